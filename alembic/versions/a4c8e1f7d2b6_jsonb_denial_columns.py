@@ -0,0 +1,81 @@
+"""jsonb_denial_columns
+
+Revision ID: a4c8e1f7d2b6
+Revises: e6f2a9c4b1d8
+Create Date: 2026-10-18 17:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c8e1f7d2b6'
+down_revision = 'e6f2a9c4b1d8'
+branch_labels = None
+depends_on = None
+
+# (table, column) converted to JSONB on PostgreSQL
+JSONB_COLUMNS = [
+    ('claims', 'diagnosis_codes'),
+    ('remittances', 'denial_reasons'),
+    ('remittances', 'adjustment_reasons'),
+    ('denial_patterns', 'conditions'),
+]
+
+# GIN indexes for containment lookups (app/utils/json_filters.py)
+GIN_INDEXES = [
+    ('ix_claims_diagnosis_codes_gin', 'claims', 'diagnosis_codes'),
+    ('ix_remittances_denial_reasons_gin', 'remittances', 'denial_reasons'),
+]
+
+
+def upgrade() -> None:
+    # Payer history lookups by date of service
+    op.create_index(
+        'ix_claims_payer_service_date',
+        'claims',
+        ['payer_id', 'service_date'],
+        unique=False
+    )
+
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Rewrites the tables; run in a maintenance window on large databases
+    for table, column in JSONB_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            postgresql_using=f'{column}::jsonb',
+        )
+
+    # jsonb_path_ops: smaller than the default operator class, supports @> only
+    for name, table, column in GIN_INDEXES:
+        op.create_index(
+            name,
+            table,
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'jsonb_path_ops'},
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, table, _ in GIN_INDEXES:
+            op.drop_index(name, table_name=table)
+        for table, column in JSONB_COLUMNS:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.JSON(),
+                existing_type=postgresql.JSONB(),
+                postgresql_using=f'{column}::json',
+            )
+
+    op.drop_index('ix_claims_payer_service_date', table_name='claims')
@@ -0,0 +1,47 @@
+"""add_default_partitions
+
+Revision ID: b5d9e3a7c2f1
+Revises: f3b8d2e6a1c7
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.maintenance.partitions import (
+    PARTITIONED_TABLES,
+    create_default_partition_sql,
+    create_partitions,
+    default_partition_name,
+    is_partitioned,
+    month_range,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d9e3a7c2f1'
+down_revision = 'f3b8d2e6a1c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Default partitions catch rows for months maintain_partitions has not
+    # created yet, instead of failing the insert (PostgreSQL only).
+    bind = op.get_bind()
+    for table in PARTITIONED_TABLES:
+        if is_partitioned(bind, table):
+            op.execute(create_default_partition_sql(table))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(bind, table):
+            continue
+        default = default_partition_name(table)
+        # Rows in the default partition move to monthly partitions before it is dropped
+        oldest, newest = bind.execute(sa.text(f"SELECT min(created_at), max(created_at) FROM {default}")).one()
+        if oldest is not None:
+            create_partitions(bind, table, month_range(oldest.date(), newest.date()))
+        op.execute(f"DROP TABLE {default}")
@@ -0,0 +1,47 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: c4d1a7e2f9b3
+Revises: 307ab2d8c272
+Create Date: 2026-10-18 10:12:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d1a7e2f9b3'
+down_revision = '307ab2d8c272'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Composite (created_at, id) indexes for keyset pagination on list endpoints
+    # (app/utils/pagination.py). Each page is an index range scan:
+    # WHERE (created_at, id) > (:created_at, :id) ORDER BY created_at, id LIMIT n
+    op.create_index(
+        'ix_claims_created_id',
+        'claims',
+        ['created_at', 'id'],
+        unique=False
+    )
+    
+    op.create_index(
+        'ix_remittances_created_id',
+        'remittances',
+        ['created_at', 'id'],
+        unique=False
+    )
+    
+    op.create_index(
+        'ix_claim_episodes_created_id',
+        'claim_episodes',
+        ['created_at', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_claim_episodes_created_id', table_name='claim_episodes')
+    op.drop_index('ix_remittances_created_id', table_name='remittances')
+    op.drop_index('ix_claims_created_id', table_name='claims')
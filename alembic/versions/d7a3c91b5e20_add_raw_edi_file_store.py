@@ -0,0 +1,56 @@
+"""add_raw_edi_file_store
+
+Revision ID: d7a3c91b5e20
+Revises: c4d1a7e2f9b3
+Create Date: 2026-10-18 21:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3c91b5e20'
+down_revision = 'c4d1a7e2f9b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Uploaded EDI files, stored once and compressed (app/services/edi/raw_store.py)
+    op.create_table(
+        'edi_raw_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('file_hash', sa.String(length=64), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=True),
+        sa.Column('file_type', sa.String(length=10), nullable=True),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('compressed_size', sa.BigInteger(), nullable=False),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('chunk_offsets', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_edi_raw_files_id'), 'edi_raw_files', ['id'], unique=False)
+    op.create_index(op.f('ix_edi_raw_files_file_hash'), 'edi_raw_files', ['file_hash'], unique=True)
+
+    # Per-row pointers into the stored file replace raw_edi_data/parsed_segments.
+    # Existing rows keep their inline data.
+    for table in ('claims', 'remittances'):
+        op.add_column(table, sa.Column('raw_file_hash', sa.String(length=64), nullable=True))
+        op.add_column(table, sa.Column('raw_offset', sa.BigInteger(), nullable=True))
+        op.add_column(table, sa.Column('raw_length', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in ('remittances', 'claims'):
+        op.drop_column(table, 'raw_length')
+        op.drop_column(table, 'raw_offset')
+        op.drop_column(table, 'raw_file_hash')
+
+    op.drop_index(op.f('ix_edi_raw_files_file_hash'), table_name='edi_raw_files')
+    op.drop_index(op.f('ix_edi_raw_files_id'), table_name='edi_raw_files')
+    op.drop_table('edi_raw_files')
@@ -0,0 +1,92 @@
+"""partition_episodes_and_audit_logs
+
+Revision ID: e6f2a9c4b1d8
+Revises: d7a3c91b5e20
+Create Date: 2026-10-18 16:40:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.maintenance.partitions import (
+    PARTITION_PREMAKE_MONTHS,
+    PARTITIONED_TABLES,
+    add_months,
+    create_partition_sql,
+    month_range,
+    month_start,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f2a9c4b1d8'
+down_revision = 'd7a3c91b5e20'
+branch_labels = None
+depends_on = None
+
+
+def _rebuild(table: str, partitioned: bool) -> None:
+    """
+    Recreate ``table`` with the same columns, indexes and foreign keys, copying its rows.
+
+    Partitioned tables are split by month on created_at; the primary key
+    becomes (id, created_at) because it must include the partition column.
+    Rows are copied, so run this in a maintenance window on large tables.
+    """
+    bind = op.get_bind()
+    old = f"{table}_old"
+
+    # Captured before the rename so the definitions still name the table
+    index_definitions = bind.execute(sa.text(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+        "WHERE indrelid = to_regclass(:table) AND NOT indisprimary"
+    ), {"table": table}).scalars().all()
+    foreign_keys = bind.execute(sa.text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(:table) AND contype = 'f'"
+    ), {"table": table}).all()
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}).scalar()
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+
+    if partitioned:
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+        oldest, newest = bind.execute(sa.text(f"SELECT min(created_at), max(created_at) FROM {old}")).one()
+        today = date.today()
+        last = max(newest.date() if newest else today, add_months(month_start(today), PARTITION_PREMAKE_MONTHS))
+        for month in month_range(oldest.date() if oldest else today, last):
+            op.execute(create_partition_sql(table, month))
+    else:
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)")
+
+    op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+    op.execute(f"DROP TABLE {old}")
+
+    primary_key = "id, created_at" if partitioned else "id"
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})")
+    for definition in index_definitions:
+        # Indexes of a partitioned parent are reported as ON ONLY <table>
+        op.execute(definition.replace(" ON ONLY ", " ON "))
+    for name, definition in foreign_keys:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+
+
+def upgrade() -> None:
+    # Monthly range partitions on created_at (PostgreSQL only; SQLite keeps plain tables).
+    # New months are created ahead by the maintain_partitions task
+    # (app/services/maintenance/partitions.py).
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in PARTITIONED_TABLES:
+        _rebuild(table, partitioned=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in PARTITIONED_TABLES:
+        _rebuild(table, partitioned=False)
@@ -0,0 +1,50 @@
+"""add_claim_feature_vectors
+
+Revision ID: f3b8d2e6a1c7
+Revises: a4c8e1f7d2b6
+Create Date: 2026-10-18 23:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d2e6a1c7'
+down_revision = 'a4c8e1f7d2b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Persisted ML feature vectors (ml/services/feature_store.py)
+    op.create_table(
+        'claim_feature_vectors',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('claim_id', sa.Integer(), nullable=False),
+        sa.Column('schema_version', sa.Integer(), nullable=False),
+        sa.Column('payer_id', sa.Integer(), nullable=True),
+        sa.Column('provider_id', sa.Integer(), nullable=True),
+        sa.Column('features', sa.LargeBinary(), nullable=False),
+        sa.Column('stale', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['claim_id'], ['claims.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_claim_feature_vectors_id'), 'claim_feature_vectors', ['id'], unique=False)
+    op.create_index(
+        'ix_claim_feature_vectors_claim_version', 'claim_feature_vectors', ['claim_id', 'schema_version'], unique=True
+    )
+    op.create_index(op.f('ix_claim_feature_vectors_payer_id'), 'claim_feature_vectors', ['payer_id'], unique=False)
+    op.create_index(
+        op.f('ix_claim_feature_vectors_provider_id'), 'claim_feature_vectors', ['provider_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_claim_feature_vectors_provider_id'), table_name='claim_feature_vectors')
+    op.drop_index(op.f('ix_claim_feature_vectors_payer_id'), table_name='claim_feature_vectors')
+    op.drop_index('ix_claim_feature_vectors_claim_version', table_name='claim_feature_vectors')
+    op.drop_index(op.f('ix_claim_feature_vectors_id'), table_name='claim_feature_vectors')
+    op.drop_table('claim_feature_vectors')
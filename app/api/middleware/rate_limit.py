@@ -8,6 +8,15 @@ import time
 import os
 import bisect
 
+from app.api.middleware.rate_limit_backends import (
+    BACKEND_FIXED_WINDOW,
+    BACKEND_GCRA,
+    RATE_LIMIT_BACKENDS,
+    RedisGCRALimiter,
+    SlidingWindowCounter,
+    TokenBucketPreCheck,
+    ceil_seconds,
+)
 from app.utils.logger import get_logger
 
 if TYPE_CHECKING:
@@ -33,9 +42,21 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     - Inaccurate rate limit headers
     
     For production deployments with multiple workers, Redis MUST be configured and available.
+    
+    Two backends are available (``RATE_LIMIT_BACKEND``):
+    - ``fixed_window`` (default): INCR/EXPIRE pipeline in Redis, per-IP timestamp lists in memory
+    - ``gcra``: one atomic Lua call per request in Redis, an in-process token bucket
+      pre-check, and O(1)-memory sliding-window counters for the in-memory fallback
+      (see ``rate_limit_backends.py``)
     """
 
-    def __init__(self, app, requests_per_minute: int = 60, requests_per_hour: int = 1000):
+    def __init__(
+        self,
+        app,
+        requests_per_minute: int = 60,
+        requests_per_hour: int = 1000,
+        backend: str = BACKEND_FIXED_WINDOW,
+    ):
         """
         Initialize rate limiter.
         
@@ -43,13 +64,21 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             app: FastAPI application
             requests_per_minute: Maximum requests per minute per IP
             requests_per_hour: Maximum requests per hour per IP
+            backend: Rate limiting backend ("fixed_window" or "gcra")
             
         Raises:
             RuntimeError: If Redis is not available in production environment
+            ValueError: If the backend is unknown
         """
         super().__init__(app)
+        if backend not in RATE_LIMIT_BACKENDS:
+            raise ValueError(
+                f"Unknown rate limit backend '{backend}'. "
+                f"Allowed backends: {', '.join(RATE_LIMIT_BACKENDS)}"
+            )
         self.requests_per_minute = requests_per_minute
         self.requests_per_hour = requests_per_hour
+        self.backend = backend
         # Try to use Redis for shared state (production)
         self.redis_client: Optional["redis.Redis"] = None
         try:
@@ -107,6 +136,21 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         # Cleanup old entries periodically
         self.last_cleanup = time.time()
         self.cleanup_interval = 300  # 5 minutes
+        
+        # GCRA backend state (see rate_limit_backends.py)
+        self.gcra_limiter: Optional[RedisGCRALimiter] = None
+        if self.backend == BACKEND_GCRA:
+            if self.redis_client:
+                self.gcra_limiter = RedisGCRALimiter(
+                    self.redis_client, requests_per_minute, requests_per_hour
+                )
+            self.pre_check = TokenBucketPreCheck(
+                capacity=requests_per_minute,
+                refill_per_second=requests_per_minute / 60.0,
+            )
+            # O(1)-memory replacement for request_times when Redis is unavailable
+            self.minute_counter = SlidingWindowCounter(60)
+            self.hour_counter = SlidingWindowCounter(3600)
 
     def _get_client_ip(self, request: Request) -> str:
         """Get client IP address from request."""
@@ -145,6 +189,11 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             if not self.request_times[ip]:
                 del self.request_times[ip]
         
+        if self.backend == BACKEND_GCRA:
+            self.pre_check.cleanup(current_time)
+            self.minute_counter.cleanup(current_time)
+            self.hour_counter.cleanup(current_time)
+        
         self.last_cleanup = current_time
 
     def _check_rate_limit_redis(self, ip: str) -> Tuple[bool, str, int, int]:
@@ -273,26 +322,131 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         else:
             return self._check_rate_limit_memory(ip)
 
+    def _check_rate_limit_local(self, ip: str) -> Tuple[bool, str, int, int, float]:
+        """
+        Check and record a request using sliding-window counters (GCRA backend fallback).
+        
+        Uses O(1) memory per IP instead of one timestamp per request. Like the
+        fixed-window in-memory check, this is NOT shared across workers.
+        
+        Returns:
+            (is_allowed, error_message, requests_last_minute, requests_last_hour,
+            retry_after_seconds). Counts include the current request when allowed.
+        """
+        current_time = time.time()
+        requests_last_minute = self.minute_counter.count(ip, current_time)
+        requests_last_hour = self.hour_counter.count(ip, current_time)
+        
+        if requests_last_minute >= self.requests_per_minute:
+            return (
+                False,
+                f"Rate limit exceeded: {int(requests_last_minute)}/{self.requests_per_minute} requests per minute",
+                int(requests_last_minute),
+                int(requests_last_hour),
+                self.minute_counter.seconds_until_below(ip, self.requests_per_minute, current_time),
+            )
+        
+        if requests_last_hour >= self.requests_per_hour:
+            return (
+                False,
+                f"Rate limit exceeded: {int(requests_last_hour)}/{self.requests_per_hour} requests per hour",
+                int(requests_last_minute),
+                int(requests_last_hour),
+                self.hour_counter.seconds_until_below(ip, self.requests_per_hour, current_time),
+            )
+        
+        self.minute_counter.increment(ip, current_time)
+        self.hour_counter.increment(ip, current_time)
+        return True, "", int(requests_last_minute) + 1, int(requests_last_hour) + 1, 0.0
+
+    def _check_rate_limit_gcra(self, ip: str) -> Tuple[bool, str, int, int, float]:
+        """
+        Check and record a request with the GCRA backend.
+        
+        Order of checks:
+        1. In-process token bucket pre-check (no network): rejects clients that are
+           clearly over the limit, e.g. retrying before their Retry-After elapsed.
+        2. Atomic GCRA Lua script in Redis (one round trip, shared across workers).
+        3. Local sliding-window counters if Redis is unavailable or fails.
+        
+        Returns:
+            (is_allowed, error_message, requests_last_minute, requests_last_hour,
+            retry_after_seconds). Counts include the current request when allowed.
+        """
+        if not self.gcra_limiter:
+            return self._check_rate_limit_local(ip)
+        
+        current_time = time.time()
+        retry_after = self.pre_check.retry_after(ip, current_time)
+        if retry_after > 0:
+            return (
+                False,
+                f"Rate limit exceeded: retry after {ceil_seconds(retry_after)} seconds",
+                self.requests_per_minute,
+                self.requests_per_hour,
+                retry_after,
+            )
+        
+        try:
+            is_allowed, remaining_minute, remaining_hour, retry_after = self.gcra_limiter.check(ip)
+        except Exception as e:
+            logger.warning(
+                "Redis rate limit check failed, falling back to memory",
+                error=str(e),
+                ip=ip,
+            )
+            return self._check_rate_limit_local(ip)
+        
+        requests_last_minute = self.requests_per_minute - remaining_minute
+        requests_last_hour = self.requests_per_hour - remaining_hour
+        
+        if not is_allowed:
+            self.pre_check.record_rejected(ip, retry_after, current_time)
+            if remaining_minute == 0:
+                window, count, limit = "minute", requests_last_minute, self.requests_per_minute
+            else:
+                window, count, limit = "hour", requests_last_hour, self.requests_per_hour
+            return (
+                False,
+                f"Rate limit exceeded: {count}/{limit} requests per {window}",
+                requests_last_minute,
+                requests_last_hour,
+                retry_after,
+            )
+        
+        self.pre_check.record_allowed(ip, current_time)
+        return True, "", requests_last_minute, requests_last_hour, 0.0
+
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Apply rate limiting to requests."""
         # Skip rate limiting in test mode
         if TESTING:
             return await call_next(request)
         
-        # Skip rate limiting for health checks
-        if request.url.path in ["/api/v1/health", "/"]:
+        # Skip rate limiting for health checks and metrics scrapes
+        if request.url.path in ["/api/v1/health", "/", "/metrics"]:
             return await call_next(request)
         
         # Get client IP
         client_ip = self._get_client_ip(request)
         
-        # Cleanup old entries periodically (only for in-memory storage)
+        # Cleanup old entries periodically (in-memory storage and GCRA pre-check buckets)
         # NOTE: In-memory storage is NOT safe for multi-worker deployments
-        if not self.redis_client:
+        if self.backend == BACKEND_GCRA or not self.redis_client:
             self._cleanup_old_entries()
         
         # Check rate limit
-        is_allowed, error_message, requests_last_minute, requests_last_hour = self._check_rate_limit(client_ip)
+        if self.backend == BACKEND_GCRA:
+            (
+                is_allowed,
+                error_message,
+                requests_last_minute,
+                requests_last_hour,
+                retry_after,
+            ) = self._check_rate_limit_gcra(client_ip)
+        else:
+            is_allowed, error_message, requests_last_minute, requests_last_hour = self._check_rate_limit(client_ip)
+            retry_after = 60
         
         if not is_allowed:
             logger.warning(
@@ -304,14 +458,15 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail=error_message,
-                headers={"Retry-After": "60"},
+                headers={"Retry-After": str(ceil_seconds(retry_after))},
             )
         
         # Record this request (only for in-memory storage, Redis is updated in _check_rate_limit_redis)
         # For in-memory: counts from _check_rate_limit_memory are BEFORE this request
         # For Redis: counts from _check_rate_limit_redis already include this request (via incr)
         # So we need to add 1 to in-memory counts for consistency in headers
-        if not self.redis_client:
+        # The GCRA backend records the request inside _check_rate_limit_gcra
+        if self.backend == BACKEND_FIXED_WINDOW and not self.redis_client:
             current_time = time.time()
             self.request_times[client_ip].append(current_time)
             # Increment counts to include current request (for consistent header values)
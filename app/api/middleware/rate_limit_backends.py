@@ -0,0 +1,319 @@
+"""Rate limiting backends used by RateLimitMiddleware.
+
+The default ``fixed_window`` backend lives in ``rate_limit.py``. This module provides
+the building blocks for the ``gcra`` backend (``RATE_LIMIT_BACKEND=gcra``):
+
+- ``RedisGCRALimiter``: atomic GCRA check of the minute and hour limits in a single
+  Redis round trip (one EVALSHA per request instead of a four-command pipeline).
+- ``TokenBucketPreCheck``: in-process pre-check that rejects clearly over-limit
+  clients without contacting Redis.
+- ``SlidingWindowCounter``: O(1)-memory per-key counter used as the local fallback
+  when Redis is unavailable.
+"""
+import math
+import time
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import redis
+
+BACKEND_FIXED_WINDOW = "fixed_window"
+BACKEND_GCRA = "gcra"
+RATE_LIMIT_BACKENDS = (BACKEND_FIXED_WINDOW, BACKEND_GCRA)
+
+# Generic Cell Rate Algorithm over two limits (minute and hour), evaluated atomically.
+#
+# Each key stores a single "theoretical arrival time" (TAT, epoch milliseconds), so
+# Redis memory is O(1) per client regardless of the limit. A request is admitted only
+# if BOTH limits admit it; a rejected request does not advance either TAT.
+#
+# KEYS[1], KEYS[2]: minute and hour TAT keys
+# ARGV[1], ARGV[2]: minute and hour limits (requests per period)
+# ARGV[3], ARGV[4]: minute and hour periods in milliseconds
+# Returns: {allowed (0/1), remaining_minute, remaining_hour, retry_after_ms}
+GCRA_LUA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local allowed = 1
+local retry_after = 0
+local tats = {}
+local new_tats = {}
+local intervals = {}
+
+for i = 1, 2 do
+  local limit = tonumber(ARGV[i])
+  local period = tonumber(ARGV[i + 2])
+  local interval = period / limit
+  local tat = tonumber(redis.call('GET', KEYS[i])) or now
+  if tat < now then
+    tat = now
+  end
+  local new_tat = tat + interval
+  local allow_at = new_tat - period
+  if allow_at > now then
+    allowed = 0
+    if allow_at - now > retry_after then
+      retry_after = allow_at - now
+    end
+  end
+  tats[i] = tat
+  new_tats[i] = new_tat
+  intervals[i] = interval
+end
+
+local remaining = {}
+for i = 1, 2 do
+  local stored = tats[i]
+  if allowed == 1 then
+    stored = new_tats[i]
+    redis.call('SET', KEYS[i], string.format('%.3f', stored), 'PX', math.ceil(stored - now))
+  end
+  local period = tonumber(ARGV[i + 2])
+  remaining[i] = math.max(0, math.floor((now + period - stored) / intervals[i]))
+end
+
+return {allowed, remaining[1], remaining[2], math.ceil(retry_after)}
+"""
+
+
+class RedisGCRALimiter:
+    """
+    Minute and hour rate limits enforced by a single atomic Redis Lua script.
+
+    The script is registered once and invoked via EVALSHA (redis-py falls back to
+    EVAL transparently if the script cache was flushed), so each check costs exactly
+    one round trip. Redis server time is used so that API workers with skewed clocks
+    still agree on the window.
+    """
+
+    def __init__(
+        self,
+        redis_client: "redis.Redis",
+        requests_per_minute: int,
+        requests_per_hour: int,
+        key_prefix: str = "rl:gcra",
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            redis_client: Redis client shared by all API workers
+            requests_per_minute: Maximum requests per minute per client
+            requests_per_hour: Maximum requests per hour per client
+            key_prefix: Prefix for the per-client TAT keys
+        """
+        self.requests_per_minute = requests_per_minute
+        self.requests_per_hour = requests_per_hour
+        self.key_prefix = key_prefix
+        self._script = redis_client.register_script(GCRA_LUA_SCRIPT)
+
+    def check(self, client_id: str) -> Tuple[bool, int, int, float]:
+        """
+        Check and, if admitted, record one request for a client.
+
+        Args:
+            client_id: Client identifier (usually the IP address)
+
+        Returns:
+            (is_allowed, remaining_minute, remaining_hour, retry_after_seconds)
+        """
+        allowed, remaining_minute, remaining_hour, retry_after_ms = self._script(
+            keys=[f"{self.key_prefix}:{client_id}:m", f"{self.key_prefix}:{client_id}:h"],
+            args=[self.requests_per_minute, self.requests_per_hour, 60_000, 3_600_000],
+        )
+        return (
+            bool(int(allowed)),
+            int(remaining_minute),
+            int(remaining_hour),
+            int(retry_after_ms) / 1000.0,
+        )
+
+
+class TokenBucketPreCheck:
+    """
+    Per-process token bucket that rejects clearly over-limit clients locally.
+
+    A worker only sees its own share of a client's traffic, so a bucket sized to the
+    global per-minute limit can only run dry for a client that is over the limit
+    cluster-wide. To keep the pre-check from ever being stricter than the shared
+    limiter, tokens are only spent on requests the shared limiter admitted. When the
+    shared limiter rejects a client, the client is blocked locally until its
+    retry-after elapses, so retry storms are absorbed without touching Redis.
+
+    Memory is O(1) per client: ``[tokens, updated_at, blocked_until]``.
+    """
+
+    def __init__(self, capacity: int, refill_per_second: float):
+        """
+        Initialize the pre-check.
+
+        Args:
+            capacity: Bucket size (burst allowance), normally the per-minute limit
+            refill_per_second: Token refill rate, normally per-minute limit / 60
+        """
+        self.capacity = float(capacity)
+        self.refill_per_second = refill_per_second
+        self._buckets: Dict[str, List[float]] = {}
+
+    def _refill(self, bucket: List[float], now: float) -> None:
+        elapsed = now - bucket[1]
+        if elapsed > 0:
+            bucket[0] = min(self.capacity, bucket[0] + elapsed * self.refill_per_second)
+            bucket[1] = now
+
+    def retry_after(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Return how long the client must wait before the shared limiter is worth asking.
+
+        Args:
+            key: Client identifier
+            now: Current time (defaults to ``time.time()``)
+
+        Returns:
+            Seconds until the client may be admitted, or 0.0 if it should be checked
+            against the shared limiter now.
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return 0.0
+        now = time.time() if now is None else now
+        if bucket[2] > now:
+            return bucket[2] - now
+        self._refill(bucket, now)
+        if bucket[0] < 1.0:
+            return (1.0 - bucket[0]) / self.refill_per_second
+        return 0.0
+
+    def record_allowed(self, key: str, now: Optional[float] = None) -> None:
+        """Spend one token for a request the shared limiter admitted."""
+        now = time.time() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [self.capacity - 1.0, now, 0.0]
+            return
+        self._refill(bucket, now)
+        bucket[0] -= 1.0
+
+    def record_rejected(self, key: str, retry_after: float, now: Optional[float] = None) -> None:
+        """Block a client locally after the shared limiter rejected it."""
+        now = time.time() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.capacity, now, 0.0]
+        bucket[2] = max(bucket[2], now + retry_after)
+
+    def cleanup(self, now: Optional[float] = None) -> None:
+        """Drop buckets that are full and not blocked (indistinguishable from new ones)."""
+        now = time.time() if now is None else now
+        for key in list(self._buckets.keys()):
+            bucket = self._buckets[key]
+            if bucket[2] > now:
+                continue
+            self._refill(bucket, now)
+            if bucket[0] >= self.capacity:
+                del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SlidingWindowCounter:
+    """
+    Sliding-window counter with O(1) memory per key.
+
+    Instead of a timestamp per request, each key keeps the count of the current
+    fixed window and the previous one: ``[window_start, current, previous]``. The
+    number of requests in the trailing window is estimated by weighting the previous
+    window by the fraction of it that still overlaps the trailing window. This is the
+    standard approximation used by sliding-window rate limiters; it never under-counts
+    a steady request rate and is exact at window boundaries.
+    """
+
+    def __init__(self, window_seconds: float):
+        """
+        Initialize the counter.
+
+        Args:
+            window_seconds: Length of the sliding window in seconds
+        """
+        self.window_seconds = window_seconds
+        self._windows: Dict[str, List[float]] = {}
+
+    def _roll(self, key: str, now: float) -> List[float]:
+        window_start = now - (now % self.window_seconds)
+        state = self._windows.get(key)
+        if state is None:
+            state = self._windows[key] = [window_start, 0.0, 0.0]
+        elif state[0] != window_start:
+            # One window later: the current count becomes the previous one.
+            # Two or more windows later: both are stale.
+            previous = state[1] if window_start - state[0] == self.window_seconds else 0.0
+            state[0], state[1], state[2] = window_start, 0.0, previous
+        return state
+
+    def count(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Estimate the number of requests for a key in the trailing window.
+
+        Args:
+            key: Client identifier
+            now: Current time (defaults to ``time.time()``)
+
+        Returns:
+            Estimated request count (may be fractional)
+        """
+        if key not in self._windows:
+            return 0.0
+        now = time.time() if now is None else now
+        window_start, current, previous = self._roll(key, now)
+        overlap = 1.0 - (now - window_start) / self.window_seconds
+        return current + previous * overlap
+
+    def increment(self, key: str, now: Optional[float] = None) -> None:
+        """Record one request for a key."""
+        now = time.time() if now is None else now
+        self._roll(key, now)[1] += 1.0
+
+    def seconds_until_below(self, key: str, limit: int, now: Optional[float] = None) -> float:
+        """
+        Seconds until the estimated count for a key drops below ``limit``.
+
+        Args:
+            key: Client identifier
+            limit: Request limit for the window
+            now: Current time (defaults to ``time.time()``)
+
+        Returns:
+            Seconds to wait (0.0 if the key is already below the limit)
+        """
+        now = time.time() if now is None else now
+        if self.count(key, now) < limit:
+            return 0.0
+        window_start, current, previous = self._windows[key]
+        elapsed = now - window_start
+        if current < limit and previous > 0:
+            # Solve current + previous * (1 - t / window) < limit for t
+            t = self.window_seconds * (1.0 - (limit - current) / previous)
+            if t > elapsed:
+                return t - elapsed
+            return 0.0
+        # Current window alone is over the limit: wait for the next window and its
+        # carried-over weight to decay.
+        return self.window_seconds - elapsed + self.window_seconds * (1.0 - limit / current)
+
+    def cleanup(self, now: Optional[float] = None) -> None:
+        """Drop keys that have had no requests for two full windows."""
+        now = time.time() if now is None else now
+        cutoff = now - 2 * self.window_seconds
+        for key in list(self._windows.keys()):
+            if self._windows[key][0] <= cutoff:
+                del self._windows[key]
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+
+def ceil_seconds(seconds: float) -> int:
+    """Round a wait time up to whole seconds for the Retry-After header (minimum 1)."""
+    return max(1, int(math.ceil(seconds)))
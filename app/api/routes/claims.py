@@ -13,22 +13,28 @@ Celery tasks and can be queried with pagination and filtering.
 - Quick Reference: `DOCUMENTATION_QUICK_REFERENCE.md` → "I'm adding a new API endpoint"
 """
 import os
-import tempfile
 from fastapi import APIRouter, UploadFile, File, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from typing import List, Optional
 
-from app.config.database import get_db
-from app.config.cache_ttl import get_claim_ttl, get_count_ttl
+from app.config.database import get_async_db, get_async_read_db, get_db
+from app.config.cache_ttl import get_claim_ttl
+from app.models.enums import ClaimStatus
+from app.services.edi.raw_store import get_raw_segments
+from app.services.queue.blob_spool import get_blob_spool, spool_upload
 from app.services.queue.tasks import process_edi_file
 from app.utils.logger import get_logger
-from app.utils.cache import cache, claim_cache_key, count_cache_key
+from app.utils.cache import cache, claim_cache_key
+from app.utils.json_filters import json_array_contains
+from app.utils.pagination import TOTAL_MODE_APPROXIMATE, TOTAL_MODE_PATTERN, get_total, paginate
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 # Configuration constants
-LARGE_FILE_THRESHOLD = 50 * 1024 * 1024  # 50MB - use file-based processing
+LARGE_FILE_THRESHOLD = 50 * 1024 * 1024  # 50MB
+# Local spool directory, used when BLOB_SPOOL_DIR (shared spool) is not set
 TEMP_DIR = os.getenv("TEMP_FILE_DIR", "/tmp/marb_edi_files")
 
 
@@ -44,8 +50,8 @@ async def upload_claim_file(
     The file is processed asynchronously via Celery tasks.
     
     **File Processing:**
-    - Small files (<50MB): Processed in memory for better performance
-    - Large files (>=50MB): Saved to temporary storage and processed from disk
+    - The upload is streamed into the blob spool (app/services/queue/blob_spool.py)
+    - The task receives a small handle; the worker reads and checksums the spooled file
     
     **File Format:**
     - Accepts EDI 837 (Professional/Institutional) claim files
@@ -57,145 +63,51 @@ async def upload_claim_file(
     - File is queued immediately, processing happens asynchronously
     
     **Error Handling:**
-    - Temporary files are automatically cleaned up on errors
+    - Spooled files are released if the task cannot be queued
     - Invalid files are still queued but will fail during processing
     """
     filename = file.filename or "unknown"
     logger.info("Received claim file upload", filename=filename)
     
-    # Check file size from Content-Length header if available
-    content_length = None
-    if hasattr(file, "size") and file.size:
-        content_length = file.size
-    elif hasattr(file, "headers"):
-        content_length_header = file.headers.get("content-length")
-        if content_length_header:
-            try:
-                content_length = int(content_length_header)
-            except (ValueError, TypeError):
-                pass
-    
-    # For files with known large size, stream directly to disk
-    if content_length and content_length > LARGE_FILE_THRESHOLD:
-        # Ensure temp directory exists
-        os.makedirs(TEMP_DIR, exist_ok=True)
-        
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(
-            mode='wb',
-            delete=False,
-            dir=TEMP_DIR,
-            prefix=f"edi_837_{filename}_",
-            suffix=".edi"
-        )
-        temp_file_path = temp_file.name
-        
-        try:
-            # Stream file directly to disk
-            file_size = 0
-            chunk_size = 8192  # 8KB chunks
-            while True:
-                chunk = await file.read(chunk_size)
-                if not chunk:
-                    break
-                temp_file.write(chunk)
-                file_size += len(chunk)
-            temp_file.close()
-            
-            file_size_mb = file_size / (1024 * 1024)
-            logger.info(
-                "Saved large file to temporary storage",
-                filename=filename,
-                temp_path=temp_file_path,
-                size_mb=round(file_size_mb, 2),
-            )
-            
-            # Queue task with file path instead of content
-            task = process_edi_file.delay(
-                file_path=temp_file_path,
-                filename=filename,
-                file_type="837",
-            )
-            
-            return {
-                "message": "Large file queued for processing from disk",
-                "task_id": task.id,
-                "filename": filename,
-                "file_size_mb": round(file_size_mb, 2),
-                "processing_mode": "file-based",
-            }
-        except Exception as e:
-            # Clean up temp file on error
-            try:
-                os.unlink(temp_file_path)
-            except:
-                pass
-            logger.error("Failed to save large file", error=str(e), filename=filename)
-            raise
-    
-    # For smaller files, stream directly to temporary file in chunks
-    # This avoids loading the entire file into memory
-    # Ensure temp directory exists
-    os.makedirs(TEMP_DIR, exist_ok=True)
-    
-    # Create temporary file
-    temp_file = tempfile.NamedTemporaryFile(
-        mode='wb',
-        delete=False,
-        dir=TEMP_DIR,
-        prefix=f"edi_837_{filename}_",
-        suffix=".edi"
+    # Stream the upload into the blob spool; the task message only carries a
+    # small handle, so broker traffic does not grow with the file
+    spool = get_blob_spool(TEMP_DIR)
+    handle = await spool_upload(file, spool)
+    file_size_mb = handle["size"] / (1024 * 1024)
+    logger.info(
+        "Spooled file for processing",
+        filename=filename,
+        sha256=handle["sha256"],
+        size_mb=round(file_size_mb, 2),
     )
-    temp_file_path = temp_file.name
-    file_size = 0
     
     try:
-        # Stream file in chunks directly to disk without accumulating in memory
-        chunk_size = 8192  # 8KB chunks
-        while True:
-            chunk = await file.read(chunk_size)
-            if not chunk:
-                break
-            temp_file.write(chunk)
-            file_size += len(chunk)
-        temp_file.close()
-        
-        file_size_mb = file_size / (1024 * 1024)
-        logger.info(
-            "Streamed file to temporary storage",
-            filename=filename,
-            temp_path=temp_file_path,
-            size_mb=round(file_size_mb, 2),
-        )
-        
-        # Queue task with file path (avoids loading entire file into memory)
         task = process_edi_file.delay(
-            file_path=temp_file_path,
+            blob_handle=handle,
             filename=filename,
             file_type="837",
         )
-        
-        return {
-            "message": "File queued for processing",
-            "task_id": task.id,
-            "filename": filename,
-            "file_size_mb": round(file_size_mb, 2),
-            "processing_mode": "file-based",
-        }
     except Exception as e:
-        # Clean up temp file on error
         try:
-            temp_file.close()
-            os.unlink(temp_file_path)
+            spool.release(handle)
         except Exception as cleanup_error:
             logger.error(
                 "Failed to delete temporary file during error cleanup",
                 error=str(cleanup_error),
                 filename=filename,
-                temp_path=temp_file_path,
+                sha256=handle["sha256"],
             )
-        logger.error("Failed to stream file", error=str(e), filename=filename)
+        logger.error("Failed to queue file", error=str(e), filename=filename)
         raise
+    
+    is_large = handle["size"] > LARGE_FILE_THRESHOLD
+    return {
+        "message": "Large file queued for processing from disk" if is_large else "File queued for processing",
+        "task_id": task.id,
+        "filename": filename,
+        "file_size_mb": round(file_size_mb, 2),
+        "processing_mode": "file-based",
+    }
 
 
 @router.get("/claims/unlinked")
@@ -231,26 +143,65 @@ async def get_unlinked_claims(
 async def get_claims(
     skip: int = Query(default=0, ge=0, description="Number of records to skip"),
     limit: int = Query(default=100, ge=1, le=1000, description="Maximum number of records to return"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(default=None, description="Cursor from a previous page's next_cursor (overrides skip)"),
+    status: Optional[ClaimStatus] = Query(default=None, description="Filter by claim status"),
+    payer_id: Optional[int] = Query(default=None, description="Filter by payer ID"),
+    practice_id: Optional[str] = Query(default=None, description="Filter by practice ID"),
+    diagnosis_code: Optional[str] = Query(default=None, description="Filter by diagnosis code"),
+    total_mode: str = Query(default=TOTAL_MODE_APPROXIMATE, pattern=TOTAL_MODE_PATTERN, description="How to compute total: exact, approximate or none"),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    """Get list of claims."""
+    """
+    Get list of claims ordered by creation time.
+    
+    Supports keyset pagination: pass ``next_cursor`` from the previous response as
+    ``cursor`` to fetch the next page in constant time regardless of depth.
+    ``skip``/``limit`` offset pagination is still supported.
+    
+    ``total`` is approximate by default on large tables (PostgreSQL planner
+    statistics); pass ``total_mode=exact`` for an exact (cached) count.
+    
+    Served from the read replica when one is configured and within
+    DATABASE_REPLICA_MAX_LAG_SECONDS; remittance and episode lists do the same.
+    """
+    return await db.run_sync(
+        _list_claims, skip, limit, cursor, status, payer_id, practice_id, diagnosis_code, total_mode
+    )
+
+
+def _list_claims(
+    db: Session,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    status: Optional[ClaimStatus],
+    payer_id: Optional[int],
+    practice_id: Optional[str],
+    diagnosis_code: Optional[str],
+    total_mode: str,
+) -> dict:
+    """Build the claims page (runs inside AsyncSession.run_sync)."""
     from app.models.database import Claim
     
-    # Use cached count for better performance
-    count_key = count_cache_key("claim")
-    cached_count = cache.get(count_key)
-    if cached_count is not None:
-        total = cached_count
-    else:
-        total = db.query(Claim).count()
-        cache.set(count_key, total, ttl_seconds=get_count_ttl())
+    query = db.query(Claim)
+    if status is not None:
+        query = query.filter(Claim.status == status)
+    if payer_id is not None:
+        query = query.filter(Claim.payer_id == payer_id)
+    if practice_id is not None:
+        query = query.filter(Claim.practice_id == practice_id)
+    if diagnosis_code is not None:
+        # Parsed codes are {"code": ..., "qualifier": ...}; older rows hold plain strings
+        query = query.filter(json_array_contains(Claim.diagnosis_codes, diagnosis_code, key="code"))
     
-    claims = (
-        db.query(Claim)
-        .options(joinedload(Claim.claim_lines))
-        .offset(skip)
-        .limit(limit)
-        .all()
+    total, total_is_exact = get_total(
+        db, query, Claim, "claim", mode=total_mode,
+        status=status.value if status else None, payer_id=payer_id, practice_id=practice_id,
+        diagnosis_code=diagnosis_code,
+    )
+    
+    claims, next_cursor = paginate(
+        query.options(joinedload(Claim.claim_lines)), Claim, limit, skip=skip, cursor=cursor
     )
     
     return {
@@ -267,23 +218,46 @@ async def get_claims(
             for claim in claims
         ],
         "total": total,
+        "total_is_exact": total_is_exact,
         "skip": skip,
         "limit": limit,
+        "next_cursor": next_cursor,
     }
 
 
 @router.get("/claims/{claim_id}")
-async def get_claim(claim_id: int, db: Session = Depends(get_db)):
+async def get_claim(
+    claim_id: int,
+    include_raw: bool = Query(False, description="Include the raw EDI segments of the claim"),
+    db: AsyncSession = Depends(get_async_db),
+):
     """Get claim by ID (cached)."""
-    from app.models.database import Claim
     from app.utils.errors import NotFoundError
     
     # Try cache first
     cache_key = claim_cache_key(claim_id)
     cached_result = cache.get(cache_key)
     if cached_result is not None:
+        if include_raw:
+            # Raw segments are never cached; load them only when asked for
+            return {**cached_result, "raw_segments": await db.run_sync(_claim_raw_segments, claim_id)}
         return cached_result
     
+    result = await db.run_sync(_claim_detail, claim_id)
+    if result is None:
+        raise NotFoundError("Claim", str(claim_id))
+    
+    # Cache with configured TTL
+    cache.set(cache_key, result, ttl_seconds=get_claim_ttl())
+    if include_raw:
+        result = {**result, "raw_segments": await db.run_sync(_claim_raw_segments, claim_id)}
+    return result
+
+
+def _claim_detail(db: Session, claim_id: int) -> Optional[dict]:
+    """Load a claim with its lines (runs inside AsyncSession.run_sync)."""
+    from app.models.database import Claim
+    
     claim = (
         db.query(Claim)
         .options(joinedload(Claim.claim_lines))
@@ -292,9 +266,9 @@ async def get_claim(claim_id: int, db: Session = Depends(get_db)):
     )
     
     if not claim:
-        raise NotFoundError("Claim", str(claim_id))
+        return None
     
-    result = {
+    return {
         "id": claim.id,
         "claim_control_number": claim.claim_control_number,
         "patient_control_number": claim.patient_control_number,
@@ -327,8 +301,10 @@ async def get_claim(claim_id: int, db: Session = Depends(get_db)):
         "created_at": claim.created_at.isoformat() if claim.created_at else None,
         "updated_at": claim.updated_at.isoformat() if claim.updated_at else None,
     }
-    
-    # Cache with configured TTL
-    cache.set(cache_key, result, ttl_seconds=get_claim_ttl())
-    return result
 
+
+def _claim_raw_segments(db: Session, claim_id: int) -> Optional[List[str]]:
+    """Load the raw EDI segments of a claim (runs inside AsyncSession.run_sync)."""
+    from app.models.database import Claim
+    
+    return get_raw_segments(db, db.get(Claim, claim_id))
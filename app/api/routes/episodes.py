@@ -1,15 +1,18 @@
 """Episode endpoints."""
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, subqueryload
 from pydantic import BaseModel
 
-from app.config.database import get_db
-from app.config.cache_ttl import get_episode_ttl, get_count_ttl
+from app.config.database import get_async_db, get_async_read_db, get_db
+from app.config.cache_ttl import get_episode_ttl
 from app.services.episodes.linker import EpisodeLinker
 from app.models.database import EpisodeStatus
 from app.utils.errors import NotFoundError
 from app.utils.logger import get_logger
-from app.utils.cache import cache, episode_cache_key, count_cache_key
+from app.utils.cache import cache, episode_cache_key
+from app.utils.pagination import TOTAL_MODE_APPROXIMATE, TOTAL_MODE_PATTERN, get_total, paginate
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -26,10 +29,17 @@ async def get_episodes(
     skip: int = Query(default=0, ge=0, description="Number of records to skip"),
     limit: int = Query(default=100, ge=1, le=1000, description="Maximum number of records to return"),
     claim_id: int = Query(default=None, description="Filter by claim ID"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(default=None, description="Cursor from a previous page's next_cursor (overrides skip)"),
+    status: Optional[EpisodeStatus] = Query(default=None, description="Filter by episode status"),
+    remittance_id: Optional[int] = Query(default=None, description="Filter by remittance ID"),
+    total_mode: str = Query(default=TOTAL_MODE_APPROXIMATE, pattern=TOTAL_MODE_PATTERN, description="How to compute total: exact, approximate or none"),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     """
-    Get list of claim episodes.
+    Get list of claim episodes ordered by creation time.
+    
+    Supports keyset pagination via ``cursor``/``next_cursor`` as well as
+    ``skip``/``limit``. See ``get_claims`` for the ``total_mode`` semantics.
     
     Uses subqueryload to eagerly load claim and remittance relationships,
     preventing N+1 queries when accessing related data. This is especially
@@ -37,6 +47,22 @@ async def get_episodes(
     as it ensures all related data is loaded in efficient separate queries
     rather than one query per episode.
     """
+    return await db.run_sync(
+        _list_episodes, skip, limit, claim_id, cursor, status, remittance_id, total_mode
+    )
+
+
+def _list_episodes(
+    db: Session,
+    skip: int,
+    limit: int,
+    claim_id: Optional[int],
+    cursor: Optional[str],
+    status: Optional[EpisodeStatus],
+    remittance_id: Optional[int],
+    total_mode: str,
+) -> dict:
+    """Build the episodes page (runs inside AsyncSession.run_sync)."""
     from app.models.database import ClaimEpisode
     
     # Use subqueryload instead of joinedload for better performance with large datasets.
@@ -47,24 +73,24 @@ async def get_episodes(
     
     if claim_id:
         base_query = base_query.filter(ClaimEpisode.claim_id == claim_id)
+    if status is not None:
+        base_query = base_query.filter(ClaimEpisode.status == status)
+    if remittance_id is not None:
+        base_query = base_query.filter(ClaimEpisode.remittance_id == remittance_id)
     
-    # Use cached count for better performance (with filter key if applicable)
-    count_key = count_cache_key("episode", claim_id=claim_id) if claim_id else count_cache_key("episode")
-    cached_count = cache.get(count_key)
-    if cached_count is not None:
-        total = cached_count
-    else:
-        # Count without eager loading for better performance
-        # Eager loading options don't affect count(), but it's cleaner to count separately
-        total = base_query.count()
-        cache.set(count_key, total, ttl_seconds=get_count_ttl())
+    # Count without eager loading (cached, keyed by the active filters)
+    total, total_is_exact = get_total(
+        db, base_query, ClaimEpisode, "episode", mode=total_mode,
+        claim_id=claim_id or None, status=status.value if status else None,
+        remittance_id=remittance_id,
+    )
     
     # Apply eager loading and pagination for the actual data query
     query = base_query.options(
         subqueryload(ClaimEpisode.claim),
         subqueryload(ClaimEpisode.remittance)
     )
-    episodes = query.offset(skip).limit(limit).all()
+    episodes, next_cursor = paginate(query, ClaimEpisode, limit, skip=skip, cursor=cursor)
     
     return {
         "episodes": [
@@ -82,24 +108,36 @@ async def get_episodes(
             for episode in episodes
         ],
         "total": total,
+        "total_is_exact": total_is_exact,
         "skip": skip,
         "limit": limit,
+        "next_cursor": next_cursor,
     }
 
 
 @router.get("/episodes/{episode_id}")
-async def get_episode(episode_id: int, db: Session = Depends(get_db)):
+async def get_episode(episode_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get episode by ID (cached)."""
-    from app.models.database import ClaimEpisode
-    from app.utils.errors import NotFoundError
-    from sqlalchemy.orm import joinedload
-    
     # Try cache first
     cache_key = episode_cache_key(episode_id)
     cached_result = cache.get(cache_key)
     if cached_result is not None:
         return cached_result
     
+    result = await db.run_sync(_episode_detail, episode_id)
+    if result is None:
+        raise NotFoundError("Episode", str(episode_id))
+    
+    # Cache with configured TTL
+    cache.set(cache_key, result, ttl_seconds=get_episode_ttl())
+    return result
+
+
+def _episode_detail(db: Session, episode_id: int) -> Optional[dict]:
+    """Load an episode (runs inside AsyncSession.run_sync)."""
+    from app.models.database import ClaimEpisode
+    from sqlalchemy.orm import joinedload
+    
     # Eager load relationships to avoid N+1 queries if relationships are accessed later
     episode = (
         db.query(ClaimEpisode)
@@ -112,9 +150,9 @@ async def get_episode(episode_id: int, db: Session = Depends(get_db)):
     )
     
     if not episode:
-        raise NotFoundError("Episode", str(episode_id))
+        return None
     
-    result = {
+    return {
         "id": episode.id,
         "claim_id": episode.claim_id,
         "remittance_id": episode.remittance_id,
@@ -126,10 +164,6 @@ async def get_episode(episode_id: int, db: Session = Depends(get_db)):
         "created_at": episode.created_at.isoformat() if episode.created_at else None,
         "updated_at": episode.updated_at.isoformat() if episode.updated_at else None,
     }
-    
-    # Cache with configured TTL
-    cache.set(cache_key, result, ttl_seconds=get_episode_ttl())
-    return result
 
 
 @router.post("/episodes/{episode_id}/link")
@@ -1,10 +1,12 @@
 """Pattern learning and detection endpoints."""
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from app.config.database import get_db
+from app.config.database import get_async_db, get_db
 from app.services.learning.pattern_detector import PatternDetector
+from app.services.learning.denial_sketch import denial_tracker
 from app.models.database import Payer
 from app.utils.errors import NotFoundError
 from app.utils.logger import get_logger
@@ -103,12 +105,64 @@ async def detect_patterns_for_all_payers(
 @router.get("/patterns/payer/{payer_id}")
 async def get_patterns_for_payer(
     payer_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get all learned denial patterns for a payer."""
+    result = await db.run_sync(_payer_patterns, payer_id)
+    if result is None:
+        raise NotFoundError("Payer", str(payer_id))
+    return result
+
+
+@router.get("/patterns/payer/{payer_id}/denial-rates")
+async def get_denial_rates_for_payer(
+    payer_id: int,
+    top: int = Query(default=10, ge=1, le=100),
+):
+    """
+    Get a payer's current denial rates from the streaming counters.
+    
+    Counters are updated as remittances are linked to claims, so no pattern
+    detection run or database query is needed. Each window is exponentially
+    decayed with the window length as its time constant. Payers without
+    linked episodes have zero episodes and no rates.
+    
+    **Parameters:**
+    - `payer_id` (path): The ID of the payer
+    - `top` (query): Maximum number of reason codes per window. Default: 10, Range: 1-100
+    
+    **Returns:**
+    - `payer_id`: The payer ID
+    - `windows`: For each window (`1d`, `7d`, `90d`):
+      - `episodes`: Decayed number of linked episodes
+      - `denied_episodes`: Decayed number of episodes with a denial
+      - `denial_rate`: Share of episodes with a denial
+      - `top_reasons`: Most frequent reason codes with `denial_reason_code`,
+        `rate` (share of episodes) and `error` (maximum overcount of the rate)
+    - `trend`: Present when the 1d denial rate clearly exceeds the 90d rate
+    """
+    windows = {}
+    for window in denial_tracker.windows:
+        rates = denial_tracker.denial_rates(payer_id, window)
+        windows[window] = {
+            "episodes": round(rates["episodes"], 2),
+            "denied_episodes": round(rates["denied_episodes"], 2),
+            "denial_rate": round(rates["denial_rate"], 4) if rates["denial_rate"] is not None else None,
+            "top_reasons": denial_tracker.top_reasons(payer_id, window, k=top),
+        }
+
+    return {
+        "payer_id": payer_id,
+        "windows": windows,
+        "trend": denial_tracker.denial_trend(payer_id),
+    }
+
+
+def _payer_patterns(db: Session, payer_id: int) -> Optional[dict]:
+    """Load a payer's denial patterns (runs inside AsyncSession.run_sync)."""
     payer = db.query(Payer).filter(Payer.id == payer_id).first()
     if not payer:
-        raise NotFoundError("Payer", str(payer_id))
+        return None
 
     detector = PatternDetector(db)
     patterns = detector.get_patterns_for_payer(payer_id)
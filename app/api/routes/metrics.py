@@ -0,0 +1,26 @@
+"""
+Prometheus metrics endpoint.
+
+Exposes the in-process metrics registry (see ``app/utils/metrics.py``) in the
+Prometheus text exposition format. Each API worker process serves its own metrics;
+scrape every worker (or run one worker per pod) for complete coverage.
+"""
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.utils.memory_monitor import get_memory_usage
+from app.utils.metrics import PROCESS_MEMORY_MB, PROMETHEUS_CONTENT_TYPE, registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint.
+    
+    **Returns:**
+    - Counters, gauges and histograms in Prometheus text format (version 0.0.4)
+    """
+    PROCESS_MEMORY_MB.set(get_memory_usage())
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,20 +1,27 @@
 """Remittance endpoints."""
 import os
-import tempfile
-from fastapi import APIRouter, UploadFile, File, Depends
+from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 
-from app.config.database import get_db
-from app.config.cache_ttl import get_remittance_ttl, get_count_ttl
+from app.config.database import get_async_db, get_async_read_db, get_db
+from app.config.cache_ttl import get_remittance_ttl
+from app.models.enums import RemittanceStatus
+from app.services.edi.raw_store import get_raw_segments
+from app.services.queue.blob_spool import get_blob_spool, spool_upload
 from app.services.queue.tasks import process_edi_file
 from app.utils.logger import get_logger
-from app.utils.cache import cache, remittance_cache_key, count_cache_key
+from app.utils.cache import cache, remittance_cache_key
+from app.utils.json_filters import json_array_contains
+from app.utils.pagination import TOTAL_MODE_APPROXIMATE, TOTAL_MODE_PATTERN, get_total, paginate
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 # Configuration constants
-LARGE_FILE_THRESHOLD = 50 * 1024 * 1024  # 50MB - use file-based processing
+LARGE_FILE_THRESHOLD = 50 * 1024 * 1024  # 50MB
+# Local spool directory, used when BLOB_SPOOL_DIR (shared spool) is not set
 TEMP_DIR = os.getenv("TEMP_FILE_DIR", "/tmp/marb_edi_files")
 
 
@@ -30,9 +37,8 @@ async def upload_remit_file(
     The file is processed asynchronously via Celery tasks.
     
     **File Processing:**
-    - Small files (<50MB): Processed in memory for better performance
-    - Large files (>=50MB): Saved to temporary storage and processed from disk
-    - Files exceeding threshold during streaming are automatically switched to file-based processing
+    - The upload is streamed into the blob spool (app/services/queue/blob_spool.py)
+    - The task receives a small handle; the worker reads and checksums the spooled file
     
     **File Format:**
     - Accepts EDI 835 (Electronic Remittance Advice) files
@@ -45,182 +51,101 @@ async def upload_remit_file(
     - File is queued immediately, processing happens asynchronously
     
     **Error Handling:**
-    - Temporary files are automatically cleaned up on errors
+    - Spooled files are released if the task cannot be queued
     - Invalid files are still queued but will fail during processing
     """
     filename = file.filename or "unknown"
     logger.info("Received remittance file upload", filename=filename)
     
-    # Check file size from Content-Length header if available
-    content_length = None
-    if hasattr(file, "size") and file.size:
-        content_length = file.size
-    elif hasattr(file, "headers"):
-        content_length_header = file.headers.get("content-length")
-        if content_length_header:
-            try:
-                content_length = int(content_length_header)
-            except (ValueError, TypeError):
-                pass
-    
-    # For files with known large size, stream directly to disk
-    if content_length and content_length > LARGE_FILE_THRESHOLD:
-        # Ensure temp directory exists
-        os.makedirs(TEMP_DIR, exist_ok=True)
-        
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(
-            mode='wb',
-            delete=False,
-            dir=TEMP_DIR,
-            prefix=f"edi_835_{filename}_",
-            suffix=".edi"
-        )
-        temp_file_path = temp_file.name
-        
-        try:
-            # Stream file directly to disk
-            file_size = 0
-            chunk_size = 8192  # 8KB chunks
-            while True:
-                chunk = await file.read(chunk_size)
-                if not chunk:
-                    break
-                temp_file.write(chunk)
-                file_size += len(chunk)
-            temp_file.close()
-            
-            file_size_mb = file_size / (1024 * 1024)
-            logger.info(
-                "Saved large file to temporary storage",
-                filename=filename,
-                temp_path=temp_file_path,
-                size_mb=round(file_size_mb, 2),
-            )
-            
-            # Queue task with file path instead of content
-            task = process_edi_file.delay(
-                file_path=temp_file_path,
-                filename=filename,
-                file_type="835",
-            )
-            
-            return {
-                "message": "Large file queued for processing from disk",
-                "task_id": task.id,
-                "filename": filename,
-                "file_size_mb": round(file_size_mb, 2),
-                "processing_mode": "file-based",
-            }
-        except Exception as e:
-            # Clean up temp file on error
-            try:
-                os.unlink(temp_file_path)
-            except:
-                pass
-            logger.error("Failed to save large file", error=str(e), filename=filename)
-            raise
-    
-    # For smaller files, stream directly to temporary file in chunks
-    # This avoids loading the entire file into memory, which is important for:
-    # - Files approaching the LARGE_FILE_THRESHOLD (but not exceeding it)
-    # - Memory efficiency in high-concurrency scenarios
-    # - Consistent processing path for all file sizes
-    # 
-    # By streaming to disk even for smaller files, we:
-    # - Avoid memory spikes that could affect other requests
-    # - Use a consistent processing model (file-based) for all files
-    # - Allow the Celery worker to handle file I/O independently
-    # 
-    # This is more efficient than loading into memory and then writing to disk,
-    # as it avoids the double memory allocation (original + decoded string).
-    # Ensure temp directory exists
-    os.makedirs(TEMP_DIR, exist_ok=True)
-    
-    # Create temporary file
-    temp_file = tempfile.NamedTemporaryFile(
-        mode='wb',
-        delete=False,
-        dir=TEMP_DIR,
-        prefix=f"edi_835_{filename}_",
-        suffix=".edi"
+    # Stream the upload into the blob spool; the task message only carries a
+    # small handle, so broker traffic does not grow with the file
+    spool = get_blob_spool(TEMP_DIR)
+    handle = await spool_upload(file, spool)
+    file_size_mb = handle["size"] / (1024 * 1024)
+    logger.info(
+        "Spooled file for processing",
+        filename=filename,
+        sha256=handle["sha256"],
+        size_mb=round(file_size_mb, 2),
     )
-    temp_file_path = temp_file.name
-    file_size = 0
     
     try:
-        # Stream file in chunks directly to disk without accumulating in memory
-        chunk_size = 8192  # 8KB chunks
-        while True:
-            chunk = await file.read(chunk_size)
-            if not chunk:
-                break
-            temp_file.write(chunk)
-            file_size += len(chunk)
-        temp_file.close()
-        
-        file_size_mb = file_size / (1024 * 1024)
-        logger.info(
-            "Streamed file to temporary storage",
-            filename=filename,
-            temp_path=temp_file_path,
-            size_mb=round(file_size_mb, 2),
-        )
-        
-        # Queue task with file path (avoids loading entire file into memory)
         task = process_edi_file.delay(
-            file_path=temp_file_path,
+            blob_handle=handle,
             filename=filename,
             file_type="835",
         )
-        
-        return {
-            "message": "File queued for processing",
-            "task_id": task.id,
-            "filename": filename,
-            "file_size_mb": round(file_size_mb, 2),
-            "processing_mode": "file-based",
-        }
     except Exception as e:
-        # Clean up temp file on error
         try:
-            temp_file.close()
-            os.unlink(temp_file_path)
+            spool.release(handle)
         except Exception as cleanup_error:
             logger.error(
                 "Failed to delete temporary file during error cleanup",
                 error=str(cleanup_error),
                 filename=filename,
-                temp_path=temp_file_path,
+                sha256=handle["sha256"],
             )
-        logger.error("Failed to stream file", error=str(e), filename=filename)
+        logger.error("Failed to queue file", error=str(e), filename=filename)
         raise
+    
+    is_large = handle["size"] > LARGE_FILE_THRESHOLD
+    return {
+        "message": "Large file queued for processing from disk" if is_large else "File queued for processing",
+        "task_id": task.id,
+        "filename": filename,
+        "file_size_mb": round(file_size_mb, 2),
+        "processing_mode": "file-based",
+    }
 
 
 @router.get("/remits")
 async def get_remits(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    skip: int = Query(default=0, ge=0, description="Number of records to skip"),
+    limit: int = Query(default=100, ge=1, le=1000, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(default=None, description="Cursor from a previous page's next_cursor (overrides skip)"),
+    status: Optional[RemittanceStatus] = Query(default=None, description="Filter by remittance status"),
+    payer_id: Optional[int] = Query(default=None, description="Filter by payer ID"),
+    denial_code: Optional[str] = Query(default=None, description="Filter by denial reason code (e.g. CO45)"),
+    total_mode: str = Query(default=TOTAL_MODE_APPROXIMATE, pattern=TOTAL_MODE_PATTERN, description="How to compute total: exact, approximate or none"),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    """Get list of remittances."""
+    """
+    Get list of remittances ordered by creation time.
+    
+    Supports keyset pagination via ``cursor``/``next_cursor`` as well as
+    ``skip``/``limit``. See ``get_claims`` for the ``total_mode`` semantics.
+    """
+    return await db.run_sync(_list_remits, skip, limit, cursor, status, payer_id, denial_code, total_mode)
+
+
+def _list_remits(
+    db: Session,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    status: Optional[RemittanceStatus],
+    payer_id: Optional[int],
+    denial_code: Optional[str],
+    total_mode: str,
+) -> dict:
+    """Build the remittances page (runs inside AsyncSession.run_sync)."""
     from app.models.database import Remittance
     
-    # Use cached count for better performance
-    count_key = count_cache_key("remittance")
-    cached_count = cache.get(count_key)
-    if cached_count is not None:
-        total = cached_count
-    else:
-        total = db.query(Remittance).count()
-        cache.set(count_key, total, ttl_seconds=get_count_ttl())
+    query = db.query(Remittance)
+    if status is not None:
+        query = query.filter(Remittance.status == status)
+    if payer_id is not None:
+        query = query.filter(Remittance.payer_id == payer_id)
+    if denial_code is not None:
+        query = query.filter(json_array_contains(Remittance.denial_reasons, denial_code, key="code"))
+    
+    total, total_is_exact = get_total(
+        db, query, Remittance, "remittance", mode=total_mode,
+        status=status.value if status else None, payer_id=payer_id, denial_code=denial_code,
+    )
     
-    remits = (
-        db.query(Remittance)
-        .options(joinedload(Remittance.payer))
-        .offset(skip)
-        .limit(limit)
-        .all()
+    remits, next_cursor = paginate(
+        query.options(joinedload(Remittance.payer)), Remittance, limit, skip=skip, cursor=cursor
     )
     
     return {
@@ -237,29 +162,52 @@ async def get_remits(
             for remit in remits
         ],
         "total": total,
+        "total_is_exact": total_is_exact,
         "skip": skip,
         "limit": limit,
+        "next_cursor": next_cursor,
     }
 
 
 @router.get("/remits/{remit_id}")
-async def get_remit(remit_id: int, db: Session = Depends(get_db)):
+async def get_remit(
+    remit_id: int,
+    include_raw: bool = Query(False, description="Include the raw EDI segments of the remittance"),
+    db: AsyncSession = Depends(get_async_db),
+):
     """Get remittance by ID (cached)."""
-    from app.models.database import Remittance
     from app.utils.errors import NotFoundError
     
     # Try cache first
     cache_key = remittance_cache_key(remit_id)
     cached_result = cache.get(cache_key)
     if cached_result is not None:
+        if include_raw:
+            # Raw segments are never cached; load them only when asked for
+            return {**cached_result, "raw_segments": await db.run_sync(_remit_raw_segments, remit_id)}
         return cached_result
     
+    result = await db.run_sync(_remit_detail, remit_id)
+    if result is None:
+        raise NotFoundError("Remittance", str(remit_id))
+    
+    # Cache with configured TTL
+    cache.set(cache_key, result, ttl_seconds=get_remittance_ttl())
+    if include_raw:
+        result = {**result, "raw_segments": await db.run_sync(_remit_raw_segments, remit_id)}
+    return result
+
+
+def _remit_detail(db: Session, remit_id: int) -> Optional[dict]:
+    """Load a remittance (runs inside AsyncSession.run_sync)."""
+    from app.models.database import Remittance
+    
     remit = db.query(Remittance).filter(Remittance.id == remit_id).first()
     
     if not remit:
-        raise NotFoundError("Remittance", str(remit_id))
+        return None
     
-    result = {
+    return {
         "id": remit.id,
         "remittance_control_number": remit.remittance_control_number,
         "payer_id": remit.payer_id,
@@ -275,8 +223,10 @@ async def get_remit(remit_id: int, db: Session = Depends(get_db)):
         "created_at": remit.created_at.isoformat() if remit.created_at else None,
         "updated_at": remit.updated_at.isoformat() if remit.updated_at else None,
     }
-    
-    # Cache with configured TTL
-    cache.set(cache_key, result, ttl_seconds=get_remittance_ttl())
-    return result
 
+
+def _remit_raw_segments(db: Session, remit_id: int) -> Optional[List[str]]:
+    """Load the raw EDI segments of a remittance (runs inside AsyncSession.run_sync)."""
+    from app.models.database import Remittance
+    
+    return get_raw_segments(db, db.get(Remittance, remit_id))
@@ -1,8 +1,11 @@
 """Risk scoring endpoints."""
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.config.database import get_db
+from app.config.database import get_async_db, get_db
 from app.config.cache_ttl import get_risk_score_ttl
 from app.services.risk.scorer import RiskScorer
 from app.models.database import Claim
@@ -13,7 +16,7 @@ router = APIRouter()
 
 
 @router.get("/risk/{claim_id}")
-async def get_risk_score(claim_id: int, db: Session = Depends(get_db)):
+async def get_risk_score(claim_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get risk score for a claim (cached). Optimized with eager loading."""
     # Try cache first
     cache_key = risk_score_cache_key(claim_id)
@@ -21,6 +24,17 @@ async def get_risk_score(claim_id: int, db: Session = Depends(get_db)):
     if cached_result is not None:
         return cached_result
     
+    result = await db.run_sync(_latest_risk_score, claim_id)
+    if result is None:
+        raise NotFoundError("Claim", str(claim_id))
+    
+    # Cache with configured TTL
+    cache.set(cache_key, result, ttl_seconds=get_risk_score_ttl())
+    return result
+
+
+def _latest_risk_score(db: Session, claim_id: int) -> Optional[dict]:
+    """Load the latest risk score of a claim (runs inside AsyncSession.run_sync)."""
     # Optimize: Use eager loading and order by to get latest risk score efficiently
     from sqlalchemy.orm import joinedload
     
@@ -31,12 +45,12 @@ async def get_risk_score(claim_id: int, db: Session = Depends(get_db)):
         .first()
     )
     if not claim:
-        raise NotFoundError("Claim", str(claim_id))
+        return None
     
     # Get latest risk score (already sorted by calculated_at desc in query)
     if claim.risk_scores:
         latest_score = claim.risk_scores[0]  # First is latest due to ordering
-        result = {
+        return {
             "claim_id": claim_id,
             "overall_score": latest_score.overall_score,
             "risk_level": latest_score.risk_level.value,
@@ -50,15 +64,10 @@ async def get_risk_score(claim_id: int, db: Session = Depends(get_db)):
             "recommendations": latest_score.recommendations,
             "calculated_at": latest_score.calculated_at.isoformat() if latest_score.calculated_at else None,
         }
-    else:
-        result = {
-            "claim_id": claim_id,
-            "message": "Risk score not yet calculated",
-        }
-    
-    # Cache with configured TTL
-    cache.set(cache_key, result, ttl_seconds=get_risk_score_ttl())
-    return result
+    return {
+        "claim_id": claim_id,
+        "message": "Risk score not yet calculated",
+    }
 
 
 @router.post("/risk/{claim_id}/calculate")
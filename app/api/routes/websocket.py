@@ -1,15 +1,48 @@
-"""WebSocket endpoints for real-time notifications."""
+"""
+WebSocket endpoints for real-time notifications.
+
+Notifications are serialized to JSON once and fanned out to per-connection
+outbound queues. Each connection has its own sender task, so a slow client only
+delays itself: when its queue is full the oldest pending message is dropped.
+
+Clients receive every notification by default. They can narrow this down by
+subscribing to topics (``practice:<id>``, ``claim:<id>``, ``task:<celery task id>``),
+either with ``?topics=practice:P1,claim:42`` on connect or by sending
+``{"action": "subscribe", "topics": [...]}`` / ``{"action": "unsubscribe", ...}``.
+
+Bulk events (claims created from a file, episodes auto-linked) arrive as
+``digest`` notifications that summarize many entities in one message (see
+``app/utils/notification_digest.py``). Clients that also want one message per
+entity opt in with ``?details=true`` or ``{"action": "subscribe", "details": true}``.
+
+Notifications raised in Celery workers reach API processes through Redis
+pub/sub (see ``app/utils/notification_bus.py``).
+"""
+import asyncio
 import json
+import os
+from collections import deque
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Set
 from datetime import datetime
 from enum import Enum
 
 from app.utils.logger import get_logger
+from app.utils.metrics import WEBSOCKET_MESSAGES_DROPPED
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+# Maximum number of pending outbound messages per connection (oldest dropped first)
+SEND_QUEUE_SIZE = int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE", "256"))
+
+# Topic kinds clients can subscribe to, keyed by the notification data field they match
+TOPIC_FIELDS = {
+    "practice": "practice_id",
+    "claim": "claim_id",
+    "task": "task_id",
+}
+
 
 class NotificationType(str, Enum):
     """Types of notifications that can be sent."""
@@ -21,28 +54,211 @@ class NotificationType(str, Enum):
     EPISODE_COMPLETED = "episode_completed"
     FILE_PROCESSED = "file_processed"
     FILE_PROGRESS = "file_progress"  # Progress updates for large file processing
+    DIGEST = "digest"  # Coalesced per-entity events (see app/utils/notification_digest.py)
     ERROR = "error"
     INFO = "info"
 
 
+def notification_topics(data: Dict[str, Any]) -> List[str]:
+    """
+    Get the subscription topics a notification belongs to.
+    
+    Args:
+        data: Notification payload data
+        
+    Returns:
+        Topics such as ``["practice:P1", "claim:42"]`` for the IDs present in data
+    """
+    return [
+        f"{kind}:{data[field]}"
+        for kind, field in TOPIC_FIELDS.items()
+        if data.get(field) is not None
+    ]
+
+
+def build_notification(
+    notification_type: NotificationType,
+    data: Dict[str, Any],
+    message: Optional[str] = None,
+    items: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Build the notification payload sent to clients.
+    
+    Args:
+        notification_type: Type of notification
+        data: Notification payload data
+        message: Optional human-readable message
+        items: Per-entity event data carried by digest notifications. Stripped
+            before the digest is sent to clients (see ConnectionManager.broadcast_digest).
+        
+    Returns:
+        Notification dictionary (type, timestamp, topics, data and optional message)
+    """
+    notification = {
+        "type": notification_type.value,
+        "timestamp": datetime.utcnow().isoformat(),
+        "topics": notification_topics(data),
+        "data": data,
+    }
+    
+    if message:
+        notification["message"] = message
+    if items:
+        notification["items"] = items
+    
+    return notification
+
+
+def parse_topics(topics: Iterable[str]) -> Set[str]:
+    """
+    Validate topic names sent by a client.
+    
+    Args:
+        topics: Topic strings such as ``practice:P1``
+        
+    Returns:
+        Set of valid topics
+        
+    Raises:
+        ValueError: If a topic is not ``<practice|claim|task>:<id>``
+    """
+    parsed = set()
+    for topic in topics:
+        kind, _, identifier = str(topic).strip().partition(":")
+        if kind not in TOPIC_FIELDS or not identifier:
+            raise ValueError(
+                f"Invalid topic '{topic}'. Expected one of "
+                f"{', '.join(kind + ':<id>' for kind in TOPIC_FIELDS)}"
+            )
+        parsed.add(f"{kind}:{identifier}")
+    return parsed
+
+
+class ClientConnection:
+    """
+    Outbound state for one WebSocket connection.
+    
+    Holds the client's topic subscriptions and a bounded queue of serialized
+    messages. A sender task is started when messages are queued and exits once
+    the queue is empty, so idle connections cost no task.
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue_size: int = SEND_QUEUE_SIZE):
+        self.websocket = websocket
+        self.topics: Set[str] = set()
+        self.details = False  # Also receive per-entity events expanded from digests
+        self.queue: deque = deque(maxlen=max_queue_size)
+        self.dropped = 0
+        self.sender: Optional[asyncio.Task] = None
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def wants(self, topics: Iterable[str]) -> bool:
+        """Whether a message with these topics should be delivered to this client."""
+        return not self.topics or not self.topics.isdisjoint(topics)
+
+    def enqueue(self, text: str) -> None:
+        """Queue a serialized message, dropping the oldest one if the queue is full."""
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+            WEBSOCKET_MESSAGES_DROPPED.inc()
+        self.queue.append(text)
+        self._idle.clear()
+
+    async def drain(self) -> None:
+        """Send queued messages until the queue is empty."""
+        try:
+            while self.queue:
+                await self.websocket.send_text(self.queue.popleft())
+        except BaseException:
+            self.queue.clear()
+            raise
+        finally:
+            self._idle.set()
+
+    async def wait_idle(self) -> None:
+        """Wait until every queued message has been sent."""
+        await self._idle.wait()
+
+
 class ConnectionManager:
     """Manage WebSocket connections."""
 
-    def __init__(self):
+    def __init__(self, max_queue_size: int = SEND_QUEUE_SIZE):
         self.active_connections: List[WebSocket] = []
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.max_queue_size = max_queue_size
 
-    async def connect(self, websocket: WebSocket):
-        """Accept a new WebSocket connection."""
+    async def connect(self, websocket: WebSocket, topics: Iterable[str] = (), details: bool = False):
+        """
+        Accept a new WebSocket connection.
+        
+        Args:
+            websocket: WebSocket connection
+            topics: Initial topic subscriptions (empty means all notifications)
+            details: Also deliver per-entity events contained in digests
+        """
         await websocket.accept()
+        client = ClientConnection(websocket, self.max_queue_size)
+        client.topics.update(topics)
+        client.details = details
+        self.clients[websocket] = client
         self.active_connections.append(websocket)
         logger.info("WebSocket connection established", total_connections=len(self.active_connections))
 
     def disconnect(self, websocket: WebSocket):
-        """Remove a WebSocket connection."""
+        """Remove a WebSocket connection and stop its sender task."""
+        client = self.clients.pop(websocket, None)
+        if client is not None and client.sender is not None and not client.sender.done():
+            client.sender.cancel()
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
             logger.info("WebSocket connection closed", total_connections=len(self.active_connections))
 
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]) -> Set[str]:
+        """Add topic subscriptions for a connection and return its current topics."""
+        client = self.clients[websocket]
+        client.topics.update(topics)
+        return client.topics
+
+    def set_details(self, websocket: WebSocket, details: bool) -> None:
+        """Opt a connection in or out of per-entity events expanded from digests."""
+        self.clients[websocket].details = details
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]) -> Set[str]:
+        """Remove topic subscriptions for a connection and return its current topics."""
+        client = self.clients[websocket]
+        client.topics.difference_update(topics)
+        return client.topics
+
+    def _ensure_sender(self, client: ClientConnection) -> None:
+        """Start the client's sender task if it is not already draining the queue."""
+        if client.sender is None or client.sender.done():
+            client.sender = asyncio.create_task(self._run_sender(client))
+
+    async def _run_sender(self, client: ClientConnection):
+        """Drain a client's queue, dropping the connection if a send fails."""
+        try:
+            await client.drain()
+        except asyncio.CancelledError:
+            raise
+        except WebSocketDisconnect:
+            # Client disconnected - expected behavior
+            self.disconnect(client.websocket)
+        except RuntimeError as e:
+            # Connection closed or in invalid state
+            logger.warning("WebSocket connection closed during broadcast", error=str(e))
+            self.disconnect(client.websocket)
+        except OSError as e:
+            # Network error
+            logger.error("Network error in WebSocket broadcast", error=str(e), exc_info=True)
+            self.disconnect(client.websocket)
+        except Exception as e:
+            # Unexpected error - log with full context but keep other connections running
+            logger.error("Unexpected error in WebSocket broadcast", error=str(e), exc_info=True)
+            self.disconnect(client.websocket)
+
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Send message to a specific connection."""
         try:
@@ -69,35 +285,97 @@ class ConnectionManager:
             # Re-raise to prevent silent failures
             raise
 
-    async def broadcast(self, message: dict):
-        """Broadcast message to all connections."""
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except WebSocketDisconnect:
-                # Client disconnected - expected behavior
-                disconnected.append(connection)
-            except RuntimeError as e:
-                # Connection closed or in invalid state
-                logger.warning("WebSocket connection closed during broadcast", error=str(e))
-                disconnected.append(connection)
-            except (ValueError, TypeError) as e:
-                # Invalid message format
-                logger.error("Invalid message format for WebSocket broadcast", error=str(e), exc_info=True)
-                disconnected.append(connection)
-            except OSError as e:
-                # Network error
-                logger.error("Network error in WebSocket broadcast", error=str(e), exc_info=True)
-                disconnected.append(connection)
-            except Exception as e:
-                # Unexpected error - log with full context but don't fail entire broadcast
-                logger.error("Unexpected error in WebSocket broadcast", error=str(e), exc_info=True)
-                disconnected.append(connection)
+    async def broadcast_text(self, text: str, topics: Iterable[str] = ()) -> int:
+        """
+        Queue an already-serialized message for every subscribed connection.
+        
+        Does not wait for delivery; each connection's sender task sends it, so a
+        slow client never delays the others.
+        
+        Args:
+            text: JSON-encoded message
+            topics: Topics of the message (used to match subscriptions)
+            
+        Returns:
+            Number of connections the message was queued for
+        """
+        topics = tuple(topics)
+        queued = 0
+        for client in list(self.clients.values()):
+            if client.wants(topics):
+                client.enqueue(text)
+                self._ensure_sender(client)
+                queued += 1
+        return queued
+
+    async def broadcast(self, message: dict, topics: Iterable[str] = ()) -> int:
+        """Serialize a message once and queue it for every subscribed connection."""
+        return await self.broadcast_text(json.dumps(message), topics)
+
+    async def broadcast_digest(self, digest: Dict[str, Any]) -> int:
+        """
+        Deliver a digest notification.
+        
+        Every client subscribed to the digest or to any entity in it receives the
+        compact summary (without ``items``). Clients that opted in to details also
+        receive one event per item. Each message is serialized once, and detail
+        events are only built if some client wants them.
+        
+        Args:
+            digest: Digest notification (see build_notification) including ``items``
+            
+        Returns:
+            Number of messages queued
+        """
+        items = digest.pop("items", None) or []
+        item_topics = [notification_topics(item) for item in items]
+        all_topics = set(digest.get("topics") or ()).union(*item_topics)
+        queued = await self.broadcast_text(json.dumps(digest), all_topics)
+        
+        detail_clients = [client for client in self.clients.values() if client.details]
+        if not detail_clients or not items:
+            return queued
+        
+        event_type = digest["data"].get("event")
+        for item, topics in zip(items, item_topics):
+            text = None
+            for client in detail_clients:
+                if not client.wants(topics):
+                    continue
+                if text is None:
+                    text = json.dumps({
+                        "type": event_type,
+                        "timestamp": digest["timestamp"],
+                        "topics": topics,
+                        "data": item,
+                    })
+                client.enqueue(text)
+                queued += 1
+        for client in detail_clients:
+            if client.queue:
+                self._ensure_sender(client)
+        return queued
+
+    async def dispatch(self, notification: Dict[str, Any], text: Optional[str] = None) -> int:
+        """
+        Deliver a notification built by build_notification.
         
-        # Remove disconnected connections
-        for conn in disconnected:
-            self.disconnect(conn)
+        Args:
+            notification: Notification dictionary
+            text: The notification already serialized, if available
+            
+        Returns:
+            Number of messages queued
+        """
+        if notification.get("type") == NotificationType.DIGEST.value:
+            return await self.broadcast_digest(notification)
+        if text is None:
+            text = json.dumps(notification)
+        return await self.broadcast_text(text, notification.get("topics") or ())
+
+    async def flush(self):
+        """Wait until all queued messages have been sent (or their connections dropped)."""
+        await asyncio.gather(*(client.wait_idle() for client in list(self.clients.values())))
 
     async def send_notification(
         self,
@@ -106,27 +384,19 @@ class ConnectionManager:
         message: Optional[str] = None,
     ):
         """
-        Send a structured notification to all connected clients.
+        Send a structured notification to this process's connected clients.
         
         Args:
             notification_type: Type of notification
             data: Notification payload data
             message: Optional human-readable message
         """
-        notification = {
-            "type": notification_type.value,
-            "timestamp": datetime.utcnow().isoformat(),
-            "data": data,
-        }
-        
-        if message:
-            notification["message"] = message
-        
-        await self.broadcast(notification)
+        notification = build_notification(notification_type, data, message)
+        queued = await self.broadcast(notification, notification["topics"])
         logger.debug(
             "Notification sent",
             notification_type=notification_type.value,
-            connections=len(self.active_connections),
+            connections=queued,
         )
 
 
@@ -144,6 +414,10 @@ async def websocket_endpoint(websocket: WebSocket):
     - Remittance processing
     - Episode linking
     
+    By default every notification is delivered. To receive only some, pass
+    ``?topics=practice:<id>,claim:<id>,task:<id>`` when connecting or send
+    ``{"action": "subscribe" | "unsubscribe", "topics": [...]}``.
+    
     **Error Handling Strategy:**
     This endpoint uses targeted exception handling to provide specific error recovery:
     - `WebSocketDisconnect`: Normal client disconnection, handled gracefully
@@ -159,6 +433,13 @@ async def websocket_endpoint(websocket: WebSocket):
     """
     await manager.connect(websocket)
     try:
+        # Initial subscriptions from the query string
+        query_topics = websocket.query_params.get("topics")
+        if query_topics:
+            manager.subscribe(websocket, parse_topics(query_topics.split(",")))
+        if websocket.query_params.get("details", "").lower() == "true":
+            manager.set_details(websocket, True)
+        
         # Send welcome message
         await manager.send_personal_message(
             {
@@ -173,9 +454,33 @@ async def websocket_endpoint(websocket: WebSocket):
             # Keep connection alive and handle incoming messages
             data = await websocket.receive_text()
             
-            # Handle client messages (can be extended for filtering/subscriptions)
+            # Handle client messages (topic subscriptions; anything else is acknowledged)
             try:
                 message = json.loads(data)
+                action = message.get("action") if isinstance(message, dict) else None
+                
+                if action in ("subscribe", "unsubscribe") and ("topics" in message or "details" in message):
+                    requested = message.get("topics") or []
+                    if isinstance(requested, str):
+                        requested = [requested]
+                    topics = parse_topics(requested)
+                    if action == "subscribe":
+                        current = manager.subscribe(websocket, topics)
+                    else:
+                        current = manager.unsubscribe(websocket, topics)
+                    if "details" in message:
+                        manager.set_details(websocket, bool(message["details"]) and action == "subscribe")
+                    await manager.send_personal_message(
+                        {
+                            "type": "ack",
+                            "message": "Subscribed" if action == "subscribe" else "Unsubscribed",
+                            "topics": sorted(current),
+                            "details": manager.clients[websocket].details,
+                            "timestamp": datetime.utcnow().isoformat(),
+                        },
+                        websocket,
+                    )
+                    continue
                 
                 # Echo back acknowledgment
                 await manager.send_personal_message(
@@ -197,6 +502,16 @@ async def websocket_endpoint(websocket: WebSocket):
                     },
                     websocket,
                 )
+            except ValueError as e:
+                # Invalid subscription request - report it and keep the connection open
+                await manager.send_personal_message(
+                    {
+                        "type": "error",
+                        "message": str(e),
+                        "timestamp": datetime.utcnow().isoformat(),
+                    },
+                    websocket,
+                )
     except WebSocketDisconnect:
         # Client disconnected normally - expected behavior
         manager.disconnect(websocket)
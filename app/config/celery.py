@@ -1,6 +1,9 @@
 """Celery configuration."""
-from celery import Celery
+from celery import Celery, signals
+from celery.schedules import crontab
+from kombu import Queue
 import os
+import time
 
 # Initialize Sentry early for Celery workers
 from app.config.sentry import init_sentry
@@ -8,6 +11,12 @@ from app.config.sentry import init_sentry
 init_sentry()
 
 from app.utils.logger import get_logger
+from app.utils.metrics import (
+    CELERY_QUEUE_WAIT_SECONDS,
+    CELERY_TASK_SECONDS,
+    instance_name,
+    registry,
+)
 
 logger = get_logger(__name__)
 
@@ -22,6 +31,52 @@ celery_app = Celery(
     include=["app.services.queue.tasks"],
 )
 
+# Queues, each served by its own worker pool (see deployment/systemd-services.sh)
+# so long file loads cannot starve short tasks:
+# - ingest: EDI file parsing and loading, including chunks of large files
+# - link: episode linking (short, one per remittance)
+# - score: risk scoring and claim feature vectors
+# - learning: pattern detection, model retraining and maintenance
+QUEUE_INGEST = "ingest"
+QUEUE_LINK = "link"
+QUEUE_SCORE = "score"
+QUEUE_LEARNING = "learning"
+CELERY_QUEUES = (QUEUE_INGEST, QUEUE_LINK, QUEUE_SCORE, QUEUE_LEARNING)
+
+# Priorities within a queue; with the Redis transport 0 is served first
+PRIORITY_HIGH = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_LOW = 9
+
+TASK_ROUTES = {
+    "process_edi_file": {"queue": QUEUE_INGEST},
+    "load_837_chunk": {"queue": QUEUE_INGEST},
+    # Chord callbacks finish files whose chunks are already loaded
+    "finalize_edi_file": {"queue": QUEUE_INGEST, "priority": PRIORITY_HIGH},
+    "fail_edi_file": {"queue": QUEUE_INGEST, "priority": PRIORITY_HIGH},
+    "link_episodes": {"queue": QUEUE_LINK},
+    "compute_feature_vectors": {"queue": QUEUE_SCORE},
+    "refresh_feature_vectors": {"queue": QUEUE_SCORE, "priority": PRIORITY_LOW},
+    "detect_patterns": {"queue": QUEUE_LEARNING},
+    "retrain_ml_model": {"queue": QUEUE_LEARNING, "priority": PRIORITY_LOW},
+    "maintain_partitions": {"queue": QUEUE_LEARNING, "priority": PRIORITY_HIGH},
+    "sweep_blob_spool": {"queue": QUEUE_LEARNING},
+}
+
+# Periodic tasks, published by the beat service (deployment/systemd-services.sh)
+BEAT_SCHEDULE = {
+    # Months without a partition fall into the default partition; keep them premade
+    "maintain-partitions": {
+        "task": "maintain_partitions",
+        "schedule": crontab(hour=2, minute=15),
+    },
+    # Spooled uploads of crashed tasks are removed after BLOB_SPOOL_STALE_HOURS
+    "sweep-blob-spool": {
+        "task": "sweep_blob_spool",
+        "schedule": crontab(minute=40),
+    },
+}
+
 # Celery settings
 celery_app.conf.update(
     task_serializer="json",
@@ -34,5 +89,117 @@ celery_app.conf.update(
     task_soft_time_limit=25 * 60,  # 25 minutes
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
+    task_queues=[Queue(name) for name in CELERY_QUEUES],
+    task_default_queue=QUEUE_INGEST,
+    task_routes=TASK_ROUTES,
+    task_default_priority=PRIORITY_DEFAULT,
+    beat_schedule=BEAT_SCHEDULE,
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        "queue_order_strategy": "priority",
+    },
 )
 
+
+# Worker metrics (see app/utils/metrics.py)
+#
+# Each worker process keeps its own metrics registry. Exporting is opt-in:
+# - METRICS_TEXTFILE_DIR: write <dir>/marb_worker_<host>-<pid>.prom for the
+#   node_exporter textfile collector
+# - METRICS_PUSHGATEWAY_URL: push to a Prometheus Pushgateway (job "marb_celery")
+# Exports happen after tasks finish, at most once every METRICS_EXPORT_INTERVAL seconds.
+METRICS_TEXTFILE_DIR = os.getenv("METRICS_TEXTFILE_DIR")
+METRICS_PUSHGATEWAY_URL = os.getenv("METRICS_PUSHGATEWAY_URL")
+METRICS_EXPORT_INTERVAL = float(os.getenv("METRICS_EXPORT_INTERVAL", "15"))
+
+# Header stamped on every published task so workers can measure queue wait time
+PUBLISHED_AT_HEADER = "marb_published_at"
+
+_task_started_at = {}
+_last_metrics_export = 0.0
+
+
+def _metrics_textfile_path() -> str:
+    return os.path.join(METRICS_TEXTFILE_DIR, f"marb_worker_{instance_name()}.prom")
+
+
+def export_worker_metrics(force: bool = False) -> None:
+    """
+    Export this worker process's metrics to the configured textfile/Pushgateway.
+    
+    Args:
+        force: Export even if the last export was less than METRICS_EXPORT_INTERVAL ago
+    """
+    global _last_metrics_export
+    if not METRICS_TEXTFILE_DIR and not METRICS_PUSHGATEWAY_URL:
+        return
+    
+    now = time.monotonic()
+    if not force and now - _last_metrics_export < METRICS_EXPORT_INTERVAL:
+        return
+    _last_metrics_export = now
+    
+    try:
+        if METRICS_TEXTFILE_DIR:
+            registry.write_textfile(_metrics_textfile_path())
+        if METRICS_PUSHGATEWAY_URL:
+            registry.push_to_gateway(
+                METRICS_PUSHGATEWAY_URL,
+                job="marb_celery",
+                grouping_key={"instance": instance_name()},
+            )
+    except Exception as e:
+        logger.warning("Failed to export worker metrics", error=str(e))
+
+
+@signals.before_task_publish.connect
+def _stamp_publish_time(headers=None, **kwargs):
+    """Record publish time in the message headers (used for queue wait time)."""
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+@signals.task_prerun.connect
+def _record_task_start(task_id=None, task=None, **kwargs):
+    """Observe queue wait time and remember when the task started."""
+    _task_started_at[task_id] = time.perf_counter()
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None) if task else None
+    if published_at is None and task is not None:
+        published_at = (getattr(task.request, "headers", None) or {}).get(PUBLISHED_AT_HEADER)
+    if published_at is not None:
+        try:
+            wait = max(0.0, time.time() - float(published_at))
+            CELERY_QUEUE_WAIT_SECONDS.observe(wait, task=task.name)
+        except (TypeError, ValueError):
+            pass
+
+
+@signals.task_postrun.connect
+def _record_task_finish(task_id=None, task=None, state=None, **kwargs):
+    """Observe task run time and export worker metrics if due."""
+    started_at = _task_started_at.pop(task_id, None)
+    if started_at is not None and task is not None:
+        CELERY_TASK_SECONDS.observe(
+            time.perf_counter() - started_at, task=task.name, state=state or "UNKNOWN"
+        )
+    export_worker_metrics()
+
+
+@signals.worker_process_shutdown.connect
+def _remove_worker_metrics(**kwargs):
+    """Remove this process's textfile so stale series do not linger after shutdown."""
+    if METRICS_TEXTFILE_DIR:
+        try:
+            os.unlink(_metrics_textfile_path())
+        except OSError:
+            pass
+
+
+@signals.worker_process_shutdown.connect
+def _sync_denial_tracker(**kwargs):
+    """Add this process's unsynced denial counts to Redis before it exits."""
+    from app.services.learning.denial_sketch import denial_tracker
+
+    if denial_tracker.sync_seconds > 0:
+        denial_tracker.sync()
@@ -11,11 +11,18 @@ Key Features:
 - TimestampMixin for automatic created_at/updated_at fields
 - Database initialization function for startup
 - Session dependency for FastAPI routes
+- Async sessions (asyncpg, aiosqlite for SQLite) for read-heavy API routes
+- Optional read replica for reporting and ML reads, with primary fallback
 
 Configuration:
 - DATABASE_URL: PostgreSQL connection string (from environment)
 - DATABASE_POOL_SIZE: Connection pool size (default: 10)
 - DATABASE_MAX_OVERFLOW: Maximum pool overflow (default: 20)
+- DATABASE_ASYNC_POOL_SIZE: Async connection pool size (default: DATABASE_POOL_SIZE)
+- DATABASE_ASYNC_MAX_OVERFLOW: Async pool overflow (default: DATABASE_MAX_OVERFLOW)
+- DATABASE_REPLICA_URL: Read replica connection string (optional; reads use the primary if unset)
+- DATABASE_REPLICA_MAX_LAG_SECONDS: Replica lag above which reads fall back to the primary (default: 30)
+- DATABASE_REPLICA_LAG_CHECK_SECONDS: How long a lag measurement is reused (default: 5)
 - Supports SQLite for testing (automatic SSL handling skipped)
 - SSL mode automatically disabled for localhost connections
 
@@ -25,17 +32,22 @@ Configuration:
 - Alembic: See `alembic/env.py` for migration configuration
 """
 import os
-from typing import Generator, Optional
+import time
+from contextlib import contextmanager
+from typing import AsyncGenerator, Generator, Iterator, Optional
 
 from dotenv import load_dotenv
 
-from sqlalchemy import create_engine, Column, DateTime, Engine
+from sqlalchemy import create_engine, event, text, Column, DateTime, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session, sessionmaker as SessionMaker
 
 from sqlalchemy.sql import func
 
-from app.config.database_url import get_database_url
+from app.config.database_url import get_database_url, parse_database_url
 from app.utils.logger import get_logger
 
 # Load .env file before reading environment variables
@@ -157,6 +169,436 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+# Async drivers by sync driver name
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: Optional[str] = None) -> str:
+    """
+    Convert a database URL to the matching async driver.
+    
+    PostgreSQL URLs use asyncpg, which takes ``ssl`` instead of libpq's
+    ``sslmode``. SQLite URLs use aiosqlite.
+    
+    Args:
+        database_url: Sync database URL (defaults to DATABASE_URL)
+        
+    Returns:
+        URL string for create_async_engine
+    """
+    url = make_url(database_url or DATABASE_URL)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    if drivername == "postgresql+asyncpg" and "sslmode" in url.query:
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def create_async_database_engine(
+    database_url: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None,
+    pool_pre_ping: bool = True,
+    echo: bool = False,
+) -> AsyncEngine:
+    """
+    Create SQLAlchemy async engine with connection pooling.
+    
+    The async pool is separate from the sync engine's pool, so an API process
+    holds up to both pools' connections.
+    
+    Args:
+        database_url: Database connection URL, sync or async form (defaults to DATABASE_URL)
+        pool_size: Connection pool size (defaults to DATABASE_ASYNC_POOL_SIZE env var or DATABASE_POOL_SIZE)
+        max_overflow: Maximum pool overflow (defaults to DATABASE_ASYNC_MAX_OVERFLOW env var or DATABASE_MAX_OVERFLOW)
+        pool_pre_ping: Enable connection health checks (default: True)
+        echo: Enable SQL query logging (default: False)
+        
+    Returns:
+        Configured SQLAlchemy AsyncEngine instance
+    """
+    url = get_async_database_url(database_url)
+    if make_url(url).get_backend_name() == "sqlite":
+        # SQLite picks its own pool class; QueuePool sizing does not apply
+        return create_async_engine(url, echo=echo)
+    
+    pool_size = pool_size or int(
+        os.getenv("DATABASE_ASYNC_POOL_SIZE", os.getenv("DATABASE_POOL_SIZE", "10"))
+    )
+    max_overflow = max_overflow or int(
+        os.getenv("DATABASE_ASYNC_MAX_OVERFLOW", os.getenv("DATABASE_MAX_OVERFLOW", "20"))
+    )
+    return create_async_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=pool_pre_ping,
+        echo=echo,
+    )
+
+
+def create_async_session_factory(engine: Optional[AsyncEngine] = None) -> async_sessionmaker:
+    """
+    Create SQLAlchemy async session factory.
+    
+    Objects stay loaded after commit (``expire_on_commit=False``) because
+    expired attributes cannot be lazy loaded outside ``run_sync``.
+    
+    Args:
+        engine: Async engine to bind sessions to (defaults to the module-level async engine)
+        
+    Returns:
+        Configured async_sessionmaker instance
+    """
+    if engine is None:
+        engine = get_async_engine()
+    
+    return async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+# Async engine and session factory (created on first use, so processes that
+# never open an async session, like Celery workers, need no async driver)
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Get the module-level async engine, creating it on first use.
+    
+    Returns:
+        AsyncEngine for DATABASE_URL
+    """
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_database_engine()
+    return _async_engine
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """
+    Get the module-level async session factory, creating it on first use.
+    
+    Returns:
+        async_sessionmaker bound to the module-level async engine
+    """
+    global _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        _AsyncSessionLocal = create_async_session_factory(get_async_engine())
+    return _AsyncSessionLocal
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get async database session for dependency injection.
+    
+    Used by read-heavy routes so that waiting on the database does not block
+    the event loop. Existing sync query code runs through ``run_sync``, which
+    keeps the ORM API (including lazy loading) while the driver I/O is awaited.
+    Celery tasks and write routes keep using the sync ``get_db``/``SessionLocal``.
+    
+    Yields:
+        Async database session instance
+        
+    Example:
+        @router.get("/items")
+        async def get_items(db: AsyncSession = Depends(get_async_db)):
+            return await db.run_sync(lambda session: session.query(Item).all())
+    """
+    async with get_async_session_factory()() as session:
+        yield session
+
+
+async def dispose_async_engine() -> None:
+    """
+    Close the async engine's pooled connections (called on application shutdown).
+    """
+    global _async_engine, _AsyncSessionLocal, _async_replica_engine, _AsyncReplicaSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _async_replica_engine is not None:
+        await _async_replica_engine.dispose()
+    _async_engine = None
+    _AsyncSessionLocal = None
+    _async_replica_engine = None
+    _AsyncReplicaSessionLocal = None
+
+
+# Read replica (optional). Reporting and ML training reads opt in through
+# read_session()/get_read_db()/get_async_read_db() and fall back to the primary
+# when no replica is configured, it is unreachable or it lags too far behind.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("DATABASE_REPLICA_MAX_LAG_SECONDS", "30"))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DATABASE_REPLICA_LAG_CHECK_SECONDS", "5"))
+
+# Seconds since the last replayed transaction, or 0 when the replica has
+# replayed everything it received (an idle primary sends no transactions)
+POSTGRES_REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+def _make_read_only(engine: Engine) -> None:
+    """Make every connection of an engine reject writes."""
+    if engine.dialect.name == "postgresql":
+        statement = "SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY"
+    elif engine.dialect.name == "sqlite":
+        statement = "PRAGMA query_only = ON"
+    else:
+        return
+    
+    @event.listens_for(engine, "connect")
+    def _set_read_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(statement)
+        cursor.close()
+
+
+def create_replica_engine(database_url: Optional[str] = None) -> Optional[Engine]:
+    """
+    Create a read-only engine for the read replica.
+    
+    Args:
+        database_url: Replica connection URL (defaults to DATABASE_REPLICA_URL)
+        
+    Returns:
+        Engine whose connections reject writes, or None if no replica is configured
+    """
+    url = database_url or DATABASE_REPLICA_URL
+    if not url:
+        return None
+    engine = create_database_engine(parse_database_url(url))
+    _make_read_only(engine)
+    return engine
+
+
+def create_async_replica_engine(database_url: Optional[str] = None) -> Optional[AsyncEngine]:
+    """
+    Create a read-only async engine for the read replica.
+    
+    Args:
+        database_url: Replica connection URL (defaults to DATABASE_REPLICA_URL)
+        
+    Returns:
+        AsyncEngine whose connections reject writes, or None if no replica is configured
+    """
+    url = database_url or DATABASE_REPLICA_URL
+    if not url:
+        return None
+    engine = create_async_database_engine(parse_database_url(url))
+    _make_read_only(engine.sync_engine)
+    return engine
+
+
+# Replica engines and session factories (created on first use)
+_replica_engine: Optional[Engine] = None
+_ReplicaSessionLocal: Optional[SessionMaker] = None
+_async_replica_engine: Optional[AsyncEngine] = None
+_AsyncReplicaSessionLocal: Optional[async_sessionmaker] = None
+# (monotonic time, lag in seconds) of the last replica lag measurement
+_replica_lag_checked: Optional[tuple] = None
+
+
+def get_replica_session_factory() -> Optional[SessionMaker]:
+    """
+    Get the read-only replica session factory, creating it on first use.
+    
+    Returns:
+        sessionmaker bound to the replica, or None if no replica is configured
+    """
+    global _replica_engine, _ReplicaSessionLocal
+    if _ReplicaSessionLocal is None and DATABASE_REPLICA_URL:
+        _replica_engine = create_replica_engine()
+        _ReplicaSessionLocal = create_session_factory(_replica_engine)
+    return _ReplicaSessionLocal
+
+
+def get_async_replica_session_factory() -> Optional[async_sessionmaker]:
+    """
+    Get the read-only async replica session factory, creating it on first use.
+    
+    Returns:
+        async_sessionmaker bound to the replica, or None if no replica is configured
+    """
+    global _async_replica_engine, _AsyncReplicaSessionLocal
+    if _AsyncReplicaSessionLocal is None and DATABASE_REPLICA_URL:
+        _async_replica_engine = create_async_replica_engine()
+        _AsyncReplicaSessionLocal = create_async_session_factory(_async_replica_engine)
+    return _AsyncReplicaSessionLocal
+
+
+def measure_replica_lag(db: Session) -> float:
+    """
+    Measure how far a replica is behind its primary.
+    
+    Only PostgreSQL streaming replicas report lag; other databases (e.g. a
+    SQLite copy used in tests) are only checked for reachability and treated
+    as current.
+    
+    Args:
+        db: Session on the replica
+        
+    Returns:
+        Replication lag in seconds
+        
+    Raises:
+        SQLAlchemyError: If the replica cannot be queried
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        db.execute(text("SELECT 1"))
+        return 0.0
+    return float(db.execute(POSTGRES_REPLICA_LAG_SQL).scalar() or 0.0)
+
+
+def replica_is_usable(db: Session, max_lag_seconds: Optional[float] = None) -> bool:
+    """
+    Check whether a replica session is reachable and within the lag tolerance.
+    
+    Lag measurements are reused for DATABASE_REPLICA_LAG_CHECK_SECONDS so that
+    request paths do not pay an extra round trip every time.
+    
+    Args:
+        db: Session on the replica
+        max_lag_seconds: Lag tolerance (defaults to DATABASE_REPLICA_MAX_LAG_SECONDS)
+        
+    Returns:
+        True if reads may use the replica
+    """
+    global _replica_lag_checked
+    max_lag = REPLICA_MAX_LAG_SECONDS if max_lag_seconds is None else max_lag_seconds
+    now = time.monotonic()
+    if _replica_lag_checked is not None and now - _replica_lag_checked[0] < REPLICA_LAG_CHECK_SECONDS:
+        lag = _replica_lag_checked[1]
+    else:
+        try:
+            lag = measure_replica_lag(db)
+        except SQLAlchemyError as e:
+            logger.warning("Read replica unavailable, using primary", error=str(e))
+            db.rollback()
+            return False
+        _replica_lag_checked = (now, lag)
+    
+    if lag > max_lag:
+        logger.warning(
+            "Read replica lagging, using primary",
+            lag_seconds=round(lag, 1),
+            max_lag_seconds=max_lag,
+        )
+        return False
+    return True
+
+
+def open_replica_session(max_lag_seconds: Optional[float] = None) -> Optional[Session]:
+    """
+    Open a replica session if a replica is configured and usable.
+    
+    For code that already holds a primary session and only wants to move
+    heavy reads off it (``PatternDetector(db, read_db=...)``).
+    
+    Args:
+        max_lag_seconds: Lag tolerance (defaults to DATABASE_REPLICA_MAX_LAG_SECONDS)
+        
+    Returns:
+        Replica session (the caller must close it), or None
+    """
+    factory = get_replica_session_factory()
+    if factory is None:
+        return None
+    session = factory()
+    if not replica_is_usable(session, max_lag_seconds):
+        session.close()
+        return None
+    session.info["replica"] = True
+    return session
+
+
+def open_read_session(max_lag_seconds: Optional[float] = None) -> Session:
+    """
+    Open a session for read-only work, on the replica when it is usable.
+    
+    The caller must not write through the returned session and must close it.
+    ``session.info["replica"]`` tells which database it is bound to.
+    
+    Args:
+        max_lag_seconds: Lag tolerance (defaults to DATABASE_REPLICA_MAX_LAG_SECONDS)
+        
+    Returns:
+        Replica session, or a primary session as fallback
+    """
+    session = open_replica_session(max_lag_seconds)
+    if session is None:
+        session = SessionLocal()
+        session.info["replica"] = False
+    return session
+
+
+@contextmanager
+def read_session(max_lag_seconds: Optional[float] = None) -> Iterator[Session]:
+    """
+    Context manager for read-only work on the replica (falls back to the primary).
+    
+    Args:
+        max_lag_seconds: Lag tolerance (defaults to DATABASE_REPLICA_MAX_LAG_SECONDS)
+        
+    Yields:
+        Database session
+        
+    Example:
+        with read_session() as db:
+            df = DataCollector(db).collect_training_data()
+    """
+    session = open_read_session(max_lag_seconds)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """
+    Get a read-only database session for dependency injection.
+    
+    Yields:
+        Replica session, or a primary session as fallback
+    """
+    with read_session() as session:
+        yield session
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get a read-only async database session for dependency injection.
+    
+    Used by list endpoints, which tolerate data that is a few seconds old.
+    
+    Yields:
+        Async replica session, or an async primary session as fallback
+    """
+    factory = get_async_replica_session_factory()
+    if factory is not None:
+        async with factory() as session:
+            if await session.run_sync(replica_is_usable):
+                session.info["replica"] = True
+                yield session
+                return
+    
+    async with get_async_session_factory()() as session:
+        session.info["replica"] = False
+        yield session
+
+
 def get_all_models():
     """
     Get all database models for registration.
@@ -175,6 +617,7 @@ def get_all_models():
         Payer,
         DenialPattern,
         RiskScore,
+        ClaimFeatureVector,
         Provider,
         Plan,
         PracticeConfig,
@@ -190,6 +633,7 @@ def get_all_models():
         Payer,
         DenialPattern,
         RiskScore,
+        ClaimFeatureVector,
         Provider,
         Plan,
         PracticeConfig,
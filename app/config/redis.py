@@ -30,3 +30,22 @@ def get_redis_client() -> redis.Redis:
             raise
     return _redis_client
 
+
+
+def create_async_redis_client() -> "redis.asyncio.Redis":
+    """
+    Create a new asyncio Redis client with the same settings as get_redis_client.
+    
+    A new client is returned on every call (not shared), since long-lived
+    consumers such as pub/sub subscribers hold their connection exclusively.
+    """
+    import redis.asyncio
+    
+    return redis.asyncio.Redis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", "6379")),
+        password=os.getenv("REDIS_PASSWORD") or None,
+        db=int(os.getenv("REDIS_DB", "0")),
+        decode_responses=True,
+        socket_connect_timeout=5,
+    )
@@ -15,6 +15,7 @@ from urllib.parse import urlparse
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
+from app.api.middleware.rate_limit_backends import RATE_LIMIT_BACKENDS
 from app.utils.logger import get_logger
 from app.utils.errors import AppError
 
@@ -27,6 +28,9 @@ DEFAULT_ENCRYPTION_KEY = "change-me-32-character-encryption-key"
 # Allowed JWT algorithms (only strong algorithms)
 ALLOWED_JWT_ALGORITHMS: Set[str] = {"HS256", "HS384", "HS512", "RS256", "RS384", "RS512"}
 
+# Allowed rate limiting backends
+ALLOWED_RATE_LIMIT_BACKENDS: Set[str] = set(RATE_LIMIT_BACKENDS)
+
 # Weak patterns that indicate insecure keys
 WEAK_KEY_PATTERNS = [
     r"^(password|secret|key|token).*$",
@@ -370,6 +374,11 @@ class SecuritySettings(BaseSettings):
         le=100000,  # Maximum 100,000 requests per hour
         description="Rate limit per hour. Range: 100-100,000 requests.",
     )
+    rate_limit_backend: str = Field(
+        default="fixed_window",
+        description="Rate limiting backend: 'fixed_window' (INCR/EXPIRE counters) or "
+                    "'gcra' (single atomic Lua call per request with a local pre-check).",
+    )
     
     # Authentication enforcement
     require_auth: bool = Field(
@@ -427,6 +436,18 @@ class SecuritySettings(BaseSettings):
             )
         return v
 
+    @field_validator("rate_limit_backend")
+    @classmethod
+    def validate_rate_limit_backend(cls, v: str) -> str:
+        """Validate rate limit backend is a known backend."""
+        v = v.lower()
+        if v not in ALLOWED_RATE_LIMIT_BACKENDS:
+            raise ValueError(
+                f"Rate limit backend '{v}' is not allowed. "
+                f"Allowed backends: {', '.join(sorted(ALLOWED_RATE_LIMIT_BACKENDS))}"
+            )
+        return v
+
     @field_validator("jwt_secret_key")
     @classmethod
     def validate_jwt_secret_key(cls, v: str) -> str:
@@ -949,6 +970,11 @@ def get_rate_limit_per_hour() -> int:
     return settings.rate_limit_per_hour
 
 
+def get_rate_limit_backend() -> str:
+    """Get rate limiting backend name."""
+    return settings.rate_limit_backend
+
+
 def is_auth_required() -> bool:
     """Check if authentication is required."""
     return settings.require_auth
@@ -19,11 +19,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import RequestValidationError
 
-from app.config.database import init_db
+from app.config.database import dispose_async_engine, init_db
 from app.api.middleware.audit import AuditMiddleware
 from app.api.middleware.rate_limit import RateLimitMiddleware
 from app.api.middleware.auth_middleware import OptionalAuthMiddleware
 from app.utils.logger import get_logger
+from app.utils.notification_bus import subscriber as notification_subscriber
 from app.utils.errors import (
     AppError,
     app_error_handler,
@@ -36,6 +37,7 @@ from app.config.security import (
     get_cors_headers,
     get_rate_limit_per_minute,
     get_rate_limit_per_hour,
+    get_rate_limit_backend,
 )
 
 logger = get_logger(__name__)
@@ -54,10 +56,14 @@ def create_lifespan() -> Callable:
         # Startup
         logger.info("Starting application...")
         await init_db()
+        # Relay notifications published by Celery workers to WebSocket clients
+        notification_subscriber.start()
         logger.info("Application started successfully")
         yield
         # Shutdown
         logger.info("Shutting down application...")
+        await notification_subscriber.stop()
+        await dispose_async_engine()
     
     return lifespan
 
@@ -93,6 +99,7 @@ def setup_middleware(app: FastAPI) -> None:
         RateLimitMiddleware,
         requests_per_minute=get_rate_limit_per_minute(),
         requests_per_hour=get_rate_limit_per_hour(),
+        backend=get_rate_limit_backend(),
     )
     
     # Audit logging middleware (first registered, last executed)
@@ -135,6 +142,7 @@ def register_routes(app: FastAPI) -> None:
     - Audit logging
     - Integrations
     - WebSocket connections
+    - Prometheus metrics
     
     Args:
         app: FastAPI application instance
@@ -150,6 +158,7 @@ def register_routes(app: FastAPI) -> None:
         audit,
         integrations,
         websocket,
+        metrics,
     )
     
     # Root endpoints (no prefix)
@@ -167,6 +176,7 @@ def register_routes(app: FastAPI) -> None:
     # Routes without /api/v1 prefix
     app.include_router(integrations.router, tags=["integrations"])
     app.include_router(websocket.router, prefix="/ws", tags=["websocket"])
+    app.include_router(metrics.router, tags=["metrics"])
     
     logger.info("Routes registered successfully")
 
@@ -36,8 +36,10 @@ from app.models.database import (
     ClaimLine,
     Remittance,
     ClaimEpisode,
+    EDIRawFile,
     DenialPattern,
     RiskScore,
+    ClaimFeatureVector,
     ParserLog,
     AuditLog,
 )
@@ -58,9 +60,11 @@ __all__ = [
     "ClaimLine",
     "Remittance",
     "ClaimEpisode",
+    "EDIRawFile",
     # Risk and learning
     "DenialPattern",
     "RiskScore",
+    "ClaimFeatureVector",
     # Logging
     "ParserLog",
     "AuditLog",
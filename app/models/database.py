@@ -12,10 +12,12 @@ Claims & Remittances:
 - ClaimLine: Individual line items within claims
 - Remittance: 835 remittance files (payment/denial information)
 - ClaimEpisode: Links claims to their remittance outcomes
+- EDIRawFile: Uploaded EDI files, stored once (compressed) and referenced by claims/remittances
 
 Risk & Learning:
 - DenialPattern: Learned patterns from historical denials
 - RiskScore: Calculated risk scores for claims
+- ClaimFeatureVector: Persisted ML feature vectors of claims
 
 Logging:
 - ParserLog: Logs of parsing issues/warnings for resilience tracking
@@ -40,7 +42,9 @@ and enums are re-exported from this module. New code should import from app.mode
 and app.models.enums directly.
 """
 from sqlalchemy import (
+    BigInteger,
     Column,
+    LargeBinary,
     String,
     Integer,
     Float,
@@ -48,16 +52,29 @@ from sqlalchemy import (
     DateTime,
     Text,
     ForeignKey,
+    Index,
     JSON,
     Enum as SQLEnum,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
 from app.config.database import Base, TimestampMixin
 from app.models.enums import ClaimStatus, RemittanceStatus, EpisodeStatus, RiskLevel
 from app.models.core import Provider, Payer, Plan, PracticeConfig
 
+# JSONB on PostgreSQL so columns filtered by content can have GIN indexes
+# (queried through app/utils/json_filters.py); plain JSON elsewhere
+IndexedJSON = JSON().with_variant(JSONB(), "postgresql")
+
+
+def _gin_index(name: str, column: str) -> Index:
+    """GIN index for JSONB containment (@>) queries, created on PostgreSQL only."""
+    return Index(
+        name, column, postgresql_using="gin", postgresql_ops={column: "jsonb_path_ops"}
+    ).ddl_if(dialect="postgresql")
+
 
 class Claim(Base, TimestampMixin):
     """
@@ -92,6 +109,11 @@ class Claim(Base, TimestampMixin):
     """
 
     __tablename__ = "claims"
+    __table_args__ = (
+        # Payer history lookups by date of service
+        Index("ix_claims_payer_service_date", "payer_id", "service_date"),
+        _gin_index("ix_claims_diagnosis_codes_gin", "diagnosis_codes"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     claim_control_number = Column(String(50), unique=True, nullable=False, index=True)
@@ -112,7 +134,7 @@ class Claim(Base, TimestampMixin):
     service_date = Column(DateTime)
     
     # Diagnosis codes (from HI segments) - stored as JSON for flexibility
-    diagnosis_codes = Column(JSON)
+    diagnosis_codes = Column(IndexedJSON)
     principal_diagnosis = Column(String(10))
     
     # Provider information
@@ -120,9 +142,14 @@ class Claim(Base, TimestampMixin):
     operating_provider_npi = Column(String(10))
     referring_provider_npi = Column(String(10))
     
-    # Raw EDI data for reference
-    raw_edi_data = Column(Text)
-    parsed_segments = Column(JSON)  # Store parsed segments for debugging
+    # Raw EDI data for reference: (raw_file_hash, raw_offset, raw_length) points at
+    # the claim's segments in EDIRawFile. raw_edi_data/parsed_segments are only set
+    # on older rows and are deferred so they are not loaded unless accessed.
+    raw_edi_data = deferred(Column(Text))
+    parsed_segments = deferred(Column(JSON))
+    raw_file_hash = Column(String(64))
+    raw_offset = Column(BigInteger)
+    raw_length = Column(Integer)
     
     # Status and metadata
     status = Column(SQLEnum(ClaimStatus), default=ClaimStatus.PENDING, index=True)
@@ -212,6 +239,9 @@ class Remittance(Base, TimestampMixin):
     """
 
     __tablename__ = "remittances"
+    __table_args__ = (
+        _gin_index("ix_remittances_denial_reasons_gin", "denial_reasons"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     remittance_control_number = Column(String(50), unique=True, nullable=False, index=True)
@@ -229,12 +259,15 @@ class Remittance(Base, TimestampMixin):
     claim_control_number = Column(String(50), index=True)
     
     # Denial information
-    denial_reasons = Column(JSON)  # Array of denial reason codes
-    adjustment_reasons = Column(JSON)  # Array of adjustment reason codes
+    denial_reasons = Column(IndexedJSON)  # Array of denial reason codes
+    adjustment_reasons = Column(IndexedJSON)  # Array of adjustment reason codes
     
-    # Raw EDI data
-    raw_edi_data = Column(Text)
-    parsed_segments = Column(JSON)
+    # Raw EDI data (see Claim)
+    raw_edi_data = deferred(Column(Text))
+    parsed_segments = deferred(Column(JSON))
+    raw_file_hash = Column(String(64))
+    raw_offset = Column(BigInteger)
+    raw_length = Column(Integer)
     
     # Status
     status = Column(SQLEnum(RemittanceStatus), default=RemittanceStatus.PENDING, index=True)
@@ -246,6 +279,39 @@ class Remittance(Base, TimestampMixin):
     episodes = relationship("ClaimEpisode", back_populates="remittance")
 
 
+class EDIRawFile(Base, TimestampMixin):
+    """
+    Uploaded EDI file content, stored once per distinct file.
+
+    Files are content-addressed by SHA-256, so re-uploading the same file does not
+    store it again. The content is compressed in independent chunks so that one
+    claim's or remittance's segments can be read by decompressing only the chunks
+    that contain them (see app.services.edi.raw_store).
+
+    Attributes:
+        file_hash: SHA-256 of the uncompressed file (hex)
+        filename: Name of the first upload of this content
+        file_type: 837 or 835
+        size: Uncompressed size in bytes
+        compressed_size: Size of ``data`` in bytes
+        chunk_size: Uncompressed bytes per chunk
+        chunk_offsets: Offset of each compressed chunk in ``data``, plus the end offset
+        data: Concatenated zlib-compressed chunks (deferred)
+    """
+
+    __tablename__ = "edi_raw_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_hash = Column(String(64), unique=True, nullable=False, index=True)
+    filename = Column(String(255))
+    file_type = Column(String(10))
+    size = Column(BigInteger, nullable=False)
+    compressed_size = Column(BigInteger, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    chunk_offsets = Column(JSON, nullable=False)
+    data = deferred(Column(LargeBinary, nullable=False))
+
+
 class ClaimEpisode(Base, TimestampMixin):
     """
     Links claims to remittances, creating a complete claim lifecycle.
@@ -269,7 +335,13 @@ class ClaimEpisode(Base, TimestampMixin):
     """
 
     __tablename__ = "claim_episodes"
+    __table_args__ = (
+        # Episodes with denials (pattern detection)
+        Index("ix_claim_episodes_status_denial", "status", "denial_count"),
+    )
 
+    # On PostgreSQL the table is partitioned by month on created_at and the
+    # primary key is (id, created_at); id alone stays unique via its sequence
     id = Column(Integer, primary_key=True, index=True)
     claim_id = Column(Integer, ForeignKey("claims.id"), nullable=False, index=True)
     remittance_id = Column(Integer, ForeignKey("remittances.id"), index=True)
@@ -329,7 +401,7 @@ class DenialPattern(Base, TimestampMixin):
     confidence_score = Column(Float)  # ML confidence score
     
     # Pattern conditions (stored as JSON for flexibility)
-    conditions = Column(JSON)  # Conditions that trigger this pattern
+    conditions = Column(IndexedJSON)  # Conditions that trigger this pattern
     
     # Metadata
     first_seen = Column(DateTime)
@@ -392,6 +464,39 @@ class RiskScore(Base, TimestampMixin):
     claim = relationship("Claim", back_populates="risk_scores")
 
 
+class ClaimFeatureVector(Base, TimestampMixin):
+    """
+    ML feature vector of a claim, computed once and read by scoring and training.
+
+    Vectors are computed in bulk after claims are loaded and kept per feature
+    schema version (see ml.services.feature_store). A vector is recomputed when
+    it is marked stale (enough new outcomes for its payer or provider to move
+    the historical features) or when the claim was updated after ``updated_at``.
+
+    Attributes:
+        claim_id: Foreign key to Claim model
+        schema_version: FEATURE_SCHEMA_VERSION the vector was computed with
+        payer_id: Claim payer, for invalidating by payer
+        provider_id: Claim provider, for invalidating by provider
+        features: Float64 values in feature_names(include_historical=True) order
+        stale: Whether the historical features must be recomputed
+    """
+
+    __tablename__ = "claim_feature_vectors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    claim_id = Column(Integer, ForeignKey("claims.id", ondelete="CASCADE"), nullable=False)
+    schema_version = Column(Integer, nullable=False)
+    payer_id = Column(Integer, index=True)
+    provider_id = Column(Integer, index=True)
+    features = Column(LargeBinary, nullable=False)
+    stale = Column(Boolean, default=False, nullable=False)
+
+    __table_args__ = (
+        Index("ix_claim_feature_vectors_claim_version", "claim_id", "schema_version", unique=True),
+    )
+
+
 class ParserLog(Base, TimestampMixin):
     """
     Logs of parsing issues/warnings for resilience tracking.
@@ -464,6 +569,7 @@ class AuditLog(Base, TimestampMixin):
 
     __tablename__ = "audit_logs"
 
+    # Partitioned by month on created_at on PostgreSQL, like claim_episodes
     id = Column(Integer, primary_key=True, index=True)
     
     # Request information
@@ -0,0 +1,174 @@
+"""
+Adaptive batch sizes for ingest loops.
+
+A fixed batch size is either too small for a large worker (many round trips)
+or too large for a small one (memory spikes, OOM kills). AdaptiveBatchSizer
+adjusts the size after every flush:
+
+- grows it by ADAPTIVE_BATCH_GROWTH while full batches flush in under half of
+  ADAPTIVE_BATCH_TARGET_SECONDS and memory is fine
+- shrinks it in proportion when a flush takes longer than the target
+- halves it when memory_pressure() reports a warning and drops it to the
+  minimum on critical pressure
+
+Before each batch it also applies backpressure: while system memory is
+critical, ingest pauses (up to INGEST_BACKPRESSURE_MAX_WAIT_SECONDS) so other
+workers can finish and release memory instead of the host OOM-killing one.
+
+Usage:
+    sizer = AdaptiveBatchSizer("claim", initial_size=CLAIM_BATCH_SIZE)
+    for batch in sizer.batches(claims):
+        started = time.perf_counter()
+        load(batch)
+        sizer.record(len(batch), time.perf_counter() - started)
+"""
+import gc
+import os
+import time
+from typing import Iterator, Optional, Sequence
+
+from app.utils.logger import get_logger
+from app.utils.memory_monitor import (
+    PRESSURE_CRITICAL,
+    PRESSURE_WARNING,
+    PSUTIL_AVAILABLE,
+    get_memory_usage,
+    memory_pressure,
+)
+from app.utils.metrics import INGEST_BACKPRESSURE_SECONDS, INGEST_BATCH_SIZE
+
+logger = get_logger(__name__)
+
+ADAPTIVE_BATCH_MIN = int(os.getenv("ADAPTIVE_BATCH_MIN", "50"))
+ADAPTIVE_BATCH_MAX = int(os.getenv("ADAPTIVE_BATCH_MAX", "10000"))
+# Flush latency to stay under; batches grow while flushes take less than half of it
+ADAPTIVE_BATCH_TARGET_SECONDS = float(os.getenv("ADAPTIVE_BATCH_TARGET_SECONDS", "2.0"))
+ADAPTIVE_BATCH_GROWTH = 1.5
+
+INGEST_BACKPRESSURE_MAX_WAIT_SECONDS = float(os.getenv("INGEST_BACKPRESSURE_MAX_WAIT_SECONDS", "30"))
+INGEST_BACKPRESSURE_POLL_SECONDS = float(os.getenv("INGEST_BACKPRESSURE_POLL_SECONDS", "0.5"))
+
+
+def wait_for_memory_headroom(entity: str) -> float:
+    """
+    Pause while system memory is critical.
+
+    Args:
+        entity: What is being ingested (metric label)
+
+    Returns:
+        Seconds paused (0.0 if there was headroom)
+    """
+    if memory_pressure() != PRESSURE_CRITICAL:
+        return 0.0
+
+    logger.warning("System memory critical, pausing ingest", entity=entity)
+    gc.collect()
+    waited = 0.0
+    while waited < INGEST_BACKPRESSURE_MAX_WAIT_SECONDS and memory_pressure() == PRESSURE_CRITICAL:
+        time.sleep(INGEST_BACKPRESSURE_POLL_SECONDS)
+        waited += INGEST_BACKPRESSURE_POLL_SECONDS
+
+    INGEST_BACKPRESSURE_SECONDS.inc(waited, entity=entity)
+    logger.info("Resuming ingest", entity=entity, paused_seconds=waited)
+    return waited
+
+
+class AdaptiveBatchSizer:
+    """Batch size controller driven by flush latency and memory pressure."""
+
+    def __init__(
+        self,
+        entity: str,
+        initial_size: int,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        target_seconds: Optional[float] = None,
+    ):
+        """
+        Initialize sizer.
+
+        Args:
+            entity: What is being ingested, e.g. "claim" (metric label)
+            initial_size: First batch size
+            min_size: Smallest batch size (default ADAPTIVE_BATCH_MIN)
+            max_size: Largest batch size (default ADAPTIVE_BATCH_MAX)
+            target_seconds: Flush latency target (default ADAPTIVE_BATCH_TARGET_SECONDS)
+        """
+        self.entity = entity
+        self.min_size = min_size or ADAPTIVE_BATCH_MIN
+        self.max_size = max(max_size or ADAPTIVE_BATCH_MAX, self.min_size)
+        self.target_seconds = target_seconds or ADAPTIVE_BATCH_TARGET_SECONDS
+        self.size = self._clamp(initial_size)
+        # Growth is measured from here, so data the task already holds is not pressure
+        self.baseline_mb = get_memory_usage() if PSUTIL_AVAILABLE else None
+        self.paused_seconds = 0.0
+        INGEST_BATCH_SIZE.set(self.size, entity=entity)
+
+    def _clamp(self, size: float) -> int:
+        return max(self.min_size, min(self.max_size, int(size)))
+
+    def batches(self, items: Sequence) -> Iterator[Sequence]:
+        """
+        Slice ``items`` into batches of the current size.
+
+        The size is read again for every batch, so record() calls between
+        batches take effect immediately.
+
+        Args:
+            items: Sequence to split
+
+        Yields:
+            Consecutive slices of ``items``
+        """
+        start = 0
+        while start < len(items):
+            self.wait_for_headroom()
+            batch = items[start:start + self.size]
+            start += len(batch)
+            yield batch
+
+    def wait_for_headroom(self) -> None:
+        """Apply backpressure before the next batch (see wait_for_memory_headroom)."""
+        waited = wait_for_memory_headroom(self.entity)
+        if waited:
+            self.paused_seconds += waited
+            self._resize(self.min_size, "backpressure")
+
+    def record(self, rows: int, seconds: float) -> int:
+        """
+        Adjust the batch size after a flush.
+
+        Args:
+            rows: Rows in the flushed batch
+            seconds: Flush latency
+
+        Returns:
+            The new batch size
+        """
+        pressure = memory_pressure(self.baseline_mb)
+        if pressure == PRESSURE_CRITICAL:
+            gc.collect()
+            self._resize(self.min_size, "memory_critical")
+        elif pressure == PRESSURE_WARNING:
+            self._resize(self.size / 2, "memory_warning")
+        elif seconds > self.target_seconds:
+            self._resize(self.size * max(0.5, self.target_seconds / seconds), "slow_flush")
+        elif rows >= self.size and seconds < self.target_seconds / 2:
+            # Only full batches say anything about headroom at this size
+            self._resize(self.size * ADAPTIVE_BATCH_GROWTH, "grow")
+        return self.size
+
+    def _resize(self, size: float, reason: str) -> None:
+        size = self._clamp(size)
+        if size == self.size:
+            return
+        logger.debug(
+            "Adjusted ingest batch size",
+            entity=self.entity,
+            previous=self.size,
+            size=size,
+            reason=reason,
+        )
+        self.size = size
+        INGEST_BATCH_SIZE.set(size, entity=self.entity)
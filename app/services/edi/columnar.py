@@ -0,0 +1,325 @@
+"""
+Columnar, typed batches of parsed claims.
+
+Parsers return one nested dict per claim and per service line, and turning
+those into rows used to cost a round of Python work per claim: an ORM object
+per claim and line, NPI validation, amount and date conversion field by field,
+and one parser log INSERT per claim with warnings.
+
+A ClaimBatch holds a chunk of claims as one typed array per field:
+
+- identifiers (control numbers, NPIs, payer IDs, codes) as object arrays
+- dates as int32 days since 1970-01-01 (NULL_DAYS for missing)
+- amounts as int64 cents (NULL_CENTS for missing)
+
+Service lines are stored the same way with ``line_claim_index`` pointing at
+the claim row, so a batch is two flat tables. Validation and conversion run
+once per column with numpy, and EDITransformer.load_837_batch inserts a whole
+batch with a handful of statements.
+
+Usage:
+    for batch in iter_claim_batches(parsed_data["claims"]):
+        claim_ids = transformer.load_837_batch(batch)
+"""
+import os
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.decimal_utils import parse_financial_amount
+
+# Claims per batch (one INSERT for claims, one for lines, one for parser logs)
+CLAIM_BATCH_SIZE = int(os.getenv("EDI_CLAIM_BATCH_SIZE", "1000"))
+
+NULL_DAYS = np.iinfo(np.int32).min
+NULL_CENTS = np.iinfo(np.int64).min
+
+CLAIM_DATE_FIELDS = ("statement_date", "admission_date", "discharge_date", "service_date")
+CLAIM_TEXT_FIELDS = (
+    "claim_control_number",
+    "patient_control_number",
+    "attending_provider_npi",
+    "payer_id",
+    "payer_name",
+    "facility_type_code",
+    "claim_frequency_type",
+    "assignment_code",
+    "principal_diagnosis",
+)
+LINE_TEXT_FIELDS = ("line_number", "revenue_code", "procedure_code", "procedure_modifier", "unit_type")
+
+# Amounts must fit int64 cents; larger values are treated as invalid
+MAX_CENTS = 10 ** 17
+# Longest integer part the vectorized parser accepts
+_MAX_AMOUNT_DIGITS = 15
+
+
+def _text_array(values: Iterable[Any]) -> np.ndarray:
+    """Stripped string array with None and non-strings as empty strings."""
+    text = np.asarray([value if isinstance(value, str) else "" for value in values], dtype=str)
+    return np.char.strip(text) if text.size else text
+
+
+def _digits(text: np.ndarray, width: int) -> np.ndarray:
+    """Digit values of the first ``width`` characters of each string (-48 for padding)."""
+    fixed = np.char.ljust(text, width).astype(f"U{width}")
+    return fixed.view(np.uint32).reshape(len(text), width).astype(np.int64) - ord("0")
+
+
+def parse_edi_dates(values: Sequence[Optional[str]]) -> np.ndarray:
+    """
+    Parse EDI dates (CCYYMMDD, or YYMMDD as 20YY) to days since 1970-01-01.
+
+    Args:
+        values: Date strings (None and invalid dates are allowed)
+
+    Returns:
+        int32 array of days, NULL_DAYS where the value is missing or invalid
+    """
+    text = _text_array(values)
+    if not text.size:
+        return np.empty(0, dtype=np.int32)
+
+    lengths = np.char.str_len(text)
+    text = np.where(lengths == 6, np.char.add("20", text), text)
+    digits = _digits(text, 8)
+    valid = ((lengths == 8) | (lengths == 6)) & ((digits >= 0) & (digits <= 9)).all(axis=1)
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 4] * 10 + digits[:, 5]
+    day = digits[:, 6] * 10 + digits[:, 7]
+    valid &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1)
+
+    months = np.where(valid, (year - 1970) * 12 + month - 1, 0)
+    month_start = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    next_month = (months + 1).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    days = month_start + day - 1
+    valid &= days < next_month
+
+    return np.where(valid, days, NULL_DAYS).astype(np.int32)
+
+
+def datetimes_to_days(values: Sequence[Optional[date]]) -> np.ndarray:
+    """
+    Convert parsed dates/datetimes to days since 1970-01-01.
+
+    Args:
+        values: date or datetime objects (None allowed); the time of day is dropped
+
+    Returns:
+        int32 array of days, NULL_DAYS where the value is None
+    """
+    days = np.array(values, dtype="datetime64[D]").astype(np.int64)
+    return np.where(days == np.iinfo(np.int64).min, NULL_DAYS, days).astype(np.int32)
+
+
+def days_to_datetimes(days: np.ndarray) -> List[Optional[datetime]]:
+    """
+    Convert days since 1970-01-01 back to datetimes at midnight.
+
+    Args:
+        days: int32 array from parse_edi_dates/datetimes_to_days
+
+    Returns:
+        List of datetimes, None where the value is NULL_DAYS
+    """
+    values = np.where(
+        days == NULL_DAYS,
+        np.datetime64("NaT", "D"),
+        days.astype(np.int64).astype("datetime64[D]"),
+    )
+    return values.astype("datetime64[us]").astype(object).tolist()
+
+
+def parse_amounts(values: Sequence[Optional[str]]) -> np.ndarray:
+    """
+    Parse decimal amount strings to cents, rounding half up like parse_financial_amount.
+
+    Plain ``[-]digits[.digits]`` strings are parsed vectorized; anything else that is
+    not empty (exponents, a leading ``+``, very long values) goes through
+    parse_financial_amount so the result is identical.
+
+    Args:
+        values: Amount strings (None and invalid amounts are allowed)
+
+    Returns:
+        int64 array of cents, NULL_CENTS where the value is missing, invalid or
+        not below MAX_CENTS in magnitude
+    """
+    text = _text_array(values)
+    if not text.size:
+        return np.empty(0, dtype=np.int64)
+
+    head, sign, unsigned = np.char.partition(text, "-").T
+    negative = sign == "-"
+    unsigned = np.where(negative, unsigned, text)
+    whole, point, fraction = np.char.partition(unsigned, ".").T
+
+    valid = (
+        ((head == "") | ~negative)
+        & ((whole != "") | (fraction != ""))
+        & ((whole == "") | np.char.isdigit(whole))
+        & ((fraction == "") | np.char.isdigit(fraction))
+        & (np.char.str_len(whole) <= _MAX_AMOUNT_DIGITS)
+    )
+
+    whole = np.where(valid & (whole != ""), whole, "0").astype(np.int64)
+    fraction_digits = _digits(np.where(valid, fraction, ""), 3)
+    fraction_digits = np.where(fraction_digits < 0, 0, fraction_digits)  # padding
+    cents = whole * 100 + fraction_digits[:, 0] * 10 + fraction_digits[:, 1] + (fraction_digits[:, 2] >= 5)
+    cents = np.where(negative, -cents, cents)
+    cents = np.where(valid, cents, NULL_CENTS)
+
+    # Rare formats Decimal accepts but the vectorized parser does not
+    for index in np.flatnonzero(~valid & (text != "")):
+        amount = parse_financial_amount(str(text[index]))
+        if amount is not None and amount.is_finite() and abs(amount * 100) < MAX_CENTS:
+            cents[index] = int((amount * 100).to_integral_value(ROUND_HALF_UP))
+    return cents
+
+
+def amounts_to_cents(values: Sequence[Optional[Any]]) -> np.ndarray:
+    """
+    Convert parsed amounts (floats/Decimals with 2 decimal places) to cents.
+
+    Args:
+        values: Numeric amounts (None allowed)
+
+    Returns:
+        int64 array of cents, NULL_CENTS where the value is None or not below
+        MAX_CENTS in magnitude
+    """
+    amounts = np.array(
+        [np.nan if value is None else float(value) for value in values], dtype=np.float64
+    )
+    missing = ~(np.abs(amounts) * 100 < MAX_CENTS)
+    cents = np.rint(np.where(missing, 0.0, amounts) * 100).astype(np.int64)
+    return np.where(missing, NULL_CENTS, cents)
+
+
+def cents_to_amounts(cents: np.ndarray) -> List[Optional[float]]:
+    """
+    Convert cents back to float amounts as stored in the database.
+
+    Args:
+        cents: int64 array of cents
+
+    Returns:
+        List of amounts, None where the value is NULL_CENTS
+    """
+    amounts = (cents / 100).tolist()
+    return [None if c == NULL_CENTS else amount for c, amount in zip(cents.tolist(), amounts)]
+
+
+def valid_npi_mask(values: Sequence[Optional[Any]]) -> np.ndarray:
+    """
+    Check NPIs for the 10-digit format.
+
+    Args:
+        values: NPI values (None allowed)
+
+    Returns:
+        Boolean array, True where the NPI is 10 digits (after stripping whitespace)
+    """
+    text = _text_array(str(value) if value is not None else None for value in values)
+    if not text.size:
+        return np.zeros(0, dtype=bool)
+    return (np.char.str_len(text) == 10) & np.char.isdigit(text)
+
+
+def _days_column(values: List[Any]) -> np.ndarray:
+    if any(isinstance(value, str) for value in values):
+        return parse_edi_dates(values)
+    return datetimes_to_days(values)
+
+
+def _cents_column(values: List[Any]) -> np.ndarray:
+    if any(isinstance(value, str) for value in values):
+        return parse_amounts(values)
+    return amounts_to_cents([value if isinstance(value, (int, float, Decimal)) else None for value in values])
+
+
+def _object_column(values: List[Any]) -> np.ndarray:
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+class ClaimBatch:
+    """
+    A chunk of parsed 837 claims stored column by column.
+
+    Scalar claim fields are numpy arrays indexed by claim row; the ragged fields
+    (diagnosis codes, warnings, raw segments) are plain lists. Service line
+    fields are arrays indexed by line row with ``line_claim_index`` giving the
+    claim row of each line.
+    """
+
+    def __init__(self, claims: List[Dict]):
+        """
+        Build the columns from parser output.
+
+        Dates and amounts may be raw EDI strings or the typed values the
+        parsers produce (datetime, float).
+
+        Args:
+            claims: Parsed claim dictionaries
+        """
+        self.size = len(claims)
+
+        for field in CLAIM_TEXT_FIELDS:
+            setattr(self, field, _object_column([claim.get(field) for claim in claims]))
+        for field in CLAIM_DATE_FIELDS:
+            setattr(self, field, _days_column([claim.get(field) for claim in claims]))
+        self.total_charge_cents = _cents_column([claim.get("total_charge_amount") for claim in claims])
+        self.is_incomplete = np.array([bool(claim.get("is_incomplete", False)) for claim in claims], dtype=bool)
+
+        self.diagnosis_codes = [claim.get("diagnosis_codes") for claim in claims]
+        self.warnings = [list(claim.get("warnings") or []) for claim in claims]
+        self.raw_blocks = [claim.get("raw_block", []) for claim in claims]
+        self.block_index = [claim.get("block_index") for claim in claims]
+
+        lines = [(row, line) for row, claim in enumerate(claims) for line in claim.get("lines") or []]
+        self.line_count = len(lines)
+        self.line_claim_index = np.array([row for row, _ in lines], dtype=np.int32)
+        for field in LINE_TEXT_FIELDS:
+            setattr(self, f"line_{field}", _object_column([line.get(field) for _, line in lines]))
+        self.line_charge_cents = _cents_column([line.get("charge_amount") for _, line in lines])
+        self.line_unit_count = np.array(
+            [np.nan if line.get("unit_count") is None else float(line["unit_count"]) for _, line in lines],
+            dtype=np.float64,
+        )
+        self.line_service_date = _days_column([line.get("service_date") for _, line in lines])
+        self.line_raw = [line for _, line in lines]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def valid_npis(self) -> np.ndarray:
+        """Boolean mask of claims whose attending provider NPI is a valid 10-digit NPI."""
+        return valid_npi_mask(self.attending_provider_npi)
+
+
+def iter_claim_batches(
+    claims: Iterable[Dict], batch_size: Optional[int] = None
+) -> Iterator[ClaimBatch]:
+    """
+    Split parsed claims into columnar batches.
+
+    Args:
+        claims: Parsed claim dictionaries (a list or any iterable, e.g. a generator)
+        batch_size: Claims per batch (default EDI_CLAIM_BATCH_SIZE)
+
+    Yields:
+        ClaimBatch for each chunk of claims
+    """
+    batch_size = batch_size or CLAIM_BATCH_SIZE
+    iterator = iter(claims)
+    while True:
+        chunk = list(islice(iterator, batch_size))
+        if not chunk:
+            return
+        yield ClaimBatch(chunk)
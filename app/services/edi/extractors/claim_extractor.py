@@ -9,6 +9,14 @@ from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# DTP qualifier -> claim date field
+CLAIM_DATE_QUALIFIER_MAP = {
+    "434": "statement_date",
+    "435": "admission_date",
+    "096": "discharge_date",
+    "472": "service_date",
+}
+
 
 class ClaimExtractor:
     """Extract claim header information."""
@@ -21,6 +29,28 @@ class ClaimExtractor:
         self, clm_segment: List[str], block: List[List[str]], warnings: List[str]
     ) -> Dict:
         """Extract claim data from CLM segment and related segments."""
+        claim_data = self.extract_header(clm_segment, warnings)
+        if not claim_data:
+            return claim_data
+
+        # Extract dates from DTP segments in the block
+        dtp_segments = self._find_segments_in_block(block, "DTP")
+        dates = self._extract_dates(dtp_segments, warnings)
+        claim_data.update(dates)
+
+        return claim_data
+
+    def extract_header(self, clm_segment: List[str], warnings: List[str]) -> Dict:
+        """
+        Extract claim header fields from the CLM segment alone.
+
+        Args:
+            clm_segment: CLM segment elements
+            warnings: List to append warnings to
+
+        Returns:
+            Claim data dictionary (empty if the CLM segment is too short)
+        """
         claim_data = {}
 
         # CLM segment (required)
@@ -70,11 +100,6 @@ class ClaimExtractor:
         # Assignment/plan participation code (CLM07)
         claim_data["assignment_code"] = self.validator.safe_get_element(clm_segment, 7)
 
-        # Extract dates from DTP segments in the block
-        dtp_segments = self._find_segments_in_block(block, "DTP")
-        dates = self._extract_dates(dtp_segments, warnings)
-        claim_data.update(dates)
-
         return claim_data
 
     def _find_segments_in_block(self, block: List[List[str]], segment_id: str) -> List[List[str]]:
@@ -90,34 +115,34 @@ class ClaimExtractor:
     def _extract_dates(self, dtp_segments: List[List[str]], warnings: List[str]) -> Dict:
         """Extract dates from DTP segments."""
         dates = {}
-
-        # Date qualifier mapping
-        date_qualifier_map = {
-            "434": "statement_date",
-            "435": "admission_date",
-            "096": "discharge_date",
-            "472": "service_date",
-        }
-
         for dtp in dtp_segments:
-            if len(dtp) < 4:
-                continue
-
-            qualifier = self.validator.safe_get_element(dtp, 1)
-            date_format = self.validator.safe_get_element(dtp, 2)
-            date_value = self.validator.safe_get_element(dtp, 3)
-
-            if qualifier in date_qualifier_map and date_value:
-                try:
-                    # Parse date based on format (D8 = CCYYMMDD)
-                    # Optimize: use direct string slicing instead of strptime for better performance
-                    if date_format == "D8" and len(date_value) == 8:
-                        parsed_date = datetime(
-                            int(date_value[0:4]), int(date_value[4:6]), int(date_value[6:8])
-                        )
-                        dates[date_qualifier_map[qualifier]] = parsed_date
-                except (ValueError, TypeError) as e:
-                    warnings.append(f"Failed to parse date {date_value}: {str(e)}")
-
+            self.extract_date(dtp, dates, warnings)
         return dates
 
+    def extract_date(self, dtp: List[str], dates: Dict, warnings: List[str]) -> None:
+        """
+        Add the date from one DTP segment to ``dates`` if its qualifier is a claim date.
+
+        Args:
+            dtp: DTP segment elements
+            dates: Date field name -> datetime, updated in place (later segments win)
+            warnings: List to append warnings to
+        """
+        if len(dtp) < 4:
+            return
+
+        qualifier = self.validator.safe_get_element(dtp, 1)
+        date_format = self.validator.safe_get_element(dtp, 2)
+        date_value = self.validator.safe_get_element(dtp, 3)
+
+        if qualifier in CLAIM_DATE_QUALIFIER_MAP and date_value:
+            try:
+                # Parse date based on format (D8 = CCYYMMDD)
+                # Optimize: use direct string slicing instead of strptime for better performance
+                if date_format == "D8" and len(date_value) == 8:
+                    parsed_date = datetime(
+                        int(date_value[0:4]), int(date_value[4:6]), int(date_value[6:8])
+                    )
+                    dates[CLAIM_DATE_QUALIFIER_MAP[qualifier]] = parsed_date
+            except (ValueError, TypeError) as e:
+                warnings.append(f"Failed to parse date {date_value}: {str(e)}")
@@ -0,0 +1,133 @@
+"""Extract claim, diagnosis and line data from a claim block in a single pass."""
+from typing import Dict, List
+
+from app.services.edi.config import ParserConfig
+from app.services.edi.extractors.claim_extractor import ClaimExtractor
+from app.services.edi.extractors.diagnosis_extractor import DiagnosisExtractor
+from app.services.edi.extractors.line_extractor import LineExtractor
+from app.services.edi.extractors.payer_extractor import PayerExtractor
+from app.services.edi.validator import SegmentValidator
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Segments after an SV2 that may hold the line's DTP*472 (same window as LineExtractor)
+SERVICE_DATE_WINDOW = 9
+
+
+class ClaimLoopExtractor:
+    """
+    Loop-aware claim extractor.
+
+    Walks a claim block once as a state machine over the 2300 (claim) and 2400
+    (service line) loops and fills the claim, diagnosis and line structures in
+    the same pass. ClaimExtractor, DiagnosisExtractor and LineExtractor each
+    rescan the block, and LineExtractor locates every LX and SV2 by comparing
+    whole segments, which is quadratic in the number of service lines.
+
+    The output (including the order of warnings) matches running ClaimExtractor,
+    PayerExtractor, DiagnosisExtractor and LineExtractor in that order. The one
+    intended difference is that lines are resolved by position: the legacy
+    extractors match segments by value, so two identical LX or SV2 segments
+    in one claim both resolved to the first occurrence.
+    """
+
+    def __init__(self, config: ParserConfig):
+        self.config = config
+        self.validator = SegmentValidator(config)
+        self.claim_extractor = ClaimExtractor(config)
+        self.diagnosis_extractor = DiagnosisExtractor(config)
+        self.line_extractor = LineExtractor(config)
+        self.payer_extractor = PayerExtractor(config)
+
+    def extract(
+        self, clm_segment: List[str], block: List[List[str]], warnings: List[str]
+    ) -> Dict:
+        """
+        Extract all claim data from a claim block.
+
+        Args:
+            clm_segment: The claim's CLM segment
+            block: Segments of the claim block
+            warnings: List to append warnings to
+
+        Returns:
+            Claim data including payer, diagnosis fields and ``lines``
+        """
+        claim_warnings: List[str] = []
+        line_warnings: List[str] = []
+
+        claim_data = self.claim_extractor.extract_header(clm_segment, claim_warnings)
+        # Dates are only extracted when the CLM segment itself was usable
+        extract_dates = bool(claim_data)
+        dates: Dict = {}
+
+        diagnosis_data = {
+            "diagnosis_codes": [],
+            "principal_diagnosis": None,
+        }
+        has_hi = False
+
+        lines: List[Dict] = []
+        # 2400 loop state: an LX waiting for its SV2, and a line waiting for its service date
+        awaiting_sv2 = False
+        line_number = None
+        dated_line = None
+        date_window_end = -1
+
+        for index, seg in enumerate(block):
+            if not seg:
+                continue
+            seg_id = seg[0]
+
+            if dated_line is not None:
+                if index > date_window_end or seg_id == "SV2" or seg_id == "LX":
+                    dated_line = None
+                elif seg_id == "DTP" and len(seg) >= 4:
+                    service_date = self.line_extractor.service_date_from_dtp(seg)
+                    if service_date:
+                        dated_line["service_date"] = service_date
+                        dated_line = None
+
+            if seg_id == "DTP":
+                if extract_dates:
+                    self.claim_extractor.extract_date(seg, dates, claim_warnings)
+            elif seg_id == "HI":
+                has_hi = True
+                self.diagnosis_extractor.extract_hi(seg, diagnosis_data)
+            elif seg_id == "LX":
+                if awaiting_sv2:
+                    line_warnings.append(f"SV2 segment not found for line {line_number}")
+                awaiting_sv2 = len(seg) >= 2
+                line_number = self.validator.safe_get_element(seg, 1) if awaiting_sv2 else None
+            elif seg_id == "SV2":
+                if awaiting_sv2:
+                    awaiting_sv2 = False
+                    line_data = self.line_extractor.extract_sv2(line_number, seg, line_warnings)
+                    lines.append(line_data)
+                    if len(seg) >= 4:
+                        dated_line = line_data
+                        date_window_end = index + SERVICE_DATE_WINDOW
+            elif seg_id == "CLM":
+                # A following claim ends the current line loop
+                if awaiting_sv2:
+                    line_warnings.append(f"SV2 segment not found for line {line_number}")
+                    awaiting_sv2 = False
+
+        if awaiting_sv2:
+            line_warnings.append(f"SV2 segment not found for line {line_number}")
+
+        claim_data.update(dates)
+        warnings.extend(claim_warnings)
+
+        # SBR/NM1 lookups stop at the first match, so the payer scan stays cheap
+        claim_data.update(self.payer_extractor.extract(block, warnings))
+
+        if not has_hi:
+            warnings.append("No HI segments found")
+        claim_data.update(diagnosis_data)
+
+        warnings.extend(line_warnings)
+        claim_data["lines"] = lines
+
+        return claim_data
@@ -43,30 +43,41 @@ class DiagnosisExtractor:
             return diagnosis_data
 
         for hi_seg in hi_segments:
-            if len(hi_seg) < 2:
-                continue
-
-            # HI01 - Health care code information
-            code_info = self.validator.safe_get_element(hi_seg, 1)
-            if code_info:
-                code_data = self._parse_code_info(code_info)
-                if code_data:
-                    diagnosis_data["diagnosis_codes"].append(code_data)
-
-                    # Check if this is principal diagnosis
-                    if code_data.get("qualifier") in ["ABK", "ABJ"]:
-                        diagnosis_data["principal_diagnosis"] = code_data.get("code")
-
-            # HI02 - Additional health care code information (optional)
-            if len(hi_seg) > 2:
-                code_info2 = self.validator.safe_get_element(hi_seg, 2)
-                if code_info2:
-                    code_data2 = self._parse_code_info(code_info2)
-                    if code_data2:
-                        diagnosis_data["diagnosis_codes"].append(code_data2)
+            self.extract_hi(hi_seg, diagnosis_data)
 
         return diagnosis_data
 
+    def extract_hi(self, hi_seg: List[str], diagnosis_data: Dict) -> None:
+        """
+        Add the codes from one HI segment to ``diagnosis_data``.
+
+        Args:
+            hi_seg: HI segment elements
+            diagnosis_data: Dictionary with ``diagnosis_codes`` and ``principal_diagnosis``,
+                updated in place
+        """
+        if len(hi_seg) < 2:
+            return
+
+        # HI01 - Health care code information
+        code_info = self.validator.safe_get_element(hi_seg, 1)
+        if code_info:
+            code_data = self._parse_code_info(code_info)
+            if code_data:
+                diagnosis_data["diagnosis_codes"].append(code_data)
+
+                # Check if this is principal diagnosis
+                if code_data.get("qualifier") in ["ABK", "ABJ"]:
+                    diagnosis_data["principal_diagnosis"] = code_data.get("code")
+
+        # HI02 - Additional health care code information (optional)
+        if len(hi_seg) > 2:
+            code_info2 = self.validator.safe_get_element(hi_seg, 2)
+            if code_info2:
+                code_data2 = self._parse_code_info(code_info2)
+                if code_data2:
+                    diagnosis_data["diagnosis_codes"].append(code_data2)
+
     def _find_segments_in_block(self, block: List[List[str]], segment_id: str) -> List[List[str]]:
         """
         Find all segments of a type in block. Optimized with list comprehension.
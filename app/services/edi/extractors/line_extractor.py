@@ -94,6 +94,29 @@ class LineExtractor:
         self, line_number: str, sv2_seg: List[str], block: List[List[str]], warnings: List[str]
     ) -> Dict:
         """Extract data from SV2 segment."""
+        line_data = self.extract_sv2(line_number, sv2_seg, warnings)
+        if len(sv2_seg) < 4:
+            return line_data
+
+        # Find service date from DTP segment after SV2
+        service_date = self._find_service_date_after_sv2(block, sv2_seg)
+        if service_date:
+            line_data["service_date"] = service_date
+
+        return line_data
+
+    def extract_sv2(self, line_number: str, sv2_seg: List[str], warnings: List[str]) -> Dict:
+        """
+        Extract line fields from the SV2 segment alone (without the service date).
+
+        Args:
+            line_number: Line number from the LX segment
+            sv2_seg: SV2 segment elements
+            warnings: List to append warnings to
+
+        Returns:
+            Line data dictionary
+        """
         line_data = {
             "line_number": line_number,
         }
@@ -160,11 +183,6 @@ class LineExtractor:
         else:
             line_data["unit_count"] = None
 
-        # Find service date from DTP segment after SV2
-        service_date = self._find_service_date_after_sv2(block, sv2_seg)
-        if service_date:
-            line_data["service_date"] = service_date
-
         return line_data
 
     def _find_service_date_after_sv2(
@@ -192,24 +210,38 @@ class LineExtractor:
                 continue
             seg_id = seg[0]
             if seg_id == "DTP" and len(seg) >= 4:
-                qualifier = self.validator.safe_get_element(seg, 1)
-                if qualifier == "472":  # Service date
-                    date_format = self.validator.safe_get_element(seg, 2)
-                    date_value = self.validator.safe_get_element(seg, 3)
-                    if date_format == "D8" and len(date_value) == 8:
-                        try:
-                            # Optimize: use direct string slicing instead of strptime for better performance
-                            return datetime(
-                                int(date_value[0:4]), int(date_value[4:6]), int(date_value[6:8])
-                            )
-                        except (ValueError, TypeError):
-                            pass
+                service_date = self.service_date_from_dtp(seg)
+                if service_date:
+                    return service_date
             # Stop if we hit another SV2 or LX
             elif seg_id in termination_segments:
                 break
 
         return None
 
+    def service_date_from_dtp(self, dtp: List[str]) -> Optional[datetime]:
+        """
+        Parse a line service date (DTP*472 in D8 format).
+
+        Args:
+            dtp: DTP segment elements (at least 4)
+
+        Returns:
+            Service date, or None if the segment is not a valid service date
+        """
+        qualifier = self.validator.safe_get_element(dtp, 1)
+        if qualifier != "472":  # Service date
+            return None
+        date_format = self.validator.safe_get_element(dtp, 2)
+        date_value = self.validator.safe_get_element(dtp, 3)
+        if date_format == "D8" and len(date_value) == 8:
+            try:
+                # Optimize: use direct string slicing instead of strptime for better performance
+                return datetime(int(date_value[0:4]), int(date_value[4:6]), int(date_value[6:8]))
+            except (ValueError, TypeError):
+                pass
+        return None
+
     def _validate_procedure_code(self, code: str) -> bool:
         """
         Validate procedure code format (CPT or HCPCS).
@@ -15,8 +15,10 @@ continuing processing even when segments are missing or malformed.
 import gc
 from typing import Dict, List, Optional, Generator
 
+from app.services.edi.adaptive_batch import wait_for_memory_headroom
 from app.services.edi.config import get_parser_config
 from app.services.edi.extractors.claim_extractor import ClaimExtractor
+from app.services.edi.extractors.claim_loop_extractor import ClaimLoopExtractor
 from app.services.edi.extractors.diagnosis_extractor import DiagnosisExtractor
 from app.services.edi.extractors.line_extractor import LineExtractor
 from app.services.edi.extractors.payer_extractor import PayerExtractor
@@ -64,6 +66,7 @@ class EDIParser:
         self.line_extractor = LineExtractor(self.config)
         self.payer_extractor = PayerExtractor(self.config)
         self.diagnosis_extractor = DiagnosisExtractor(self.config)
+        self.claim_loop_extractor = ClaimLoopExtractor(self.config)
         self.format_profile = None
 
     def parse(self, file_content: str, filename: str) -> Dict:
@@ -136,6 +139,45 @@ class EDIParser:
                 monitor.finish()
             raise ValueError(f"Unknown file type: {file_type}")
 
+    def split_claim_blocks(self, file_content: str) -> List[List[List[str]]]:
+        """
+        Split 837 content into claim blocks without extracting them.
+
+        Used to cut large files into chunks that are parsed separately; the
+        content may be a whole file or a range that starts at a subscriber HL.
+
+        Args:
+            file_content: 837 content
+
+        Returns:
+            Claim blocks, each a list of segments
+        """
+        return self._get_claim_blocks(self._split_segments(file_content))
+
+    def parse_claim_blocks(self, blocks: List[List[List[str]]], first_index: int = 0) -> List[Dict]:
+        """
+        Parse claim blocks from split_claim_blocks.
+
+        Args:
+            blocks: Claim blocks
+            first_index: Block index of the first block in the whole file
+
+        Returns:
+            Parsed claims (blocks that fail to parse are logged and skipped, as in parse())
+        """
+        parsed_claims = []
+        for offset, block in enumerate(blocks):
+            try:
+                parsed_claims.append(self._parse_claim_block(block, first_index + offset))
+            except Exception as e:
+                logger.error(
+                    "Failed to parse claim block",
+                    block_index=first_index + offset,
+                    error=str(e),
+                    exc_info=True,
+                )
+        return parsed_claims
+
     def _adapt_to_format(self, format_analysis: Dict) -> None:
         """Adapt parser configuration based on detected format."""
         # Update segment expectations based on detected segments
@@ -412,6 +454,8 @@ class EDIParser:
                 if batch_end % (batch_size * 10) == 0:
                     # Collect generation 0 (faster, less aggressive)
                     gc.collect(0)
+                    # Pause while system memory is critical (backpressure)
+                    wait_for_memory_headroom("claim")
                 # Full GC every 50 batches for very large files
                 elif batch_end % (batch_size * 50) == 0:
                     gc.collect()
@@ -518,6 +562,8 @@ class EDIParser:
                 if batch_end % (batch_size * 10) == 0:
                     # Collect generation 0 (faster, less aggressive)
                     gc.collect(0)
+                    # Pause while system memory is critical (backpressure)
+                    wait_for_memory_headroom("remittance")
                 # Full GC every 50 batches for very large files
                 elif batch_end % (batch_size * 50) == 0:
                     gc.collect()
@@ -1030,19 +1076,9 @@ class EDIParser:
                 "is_incomplete": True,
             }
 
-        claim_data = self.claim_extractor.extract(clm_seg, block, warnings)
-
-        # Extract payer information (SBR/NM1 segments)
-        payer_data = self.payer_extractor.extract(block, warnings)
-        claim_data.update(payer_data)
-
-        # Extract diagnosis codes (HI segments)
-        diagnosis_data = self.diagnosis_extractor.extract(block, warnings)
-        claim_data.update(diagnosis_data)
-
-        # Extract claim lines (LX/SV2 segments)
-        lines_data = self.line_extractor.extract(block, warnings)
-        claim_data["lines"] = lines_data
+        # Extract claim header, payer, diagnosis codes and lines; CLM/DTP/HI/LX/SV2
+        # are read in a single pass over the block
+        claim_data = self.claim_loop_extractor.extract(clm_seg, block, warnings)
 
         # Store raw block for reference
         claim_data["raw_block"] = block
@@ -1,9 +1,11 @@
 """Optimized EDI parser for large files with streaming and batch processing."""
 from typing import List, Dict, Optional, Iterator, Tuple, Generator
 import gc
+from app.services.edi.adaptive_batch import wait_for_memory_headroom
 from app.services.edi.config import get_parser_config, ParserConfig
 from app.services.edi.validator import SegmentValidator
 from app.services.edi.extractors.claim_extractor import ClaimExtractor
+from app.services.edi.extractors.claim_loop_extractor import ClaimLoopExtractor
 from app.services.edi.extractors.line_extractor import LineExtractor
 from app.services.edi.extractors.payer_extractor import PayerExtractor
 from app.services.edi.extractors.diagnosis_extractor import DiagnosisExtractor
@@ -45,6 +47,7 @@ class OptimizedEDIParser:
         self.line_extractor = LineExtractor(self.config)
         self.payer_extractor = PayerExtractor(self.config)
         self.diagnosis_extractor = DiagnosisExtractor(self.config)
+        self.claim_loop_extractor = ClaimLoopExtractor(self.config)
         self.format_profile = None
 
     def parse(
@@ -386,19 +389,9 @@ class OptimizedEDIParser:
                 "is_incomplete": True,
             }
         
-        claim_data = self.claim_extractor.extract(clm_seg, block, warnings)
-        
-        # Extract payer information (SBR/NM1 segments)
-        payer_data = self.payer_extractor.extract(block, warnings)
-        claim_data.update(payer_data)
-        
-        # Extract diagnosis codes (HI segments)
-        diagnosis_data = self.diagnosis_extractor.extract(block, warnings)
-        claim_data.update(diagnosis_data)
-        
-        # Extract claim lines (LX/SV2 segments)
-        lines_data = self.line_extractor.extract(block, warnings)
-        claim_data["lines"] = lines_data
+        # Extract claim header, payer, diagnosis codes and lines; CLM/DTP/HI/LX/SV2
+        # are read in a single pass over the block
+        claim_data = self.claim_loop_extractor.extract(clm_seg, block, warnings)
         
         # Store raw block for reference
         claim_data["raw_block"] = block
@@ -907,6 +900,8 @@ class OptimizedEDIParser:
                 
                 if batch_end % (batch_size * 10) == 0:
                     gc.collect(0)
+                    # Pause while system memory is critical (backpressure)
+                    wait_for_memory_headroom("claim")
                 elif batch_end % (batch_size * 50) == 0:
                     gc.collect()
             
@@ -1018,6 +1013,8 @@ class OptimizedEDIParser:
                 
                 if batch_end % (batch_size * 10) == 0:
                     gc.collect(0)
+                    # Pause while system memory is critical (backpressure)
+                    wait_for_memory_headroom("remittance")
                 elif batch_end % (batch_size * 50) == 0:
                     gc.collect()
             
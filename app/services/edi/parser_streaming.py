@@ -5,6 +5,7 @@ from io import StringIO
 
 from app.services.edi.config import get_parser_config
 from app.services.edi.extractors.claim_extractor import ClaimExtractor
+from app.services.edi.extractors.claim_loop_extractor import ClaimLoopExtractor
 from app.services.edi.extractors.diagnosis_extractor import DiagnosisExtractor
 from app.services.edi.extractors.line_extractor import LineExtractor
 from app.services.edi.extractors.payer_extractor import PayerExtractor
@@ -44,6 +45,7 @@ class StreamingEDIParser:
         self.line_extractor = LineExtractor(self.config)
         self.payer_extractor = PayerExtractor(self.config)
         self.diagnosis_extractor = DiagnosisExtractor(self.config)
+        self.claim_loop_extractor = ClaimLoopExtractor(self.config)
         self.format_profile = None
 
     def parse(
@@ -795,19 +797,9 @@ class StreamingEDIParser:
                 "is_incomplete": True,
             }
 
-        claim_data = self.claim_extractor.extract(clm_seg, block, warnings)
-
-        # Extract payer information (SBR/NM1 segments)
-        payer_data = self.payer_extractor.extract(block, warnings)
-        claim_data.update(payer_data)
-
-        # Extract diagnosis codes (HI segments)
-        diagnosis_data = self.diagnosis_extractor.extract(block, warnings)
-        claim_data.update(diagnosis_data)
-
-        # Extract claim lines (LX/SV2 segments)
-        lines_data = self.line_extractor.extract(block, warnings)
-        claim_data["lines"] = lines_data
+        # Extract claim header, payer, diagnosis codes and lines; CLM/DTP/HI/LX/SV2
+        # are read in a single pass over the block
+        claim_data = self.claim_loop_extractor.extract(clm_seg, block, warnings)
 
         # Store raw block for reference
         claim_data["raw_block"] = block
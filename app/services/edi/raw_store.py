@@ -0,0 +1,329 @@
+"""
+Content-addressed store for raw EDI file content.
+
+Claims and remittances used to copy their raw segments (``raw_edi_data``) and
+the full parsed dictionary (``parsed_segments``) into their own rows, so every
+ingest wrote the file content into the hot tables again, row by row. Instead,
+each uploaded file is stored once in ``edi_raw_files`` (keyed by its SHA-256)
+and every row keeps a ``(raw_file_hash, raw_offset, raw_length)`` pointer to
+its segments.
+
+The file is compressed in independent zlib chunks (EDI_RAW_STORE_CHUNK_SIZE
+uncompressed bytes each). Reading one row's segments fetches and decompresses
+only the chunks covering its byte range.
+
+Usage:
+    file_hash = store_raw_file(db, raw_bytes, filename, "837")
+    locator = RawBlockLocator(file_hash, raw_bytes)
+    transformer = EDITransformer(db, practice_id, filename, raw_locator=locator)
+    ...
+    segments = get_raw_segments(db, claim)  # only when the raw data is requested
+"""
+import ast
+import hashlib
+import os
+import zlib
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.database import EDIRawFile
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RAW_STORE_CHUNK_SIZE = int(os.getenv("EDI_RAW_STORE_CHUNK_SIZE", str(256 * 1024)))
+RAW_STORE_COMPRESSION_LEVEL = int(os.getenv("EDI_RAW_STORE_COMPRESSION_LEVEL", "6"))
+
+SEGMENT_TERMINATOR = b"~"
+ELEMENT_SEPARATOR = "*"
+
+
+def hash_content(raw: bytes) -> str:
+    """
+    Get the content address of a file.
+
+    Args:
+        raw: File content
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(raw).hexdigest()
+
+
+def compress_chunks(
+    raw: bytes,
+    chunk_size: Optional[int] = None,
+    level: Optional[int] = None,
+) -> Tuple[bytes, List[int]]:
+    """
+    Compress content as independently decompressible chunks.
+
+    Args:
+        raw: Uncompressed content
+        chunk_size: Uncompressed bytes per chunk (default EDI_RAW_STORE_CHUNK_SIZE)
+        level: zlib compression level (default EDI_RAW_STORE_COMPRESSION_LEVEL)
+
+    Returns:
+        Tuple of (concatenated compressed chunks, compressed offset of each chunk
+        followed by the total length)
+    """
+    chunk_size = chunk_size or RAW_STORE_CHUNK_SIZE
+    level = RAW_STORE_COMPRESSION_LEVEL if level is None else level
+    frames = []
+    offsets = [0]
+    for start in range(0, len(raw), chunk_size):
+        frame = zlib.compress(raw[start:start + chunk_size], level)
+        frames.append(frame)
+        offsets.append(offsets[-1] + len(frame))
+    return b"".join(frames), offsets
+
+
+def store_raw_file(
+    db: Session,
+    raw: bytes,
+    filename: Optional[str] = None,
+    file_type: Optional[str] = None,
+) -> str:
+    """
+    Store a file's content once and return its content address.
+
+    If the same content was stored before, nothing is written. The new row is
+    committed immediately so that concurrent workers storing the same file
+    cannot fail each other's ingest transaction.
+
+    Args:
+        db: Database session (must not have pending changes)
+        raw: File content
+        filename: Original filename
+        file_type: 837 or 835
+
+    Returns:
+        File hash to use in row pointers
+    """
+    file_hash = hash_content(raw)
+    if db.query(EDIRawFile.id).filter(EDIRawFile.file_hash == file_hash).first():
+        return file_hash
+
+    chunk_size = RAW_STORE_CHUNK_SIZE
+    data, offsets = compress_chunks(raw, chunk_size)
+    db.add(
+        EDIRawFile(
+            file_hash=file_hash,
+            filename=filename,
+            file_type=file_type,
+            size=len(raw),
+            compressed_size=len(data),
+            chunk_size=chunk_size,
+            chunk_offsets=offsets,
+            data=data,
+        )
+    )
+    try:
+        db.commit()
+    except IntegrityError:
+        # Stored concurrently by another worker
+        db.rollback()
+        return file_hash
+
+    logger.info(
+        "Stored raw EDI file",
+        file_hash=file_hash,
+        filename=filename,
+        size=len(raw),
+        compressed_size=len(data),
+    )
+    return file_hash
+
+
+def read_raw_range(db: Session, file_hash: str, offset: int, length: int) -> Optional[bytes]:
+    """
+    Read a byte range of a stored file.
+
+    Only the compressed chunks overlapping the range are fetched from the database.
+
+    Args:
+        db: Database session
+        file_hash: Content address from store_raw_file
+        offset: Start offset in the uncompressed file
+        length: Number of bytes
+
+    Returns:
+        The bytes, or None if the file is not stored
+    """
+    meta = (
+        db.query(EDIRawFile.chunk_size, EDIRawFile.chunk_offsets)
+        .filter(EDIRawFile.file_hash == file_hash)
+        .first()
+    )
+    if meta is None:
+        return None
+    if length <= 0:
+        return b""
+
+    chunk_size, offsets = meta
+    first = offset // chunk_size
+    last = min((offset + length - 1) // chunk_size, len(offsets) - 2)
+    start, end = offsets[first], offsets[last + 1]
+
+    # SUBSTR is 1-based and works on binary columns in PostgreSQL and SQLite
+    blob = (
+        db.query(func.substr(EDIRawFile.data, start + 1, end - start))
+        .filter(EDIRawFile.file_hash == file_hash)
+        .scalar()
+    )
+    content = b"".join(
+        zlib.decompress(blob[offsets[i] - start:offsets[i + 1] - start])
+        for i in range(first, last + 1)
+    )
+    relative = offset - first * chunk_size
+    return content[relative:relative + length]
+
+
+def split_raw_segments(raw: bytes) -> List[str]:
+    """
+    Split raw EDI content into segment strings the way the parser does.
+
+    Args:
+        raw: Raw EDI content
+
+    Returns:
+        Non-empty segments without terminators or line breaks
+    """
+    segments = []
+    for segment in raw.split(SEGMENT_TERMINATOR):
+        segment = segment.translate(None, b"\r\n").strip()
+        if segment:
+            segments.append(segment.decode("utf-8", errors="replace"))
+    return segments
+
+
+def get_raw_segments(db: Session, record: Any) -> Optional[List[str]]:
+    """
+    Load the raw segments of a claim or remittance.
+
+    Rows ingested before the raw store existed keep their segments inline in
+    ``raw_edi_data`` (a deferred column, loaded only here).
+
+    Args:
+        db: Database session
+        record: Claim or Remittance (None is allowed)
+
+    Returns:
+        List of segment strings (e.g. ``"CLM*123*100.00"``), or None if unavailable
+    """
+    if record is None:
+        return None
+    if record.raw_file_hash and record.raw_length is not None:
+        raw = read_raw_range(db, record.raw_file_hash, record.raw_offset, record.raw_length)
+        if raw is not None:
+            return split_raw_segments(raw)
+        logger.warning("Raw EDI file missing from store", file_hash=record.raw_file_hash)
+        return None
+
+    if record.raw_edi_data:
+        try:
+            block = ast.literal_eval(record.raw_edi_data)
+            return [ELEMENT_SEPARATOR.join(segment) for segment in block]
+        except (ValueError, SyntaxError, TypeError):
+            return [record.raw_edi_data]
+    return None
+
+
+class RawBlockLocator:
+    """
+    Find the byte range of parsed blocks in the original file.
+
+    Parsers return blocks (claims, remittances) as lists of segments in file order
+    and each block is a contiguous run of segments. The locator walks the file
+    once with a cursor, so locating all blocks of a file is linear in its size.
+    """
+
+    def __init__(self, file_hash: str, raw: bytes, base_offset: int = 0):
+        """
+        Initialize locator.
+
+        Args:
+            file_hash: Content address of the stored file (from store_raw_file)
+            raw: File content, as stored, or a range of it
+            base_offset: Offset of ``raw`` in the stored file when it is a range
+        """
+        self.file_hash = file_hash
+        self._raw = raw
+        self._base_offset = base_offset
+        self._position = 0
+
+    def locate(self, block: List[List[str]]) -> Optional[Tuple[int, int]]:
+        """
+        Locate the next occurrence of a block after the previously located one.
+
+        Args:
+            block: Segments of the block as returned by the parser
+
+        Returns:
+            Tuple of (offset, length), or None if the block is not found
+        """
+        if not block:
+            return None
+
+        expected = [ELEMENT_SEPARATOR.join(segment).encode("utf-8") for segment in block if segment]
+        position = self._position
+        segment = self._next_segment(position)
+        while segment is not None and segment[2] != expected[0]:
+            segment = self._next_segment(segment[1])
+        if segment is None:
+            return None
+
+        start, end = segment[0], segment[1]
+        for text in expected[1:]:
+            segment = self._next_segment(end)
+            if segment is None or segment[2] != text:
+                # Parsed content differs from the file; leave the cursor where it was
+                return None
+            end = segment[1]
+
+        self._position = end
+        return self._base_offset + start, end - start
+
+    def tell(self) -> int:
+        """
+        Get the cursor position, to rewind to with seek.
+
+        Returns:
+            Position after the last located block
+        """
+        return self._position
+
+    def seek(self, position: int) -> None:
+        """
+        Move the cursor back to a position returned by tell.
+
+        Used when blocks were located for rows that were then rolled back, so
+        locating them again finds the same byte ranges.
+
+        Args:
+            position: Cursor position from tell
+        """
+        self._position = position
+
+    def _next_segment(self, position: int) -> Optional[Tuple[int, int, bytes]]:
+        """Return (start, end, normalized text) of the next non-empty segment."""
+        raw = self._raw
+        size = len(raw)
+        while position < size:
+            terminator = raw.find(SEGMENT_TERMINATOR, position)
+            if terminator == -1:
+                terminator = end = size
+            else:
+                end = terminator + 1
+            text = raw[position:terminator].translate(None, b"\r\n").strip()
+            if text:
+                start = position
+                while raw[start:start + 1].isspace():
+                    start += 1
+                return start, end, text
+            position = end
+        return None
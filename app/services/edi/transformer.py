@@ -1,7 +1,9 @@
 """Transform parsed EDI data to database models."""
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+import numpy as np
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.models.database import (
@@ -14,6 +16,13 @@ from app.models.database import (
     Remittance,
     RemittanceStatus,
 )
+from app.services.edi.columnar import (
+    CLAIM_DATE_FIELDS,
+    ClaimBatch,
+    cents_to_amounts,
+    days_to_datetimes,
+)
+from app.services.edi.raw_store import RawBlockLocator
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -38,10 +47,27 @@ def _make_json_serializable(obj: Any) -> Any:
 class EDITransformer:
     """Transform parsed EDI data to database models."""
 
-    def __init__(self, db: Session, practice_id: str = None, filename: str = None):
+    def __init__(
+        self,
+        db: Session,
+        practice_id: str = None,
+        filename: str = None,
+        raw_locator: Optional[RawBlockLocator] = None,
+    ):
+        """
+        Initialize transformer.
+
+        Args:
+            db: Database session
+            practice_id: Practice the file belongs to
+            filename: Name of the file being transformed
+            raw_locator: Locator for the file in the raw EDI store. When given,
+                rows point into the stored file instead of copying their raw segments.
+        """
         self.db = db
         self.practice_id = practice_id
         self.filename = filename
+        self.raw_locator = raw_locator
         # Cache for providers and payers to reduce database queries
         self._provider_cache: Dict[str, Provider] = {}
         self._payer_cache: Dict[str, Payer] = {}
@@ -139,12 +165,11 @@ class EDITransformer:
             service_date=claim_data.get("service_date"),
             diagnosis_codes=claim_data.get("diagnosis_codes"),
             principal_diagnosis=claim_data.get("principal_diagnosis"),
-            raw_edi_data=str(claim_data.get("raw_block", [])),
-            parsed_segments=_make_json_serializable(claim_data),
             status=ClaimStatus.PENDING,
             is_incomplete=claim_data.get("is_incomplete", False),
             parsing_warnings=claim_data.get("warnings", []),
             practice_id=self.practice_id,
+            **self._raw_reference(claim_data),
         )
 
         # Create claim lines
@@ -160,7 +185,7 @@ class EDITransformer:
                 unit_count=line_data.get("unit_count"),
                 unit_type=line_data.get("unit_type"),
                 service_date=line_data.get("service_date"),
-                raw_segment_data=line_data,
+                raw_segment_data=_make_json_serializable(line_data),
             )
             claim.claim_lines.append(claim_line)
 
@@ -186,6 +211,192 @@ class EDITransformer:
 
         return claim
 
+    def load_837_batch(self, batch: ClaimBatch) -> List[int]:
+        """
+        Insert a batch of parsed 837 claims with their lines and parsing logs.
+
+        Produces the same rows as transform_837_claim for each claim, but works
+        column by column: NPIs are validated and dates/amounts converted once per
+        batch, providers and payers are resolved once per distinct value, and
+        claims, claim lines and parser logs are each written with one INSERT.
+
+        Args:
+            batch: Columnar claims from iter_claim_batches
+
+        Returns:
+            IDs of the inserted claims, in batch order
+        """
+        size = len(batch)
+        if not size:
+            return []
+
+        warnings = batch.warnings
+        provider_ids = self._resolve_batch_providers(batch, warnings)
+        payer_ids = self._resolve_batch_payers(batch, warnings)
+
+        dates = {field: days_to_datetimes(getattr(batch, field)) for field in CLAIM_DATE_FIELDS}
+        charges = cents_to_amounts(batch.total_charge_cents)
+        temp_prefix = f"TEMP_{datetime.now().timestamp()}"
+
+        claim_rows = []
+        for i in range(size):
+            raw_reference = {
+                "raw_edi_data": None,
+                "raw_file_hash": None,
+                "raw_offset": None,
+                "raw_length": None,
+            }
+            raw_reference.update(
+                self._raw_reference({"raw_block": batch.raw_blocks[i], "block_index": batch.block_index[i]})
+            )
+            claim_rows.append({
+                "claim_control_number": batch.claim_control_number[i] or f"{temp_prefix}_{i}",
+                "patient_control_number": batch.patient_control_number[i],
+                "provider_id": provider_ids[i],
+                "payer_id": payer_ids[i],
+                "total_charge_amount": charges[i],
+                "facility_type_code": batch.facility_type_code[i],
+                "claim_frequency_type": batch.claim_frequency_type[i],
+                "assignment_code": batch.assignment_code[i],
+                "statement_date": dates["statement_date"][i],
+                "admission_date": dates["admission_date"][i],
+                "discharge_date": dates["discharge_date"][i],
+                "service_date": dates["service_date"][i],
+                "diagnosis_codes": batch.diagnosis_codes[i],
+                "principal_diagnosis": batch.principal_diagnosis[i],
+                "status": ClaimStatus.PENDING,
+                "is_incomplete": bool(batch.is_incomplete[i]),
+                "parsing_warnings": warnings[i],
+                "practice_id": self.practice_id,
+                **raw_reference,
+            })
+
+        # claim_control_number is unique, so RETURNING it maps IDs back to rows
+        # without requiring ordered RETURNING (which is row-by-row on some backends)
+        inserted = dict(
+            self.db.execute(
+                insert(Claim).returning(Claim.claim_control_number, Claim.id), claim_rows
+            ).all()
+        )
+        claim_ids = [inserted[row["claim_control_number"]] for row in claim_rows]
+
+        if batch.line_count:
+            line_charges = cents_to_amounts(batch.line_charge_cents)
+            line_dates = days_to_datetimes(batch.line_service_date)
+            unit_counts = [None if np.isnan(count) else count for count in batch.line_unit_count.tolist()]
+            self.db.execute(
+                insert(ClaimLine),
+                [
+                    {
+                        "claim_id": claim_ids[batch.line_claim_index[j]],
+                        "line_number": batch.line_line_number[j],
+                        "revenue_code": batch.line_revenue_code[j],
+                        "procedure_code": batch.line_procedure_code[j],
+                        "procedure_modifier": batch.line_procedure_modifier[j],
+                        "charge_amount": line_charges[j],
+                        "unit_count": unit_counts[j],
+                        "unit_type": batch.line_unit_type[j],
+                        "service_date": line_dates[j],
+                        "raw_segment_data": _make_json_serializable(batch.line_raw[j]),
+                    }
+                    for j in range(batch.line_count)
+                ],
+            )
+
+        parser_log_mappings = [
+            {
+                "file_name": self.filename or "unknown",
+                "file_type": "837",
+                "log_level": "warning",
+                "segment_type": "CLM",
+                "issue_type": "parsing_warning",
+                "message": warning,
+                "claim_control_number": claim_rows[i]["claim_control_number"],
+                "practice_id": self.practice_id,
+            }
+            for i in range(size)
+            for warning in warnings[i]
+        ]
+        if parser_log_mappings:
+            self.db.bulk_insert_mappings(ParserLog, parser_log_mappings)
+
+        return list(claim_ids)
+
+    def _resolve_batch_providers(self, batch: ClaimBatch, warnings: List[List[str]]) -> List[Optional[int]]:
+        """
+        Resolve attending provider NPIs of a batch to provider IDs.
+
+        Args:
+            batch: Columnar claims
+            warnings: Per-claim warning lists, appended to for invalid NPIs
+
+        Returns:
+            Provider ID (or None) per claim
+        """
+        npis = batch.attending_provider_npi
+        valid = batch.valid_npis()
+        provider_ids: List[Optional[int]] = [None] * len(batch)
+
+        invalid_rows = [i for i in np.flatnonzero(~valid).tolist() if npis[i]]
+        for i in invalid_rows:
+            warnings[i].append(f"Invalid or missing provider NPI: {npis[i]}")
+        if invalid_rows:
+            logger.warning(
+                "Invalid provider NPIs in batch",
+                count=len(invalid_rows),
+                filename=self.filename,
+                practice_id=self.practice_id,
+            )
+
+        rows = np.flatnonzero(valid)
+        if not rows.size:
+            return provider_ids
+        stripped = [str(npis[i]).strip() for i in rows.tolist()]
+        unique_npis, inverse = np.unique(np.array(stripped), return_inverse=True)
+        unique_npis = unique_npis.tolist()
+        self.preload_providers_and_payers(
+            [npi for npi in unique_npis if npi not in self._provider_cache], []
+        )
+        unique_ids = [self._get_or_create_provider(npi).id for npi in unique_npis]
+        for row, index in zip(rows.tolist(), inverse.tolist()):
+            provider_ids[row] = unique_ids[index]
+        return provider_ids
+
+    def _resolve_batch_payers(self, batch: ClaimBatch, warnings: List[List[str]]) -> List[Optional[int]]:
+        """
+        Resolve payer IDs of a batch to payer primary keys.
+
+        Args:
+            batch: Columnar claims
+            warnings: Per-claim warning lists, appended to for blank payer IDs
+
+        Returns:
+            Payer primary key (or None) per claim
+        """
+        payer_keys: List[Optional[int]] = [None] * len(batch)
+        first_row: Dict[str, int] = {}
+        rows_by_payer: Dict[str, List[int]] = {}
+        for i, payer_id in enumerate(batch.payer_id.tolist()):
+            if not payer_id:
+                continue
+            stripped = str(payer_id).strip()
+            if not stripped:
+                warnings[i].append(f"Invalid or missing payer ID: {payer_id}")
+                continue
+            first_row.setdefault(stripped, i)
+            rows_by_payer.setdefault(stripped, []).append(i)
+
+        if not rows_by_payer:
+            return payer_keys
+        self.preload_providers_and_payers(
+            [], [payer_id for payer_id in rows_by_payer if payer_id not in self._payer_cache]
+        )
+        for payer_id, rows in rows_by_payer.items():
+            payer = self._get_or_create_payer(payer_id, batch.payer_name[first_row[payer_id]])
+            for i in rows:
+                payer_keys[i] = payer.id
+        return payer_keys
+
     def _get_or_create_provider(self, npi: str) -> Provider:
         """
         Get or create provider by NPI. Optimized with caching.
@@ -411,10 +622,9 @@ class EDITransformer:
             claim_control_number=claim_control_number,
             denial_reasons=denial_reasons if denial_reasons else None,
             adjustment_reasons=adjustment_reasons if adjustment_reasons else None,
-            raw_edi_data=str(parsed_data.get("raw_block", [])),
-            parsed_segments=_make_json_serializable(parsed_data),
             status=RemittanceStatus.PENDING,
             parsing_warnings=parsed_data.get("warnings", []),
+            **self._raw_reference(parsed_data),
         )
 
         # Log parsing warnings (batch add for better performance)
@@ -439,6 +649,37 @@ class EDITransformer:
 
         return remittance
 
+    def _raw_reference(self, parsed_data: Dict) -> Dict[str, Any]:
+        """
+        Get the model fields that reference a block's raw segments.
+
+        Blocks found in the raw EDI store get a (file hash, offset, length) pointer.
+        Otherwise (no store for this file, or the block could not be located) the
+        segments are kept inline in ``raw_edi_data`` as before.
+
+        Args:
+            parsed_data: Parsed claim or remittance data with ``raw_block``
+
+        Returns:
+            Keyword arguments for Claim/Remittance
+        """
+        raw_block = parsed_data.get("raw_block", [])
+        if self.raw_locator is not None:
+            location = self.raw_locator.locate(raw_block)
+            if location is not None:
+                offset, length = location
+                return {
+                    "raw_file_hash": self.raw_locator.file_hash,
+                    "raw_offset": offset,
+                    "raw_length": length,
+                }
+            logger.warning(
+                "Block not found in raw EDI file, storing segments inline",
+                filename=self.filename,
+                block_index=parsed_data.get("block_index"),
+            )
+        return {"raw_edi_data": str(raw_block)}
+
     def _parse_edi_date(self, date_str: str) -> datetime:
         """
         Parse EDI date string to datetime. Optimized for performance.
@@ -1,15 +1,39 @@
 """Link claims to remittances to create episodes."""
 from typing import List, Optional
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from app.models.database import Claim, Remittance, ClaimEpisode, EpisodeStatus
 from app.utils.logger import get_logger
+from app.api.routes.websocket import NotificationType
 from app.utils.notifications import notify_episode_linked, notify_episode_completed
+from app.utils.notification_digest import digest_aggregator
 from app.utils.cache import cache, episode_cache_key, count_cache_key
+from app.services.learning.denial_sketch import DenialRateTracker, denial_reason_codes, denial_tracker
 
 logger = get_logger(__name__)
 
+# Session.info key of the denial counts waiting for the session to commit
+PENDING_DENIALS_KEY = "pending_denials"
+
+
+def _record_pending_denials(session: Session) -> None:
+    """Count the episodes of a committed session in the denial rate tracker (non-blocking)."""
+    pending = session.info.get(PENDING_DENIALS_KEY) or []
+    session.info[PENDING_DENIALS_KEY] = []
+    for tracker, payer_id, reason_codes, episode_count in pending:
+        try:
+            for _ in range(episode_count):
+                tracker.record_episode(payer_id, reason_codes)
+        except Exception as e:
+            logger.warning("Failed to record episode denials", error=str(e), payer_id=payer_id)
+
+
+def _discard_pending_denials(session: Session) -> None:
+    """Drop the denial counts of a rolled back session."""
+    session.info[PENDING_DENIALS_KEY] = []
+
 
 class EpisodeLinker:
     """
@@ -20,8 +44,34 @@ class EpisodeLinker:
     statuses, and retrieving episode information.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, tracker: Optional[DenialRateTracker] = None):
         self.db = db
+        self.tracker = tracker or denial_tracker
+
+    def _record_denials(self, remittance: Remittance, episode_count: int) -> None:
+        """
+        Count newly linked episodes in the streaming denial rate tracker (non-blocking).
+
+        The counts are recorded when the session commits and dropped if it
+        rolls back, so a failed or retried link is never counted twice.
+
+        Args:
+            remittance: The linked remittance
+            episode_count: Number of episodes created for it
+        """
+        if not remittance.payer_id or not episode_count:
+            return
+        try:
+            pending = self.db.info.get(PENDING_DENIALS_KEY)
+            if pending is None:
+                pending = self.db.info[PENDING_DENIALS_KEY] = []
+                event.listen(self.db, "after_commit", _record_pending_denials)
+                event.listen(self.db, "after_rollback", _discard_pending_denials)
+            pending.append(
+                (self.tracker, remittance.payer_id, denial_reason_codes(remittance.denial_reasons), episode_count)
+            )
+        except Exception as e:
+            logger.warning("Failed to record episode denials", error=str(e), remittance_id=remittance.id)
 
     def link_claim_to_remittance(
         self, claim_id: int, remittance_id: int
@@ -100,6 +150,7 @@ class EpisodeLinker:
                 raise
             
             logger.info("Episode created", episode_id=episode.id, claim_id=claim_id, remittance_id=remittance_id)
+            self._record_denials(remittance, 1)
 
             # Invalidate cache for the new episode and related caches
             # IMPORTANT: Must invalidate cache when episodes are created/modified
@@ -187,12 +238,14 @@ class EpisodeLinker:
 
             # Create episodes for claims that don't already have one
             new_episodes = []
+            created_count = 0
             for claim in claims:
                 if claim.id in existing_episodes_dict:
                     # Use existing episode
                     existing = existing_episodes_dict[claim.id]
                     new_episodes.append(existing)
                 else:
+                    created_count += 1
                     # Create new episode (optimized: batch create)
                     episode = ClaimEpisode(
                         claim_id=claim.id,
@@ -219,6 +272,8 @@ class EpisodeLinker:
                 )
                 raise
 
+            self._record_denials(remittance, created_count)
+
             # Invalidate cache for all newly created episodes
             # IMPORTANT: Must invalidate cache when episodes are created/modified
             # to ensure cache consistency across all callers (API routes, Celery tasks, etc.)
@@ -232,19 +287,23 @@ class EpisodeLinker:
             cache.delete_pattern("count:episode*")
 
             # Send notifications in batch (non-blocking)
-            for episode in new_episodes:
-                if episode.id:  # Only notify for newly created episodes
-                    try:
-                        notify_episode_linked(
-                            episode.id,
+            # Coalesce into one digest per remittance instead of one message per episode
+            try:
+                for episode in new_episodes:
+                    if episode.id:  # Only notify for newly created episodes
+                        digest_aggregator.add(
+                            NotificationType.EPISODE_LINKED,
                             {
+                                "episode_id": episode.id,
                                 "claim_id": episode.claim_id,
                                 "remittance_id": episode.remittance_id,
                                 "status": episode.status.value,
                             },
+                            {"remittance_id": remittance.id},
                         )
-                    except Exception as e:
-                        logger.warning("Failed to send episode linked notification", error=str(e), episode_id=episode.id)
+                digest_aggregator.flush()
+            except Exception as e:
+                logger.warning("Failed to send episode linked notifications", error=str(e), remittance_id=remittance.id)
 
             logger.info(
                 "Auto-linked remittance to claims",
@@ -543,6 +602,8 @@ class EpisodeLinker:
                     )
                     raise
 
+                self._record_denials(remittance, len(newly_created_episodes))
+
                 # Invalidate cache for all newly created episodes
                 # IMPORTANT: Must invalidate cache when episodes are created/modified
                 # to ensure cache consistency across all callers (API routes, Celery tasks, etc.)
@@ -556,19 +617,23 @@ class EpisodeLinker:
                 cache.delete_pattern("count:episode*")
 
                 # Send notifications in batch (non-blocking) - only for newly created episodes
-                for episode in newly_created_episodes:
-                    if episode.id:  # Only notify for newly created episodes
-                        try:
-                            notify_episode_linked(
-                                episode.id,
+                # Coalesce into one digest per remittance instead of one message per episode
+                try:
+                    for episode in newly_created_episodes:
+                        if episode.id:  # Only notify for newly created episodes
+                            digest_aggregator.add(
+                                NotificationType.EPISODE_LINKED,
                                 {
+                                    "episode_id": episode.id,
                                     "claim_id": episode.claim_id,
                                     "remittance_id": episode.remittance_id,
                                     "status": episode.status.value,
                                 },
+                                {"remittance_id": remittance.id},
                             )
-                        except Exception as e:
-                            logger.warning("Failed to send episode linked notification", error=str(e), episode_id=episode.id)
+                    digest_aggregator.flush()
+                except Exception as e:
+                    logger.warning("Failed to send episode linked notifications", error=str(e), remittance_id=remittance.id)
 
             logger.info(
                 "Auto-linked remittance to claims by patient/date",
@@ -0,0 +1,565 @@
+"""
+Streaming denial frequency tracking per payer.
+
+PatternDetector recomputes denial frequencies in batch from the episode
+history. DenialRateTracker updates denial counters as EpisodeLinker's links
+commit, so risk scoring and the learning API can read current denial
+rates in O(1) without touching the database:
+
+- CountMinSketch: denied episodes per (payer, reason code) in fixed memory
+- HeavyHitters: the most frequent reason codes of a payer (Space-Saving)
+- exact episode and denied episode counts per payer
+
+Each window (1d, 7d, 90d) is exponentially decayed with the window as its
+time constant, using forward decay: an event at time ``t`` is added with
+weight ``exp((t - L) / tau)`` for a landmark ``L``, and read by multiplying
+by ``exp(-(now - L) / tau)``. Nothing is ever rescanned or rescaled. The
+landmark moves every EPOCH_TIME_CONSTANTS time constants to keep weights in
+floating point range; the previous epoch is still read until it has decayed.
+
+Counters live in process memory. Every DENIAL_SKETCH_SYNC_SECONDS the
+increments since the last sync are added to Redis (HINCRBYFLOAT, so workers
+never overwrite each other) and the merged counters are read back. A Celery
+worker's links therefore reach the API process within two sync intervals,
+and a restarted process starts from the snapshot. Worker processes also sync
+on shutdown, so a recycled worker does not lose its last increments. With a
+sync interval of 0 the counters stay in process memory.
+
+Configuration (environment):
+- DENIAL_SKETCH_WIDTH: counters per sketch row (default 2048)
+- DENIAL_SKETCH_DEPTH: sketch rows (default 4)
+- DENIAL_SKETCH_TOP_K: reason codes tracked per payer and window (default 32)
+- DENIAL_SKETCH_SYNC_SECONDS: Redis sync interval (default 30)
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DENIAL_SKETCH_WIDTH = int(os.getenv("DENIAL_SKETCH_WIDTH", "2048"))
+DENIAL_SKETCH_DEPTH = int(os.getenv("DENIAL_SKETCH_DEPTH", "4"))
+DENIAL_SKETCH_TOP_K = int(os.getenv("DENIAL_SKETCH_TOP_K", "32"))
+DENIAL_SKETCH_SYNC_SECONDS = float(os.getenv("DENIAL_SKETCH_SYNC_SECONDS", "30"))
+
+# Window name -> decay time constant in seconds
+DENIAL_WINDOWS = {
+    "1d": 86400.0,
+    "7d": 7 * 86400.0,
+    "90d": 90 * 86400.0,
+}
+
+# Landmark epoch length in time constants; weights stay below e**50
+EPOCH_TIME_CONSTANTS = 50
+
+# A payer's 1d denial rate is reported as a trend when it is at least
+# DENIAL_TREND_RATIO times its 90d rate and DENIAL_TREND_MIN_INCREASE higher,
+# over at least DENIAL_TREND_MIN_EPISODES (decayed) episodes
+DENIAL_TREND_MIN_EPISODES = 20
+DENIAL_TREND_RATIO = 1.5
+DENIAL_TREND_MIN_INCREASE = 0.05
+
+
+def denial_reason_codes(denial_reasons) -> List[str]:
+    """Denial reason codes of a remittance (entries are dicts with a code, or codes)."""
+    codes = []
+    for reason in denial_reasons or []:
+        reason_code = reason.get("code") if isinstance(reason, dict) else str(reason)
+        if reason_code:
+            codes.append(reason_code)
+    return codes
+
+
+def sketch_cells(key: str, width: int, depth: int) -> List[int]:
+    """
+    Flat Count-Min counter indices of a key, one per row.
+
+    Uses double hashing of one 128-bit digest, so a key is hashed once
+    regardless of the depth.
+
+    Args:
+        key: Counted key
+        width: Counters per row
+        depth: Number of rows
+
+    Returns:
+        ``depth`` indices into a flat ``depth * width`` counter array
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], "little")
+    second = int.from_bytes(digest[8:], "little") | 1
+    return [row * width + (first + row * second) % width for row in range(depth)]
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch of weighted counts.
+
+    Estimates never undercount; they overcount by at most ``e / width`` of the
+    total weight with probability ``1 - exp(-depth)``.
+    """
+
+    def __init__(self, width: int = DENIAL_SKETCH_WIDTH, depth: int = DENIAL_SKETCH_DEPTH):
+        """
+        Initialize sketch.
+
+        Args:
+            width: Counters per row
+            depth: Number of rows (independent hash functions)
+        """
+        self.width = width
+        self.depth = depth
+        self.counts = np.zeros(width * depth, dtype=np.float64)
+
+    def cells(self, key: str) -> List[int]:
+        """Flat counter indices of a key, one per row."""
+        return sketch_cells(key, self.width, self.depth)
+
+    def add(self, key: str, weight: float = 1.0) -> List[int]:
+        """
+        Add weight to a key.
+
+        Args:
+            key: Counted key
+            weight: Weight to add
+
+        Returns:
+            The updated counter indices
+        """
+        cells = self.cells(key)
+        self.counts[cells] += weight
+        return cells
+
+    def estimate(self, key: str) -> float:
+        """Estimated weight of a key."""
+        return float(self.counts[self.cells(key)].min())
+
+
+class HeavyHitters:
+    """
+    Most frequent keys by weight (weighted Space-Saving).
+
+    While at most ``capacity`` distinct keys have been seen, every count is
+    exact. After that, a new key replaces the smallest one and inherits its
+    count as ``error``: the true count lies in ``[count - error, count]`` and
+    every key heavier than the smallest tracked count is tracked.
+    """
+
+    def __init__(self, capacity: int = DENIAL_SKETCH_TOP_K):
+        """
+        Initialize summary.
+
+        Args:
+            capacity: Maximum number of tracked keys
+        """
+        self.capacity = capacity
+        self.counts: Dict[str, List[float]] = {}
+
+    def add(self, key: str, weight: float = 1.0) -> Tuple[float, float]:
+        """
+        Add weight to a key.
+
+        Args:
+            key: Counted key
+            weight: Weight to add
+
+        Returns:
+            Tuple of (count increase, error increase) of the key
+        """
+        entry = self.counts.get(key)
+        if entry is not None:
+            entry[0] += weight
+            return weight, 0.0
+        if len(self.counts) < self.capacity:
+            self.counts[key] = [weight, 0.0]
+            return weight, 0.0
+
+        smallest = min(self.counts, key=lambda tracked: self.counts[tracked][0])
+        floor = self.counts.pop(smallest)[0]
+        self.counts[key] = [floor + weight, floor]
+        return floor + weight, floor
+
+    def top(self, k: Optional[int] = None) -> List[Tuple[str, float, float]]:
+        """Tracked keys as (key, count, error), heaviest first."""
+        ranked = sorted(
+            ((key, count, error) for key, (count, error) in self.counts.items()),
+            key=lambda entry: -entry[1],
+        )
+        return ranked[:k] if k is not None else ranked
+
+
+class _EpochCounters:
+    """Forward-decayed counters of one window and landmark epoch."""
+
+    def __init__(self, width: int, depth: int, top_k: int):
+        self.sketch = CountMinSketch(width, depth)
+        self.episodes: Dict[int, float] = defaultdict(float)
+        self.denied: Dict[int, float] = defaultdict(float)
+        self.top_k = top_k
+        self.reasons: Dict[int, HeavyHitters] = {}
+
+    def heavy_hitters(self, payer_id: int) -> HeavyHitters:
+        """Reason code summary of a payer."""
+        summary = self.reasons.get(payer_id)
+        if summary is None:
+            summary = self.reasons[payer_id] = HeavyHitters(self.top_k)
+        return summary
+
+    @classmethod
+    def from_fields(cls, fields: Dict[str, str], width: int, depth: int, top_k: int) -> "_EpochCounters":
+        """Rebuild counters from a Redis snapshot hash."""
+        counters = cls(width, depth, top_k)
+        reasons: Dict[int, Dict[str, List[float]]] = defaultdict(dict)
+        for field, value in fields.items():
+            kind, _, rest = field.partition(":")
+            if kind == "c":
+                counters.sketch.counts[int(rest)] = float(value)
+            elif kind == "e":
+                counters.episodes[int(rest)] = float(value)
+            elif kind == "d":
+                counters.denied[int(rest)] = float(value)
+            elif kind in ("r", "x"):
+                payer_id, _, code = rest.partition(":")
+                entry = reasons[int(payer_id)].setdefault(code, [0.0, 0.0])
+                entry[0 if kind == "r" else 1] += float(value)
+        for payer_id, entries in reasons.items():
+            summary = counters.heavy_hitters(payer_id)
+            # Several processes' summaries add up to more than capacity keys
+            for code, entry in sorted(entries.items(), key=lambda item: -item[1][0])[:top_k]:
+                summary.counts[code] = entry
+        return counters
+
+
+class DenialRateTracker:
+    """
+    Decayed denial counters per payer and reason code, synced through Redis.
+
+    Thread-safe. Use the module-level ``denial_tracker`` instance.
+    """
+
+    def __init__(
+        self,
+        width: int = DENIAL_SKETCH_WIDTH,
+        depth: int = DENIAL_SKETCH_DEPTH,
+        top_k: int = DENIAL_SKETCH_TOP_K,
+        sync_seconds: float = DENIAL_SKETCH_SYNC_SECONDS,
+        windows: Optional[Dict[str, float]] = None,
+        key_prefix: str = "marb:denial_sketch",
+        redis_client=None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize tracker.
+
+        Args:
+            width: Count-Min sketch width
+            depth: Count-Min sketch depth
+            top_k: Reason codes tracked per payer and window
+            sync_seconds: Redis sync interval; 0 keeps counters in process memory
+            windows: Window name -> decay time constant in seconds (default DENIAL_WINDOWS)
+            key_prefix: Prefix of the Redis snapshot keys
+            redis_client: Redis client (default: the shared client, connected on first sync)
+            clock: Time source in epoch seconds
+        """
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.sync_seconds = sync_seconds
+        self.windows = dict(windows or DENIAL_WINDOWS)
+        self.key_prefix = key_prefix
+        self.clock = clock
+        self._redis = redis_client
+        self._lock = threading.Lock()
+        # (window, epoch) -> counters, and -> Redis hash field increments not yet synced
+        self._counters: Dict[Tuple[str, int], _EpochCounters] = {}
+        self._pending: Dict[Tuple[str, int], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # Sync on first use, to start from the snapshot
+        self._last_sync = float("-inf")
+
+    def record_episode(self, payer_id: int, reason_codes: Iterable[str], at: Optional[float] = None) -> None:
+        """
+        Count a linked episode.
+
+        Args:
+            payer_id: Payer of the remittance
+            reason_codes: Denial reason codes of the remittance (empty when paid)
+            at: Event time in epoch seconds (default: now)
+        """
+        at = self.clock() if at is None else at
+        codes = list(dict.fromkeys(reason_codes))
+        # Every window's sketch has the same shape, so each key is hashed once
+        cells = {code: sketch_cells(f"{payer_id}:{code}", self.width, self.depth) for code in codes}
+        with self._lock:
+            for window, tau in self.windows.items():
+                epoch = self._epoch(tau, at)
+                weight = math.exp((at - epoch * EPOCH_TIME_CONSTANTS * tau) / tau)
+                counters = self._epoch_counters(window, epoch)
+                pending = self._pending[(window, epoch)]
+
+                counters.episodes[payer_id] += weight
+                pending[f"e:{payer_id}"] += weight
+                if not codes:
+                    continue
+                counters.denied[payer_id] += weight
+                pending[f"d:{payer_id}"] += weight
+                summary = counters.heavy_hitters(payer_id)
+                for code in codes:
+                    counters.sketch.counts[cells[code]] += weight
+                    for cell in cells[code]:
+                        pending[f"c:{cell}"] += weight
+                    added, error = summary.add(code, weight)
+                    pending[f"r:{payer_id}:{code}"] += added
+                    if error:
+                        pending[f"x:{payer_id}:{code}"] += error
+        self._maybe_sync(at)
+
+    def denial_rates(self, payer_id: int, window: str = "7d", at: Optional[float] = None) -> Dict:
+        """
+        Decayed episode counts and denial rate of a payer.
+
+        Args:
+            payer_id: Payer ID
+            window: Window name (see DENIAL_WINDOWS)
+            at: Time to read at in epoch seconds (default: now)
+
+        Returns:
+            Dictionary with ``episodes``, ``denied_episodes`` and ``denial_rate``
+            (None without episodes)
+        """
+        at = self.clock() if at is None else at
+        self._maybe_sync(at)
+        with self._lock:
+            episodes = denied = 0.0
+            for counters, decay in self._decayed(window, at):
+                episodes += counters.episodes.get(payer_id, 0.0) * decay
+                denied += counters.denied.get(payer_id, 0.0) * decay
+        return {
+            "episodes": episodes,
+            "denied_episodes": denied,
+            "denial_rate": denied / episodes if episodes > 0 else None,
+        }
+
+    def reason_rate(self, payer_id: int, reason_code: str, window: str = "7d", at: Optional[float] = None) -> Optional[float]:
+        """
+        Share of a payer's episodes denied for a reason code (Count-Min estimate).
+
+        Args:
+            payer_id: Payer ID
+            reason_code: Denial reason code
+            window: Window name (see DENIAL_WINDOWS)
+            at: Time to read at in epoch seconds (default: now)
+
+        Returns:
+            Estimated rate (never below the true rate), or None without episodes
+        """
+        at = self.clock() if at is None else at
+        self._maybe_sync(at)
+        key = f"{payer_id}:{reason_code}"
+        with self._lock:
+            episodes = count = 0.0
+            for counters, decay in self._decayed(window, at):
+                episodes += counters.episodes.get(payer_id, 0.0) * decay
+                count += counters.sketch.estimate(key) * decay
+        return min(count / episodes, 1.0) if episodes > 0 else None
+
+    def top_reasons(self, payer_id: int, window: str = "7d", k: int = 10, at: Optional[float] = None) -> List[Dict]:
+        """
+        A payer's most frequent denial reason codes.
+
+        Args:
+            payer_id: Payer ID
+            window: Window name (see DENIAL_WINDOWS)
+            k: Maximum number of reason codes
+            at: Time to read at in epoch seconds (default: now)
+
+        Returns:
+            List of dictionaries with ``denial_reason_code``, ``rate`` (share of
+            episodes) and ``error`` (maximum overcount of the rate), highest first
+        """
+        at = self.clock() if at is None else at
+        self._maybe_sync(at)
+        with self._lock:
+            episodes = 0.0
+            totals: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0])
+            for counters, decay in self._decayed(window, at):
+                episodes += counters.episodes.get(payer_id, 0.0) * decay
+                summary = counters.reasons.get(payer_id)
+                for code, count, error in summary.top() if summary else ():
+                    totals[code][0] += count * decay
+                    totals[code][1] += error * decay
+        if episodes <= 0:
+            return []
+        ranked = sorted(totals.items(), key=lambda item: -item[1][0])[:k]
+        return [
+            {
+                "denial_reason_code": code,
+                "rate": round(min(count / episodes, 1.0), 4),
+                "error": round(error / episodes, 4),
+            }
+            for code, (count, error) in ranked
+        ]
+
+    def denial_trend(self, payer_id: int, at: Optional[float] = None) -> Optional[Dict]:
+        """
+        A payer's 1d denial rate if it clearly exceeds its 90d rate.
+
+        Args:
+            payer_id: Payer ID
+            at: Time to read at in epoch seconds (default: now)
+
+        Returns:
+            Dictionary with ``recent_rate``, ``baseline_rate`` and
+            ``top_reasons`` (1d), or None when there is no such trend
+        """
+        recent = self.denial_rates(payer_id, "1d", at)
+        baseline = self.denial_rates(payer_id, "90d", at)
+        if recent["episodes"] < DENIAL_TREND_MIN_EPISODES or recent["denial_rate"] is None:
+            return None
+        baseline_rate = baseline["denial_rate"] or 0.0
+        if (
+            recent["denial_rate"] < baseline_rate * DENIAL_TREND_RATIO
+            or recent["denial_rate"] - baseline_rate < DENIAL_TREND_MIN_INCREASE
+        ):
+            return None
+        return {
+            "recent_rate": round(recent["denial_rate"], 4),
+            "baseline_rate": round(baseline_rate, 4),
+            "top_reasons": self.top_reasons(payer_id, "1d", k=3, at=at),
+        }
+
+    def sync(self) -> bool:
+        """
+        Add local increments to the Redis snapshot and load the merged counters.
+
+        Returns:
+            True if both steps succeeded; on failure the local counters are kept
+            and the increments are retried on the next sync
+        """
+        with self._lock:
+            pending = {key: dict(fields) for key, fields in self._pending.items() if fields}
+            self._pending.clear()
+        try:
+            redis_client = self._redis_client()
+            if pending:
+                pipe = redis_client.pipeline()
+                for (window, epoch), fields in pending.items():
+                    key = self._redis_key(window, epoch)
+                    for field, increment in fields.items():
+                        pipe.hincrbyfloat(key, field, increment)
+                    # Kept until the epoch after next, when it has fully decayed
+                    pipe.expire(key, int(3 * EPOCH_TIME_CONSTANTS * self.windows[window]))
+                pipe.execute()
+        except Exception as e:
+            with self._lock:
+                for key, fields in pending.items():
+                    for field, increment in fields.items():
+                        self._pending[key][field] += increment
+            logger.warning("Denial sketch sync failed", error=str(e), stage="flush")
+            return False
+
+        at = self.clock()
+        try:
+            loaded = {}
+            for window, tau in self.windows.items():
+                epoch = self._epoch(tau, at)
+                for key in ((window, epoch - 1), (window, epoch)):
+                    fields = redis_client.hgetall(self._redis_key(*key))
+                    if fields:
+                        loaded[key] = _EpochCounters.from_fields(fields, self.width, self.depth, self.top_k)
+        except Exception as e:
+            logger.warning("Denial sketch sync failed", error=str(e), stage="load")
+            return False
+
+        with self._lock:
+            # Increments recorded while loading are not in the snapshot yet
+            for key, fields in self._pending.items():
+                if key in loaded:
+                    _apply_fields(loaded[key], fields)
+            for key, counters in self._counters.items():
+                if key not in loaded and key in self._pending:
+                    loaded[key] = counters
+            self._counters = loaded
+        return True
+
+    def reset(self) -> None:
+        """Drop all local counters and pending increments (the Redis snapshot is kept)."""
+        with self._lock:
+            self._counters.clear()
+            self._pending.clear()
+            self._last_sync = float("-inf")
+
+    def _maybe_sync(self, at: float) -> None:
+        """Sync if the sync interval has elapsed."""
+        if self.sync_seconds <= 0:
+            return
+        with self._lock:
+            if at - self._last_sync < self.sync_seconds:
+                return
+            self._last_sync = at
+        self.sync()
+
+    def _redis_client(self):
+        """Redis client, connected on first use."""
+        if self._redis is None:
+            from app.config.redis import get_redis_client
+
+            self._redis = get_redis_client()
+        return self._redis
+
+    def _redis_key(self, window: str, epoch: int) -> str:
+        return f"{self.key_prefix}:{window}:{epoch}"
+
+    @staticmethod
+    def _epoch(tau: float, at: float) -> int:
+        return int(at // (EPOCH_TIME_CONSTANTS * tau))
+
+    def _epoch_counters(self, window: str, epoch: int) -> _EpochCounters:
+        """Counters of an epoch, dropping epochs that have fully decayed."""
+        counters = self._counters.get((window, epoch))
+        if counters is None:
+            counters = self._counters[(window, epoch)] = _EpochCounters(self.width, self.depth, self.top_k)
+            for key in [key for key in self._counters if key[0] == window and key[1] < epoch - 1]:
+                del self._counters[key]
+        return counters
+
+    def _decayed(self, window: str, at: float) -> List[Tuple[_EpochCounters, float]]:
+        """Counters of a window with the factor that decays them to ``at``."""
+        if window not in self.windows:
+            raise ValueError(f"Unknown denial window {window!r}; expected one of {sorted(self.windows)}")
+        tau = self.windows[window]
+        epoch = self._epoch(tau, at)
+        decayed = []
+        for key in ((window, epoch - 1), (window, epoch)):
+            counters = self._counters.get(key)
+            if counters is not None:
+                landmark = key[1] * EPOCH_TIME_CONSTANTS * tau
+                decayed.append((counters, math.exp(-(at - landmark) / tau)))
+        return decayed
+
+
+def _apply_fields(counters: _EpochCounters, fields: Dict[str, float]) -> None:
+    """Add snapshot hash field increments to counters."""
+    extra = _EpochCounters.from_fields(fields, counters.sketch.width, counters.sketch.depth, counters.top_k)
+    counters.sketch.counts += extra.sketch.counts
+    for payer_id, value in extra.episodes.items():
+        counters.episodes[payer_id] += value
+    for payer_id, value in extra.denied.items():
+        counters.denied[payer_id] += value
+    for payer_id, summary in extra.reasons.items():
+        target = counters.heavy_hitters(payer_id)
+        for code, (count, error) in summary.counts.items():
+            entry = target.counts.setdefault(code, [0.0, 0.0])
+            entry[0] += count
+            entry[1] += error
+
+
+# Global tracker instance
+denial_tracker = DenialRateTracker()
@@ -5,7 +5,9 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 
 from app.models.database import (
+    Claim,
     ClaimEpisode,
+    ClaimLine,
     DenialPattern,
     Remittance,
     Payer,
@@ -14,15 +16,43 @@ from app.models.database import (
 from app.utils.logger import get_logger
 from app.utils.cache import cache, cache_key
 from app.config.cache_ttl import get_payer_ttl
+from app.services.learning.denial_sketch import denial_reason_codes
+from ml.models.pattern_learner import (
+    ATTRIBUTE_PATTERN_TYPE,
+    PatternLearner,
+    claim_items,
+    conditions_match,
+    diagnosis_code_values,
+    pattern_key,
+)
 
 logger = get_logger(__name__)
 
+# Rows fetched per round trip when scanning episodes for pattern mining
+MINING_BATCH_SIZE = 10000
+
 
 class PatternDetector:
     """Detect and learn denial patterns from historical data."""
 
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        read_db: Optional[Session] = None,
+        learner: Optional[PatternLearner] = None,
+    ):
+        """
+        Initialize detector.
+        
+        Args:
+            db: Session for reading and writing patterns
+            read_db: Session for the historical episode scans, e.g. from
+                ``read_session()`` to keep them off the primary (defaults to ``db``)
+            learner: Miner for claim attribute patterns (defaults to PatternLearner())
+        """
         self.db = db
+        self.read_db = read_db or db
+        self.learner = learner or PatternLearner()
 
     def detect_patterns_for_payer(self, payer_id: int, days_back: int = 90) -> List[DenialPattern]:
         """Detect denial patterns for a specific payer."""
@@ -33,7 +63,7 @@ class PatternDetector:
         # Get episodes with denials for this payer - eager load remittance and claim to avoid N+1
         # Load both relationships even if not immediately used, to prevent lazy loading issues
         episodes = (
-            self.db.query(ClaimEpisode)
+            self.read_db.query(ClaimEpisode)
             .join(Remittance)
             .options(
                 joinedload(ClaimEpisode.remittance),
@@ -44,6 +74,9 @@ class PatternDetector:
                 ClaimEpisode.status == EpisodeStatus.COMPLETE,
                 ClaimEpisode.denial_count > 0,
                 Remittance.created_at >= cutoff_date,
+                # Episodes are linked after their remittance arrives, so this holds too;
+                # it lets PostgreSQL skip claim_episodes partitions outside the window
+                ClaimEpisode.created_at >= cutoff_date,
             )
             .all()
         )
@@ -55,23 +88,19 @@ class PatternDetector:
         # Analyze denial reasons
         denial_reasons = defaultdict(lambda: {"count": 0, "episodes": []})
         for episode in episodes:
-            remittance = episode.remittance
-            reasons = remittance.denial_reasons or []
-            for reason in reasons:
-                reason_code = reason.get("code") if isinstance(reason, dict) else str(reason)
-                if reason_code:
-                    denial_reasons[reason_code]["count"] += 1
-                    denial_reasons[reason_code]["episodes"].append(episode.id)
+            for reason_code in denial_reason_codes(episode.remittance.denial_reasons):
+                denial_reasons[reason_code]["count"] += 1
+                denial_reasons[reason_code]["episodes"].append(episode.id)
         
         # Batch load all existing patterns for this payer to avoid N+1 queries
-        existing_patterns = {
-            pattern.denial_reason_code: pattern
-            for pattern in (
-                self.db.query(DenialPattern)
-                .filter(DenialPattern.payer_id == payer_id)
-                .all()
-            )
-        }
+        existing_patterns = {}
+        existing_combinations = {}
+        for pattern in self.db.query(DenialPattern).filter(DenialPattern.payer_id == payer_id).all():
+            if pattern.pattern_type == ATTRIBUTE_PATTERN_TYPE:
+                key = (pattern.denial_reason_code, pattern_key(pattern.conditions))
+                existing_combinations[key] = pattern
+            else:
+                existing_patterns[pattern.denial_reason_code] = pattern
         
         # Create or update patterns
         patterns = []
@@ -110,6 +139,10 @@ class PatternDetector:
                 self.db.add(pattern)
             
             patterns.append(pattern)
+
+        patterns.extend(
+            self._update_attribute_patterns(payer_id, cutoff_date, total_episodes, existing_combinations, now)
+        )
         
         self.db.flush()
         
@@ -125,6 +158,118 @@ class PatternDetector:
         
         return patterns
 
+    def _update_attribute_patterns(
+        self,
+        payer_id: int,
+        cutoff_date: datetime,
+        denial_episode_count: int,
+        existing_patterns: Dict,
+        now: datetime,
+    ) -> List[DenialPattern]:
+        """
+        Mine claim attribute combinations that predict denials and store them.
+
+        Patterns mined in an earlier run and not found again are deleted, as
+        their statistics no longer hold.
+
+        Args:
+            payer_id: Payer to mine
+            cutoff_date: Start of the lookback window
+            denial_episode_count: Denied episodes in the window
+            existing_patterns: Stored attribute patterns by (reason code, pattern_key)
+            now: Timestamp for first_seen/last_seen
+
+        Returns:
+            Created or updated patterns
+        """
+        rules = []
+        # No rule can cover more episodes than were denied
+        if denial_episode_count >= self.learner.min_occurrences:
+            transactions, outcomes = self._load_transactions(payer_id, cutoff_date)
+            rules = self.learner.fit(transactions, outcomes)
+
+        patterns = []
+        for rule in rules:
+            reason_code = rule["denial_reason_code"]
+            pattern = existing_patterns.pop((reason_code, pattern_key(rule["conditions"])), None)
+            if pattern is None:
+                pattern = DenialPattern(
+                    payer_id=payer_id,
+                    pattern_type=ATTRIBUTE_PATTERN_TYPE,
+                    denial_reason_code=reason_code,
+                    first_seen=now,
+                )
+                self.db.add(pattern)
+            pattern.pattern_description = rule["description"]
+            pattern.occurrence_count = rule["occurrence_count"]
+            # Share of the payer's denials, as for denial reason patterns
+            pattern.frequency = rule["occurrence_count"] / denial_episode_count
+            pattern.confidence_score = rule["confidence"]
+            pattern.conditions = rule["conditions"]
+            pattern.last_seen = now
+            patterns.append(pattern)
+
+        for stale in existing_patterns.values():
+            self.db.delete(stale)
+
+        return patterns
+
+    def _load_transactions(self, payer_id: int, cutoff_date: datetime):
+        """
+        Claim attribute items and denial reason codes of a payer's episodes.
+
+        Reads only the needed columns, in batches, rather than ORM objects.
+
+        Args:
+            payer_id: Payer to load
+            cutoff_date: Start of the lookback window
+
+        Returns:
+            Tuple of (items per episode, reason codes per episode)
+        """
+        window = (
+            Remittance.payer_id == payer_id,
+            ClaimEpisode.status == EpisodeStatus.COMPLETE,
+            Remittance.created_at >= cutoff_date,
+            ClaimEpisode.created_at >= cutoff_date,
+        )
+
+        procedure_codes = defaultdict(set)
+        lines = (
+            self.read_db.query(ClaimLine.claim_id, ClaimLine.procedure_code)
+            .join(ClaimEpisode, ClaimEpisode.claim_id == ClaimLine.claim_id)
+            .join(Remittance, ClaimEpisode.remittance_id == Remittance.id)
+            .filter(*window, ClaimLine.procedure_code.isnot(None))
+            .yield_per(MINING_BATCH_SIZE)
+        )
+        for claim_id, procedure_code in lines:
+            procedure_codes[claim_id].add(procedure_code)
+
+        rows = (
+            self.read_db.query(
+                ClaimEpisode.claim_id,
+                ClaimEpisode.denial_count,
+                Claim.principal_diagnosis,
+                Claim.diagnosis_codes,
+                Claim.facility_type_code,
+                Claim.total_charge_amount,
+                Remittance.denial_reasons,
+            )
+            .join(Claim, ClaimEpisode.claim_id == Claim.id)
+            .join(Remittance, ClaimEpisode.remittance_id == Remittance.id)
+            .filter(*window)
+            .yield_per(MINING_BATCH_SIZE)
+        )
+
+        transactions = []
+        outcomes = []
+        for claim_id, denial_count, principal, diagnosis_codes, facility_type, charge, reasons in rows:
+            transactions.append(
+                claim_items(principal, diagnosis_codes, procedure_codes.get(claim_id), facility_type, charge)
+            )
+            outcomes.append(denial_reason_codes(reasons) if denial_count else [])
+        return transactions, outcomes
+
     def get_patterns_for_payer(self, payer_id: int) -> List[DenialPattern]:
         """Get all denial patterns for a payer."""
         cache_key_str = cache_key("pattern", "payer", payer_id)
@@ -273,12 +418,19 @@ class PatternDetector:
         match_score = 0.0
         conditions = pattern.conditions or {}
 
+        # Mined patterns are rules: a claim with all their attributes is denied
+        # for the reason with probability confidence_score
+        if pattern.pattern_type == ATTRIBUTE_PATTERN_TYPE:
+            if conditions_match(conditions, claim):
+                return pattern.confidence_score or 0.0
+            return 0.0
+
         # If pattern has specific conditions, check them
         if conditions:
             # Check diagnosis code matches
             if "diagnosis_codes" in conditions:
                 pattern_diagnosis = conditions.get("diagnosis_codes", [])
-                claim_diagnosis = claim.diagnosis_codes or []
+                claim_diagnosis = diagnosis_code_values(claim.diagnosis_codes)
                 if any(dx in claim_diagnosis for dx in pattern_diagnosis):
                     match_score += 0.3
 
@@ -335,7 +487,7 @@ class PatternDetector:
         from app.models.database import Payer
 
         # Batch load all payers at once
-        payers = self.db.query(Payer).all()
+        payers = self.read_db.query(Payer).all()
         all_patterns = {}
 
         # Process payers in batches to optimize memory usage
@@ -0,0 +1 @@
+# Database maintenance services
@@ -0,0 +1,331 @@
+"""
+Monthly range partitions for time-series tables.
+
+On PostgreSQL, claim_episodes and audit_logs are partitioned by month on
+created_at (migration e6f2a9c4b1d8). Each month is a table named
+``<table>_pYYYYMM``, so queries bounded on created_at only scan the months
+they cover, and old months can be detached instead of bulk deleted.
+
+The maintain_partitions task (run daily by celery beat) creates partitions
+PARTITION_PREMAKE_MONTHS ahead, and detaches partitions older than the table's
+retention. Each table also has a default partition (``<table>_default``) as a
+safety net: if maintenance stops running, rows for months without a partition
+land there instead of failing to insert, and are moved into their month's
+partition when it is created. Detached
+partitions stay in the database as plain tables (moved to
+PARTITION_ARCHIVE_TABLESPACE when set) until they are dumped or dropped.
+
+claims and remittances are not partitioned: claim_lines, claim_episodes and
+risk_scores reference claims.id, claim_episodes references remittances.id, and
+PostgreSQL only allows a foreign key to a partitioned table through a unique
+key that includes the partition column.
+
+On other databases (SQLite in tests) the tables are plain and maintenance does nothing.
+"""
+import os
+import re
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PARTITIONED_TABLES = ("claim_episodes", "audit_logs")
+
+# Months of partitions kept ready ahead of the current month
+PARTITION_PREMAKE_MONTHS = int(os.getenv("PARTITION_PREMAKE_MONTHS", "3"))
+
+# Months kept attached per table (0 keeps every partition)
+PARTITION_RETENTION_MONTHS = {
+    "claim_episodes": int(os.getenv("EPISODE_PARTITION_RETENTION_MONTHS", "0")),
+    "audit_logs": int(os.getenv("AUDIT_LOG_PARTITION_RETENTION_MONTHS", "84")),
+}
+
+PARTITION_ARCHIVE_TABLESPACE = os.getenv("PARTITION_ARCHIVE_TABLESPACE")
+
+
+def month_start(value: date) -> date:
+    """First day of the month containing ``value`` (a date or datetime)."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """
+    Shift a month start by a number of months.
+
+    Args:
+        month: First day of a month
+        months: Months to add (negative to go back)
+
+    Returns:
+        First day of the resulting month
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(start: date, end: date) -> List[date]:
+    """
+    Month starts from the month of ``start`` through the month of ``end``.
+
+    Args:
+        start: Any day in the first month
+        end: Any day in the last month
+
+    Returns:
+        List of month starts (empty if end is before start)
+    """
+    months = []
+    month, last = month_start(start), month_start(end)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(table: str, month: date) -> str:
+    """Name of the partition holding ``month`` of ``table``."""
+    return f"{table}_p{month:%Y%m}"
+
+
+def partition_month(table: str, name: str) -> Optional[date]:
+    """
+    Month held by a partition, from its name.
+
+    Args:
+        table: Parent table name
+        name: Partition table name
+
+    Returns:
+        First day of the month, or None if the name is not a monthly partition of ``table``
+    """
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})", name)
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def default_partition_name(table: str) -> str:
+    """Name of the default partition of ``table``."""
+    return f"{table}_default"
+
+
+def create_default_partition_sql(table: str) -> str:
+    """
+    DDL creating the default partition of ``table``.
+
+    Args:
+        table: Parent table name
+
+    Returns:
+        CREATE TABLE statement (a no-op if the partition exists)
+    """
+    return f"CREATE TABLE IF NOT EXISTS {default_partition_name(table)} PARTITION OF {table} DEFAULT"
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    """
+    DDL creating the partition of ``table`` for one month.
+
+    Args:
+        table: Parent table name
+        month: First day of the month
+
+    Returns:
+        CREATE TABLE statement (a no-op if the partition exists)
+    """
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def expired_partitions(
+    table: str, partitions: Iterable[str], retention_months: int, today: date
+) -> List[str]:
+    """
+    Partitions whose whole month is older than the retention window.
+
+    Args:
+        table: Parent table name
+        partitions: Attached partition names
+        retention_months: Months to keep, counting the current month (0 keeps all)
+        today: Current date
+
+    Returns:
+        Names of the partitions to detach, oldest first
+    """
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(today), -(retention_months - 1))
+    expired = [
+        (month, name)
+        for name in partitions
+        if (month := partition_month(table, name)) is not None and month < cutoff
+    ]
+    return [name for _, name in sorted(expired)]
+
+
+def is_partitioned(connection: Connection, table: str) -> bool:
+    """Whether ``table`` is a partitioned table (always False outside PostgreSQL)."""
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": table},
+    ).first() is not None
+
+
+def list_partitions(connection: Connection, table: str) -> List[str]:
+    """
+    Names of the partitions attached to ``table``.
+
+    Args:
+        connection: PostgreSQL connection
+        table: Parent table name
+
+    Returns:
+        Sorted partition names
+    """
+    return list(connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table) ORDER BY child.relname"
+        ),
+        {"table": table},
+    ).scalars())
+
+
+def create_partitions(connection: Connection, table: str, months: Iterable[date]) -> List[str]:
+    """
+    Create the missing monthly partitions of ``table``.
+
+    Args:
+        connection: PostgreSQL connection
+        table: Parent table name
+        months: Month starts to cover
+
+    Returns:
+        Names of the partitions created
+    """
+    existing = set(list_partitions(connection, table))
+    default = default_partition_name(table)
+    created = []
+    for month in months:
+        name = partition_name(table, month)
+        if name in existing:
+            continue
+        if default in existing and _move_default_rows(connection, table, month):
+            logger.warning("Moved rows out of the default partition", table=table, partition=name)
+        else:
+            connection.execute(text(create_partition_sql(table, month)))
+        created.append(name)
+    return created
+
+
+def _move_default_rows(connection: Connection, table: str, month: date) -> bool:
+    """
+    Create the partition for ``month`` from the rows of the default partition, if it has any.
+
+    A partition cannot be added while the default partition holds rows in its
+    range, so the rows are moved into a new table that is then attached.
+
+    Args:
+        connection: PostgreSQL connection
+        table: Parent table name
+        month: First day of the month
+
+    Returns:
+        Whether the partition was created (False if the default partition has no rows for the month)
+    """
+    default = default_partition_name(table)
+    bounds = {"start": month, "end": add_months(month, 1)}
+    in_month = "created_at >= :start AND created_at < :end"
+    if connection.execute(text(f"SELECT 1 FROM {default} WHERE {in_month} LIMIT 1"), bounds).first() is None:
+        return False
+
+    name = partition_name(table, month)
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+    connection.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {default} WHERE {in_month} RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        bounds,
+    )
+    connection.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    ))
+    return True
+
+
+def detach_partitions(connection: Connection, table: str, partitions: Iterable[str]) -> List[str]:
+    """
+    Detach partitions from ``table``, moving them to the archive tablespace if one is set.
+
+    Args:
+        connection: PostgreSQL connection
+        table: Parent table name
+        partitions: Partition names to detach
+
+    Returns:
+        Names of the partitions detached
+    """
+    detached = []
+    for name in partitions:
+        connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if PARTITION_ARCHIVE_TABLESPACE:
+            tablespace = connection.dialect.identifier_preparer.quote(PARTITION_ARCHIVE_TABLESPACE)
+            connection.execute(text(f"ALTER TABLE {name} SET TABLESPACE {tablespace}"))
+        detached.append(name)
+    return detached
+
+
+def maintain_partitions(
+    connection: Connection,
+    today: Optional[date] = None,
+    months_ahead: Optional[int] = None,
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Create upcoming partitions and detach expired ones for every partitioned table.
+
+    Tables that are not partitioned (e.g. on SQLite, or before the migration)
+    are skipped.
+
+    Args:
+        connection: Database connection (the caller commits)
+        today: Current date (default: today)
+        months_ahead: Months to create ahead of the current one (default PARTITION_PREMAKE_MONTHS)
+
+    Returns:
+        Dictionary per table with the ``created`` and ``detached`` partition names
+    """
+    today = today or date.today()
+    months_ahead = PARTITION_PREMAKE_MONTHS if months_ahead is None else months_ahead
+    results = {}
+
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            continue
+
+        connection.execute(text(create_default_partition_sql(table)))
+        created = create_partitions(
+            connection, table, month_range(today, add_months(month_start(today), months_ahead))
+        )
+        detached = detach_partitions(
+            connection,
+            table,
+            expired_partitions(
+                table, list_partitions(connection, table), PARTITION_RETENTION_MONTHS.get(table, 0), today
+            ),
+        )
+        results[table] = {"created": created, "detached": detached}
+        logger.info("Maintained partitions", table=table, created=created, detached=detached)
+
+    return results
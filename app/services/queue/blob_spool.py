@@ -0,0 +1,345 @@
+"""
+Blob handoff between the API and Celery workers.
+
+Uploads are spooled to a content-addressed directory and tasks receive a small
+handle instead of the file content, so broker messages stay the same size
+however large the file is. Set BLOB_SPOOL_DIR to a filesystem mounted on the
+API and all worker hosts (NFS, EFS, ...); without it, files are spooled to a
+local directory, which only works when the API and workers share a host
+(development, tests).
+
+Layout under the spool root:
+    blobs/<ab>/<sha256>    content, named by its SHA-256
+    refs/<sha256>/<ref>    one empty file per holder of the blob
+    tmp/                   writes in progress, renamed into blobs/ on commit
+
+Every commit adds a reference and every release removes one; the blob is
+deleted with its last reference. Uploading the same content twice stores it
+once. sweep() removes what crashed holders left behind.
+
+Usage:
+    with spool.writer() as writer:
+        writer.write(chunk)
+        handle = writer.commit()
+    process_edi_file.delay(blob_handle=handle, ...)
+
+    # worker
+    content = open_blob_spool(handle).read(handle)
+    ...
+    open_blob_spool(handle).release(handle)
+"""
+import hashlib
+import os
+import tempfile
+import time
+import uuid
+from typing import Dict, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Shared spool root (same mount path on every host); unset = local spool
+BLOB_SPOOL_DIR = os.getenv("BLOB_SPOOL_DIR")
+BLOB_SPOOL_LOCAL_DIR = os.getenv("TEMP_FILE_DIR", "/tmp/marb_edi_files")
+BLOB_SPOOL_CHUNK_SIZE = int(os.getenv("BLOB_SPOOL_CHUNK_SIZE", str(1024 * 1024)))
+# References and temp files older than this are assumed to belong to crashed holders
+BLOB_SPOOL_STALE_SECONDS = float(os.getenv("BLOB_SPOOL_STALE_HOURS", "24")) * 3600
+
+
+class BlobChecksumError(ValueError):
+    """Spooled content does not match its handle."""
+
+
+class BlobWriter:
+    """Chunked, hashing writer for one blob (use as a context manager)."""
+
+    def __init__(self, spool: "DirectoryBlobSpool"):
+        self._spool = spool
+        fd, self._tmp_path = tempfile.mkstemp(dir=spool.tmp_dir, prefix="upload-")
+        self._file = os.fdopen(fd, "wb", buffering=BLOB_SPOOL_CHUNK_SIZE)
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self._handle = None
+
+    def write(self, data: bytes) -> None:
+        """Append data."""
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def commit(self) -> Dict:
+        """
+        Finish the blob and take a reference to it.
+
+        Returns:
+            Handle to pass to the task
+        """
+        self._file.flush()
+        if self._spool.durable:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._handle = self._spool._install(self._tmp_path, self._hash.hexdigest(), self.size)
+        return self._handle
+
+    def abort(self) -> None:
+        """Discard the blob."""
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.unlink(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "BlobWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._handle is None:
+            self.abort()
+
+
+class DirectoryBlobSpool:
+    """
+    Blob spool in a directory (shared filesystem or local).
+
+    Handles are JSON-serializable dicts: ``{"spool", "sha256", "size", "ref"}``.
+    """
+
+    def __init__(self, root: str, durable: bool = True):
+        """
+        Initialize spool.
+
+        Args:
+            root: Spool directory (created if missing)
+            durable: fsync blobs and directories on commit, so other hosts
+                never see a partial file after a crash
+        """
+        self.root = os.path.abspath(root)
+        self.durable = durable
+        self.blob_dir = os.path.join(self.root, "blobs")
+        self.ref_dir = os.path.join(self.root, "refs")
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        for directory in (self.blob_dir, self.ref_dir, self.tmp_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def blob_path(self, sha256: str) -> str:
+        """Path of a blob."""
+        return os.path.join(self.blob_dir, sha256[:2], sha256)
+
+    def writer(self) -> BlobWriter:
+        """Start writing a new blob."""
+        return BlobWriter(self)
+
+    def _install(self, tmp_path: str, sha256: str, size: int) -> Dict:
+        # Reference first: a concurrent release of the same content then sees it
+        # and keeps (or restores) the blob
+        ref = self._add_ref(sha256)
+        path = self.blob_path(sha256)
+        if os.path.exists(path):
+            os.unlink(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            if self.durable:
+                self._fsync_dir(os.path.dirname(path))
+        logger.info("Spooled blob", sha256=sha256, size=size, ref=ref)
+        return {"spool": self.root, "sha256": sha256, "size": size, "ref": ref}
+
+    def _add_ref(self, sha256: str) -> str:
+        ref = uuid.uuid4().hex
+        ref_dir = os.path.join(self.ref_dir, sha256)
+        # The directory can be removed by a concurrent release of the last reference
+        for _ in range(3):
+            os.makedirs(ref_dir, exist_ok=True)
+            try:
+                with open(os.path.join(ref_dir, ref), "xb"):
+                    return ref
+            except FileNotFoundError:
+                continue
+        raise OSError(f"Could not add a reference to blob {sha256}")
+
+    def read(self, handle: Dict) -> bytes:
+        """
+        Read a blob, verifying its size and checksum.
+
+        Args:
+            handle: Handle from commit()
+
+        Returns:
+            Blob content
+
+        Raises:
+            FileNotFoundError: If the blob is not in the spool
+            BlobChecksumError: If the content does not match the handle
+        """
+        digest = hashlib.sha256()
+        chunks = []
+        with open(self.blob_path(handle["sha256"]), "rb") as f:
+            while True:
+                chunk = f.read(BLOB_SPOOL_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                chunks.append(chunk)
+        content = b"".join(chunks)
+        if len(content) != handle["size"] or digest.hexdigest() != handle["sha256"]:
+            raise BlobChecksumError(
+                f"Spooled blob {handle['sha256']} is corrupt "
+                f"({len(content)} bytes, expected {handle['size']})"
+            )
+        return content
+
+    def release(self, handle: Dict) -> bool:
+        """
+        Drop the handle's reference and delete the blob if it was the last one.
+
+        Args:
+            handle: Handle from commit()
+
+        Returns:
+            True if the blob was deleted
+        """
+        sha256 = handle["sha256"]
+        ref_dir = os.path.join(self.ref_dir, sha256)
+        try:
+            os.unlink(os.path.join(ref_dir, handle["ref"]))
+        except FileNotFoundError:
+            logger.warning("Blob reference already released", sha256=sha256, ref=handle["ref"])
+        try:
+            # Only succeeds if no references are left
+            os.rmdir(ref_dir)
+        except OSError:
+            return False
+        return self._delete_unreferenced(sha256)
+
+    def _delete_unreferenced(self, sha256: str) -> bool:
+        path = self.blob_path(sha256)
+        tombstone = os.path.join(self.tmp_dir, f"delete-{sha256}-{uuid.uuid4().hex}")
+        try:
+            os.rename(path, tombstone)
+        except FileNotFoundError:
+            return False
+        # A writer may have referenced the content since the references were checked
+        if os.path.isdir(os.path.join(self.ref_dir, sha256)):
+            try:
+                os.link(tombstone, path)
+            except FileExistsError:
+                pass
+            os.unlink(tombstone)
+            return False
+        os.unlink(tombstone)
+        logger.info("Deleted spooled blob", sha256=sha256)
+        return True
+
+    def sweep(self, max_age_seconds: Optional[float] = None) -> int:
+        """
+        Remove stale references and temp files, then unreferenced blobs.
+
+        Args:
+            max_age_seconds: Age after which references and temp files are
+                stale (default BLOB_SPOOL_STALE_HOURS)
+
+        Returns:
+            Number of blobs deleted
+        """
+        max_age = BLOB_SPOOL_STALE_SECONDS if max_age_seconds is None else max_age_seconds
+        cutoff = time.time() - max_age
+
+        for name in os.listdir(self.tmp_dir):
+            path = os.path.join(self.tmp_dir, name)
+            if self._mtime(path) < cutoff:
+                self._unlink(path)
+
+        for sha256 in os.listdir(self.ref_dir):
+            ref_dir = os.path.join(self.ref_dir, sha256)
+            for ref in os.listdir(ref_dir) if os.path.isdir(ref_dir) else []:
+                path = os.path.join(ref_dir, ref)
+                if self._mtime(path) < cutoff:
+                    logger.warning("Removing stale blob reference", sha256=sha256, ref=ref)
+                    self._unlink(path)
+            try:
+                os.rmdir(ref_dir)
+            except OSError:
+                pass
+
+        deleted = 0
+        for prefix in os.listdir(self.blob_dir):
+            for sha256 in os.listdir(os.path.join(self.blob_dir, prefix)):
+                # Left behind by a holder that crashed between releasing and deleting
+                if os.path.isdir(os.path.join(self.ref_dir, sha256)):
+                    continue
+                if self._mtime(self.blob_path(sha256)) < cutoff and self._delete_unreferenced(sha256):
+                    deleted += 1
+        return deleted
+
+    @staticmethod
+    def _mtime(path: str) -> float:
+        try:
+            return os.stat(path).st_mtime
+        except FileNotFoundError:
+            return time.time()
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _fsync_dir(path: str) -> None:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def get_blob_spool(local_root: Optional[str] = None) -> DirectoryBlobSpool:
+    """
+    Spool for new uploads.
+
+    Args:
+        local_root: Directory for the local spool when BLOB_SPOOL_DIR is not set
+            (default TEMP_FILE_DIR)
+
+    Returns:
+        Shared spool at BLOB_SPOOL_DIR, or a local spool
+    """
+    if BLOB_SPOOL_DIR:
+        return DirectoryBlobSpool(BLOB_SPOOL_DIR, durable=True)
+    return DirectoryBlobSpool(local_root or BLOB_SPOOL_LOCAL_DIR, durable=False)
+
+
+def open_blob_spool(handle: Dict) -> DirectoryBlobSpool:
+    """
+    Spool that holds a handle's blob.
+
+    Args:
+        handle: Handle from BlobWriter.commit()
+
+    Returns:
+        The spool the handle was written to
+    """
+    return DirectoryBlobSpool(handle["spool"], durable=bool(BLOB_SPOOL_DIR))
+
+
+async def spool_upload(upload, spool: DirectoryBlobSpool) -> Dict:
+    """
+    Stream an uploaded file into a spool.
+
+    Args:
+        upload: File with an async ``read(size)`` (e.g. FastAPI UploadFile)
+        spool: Target spool
+
+    Returns:
+        Handle of the spooled blob
+    """
+    with spool.writer() as writer:
+        while True:
+            chunk = await upload.read(BLOB_SPOOL_CHUNK_SIZE)
+            if not chunk:
+                break
+            writer.write(chunk)
+        return writer.commit()
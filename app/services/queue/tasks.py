@@ -15,17 +15,28 @@ Key Features:
 
 Tasks:
 - process_edi_file: Main task for processing EDI files (837 or 835)
+- load_837_chunk / finalize_edi_file: Chunk subtasks and chord callback for large 837 files
+- compute_feature_vectors / refresh_feature_vectors: Persisted ML feature vectors of claims
+
+Tasks are routed to the ingest, link, score and learning queues (app/config/celery.py).
 """
 import os
-from celery import Task
+import time
+from celery import Task, chord, group
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from app.config.celery import celery_app
-from app.config.database import SessionLocal
+from app.config.database import SessionLocal, open_replica_session
+from app.services.edi.adaptive_batch import AdaptiveBatchSizer
+from app.services.edi.columnar import CLAIM_BATCH_SIZE, ClaimBatch
 from app.services.edi.parser import EDIParser
 from app.services.edi.parser_optimized import OptimizedEDIParser
+from app.services.edi.raw_store import RawBlockLocator, read_raw_range, store_raw_file
 from app.services.edi.transformer import EDITransformer
+from app.services.queue.blob_spool import get_blob_spool, open_blob_spool
 from app.services.episodes.linker import EpisodeLinker
 from app.services.learning.pattern_detector import PatternDetector
+from ml.services.feature_store import FEATURE_STORE_BATCH_SIZE, FeatureStore
 from app.models.database import (
     Claim,
     Remittance,
@@ -36,14 +47,22 @@ from app.models.database import (
     EpisodeStatus,
 )
 from app.utils.logger import get_logger
+from app.api.routes.websocket import NotificationType
 from app.utils.notifications import (
     notify_file_processed,
-    notify_claim_processed,
-    notify_remittance_processed,
     notify_file_progress,
 )
+from app.utils.notification_digest import ProgressThrottle, digest_aggregator
 from app.config.sentry import capture_exception, add_breadcrumb, settings
 from app.utils.memory_monitor import get_memory_usage, log_memory_checkpoint
+from app.utils.metrics import (
+    DB_FLUSH_SECONDS,
+    EDI_PARSE_BYTES,
+    EDI_PARSE_MB_PER_SECOND,
+    EDI_ROWS_TRANSFORMED,
+    EDI_TRANSFORM_ROWS_PER_SECOND,
+    EPISODE_LINK_SECONDS,
+)
 
 logger = get_logger(__name__)
 
@@ -55,6 +74,258 @@ except ImportError:
     PERFORMANCE_MONITORING_AVAILABLE = False
     PerformanceMonitor = None
 
+# 837 files at least this large are loaded by chunk subtasks joined by a chord
+EDI_FANOUT_MIN_MB = float(os.getenv("EDI_FANOUT_MIN_MB", "50"))
+# Claims per chunk subtask
+EDI_FANOUT_CHUNK_CLAIMS = int(os.getenv("EDI_FANOUT_CHUNK_CLAIMS", "5000"))
+# Initial remittances per flush (adjusted by AdaptiveBatchSizer)
+REMITTANCE_BATCH_SIZE = int(os.getenv("EDI_REMITTANCE_BATCH_SIZE", "50"))
+# Task messages published per apply_async call when fanning out
+FANOUT_BATCH_SIZE = int(os.getenv("CELERY_FANOUT_BATCH_SIZE", "500"))
+# Claim IDs per query when loading claims for notifications
+NOTIFICATION_QUERY_BATCH_SIZE = int(os.getenv("NOTIFICATION_QUERY_BATCH_SIZE", "1000"))
+# Retries of a chunk task after a database connection error
+EDI_CHUNK_MAX_RETRIES = int(os.getenv("EDI_CHUNK_MAX_RETRIES", "3"))
+
+
+def _load_claims_individually(db: Session, transformer: EDITransformer, claims_data: list) -> list:
+    """
+    Transform and insert claims one at a time, skipping claims that fail.
+
+    Used when a columnar batch cannot be loaded as a whole (for example a
+    duplicate claim control number), so one bad claim does not drop the batch.
+
+    Args:
+        db: Database session
+        transformer: Transformer for the file
+        claims_data: Parsed claim dictionaries of the failed batch
+
+    Returns:
+        IDs of the claims that were inserted
+    """
+    claim_ids = []
+    for claim_data in claims_data:
+        try:
+            with db.begin_nested():
+                claim = transformer.transform_837_claim(claim_data)
+                db.add(claim)
+                db.flush()
+            claim_ids.append(claim.id)
+        except Exception as e:
+            logger.error(
+                "Failed to transform claim",
+                error=str(e),
+                claim_data=claim_data.get("claim_control_number"),
+                exc_info=True,
+            )
+    return claim_ids
+
+
+def _load_claim_batch(db: Session, transformer: EDITransformer, batch_claims: list, filename: str) -> list:
+    """
+    Load one columnar batch of claims, retrying claim by claim if the batch fails.
+
+    The raw block locator is rewound before the retry: the failed batch
+    already moved its forward-only cursor past these claims.
+
+    Args:
+        db: Database session
+        transformer: Transformer for the file
+        batch_claims: Parsed claim dictionaries
+        filename: File name for logging
+
+    Returns:
+        IDs of the claims that were inserted
+    """
+    locator = transformer.raw_locator
+    position = locator.tell() if locator is not None else None
+    try:
+        with DB_FLUSH_SECONDS.time(entity="claim"):
+            with db.begin_nested():
+                return transformer.load_837_batch(ClaimBatch(batch_claims))
+    except Exception as e:
+        logger.warning(
+            "Failed to load claim batch, processing claims individually",
+            error=str(e),
+            batch_size=len(batch_claims),
+            filename=filename,
+        )
+        if locator is not None:
+            locator.seek(position)
+        return _load_claims_individually(db, transformer, batch_claims)
+
+
+def _notify_claims_created(db: Session, claim_ids: list, digest_context: dict) -> None:
+    """
+    Send claim notifications as coalesced digests (one message per
+    NOTIFICATION_DIGEST_MAX_ITEMS claims instead of one per claim).
+
+    Claims are loaded NOTIFICATION_QUERY_BATCH_SIZE IDs per query.
+
+    Args:
+        db: Database session
+        claim_ids: IDs of the claims created from the file
+        digest_context: filename, file_type, task_id and practice_id of the file
+    """
+    try:
+        for start in range(0, len(claim_ids), NOTIFICATION_QUERY_BATCH_SIZE):
+            rows = (
+                db.query(Claim.id, Claim.claim_control_number, Claim.status, Claim.practice_id)
+                .filter(Claim.id.in_(claim_ids[start:start + NOTIFICATION_QUERY_BATCH_SIZE]))
+                .order_by(Claim.id)
+                .all()
+            )
+            for claim_id, claim_control_number, status, claim_practice_id in rows:
+                digest_aggregator.add(
+                    NotificationType.CLAIM_PROCESSED,
+                    {
+                        "claim_id": claim_id,
+                        "claim_control_number": claim_control_number,
+                        "status": status.value if status else None,
+                        "practice_id": claim_practice_id,
+                    },
+                    digest_context,
+                )
+        digest_aggregator.flush()
+    except Exception as e:
+        logger.warning("Failed to batch load claims for notifications", error=str(e))
+
+
+def _queue_episode_linking(remittance_ids: list) -> None:
+    """
+    Queue link_episodes for each remittance, publishing FANOUT_BATCH_SIZE tasks per call.
+
+    Args:
+        remittance_ids: IDs of committed remittances
+    """
+    for start in range(0, len(remittance_ids), FANOUT_BATCH_SIZE):
+        batch = remittance_ids[start:start + FANOUT_BATCH_SIZE]
+        try:
+            group(link_episodes.s(remittance_id) for remittance_id in batch).apply_async()
+        except Exception as e:
+            logger.warning(
+                "Failed to queue episode linking tasks",
+                error=str(e),
+                remittance_ids=batch,
+            )
+
+
+def _queue_feature_vectors(claim_ids: list) -> None:
+    """
+    Queue compute_feature_vectors for committed claims, FEATURE_STORE_BATCH_SIZE claims per task.
+
+    Args:
+        claim_ids: IDs of committed claims
+    """
+    if not claim_ids:
+        return
+    try:
+        group(
+            compute_feature_vectors.s(claim_ids[start:start + FEATURE_STORE_BATCH_SIZE])
+            for start in range(0, len(claim_ids), FEATURE_STORE_BATCH_SIZE)
+        ).apply_async()
+    except Exception as e:
+        # Vectors that were not computed here are computed on first use
+        logger.warning("Failed to queue feature vector computation", error=str(e), claims=len(claim_ids))
+
+
+def _record_episode_outcomes(db: Session, episodes: list) -> None:
+    """
+    Mark feature vectors stale when newly linked outcomes move their history enough,
+    and queue their recomputation.
+
+    Args:
+        db: Database session
+        episodes: Episodes that were just linked
+    """
+    try:
+        marked = FeatureStore(db).record_outcomes([episode.claim for episode in episodes if episode.claim])
+        db.commit()
+        if marked:
+            refresh_feature_vectors.delay()
+    except Exception as e:
+        db.rollback()
+        logger.warning("Failed to invalidate feature vectors", error=str(e))
+
+
+def _fan_out_837(
+    task: Task, db: Session, file_content: str, filename: str, practice_id: str = None
+) -> dict:
+    """
+    Split a large 837 file into chunk subtasks joined by a finalize_edi_file chord.
+
+    The file is stored once in the raw EDI store and each chunk subtask gets the
+    byte range of EDI_FANOUT_CHUNK_CLAIMS consecutive claim blocks, so messages
+    stay small and chunks are parsed and loaded in parallel on ingest workers.
+    If a chunk still fails after its retries, fail_edi_file reports the file
+    as failed instead of finalize_edi_file.
+
+    Args:
+        task: The process_edi_file task
+        db: Database session
+        file_content: File content
+        filename: File name
+        practice_id: Practice the file belongs to
+
+    Returns:
+        Result dict with status "chunked", or None if the file cannot be chunked
+        (no claim blocks, or blocks that cannot be located in the raw file)
+    """
+    raw_bytes = file_content.encode("utf-8")
+    try:
+        raw_file_hash = store_raw_file(db, raw_bytes, filename=filename, file_type="837")
+    except Exception as e:
+        db.rollback()
+        logger.warning("Failed to store raw EDI file, loading it in one task", error=str(e), filename=filename)
+        return None
+    locator = RawBlockLocator(raw_file_hash, raw_bytes)
+    ranges = []
+    for block in EDIParser(practice_id=practice_id).split_claim_blocks(file_content):
+        block_range = locator.locate(block)
+        if block_range is None:
+            logger.warning("Cannot locate 837 claim block, loading the file in one task", filename=filename)
+            return None
+        ranges.append(block_range)
+    if not ranges:
+        logger.warning("No claim blocks in 837 file, loading it in one task", filename=filename)
+        return None
+
+    chunks = []
+    for start in range(0, len(ranges), EDI_FANOUT_CHUNK_CLAIMS):
+        first_offset = ranges[start][0]
+        last_offset, last_length = ranges[min(start + EDI_FANOUT_CHUNK_CLAIMS, len(ranges)) - 1]
+        chunks.append(load_837_chunk.s(
+            raw_file_hash,
+            first_offset,
+            last_offset + last_length - first_offset,
+            first_block_index=start,
+            filename=filename,
+            practice_id=practice_id,
+            parent_task_id=task.request.id,
+        ))
+
+    file_kwargs = {
+        "filename": filename, "file_type": "837", "practice_id": practice_id, "parent_task_id": task.request.id
+    }
+    finalize = finalize_edi_file.s(**file_kwargs).on_error(fail_edi_file.s(**file_kwargs))
+    result = chord(chunks)(finalize)
+
+    logger.info(
+        "Queued 837 chunk tasks",
+        filename=filename,
+        claim_blocks=len(ranges),
+        chunks=len(chunks),
+        finalize_task_id=result.id,
+    )
+    return {
+        "status": "chunked",
+        "filename": filename,
+        "file_type": "837",
+        "claim_blocks": len(ranges),
+        "chunks": len(chunks),
+        "finalize_task_id": result.id,
+    }
+
 
 @celery_app.task(bind=True, name="process_edi_file")
 def process_edi_file(
@@ -64,22 +335,46 @@ def process_edi_file(
     filename: str = None,
     file_type: str = None,
     practice_id: str = None,
+    blob_handle: dict = None,
 ):
     """
     Process EDI file (837 or 835).
     
-    Supports two modes:
-    - Memory-based: file_content provided (for files <50MB)
-    - File-based: file_path provided (for files >50MB)
+    Supports three modes:
+    - Spooled: blob_handle from the blob spool (uploads; the blob is released when done)
+    - Memory-based: file_content provided (for small files)
+    - File-based: file_path to a file on this host (deleted when done)
     """
     # Validate inputs
-    if not file_content and not file_path:
-        raise ValueError("Either file_content or file_path must be provided")
-    if file_content and file_path:
-        raise ValueError("Cannot provide both file_content and file_path")
+    sources = [source for source in (file_content, file_path, blob_handle) if source]
+    if not sources:
+        raise ValueError("Either file_content or file_path must be provided, or a blob_handle")
+    if len(sources) > 1:
+        raise ValueError("Cannot provide both file_content and file_path (or blob_handle)")
     
+    if blob_handle:
+        logger.info(
+            "Processing spooled EDI file",
+            filename=filename,
+            sha256=blob_handle["sha256"],
+            file_type=file_type,
+            task_id=self.request.id,
+            practice_id=practice_id,
+        )
+        spool = open_blob_spool(blob_handle)
+        try:
+            file_content = spool.read(blob_handle).decode("utf-8")
+        except FileNotFoundError:
+            logger.error("Spooled file not found", sha256=blob_handle["sha256"], filename=filename)
+            raise
+        except Exception as e:
+            # Corrupt or undecodable content cannot succeed on a retry either
+            logger.error("Failed to read spooled file", error=str(e), sha256=blob_handle["sha256"])
+            spool.release(blob_handle)
+            raise
+        file_size = blob_handle["size"]
     # Load content from file if file_path provided
-    if file_path:
+    elif file_path:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
@@ -129,6 +424,16 @@ def process_edi_file(
         file_size_mb = file_size / (1024 * 1024)
         use_optimized = file_size_mb > 10  # Use optimized parser for files > 10MB
         
+        # Large 837 files are loaded in parallel by chunk subtasks
+        if file_type == "837" and file_size_mb >= EDI_FANOUT_MIN_MB:
+            result = _fan_out_837(self, db, file_content, filename, practice_id)
+            if result is not None:
+                if file_path and os.path.exists(file_path):
+                    os.unlink(file_path)
+                if monitor:
+                    monitor.finish()
+                return result
+        
         # Send initial progress notification
         try:
             notify_file_progress(
@@ -140,11 +445,13 @@ def process_edi_file(
                 current=0,
                 total=1,
                 message=f"Starting to parse {filename} ({file_size_mb:.1f} MB)",
+                practice_id=practice_id,
             )
         except Exception as e:
             logger.warning("Failed to send initial progress notification", error=str(e))
         
         # Parse EDI file
+        parse_started = time.perf_counter()
         if use_optimized:
             logger.info("Using optimized parser for large file", filename=filename, size_mb=file_size_mb)
             parser = OptimizedEDIParser(practice_id=practice_id)
@@ -158,6 +465,12 @@ def process_edi_file(
             parser = EDIParser(practice_id=practice_id)
             parsed_data = parser.parse(file_content, filename)
         
+        parse_seconds = time.perf_counter() - parse_started
+        parsed_file_type = parsed_data.get("file_type", file_type or "unknown")
+        EDI_PARSE_BYTES.inc(file_size, file_type=parsed_file_type)
+        if parse_seconds > 0:
+            EDI_PARSE_MB_PER_SECOND.observe(file_size_mb / parse_seconds, file_type=parsed_file_type)
+        
         if monitor:
             monitor.checkpoint("parsing_complete", {
                 "file_type": parsed_data.get("file_type"),
@@ -176,6 +489,7 @@ def process_edi_file(
                 current=0,
                 total=len(parsed_data.get("claims", [])) + len(parsed_data.get("remittances", [])),
                 message=f"Parsing complete, processing {len(parsed_data.get('claims', []))} claims / {len(parsed_data.get('remittances', []))} remittances",
+                practice_id=practice_id,
             )
         except Exception as e:
             logger.warning("Failed to send parsing progress notification", error=str(e))
@@ -184,88 +498,89 @@ def process_edi_file(
         if not file_type:
             file_type = parsed_data.get("file_type", "837")
         
+        # Keep the file once in the raw EDI store; rows only point into it
+        raw_locator = None
+        try:
+            raw_bytes = file_content.encode("utf-8")
+            raw_file_hash = store_raw_file(db, raw_bytes, filename=filename, file_type=file_type)
+            raw_locator = RawBlockLocator(raw_file_hash, raw_bytes)
+        except Exception as e:
+            db.rollback()
+            logger.warning("Failed to store raw EDI file, storing segments inline", error=str(e), filename=filename)
+        
         if file_type == "837":
             # Transform and save claims with batch processing
-            transformer = EDITransformer(db, practice_id=practice_id, filename=filename)
+            transformer = EDITransformer(
+                db, practice_id=practice_id, filename=filename, raw_locator=raw_locator
+            )
             claims_created = []
-            claims_to_add = []
-            batch_size = 50
             
             claims_data = parsed_data.get("claims", [])
             total_claims = len(claims_data)
+            progress_throttle = ProgressThrottle()
             
+            # Batch size adapts to flush latency and memory pressure
+            sizer = AdaptiveBatchSizer("claim", initial_size=CLAIM_BATCH_SIZE)
             logger.info(
                 "Processing claims",
                 total_claims=total_claims,
-                batch_size=batch_size,
+                batch_size=sizer.size,
                 filename=filename,
             )
             
-            for idx, claim_data in enumerate(claims_data):
-                try:
-                    claim = transformer.transform_837_claim(claim_data)
-                    claims_to_add.append(claim)
-                    
-                    # Commit in batches to reduce memory usage and improve performance
-                    if len(claims_to_add) >= batch_size:
-                        db.bulk_save_objects(claims_to_add)
-                        db.flush()
-                        
-                        # Get IDs after flush
-                        for c in claims_to_add:
-                            claims_created.append(c.id)
-                        
-                        claims_to_add = []
-                        
-                        # Send progress notification for large files
-                        if total_claims > 50:
-                            progress = 0.3 + (0.4 * (idx + 1) / total_claims)  # 30% to 70%
-                            try:
-                                notify_file_progress(
-                                    filename=filename,
-                                    file_type="837",
-                                    task_id=self.request.id,
-                                    stage="saving",
-                                    progress=progress,
-                                    current=idx + 1,
-                                    total=total_claims,
-                                    message=f"Processing claims: {idx + 1}/{total_claims}",
-                                )
-                            except Exception as e:
-                                logger.warning("Failed to send progress notification", error=str(e))
-                        
-                        # Log progress for large files
-                        if total_claims > 100 and (idx + 1) % 100 == 0:
-                            logger.info(
-                                "Claim processing progress",
-                                processed=idx + 1,
-                                total=total_claims,
-                                progress_pct=((idx + 1) / total_claims) * 100,
-                            )
-                    
-                except Exception as e:
-                    logger.error(
-                        "Failed to transform claim",
-                        error=str(e),
-                        claim_data=claim_data.get("claim_control_number"),
-                        exc_info=True,
+            # Claims are loaded as columnar batches (one INSERT each for claims,
+            # lines and parser logs); a batch that fails is retried claim by claim
+            transform_seconds = 0.0
+            processed = 0
+            for batch_claims in sizer.batches(claims_data):
+                processed += len(batch_claims)
+                transform_started = time.perf_counter()
+                claims_created.extend(_load_claim_batch(db, transformer, batch_claims, filename))
+                batch_seconds = time.perf_counter() - transform_started
+                transform_seconds += batch_seconds
+                sizer.record(len(batch_claims), batch_seconds)
+                
+                # Send progress notification for large files
+                if total_claims > 50 and progress_throttle.ready():
+                    progress = 0.3 + (0.4 * processed / total_claims)  # 30% to 70%
+                    try:
+                        notify_file_progress(
+                            filename=filename,
+                            file_type="837",
+                            task_id=self.request.id,
+                            stage="saving",
+                            progress=progress,
+                            current=processed,
+                            total=total_claims,
+                            message=f"Processing claims: {processed}/{total_claims}",
+                            practice_id=practice_id,
+                        )
+                    except Exception as e:
+                        logger.warning("Failed to send progress notification", error=str(e))
+                
+                if total_claims > 100:
+                    logger.info(
+                        "Claim processing progress",
+                        processed=processed,
+                        total=total_claims,
+                        progress_pct=(processed / total_claims) * 100,
                     )
-                    # Continue processing other claims
-                    continue
-            
-            # Commit remaining claims
-            if claims_to_add:
-                db.bulk_save_objects(claims_to_add)
-                db.flush()
-                for c in claims_to_add:
-                    claims_created.append(c.id)
             
             db.commit()
+            _queue_feature_vectors(claims_created)
+            
+            EDI_ROWS_TRANSFORMED.inc(len(claims_created), entity="claim")
+            if claims_created and transform_seconds > 0:
+                EDI_TRANSFORM_ROWS_PER_SECOND.observe(
+                    len(claims_created) / transform_seconds, entity="claim"
+                )
             
             logger.info(
                 "837 file processed successfully",
                 filename=filename,
                 claims_created=len(claims_created),
+                final_batch_size=sizer.size,
+                backpressure_seconds=sizer.paused_seconds,
             )
             
             if monitor:
@@ -285,36 +600,19 @@ def process_edi_file(
             
             # Send WebSocket notification for file processing
             try:
-                notify_file_processed(filename, file_type, result)
+                notify_file_processed(
+                    filename, file_type, result, task_id=self.request.id, practice_id=practice_id
+                )
             except Exception as e:
                 logger.warning("Failed to send file processed notification", error=str(e), filename=filename)
             
-            # Send notifications for each claim processed
-            # Optimize: batch load claims instead of querying one by one
             if claims_created:
-                try:
-                    claims = db.query(Claim).filter(Claim.id.in_(claims_created)).all()
-                    # Ensure all claims are in the dictionary
-                    claim_dict = {claim.id: claim for claim in claims}
-
-                    for claim_id in claims_created:
-                        claim = claim_dict.get(claim_id)
-                        if not claim:
-                            logger.warning("Claim not found in batch load", claim_id=claim_id)
-                            continue
-
-                        try:
-                            notify_claim_processed(
-                                claim_id,
-                                {
-                                    "claim_control_number": claim.claim_control_number,
-                                    "status": claim.status.value if claim.status else None,
-                                },
-                            )
-                        except Exception as e:
-                            logger.warning("Failed to send claim processed notification", error=str(e), claim_id=claim_id)
-                except Exception as e:
-                    logger.warning("Failed to batch load claims for notifications", error=str(e))
+                _notify_claims_created(db, claims_created, {
+                    "filename": filename,
+                    "file_type": file_type,
+                    "task_id": self.request.id,
+                    "practice_id": practice_id,
+                })
             
             # Clean up temporary file if file_path was provided
             if file_path and os.path.exists(file_path):
@@ -328,32 +626,42 @@ def process_edi_file(
         
         elif file_type == "835":
             # Transform and save remittances with batch processing
-            transformer = EDITransformer(db, practice_id=practice_id, filename=filename)
+            transformer = EDITransformer(
+                db, practice_id=practice_id, filename=filename, raw_locator=raw_locator
+            )
             remittances_created = []
             remittances_to_add = []
             remittance_ids_for_linking = []
             bpr_data = parsed_data.get("bpr", {})
-            batch_size = 50
+            # Batch size adapts to flush latency and memory pressure
+            sizer = AdaptiveBatchSizer("remittance", initial_size=REMITTANCE_BATCH_SIZE)
             
             remittances_data = parsed_data.get("remittances", [])
             total_remittances = len(remittances_data)
+            progress_throttle = ProgressThrottle()
             
             logger.info(
                 "Processing remittances",
                 total_remittances=total_remittances,
-                batch_size=batch_size,
+                batch_size=sizer.size,
                 filename=filename,
             )
             
+            transform_seconds = 0.0
             for idx, remittance_data in enumerate(remittances_data):
                 try:
+                    transform_started = time.perf_counter()
                     remittance = transformer.transform_835_remittance(remittance_data, bpr_data)
+                    transform_seconds += time.perf_counter() - transform_started
                     remittances_to_add.append(remittance)
                     
                     # Commit in batches to reduce memory usage and improve performance
-                    if len(remittances_to_add) >= batch_size:
-                        db.bulk_save_objects(remittances_to_add)
-                        db.flush()
+                    if len(remittances_to_add) >= sizer.size:
+                        flush_started = time.perf_counter()
+                        with DB_FLUSH_SECONDS.time(entity="remittance"):
+                            db.bulk_save_objects(remittances_to_add)
+                            db.flush()
+                        sizer.record(len(remittances_to_add), time.perf_counter() - flush_started)
                         
                         # Get IDs after flush and queue linking tasks
                         for r in remittances_to_add:
@@ -361,9 +669,10 @@ def process_edi_file(
                             remittance_ids_for_linking.append(r.id)
                         
                         remittances_to_add = []
+                        sizer.wait_for_headroom()
                         
                         # Send progress notification for large files
-                        if total_remittances > 50:
+                        if total_remittances > 50 and progress_throttle.ready():
                             progress = 0.3 + (0.4 * (idx + 1) / total_remittances)  # 30% to 70%
                             try:
                                 notify_file_progress(
@@ -375,6 +684,7 @@ def process_edi_file(
                                     current=idx + 1,
                                     total=total_remittances,
                                     message=f"Processing remittances: {idx + 1}/{total_remittances}",
+                                    practice_id=practice_id,
                                 )
                             except Exception as e:
                                 logger.warning("Failed to send progress notification", error=str(e))
@@ -400,24 +710,23 @@ def process_edi_file(
             
             # Commit remaining remittances
             if remittances_to_add:
-                db.bulk_save_objects(remittances_to_add)
-                db.flush()
+                with DB_FLUSH_SECONDS.time(entity="remittance"):
+                    db.bulk_save_objects(remittances_to_add)
+                    db.flush()
                 for r in remittances_to_add:
                     remittances_created.append(r.id)
                     remittance_ids_for_linking.append(r.id)
             
             db.commit()
             
+            EDI_ROWS_TRANSFORMED.inc(len(remittances_created), entity="remittance")
+            if remittances_created and transform_seconds > 0:
+                EDI_TRANSFORM_ROWS_PER_SECOND.observe(
+                    len(remittances_created) / transform_seconds, entity="remittance"
+                )
+            
             # Queue episode linking tasks in batches (after commit)
-            for remittance_id in remittance_ids_for_linking:
-                try:
-                    link_episodes.delay(remittance_id)
-                except Exception as e:
-                    logger.warning(
-                        "Failed to queue episode linking task",
-                        error=str(e),
-                        remittance_id=remittance_id,
-                    )
+            _queue_episode_linking(remittance_ids_for_linking)
             
             logger.info(
                 "835 file processed successfully",
@@ -451,44 +760,52 @@ def process_edi_file(
                     current=len(remittances_created),
                     total=len(remittances_created),
                     message=f"File {filename} processed successfully",
+                    practice_id=practice_id,
                 )
             except Exception as e:
                 logger.warning("Failed to send completion progress notification", error=str(e))
             
             # Send WebSocket notification for file processing
             try:
-                notify_file_processed(filename, file_type, result)
+                notify_file_processed(
+                    filename, file_type, result, task_id=self.request.id, practice_id=practice_id
+                )
             except Exception as e:
                 logger.warning("Failed to send file processed notification", error=str(e), filename=filename)
             
-            # Send notifications for each remittance processed
-            # Optimize: batch load remittances instead of querying one by one
+            # Send remittance notifications as coalesced digests
             if remittances_created:
                 try:
-                    remittances = db.query(Remittance).filter(Remittance.id.in_(remittances_created)).all()
-                    remittance_dict = {remittance.id: remittance for remittance in remittances}
-
-                    for remittance_id in remittances_created:
-                        remittance = remittance_dict.get(remittance_id)
-                        if not remittance:
-                            logger.warning("Remittance not found in batch load", remittance_id=remittance_id)
-                            continue
-
-                        try:
-                            notify_remittance_processed(
-                                remittance_id,
-                                {
-                                    "claim_control_number": remittance.claim_control_number,
-                                    "payment_amount": remittance.payment_amount,
-                                    "status": remittance.status.value if remittance.status else None,
-                                },
-                            )
-                        except Exception as e:
-                            logger.warning(
-                                "Failed to send remittance processed notification",
-                                error=str(e),
-                                remittance_id=remittance_id,
-                            )
+                    digest_context = {
+                        "filename": filename,
+                        "file_type": file_type,
+                        "task_id": self.request.id,
+                        "practice_id": practice_id,
+                    }
+                    rows = (
+                        db.query(
+                            Remittance.id,
+                            Remittance.claim_control_number,
+                            Remittance.payment_amount,
+                            Remittance.status,
+                        )
+                        .filter(Remittance.id.in_(remittances_created))
+                        .order_by(Remittance.id)
+                        .all()
+                    )
+                    for remittance_id, claim_control_number, payment_amount, status in rows:
+                        digest_aggregator.add(
+                            NotificationType.REMITTANCE_PROCESSED,
+                            {
+                                "remittance_id": remittance_id,
+                                "claim_control_number": claim_control_number,
+                                "payment_amount": payment_amount,
+                                "status": status.value if status else None,
+                                "practice_id": practice_id,
+                            },
+                            digest_context,
+                        )
+                    digest_aggregator.flush()
                 except Exception as e:
                     logger.warning("Failed to batch load remittances for notifications", error=str(e))
             
@@ -566,6 +883,242 @@ def process_edi_file(
         if monitor and not monitor.checkpoints:  # If no checkpoints were recorded, finish anyway
             monitor.finish()
         db.close()
+        if blob_handle:
+            try:
+                open_blob_spool(blob_handle).release(blob_handle)
+            except Exception as e:
+                logger.warning("Failed to release spooled file", error=str(e), sha256=blob_handle["sha256"])
+
+
+@celery_app.task(
+    bind=True,
+    name="load_837_chunk",
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    max_retries=EDI_CHUNK_MAX_RETRIES,
+)
+def load_837_chunk(
+    self: Task,
+    raw_file_hash: str,
+    offset: int,
+    length: int,
+    first_block_index: int = 0,
+    filename: str = None,
+    practice_id: str = None,
+    parent_task_id: str = None,
+):
+    """
+    Parse and load a range of claim blocks of a large 837 file.
+
+    Queued by process_edi_file for files of at least EDI_FANOUT_MIN_MB; the
+    results of all chunks are passed to finalize_edi_file. The chunk is
+    committed in one transaction, so a database connection error rolls it
+    back and the task is retried (up to EDI_CHUNK_MAX_RETRIES times).
+    Claim notifications are sent here, so only counts go through the
+    result backend.
+
+    Args:
+        self: Celery task instance (bound task)
+        raw_file_hash: Content address of the file in the raw EDI store
+        offset: Byte offset of the first claim block
+        length: Byte length of the range
+        first_block_index: Index of the first claim block in the file
+        filename: File name
+        practice_id: Practice the file belongs to
+        parent_task_id: ID of the process_edi_file task that split the file
+
+    Returns:
+        Dict with claims_created and warnings
+    """
+    db: Session = SessionLocal()
+    try:
+        raw = read_raw_range(db, raw_file_hash, offset, length)
+        if raw is None:
+            raise ValueError(f"Raw EDI file not found: {raw_file_hash}")
+
+        # The parent already adapted to the file format; chunks use the practice config
+        parser = EDIParser(practice_id=practice_id, auto_detect_format=False)
+        claims_data = parser.parse_claim_blocks(
+            parser.split_claim_blocks(raw.decode("utf-8")), first_index=first_block_index
+        )
+        transformer = EDITransformer(
+            db,
+            practice_id=practice_id,
+            filename=filename,
+            raw_locator=RawBlockLocator(raw_file_hash, raw, base_offset=offset),
+        )
+
+        claims_created = []
+        sizer = AdaptiveBatchSizer("claim", initial_size=CLAIM_BATCH_SIZE)
+        for batch_claims in sizer.batches(claims_data):
+            batch_started = time.perf_counter()
+            claims_created.extend(_load_claim_batch(db, transformer, batch_claims, filename))
+            sizer.record(len(batch_claims), time.perf_counter() - batch_started)
+        db.commit()
+        _queue_feature_vectors(claims_created)
+        # Clients track the file by the task ID returned at upload
+        _notify_claims_created(db, claims_created, {
+            "filename": filename,
+            "file_type": "837",
+            "task_id": parent_task_id or self.request.id,
+            "practice_id": practice_id,
+        })
+
+        EDI_ROWS_TRANSFORMED.inc(len(claims_created), entity="claim")
+        logger.info(
+            "837 chunk loaded",
+            filename=filename,
+            first_block_index=first_block_index,
+            claims_parsed=len(claims_data),
+            claims_created=len(claims_created),
+            task_id=self.request.id,
+        )
+        return {
+            "claims_created": len(claims_created),
+            "warnings": [warning for claim in claims_data for warning in claim.get("warnings") or []],
+        }
+
+    except Exception as e:
+        logger.error(
+            "Failed to load 837 chunk",
+            error=str(e),
+            filename=filename,
+            first_block_index=first_block_index,
+            task_id=self.request.id,
+            retries=self.request.retries,
+        )
+        capture_exception(
+            e,
+            context={
+                "task": {
+                    "task_id": self.request.id,
+                    "task_name": "load_837_chunk",
+                    "filename": filename,
+                    "first_block_index": first_block_index,
+                },
+            },
+            tags={"task": "load_837_chunk", "error_type": type(e).__name__},
+        )
+        db.rollback()
+        raise
+
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, name="finalize_edi_file")
+def finalize_edi_file(
+    self: Task,
+    chunk_results: list,
+    filename: str = None,
+    file_type: str = "837",
+    practice_id: str = None,
+    parent_task_id: str = None,
+):
+    """
+    Combine the results of the chunk tasks of a file and send its file notification.
+
+    Runs as the chord callback once every load_837_chunk task has finished.
+
+    Args:
+        self: Celery task instance (bound task)
+        chunk_results: Results of the chunk tasks
+        filename: File name
+        file_type: File type
+        practice_id: Practice the file belongs to
+        parent_task_id: ID of the process_edi_file task that split the file
+
+    Returns:
+        Dict with status, claims_created, chunks and warnings
+    """
+    claims_created = sum(chunk["claims_created"] for chunk in chunk_results)
+    result = {
+        "status": "success",
+        "filename": filename,
+        "file_type": file_type,
+        "claims_created": claims_created,
+        "chunks": len(chunk_results),
+        "warnings": [warning for chunk in chunk_results for warning in chunk["warnings"]],
+    }
+    logger.info(
+        "837 file processed successfully",
+        filename=filename,
+        claims_created=claims_created,
+        chunks=len(chunk_results),
+        parent_task_id=parent_task_id,
+    )
+
+    # Clients track the file by the task ID returned at upload
+    task_id = parent_task_id or self.request.id
+    try:
+        notify_file_processed(filename, file_type, result, task_id=task_id, practice_id=practice_id)
+    except Exception as e:
+        logger.warning("Failed to send file processed notification", error=str(e), filename=filename)
+
+    return result
+
+
+@celery_app.task(bind=True, name="fail_edi_file")
+def fail_edi_file(
+    self: Task,
+    failed_task_id: str,
+    filename: str = None,
+    file_type: str = "837",
+    practice_id: str = None,
+    parent_task_id: str = None,
+):
+    """
+    Report a chunked file as failed.
+
+    Linked as the error callback of finalize_edi_file: runs when a
+    load_837_chunk task fails after its retries (or finalize_edi_file
+    itself fails). Claims of chunks that were loaded stay committed; a
+    re-upload skips them as duplicates.
+
+    Args:
+        self: Celery task instance (bound task)
+        failed_task_id: ID of the failed chord callback
+        filename: File name
+        file_type: File type
+        practice_id: Practice the file belongs to
+        parent_task_id: ID of the process_edi_file task that split the file
+
+    Returns:
+        Dict with status "failed"
+    """
+    result = {
+        "status": "failed",
+        "filename": filename,
+        "file_type": file_type,
+        "failed_task_id": failed_task_id,
+    }
+    logger.error(
+        "837 file processing failed",
+        filename=filename,
+        failed_task_id=failed_task_id,
+        parent_task_id=parent_task_id,
+    )
+    add_breadcrumb(
+        message=f"EDI file processing failed: {filename}",
+        category="celery_task",
+        level="error",
+        data={
+            "task": "fail_edi_file",
+            "filename": filename,
+            "file_type": file_type,
+            "practice_id": practice_id,
+            "task_id": parent_task_id,
+        },
+    )
+
+    # Clients track the file by the task ID returned at upload
+    task_id = parent_task_id or self.request.id
+    try:
+        notify_file_processed(filename, file_type, result, task_id=task_id, practice_id=practice_id)
+    except Exception as e:
+        logger.warning("Failed to send file failed notification", error=str(e), filename=filename)
+
+    return result
 
 
 @celery_app.task(bind=True, name="link_episodes")
@@ -594,12 +1147,14 @@ def link_episodes(self: Task, remittance_id: int):
     logger.info("Linking episodes", remittance_id=remittance_id, task_id=self.request.id)
     
     db: Session = SessionLocal()
+    link_started = time.perf_counter()
     
     try:
         remittance = db.query(Remittance).filter(Remittance.id == remittance_id).first()
         
         if not remittance:
             logger.warning("Remittance not found", remittance_id=remittance_id)
+            EPISODE_LINK_SECONDS.observe(time.perf_counter() - link_started, outcome="not_found")
             return {"status": "error", "message": "Remittance not found"}
         
         linker = EpisodeLinker(db)
@@ -655,6 +1210,13 @@ def link_episodes(self: Task, remittance_id: int):
         # This ensures count queries reflect the new/updated episodes
         cache.delete_pattern("count:episode*")
         
+        if episodes:
+            _record_episode_outcomes(db, episodes)
+        
+        EPISODE_LINK_SECONDS.observe(
+            time.perf_counter() - link_started,
+            outcome="linked" if episodes else "unmatched",
+        )
         logger.info("Episodes linked", remittance_id=remittance_id, episode_count=len(episodes))
         
         return {
@@ -664,6 +1226,7 @@ def link_episodes(self: Task, remittance_id: int):
         }
     
     except Exception as e:
+        EPISODE_LINK_SECONDS.observe(time.perf_counter() - link_started, outcome="error")
         logger.error("Failed to link episodes", remittance_id=remittance_id, error=str(e), exc_info=True)
         
         # Add breadcrumb for context
@@ -747,9 +1310,11 @@ def detect_patterns(self: Task, payer_id: int = None, days_back: int = 90):
     )
     
     db: Session = SessionLocal()
+    # Episode scans read from the replica when one is configured and current
+    read_db = open_replica_session()
     
     try:
-        detector = PatternDetector(db)
+        detector = PatternDetector(db, read_db=read_db)
         
         if payer_id:
             # Detect patterns for specific payer
@@ -870,6 +1435,8 @@ def detect_patterns(self: Task, payer_id: int = None, days_back: int = 90):
         raise
     
     finally:
+        if read_db is not None:
+            read_db.close()
         db.close()
 
 
@@ -883,6 +1450,7 @@ def retrain_ml_model(
     days_back: int = 90,
     output_dir: str = "ml/models/saved",
     run_pattern_detection: bool = True,
+    incremental: bool = False,
 ):
     """
     Retrain ML model and run pattern detection (scheduled task).
@@ -899,6 +1467,8 @@ def retrain_ml_model(
         days_back: Days to look back for pattern detection
         output_dir: Directory to save trained model
         run_pattern_detection: Whether to run pattern detection
+        incremental: Whether to update the latest model with new outcomes only
+            (e.g. daily), instead of retraining on the whole date range
     """
     from datetime import datetime, timedelta
     from ml.training.continuous_learning_pipeline import ContinuousLearningPipeline
@@ -909,6 +1479,7 @@ def retrain_ml_model(
         task_id=task_id,
         model_type=model_type,
         run_pattern_detection=run_pattern_detection,
+        incremental=incremental,
     )
     
     # Add breadcrumb for Sentry
@@ -923,6 +1494,8 @@ def retrain_ml_model(
     )
     
     db = SessionLocal()
+    # Training data collection reads from the replica when one is configured and current
+    read_db = open_replica_session()
     
     try:
         # Parse dates
@@ -937,7 +1510,7 @@ def retrain_ml_model(
             end_dt = datetime.now()
         
         # Run pipeline
-        pipeline = ContinuousLearningPipeline(db)
+        pipeline = ContinuousLearningPipeline(db, read_session=read_db)
         results = pipeline.run_full_pipeline(
             start_date=start_dt,
             end_date=end_dt,
@@ -946,6 +1519,7 @@ def retrain_ml_model(
             days_back=days_back,
             output_dir=output_dir,
             run_pattern_detection=run_pattern_detection,
+            incremental=incremental,
         )
         
         # Log results
@@ -981,6 +1555,9 @@ def retrain_ml_model(
             "steps_completed": results["steps_completed"],
             "errors": results["errors"],
             "model_metrics": results.get("model_metrics", {}),
+            "training_mode": results.get("training_mode"),
+            "new_episodes": results.get("new_episodes"),
+            "model_path": results.get("model_path"),
             "pattern_detection": results.get("pattern_detection", {}),
         }
         
@@ -1018,6 +1595,127 @@ def retrain_ml_model(
         db.rollback()
         raise self.retry(exc=e, countdown=3600)  # Retry after 1 hour
     
+    finally:
+        if read_db is not None:
+            read_db.close()
+        db.close()
+
+
+
+@celery_app.task(bind=True, name="maintain_partitions")
+def maintain_partitions(self: Task, months_ahead: int = None):
+    """
+    Create upcoming monthly partitions and detach expired ones (scheduled task).
+
+    Run daily by celery beat (BEAT_SCHEDULE in app/config/celery.py). Rows for
+    months without a partition go to the default partition until their month
+    is created (PostgreSQL only; a no-op elsewhere).
+
+    Args:
+        self: Celery task instance (bound task)
+        months_ahead: Months of partitions to create ahead (default PARTITION_PREMAKE_MONTHS)
+
+    Returns:
+        Dict with the partitions created and detached per table
+    """
+    from app.services.maintenance import partitions
+
+    db = SessionLocal()
+    try:
+        results = partitions.maintain_partitions(db.connection(), months_ahead=months_ahead)
+        db.commit()
+        return {"status": "success", "tables": results}
+    except Exception as e:
+        logger.error(
+            "Partition maintenance failed",
+            task_id=self.request.id,
+            error=str(e),
+            exc_info=True,
+        )
+        capture_exception(
+            e,
+            level="error",
+            context={"task": {"name": "maintain_partitions", "id": self.request.id}},
+            tags={"task": "maintain_partitions", "error_type": type(e).__name__},
+        )
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, name="sweep_blob_spool")
+def sweep_blob_spool(self: Task, max_age_hours: float = None):
+    """
+    Remove spooled uploads left behind by crashed tasks (scheduled task).
+
+    Run hourly by celery beat (BEAT_SCHEDULE in app/config/celery.py).
+
+    Args:
+        self: Celery task instance (bound task)
+        max_age_hours: Age after which references are stale (default BLOB_SPOOL_STALE_HOURS)
+
+    Returns:
+        Dict with the number of blobs deleted
+    """
+    max_age_seconds = max_age_hours * 3600 if max_age_hours is not None else None
+    deleted = get_blob_spool().sweep(max_age_seconds)
+    logger.info("Swept blob spool", blobs_deleted=deleted, task_id=self.request.id)
+    return {"status": "success", "blobs_deleted": deleted}
+
+
+@celery_app.task(bind=True, name="compute_feature_vectors")
+def compute_feature_vectors(self: Task, claim_ids: list):
+    """
+    Compute and store the ML feature vectors of newly loaded claims.
+
+    Args:
+        self: Celery task instance (bound task)
+        claim_ids: IDs of the claims
+
+    Returns:
+        Dict with the number of vectors stored
+    """
+    db: Session = SessionLocal()
+    try:
+        stored = FeatureStore(db).compute(claim_ids)
+        db.commit()
+        logger.info("Feature vectors computed", vectors=stored, task_id=self.request.id)
+        return {"status": "success", "vectors": stored}
+    except Exception as e:
+        logger.error(
+            "Failed to compute feature vectors",
+            error=str(e),
+            claims=len(claim_ids),
+            task_id=self.request.id,
+        )
+        db.rollback()
+        raise
     finally:
         db.close()
 
+
+@celery_app.task(bind=True, name="refresh_feature_vectors")
+def refresh_feature_vectors(self: Task, limit: int = None):
+    """
+    Recompute feature vectors marked stale by episode linking.
+
+    Args:
+        self: Celery task instance (bound task)
+        limit: Maximum number of vectors to recompute (default all)
+
+    Returns:
+        Dict with the number of vectors recomputed
+    """
+    db: Session = SessionLocal()
+    try:
+        refreshed = FeatureStore(db).refresh_stale(limit=limit)
+        db.commit()
+        logger.info("Stale feature vectors refreshed", vectors=refreshed, task_id=self.request.id)
+        return {"status": "success", "vectors": refreshed}
+    except Exception as e:
+        logger.error("Failed to refresh feature vectors", error=str(e), task_id=self.request.id)
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -1,12 +1,18 @@
 """ML service for risk prediction."""
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import numpy as np
 from pathlib import Path
 import os
 
 from app.models.database import Claim
 from ml.models.risk_predictor import RiskPredictor
-from ml.services.feature_extractor import FeatureExtractor
+from ml.services.feature_pipeline import (
+    FEATURE_INDEX,
+    FEATURE_SCHEMA_VERSION,
+    HISTORICAL_FEATURES,
+    build_feature_matrix,
+)
+from ml.services.feature_store import FeatureStore
 from app.utils.logger import get_logger
 from app.utils.memory_monitor import log_memory_checkpoint, get_memory_usage
 
@@ -26,7 +32,6 @@ class MLService:
         """
         self.model: Optional[RiskPredictor] = None
         self.model_loaded = False
-        self.feature_extractor = FeatureExtractor()
         self.db_session = db_session
 
         # Try to load model
@@ -120,6 +125,41 @@ class MLService:
         """
         self.model = RiskPredictor(model_path=model_path)
         self.model_loaded = True
+        if self.model.feature_schema_version != FEATURE_SCHEMA_VERSION:
+            logger.warning(
+                "Model was trained on a different feature schema",
+                model_path=model_path,
+                model_schema_version=self.model.feature_schema_version,
+                serving_schema_version=FEATURE_SCHEMA_VERSION,
+            )
+
+    def _model_feature_names(self) -> Optional[List[str]]:
+        """Feature names recorded with the loaded model (None if unknown)."""
+        names = getattr(self.model, "feature_names", None)
+        return names if isinstance(names, list) else None
+
+    def extract_features(self, claims: List[Claim]) -> np.ndarray:
+        """
+        Feature matrix for claims, in the column order the loaded model was trained on.
+
+        With a database session, stored feature vectors are used (and missing
+        ones stored); without one, features are computed without history.
+
+        Args:
+            claims: Claims with their claim_lines loaded
+
+        Returns:
+            Float32 array of shape (n_claims, n_features)
+        """
+        names = self._model_feature_names()
+        include_historical = names is None or any(name in HISTORICAL_FEATURES for name in names)
+        if self.db_session is not None:
+            features = FeatureStore(self.db_session).feature_matrix(claims, include_historical=include_historical)
+        else:
+            features = build_feature_matrix(claims, include_historical=include_historical)
+        if names and all(name in FEATURE_INDEX for name in names):
+            features = features[:, [FEATURE_INDEX[name] for name in names]]
+        return features.astype(np.float32)
 
     def predict_risk(self, claim: Claim) -> float:
         """
@@ -146,19 +186,17 @@ class MLService:
             )
             
             # Extract features
-            features = self.feature_extractor.extract_features(
-                claim, include_historical=True, db_session=self.db_session
-            )
+            features = self.extract_features([claim])
             
             log_memory_checkpoint(
                 "ml_prediction",
                 "features_extracted",
                 start_memory_mb=start_memory,
-                metadata={"claim_id": claim.id, "feature_count": len(features)},
+                metadata={"claim_id": claim.id, "feature_count": features.shape[1]},
             )
 
             # Predict denial rate (0.0 to 1.0)
-            denial_rate = self.model.predict_single(features)
+            denial_rate = float(self.model.predict(features)[0])
             
             log_memory_checkpoint(
                 "ml_prediction",
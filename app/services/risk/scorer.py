@@ -9,6 +9,7 @@ for healthcare claims. It combines multiple risk assessment components:
 - Documentation rules: Assesses documentation completeness
 - ML predictions: Uses machine learning models for risk prediction
 - Pattern detection: Analyzes historical denial patterns
+- Denial trends: Flags payers whose recent denial rate is well above their usual rate
 
 The scorer calculates an overall risk score (0-100) and risk level (low, medium, high, critical)
 by combining weighted component scores. Risk scores are cached for performance.
@@ -17,6 +18,7 @@ Configuration:
 - Risk weights can be configured via environment variables (see app/config/risk_weights.py)
 - Component weights default to balanced distribution but can be customized per practice
 """
+import time
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 
@@ -26,9 +28,11 @@ from app.services.risk.rules.coding_rules import CodingRulesEngine
 from app.services.risk.rules.doc_rules import DocumentationRulesEngine
 from app.services.risk.ml_service import MLService
 from app.services.learning.pattern_detector import PatternDetector
+from app.services.learning.denial_sketch import DenialRateTracker, denial_tracker
 from app.utils.logger import get_logger
 from app.utils.notifications import notify_risk_score_calculated
 from app.utils.cache import cache, risk_score_cache_key
+from app.utils.metrics import RISK_SCORE_SECONDS
 from app.config.cache_ttl import get_risk_score_ttl
 from app.config.risk_weights import get_risk_weights, validate_weights
 
@@ -38,7 +42,12 @@ logger = get_logger(__name__)
 class RiskScorer:
     """Orchestrates risk scoring for claims."""
 
-    def __init__(self, db: Session, weights: Optional[Dict[str, float]] = None):
+    def __init__(
+        self,
+        db: Session,
+        weights: Optional[Dict[str, float]] = None,
+        tracker: Optional[DenialRateTracker] = None,
+    ):
         """
         Initialize RiskScorer.
         
@@ -46,6 +55,7 @@ class RiskScorer:
             db: Database session
             weights: Optional dictionary of risk component weights. If not provided, 
                    uses weights from config (which can be overridden via environment variables).
+            tracker: Streaming denial rate tracker (default: the process-wide tracker)
         """
         self.db = db
         self.payer_rules = PayerRulesEngine(db)
@@ -53,6 +63,7 @@ class RiskScorer:
         self.doc_rules = DocumentationRulesEngine(db)
         self.ml_service = MLService(db_session=db)
         self.pattern_detector = PatternDetector(db)
+        self.denial_tracker = tracker or denial_tracker
         
         # Use provided weights, or get from config (which reads from env vars or defaults)
         if weights is not None:
@@ -71,6 +82,7 @@ class RiskScorer:
     def calculate_risk_score(self, claim_id: int) -> RiskScore:
         """Calculate comprehensive risk score for a claim. Optimized with eager loading."""
         logger.info("Calculating risk score", claim_id=claim_id)
+        started = time.perf_counter()
         
         # Optimize: Use eager loading to fetch related data in one query
         from sqlalchemy.orm import joinedload
@@ -145,6 +157,22 @@ class RiskScorer:
             logger.warning("Pattern analysis failed", error=str(e))
             component_scores["pattern_risk"] = 0.0
         
+        # 6. Recent payer denial trend (streaming counters, no query; informational)
+        try:
+            trend = self.denial_tracker.denial_trend(claim.payer_id) if claim.payer_id else None
+            if trend:
+                risk_factors.append({
+                    "type": "denial_trend",
+                    "severity": "medium",
+                    "message": (
+                        f"Payer denial rate rose to {trend['recent_rate']:.0%} in the last day "
+                        f"(90-day rate {trend['baseline_rate']:.0%})"
+                    ),
+                    "top_denial_reasons": trend["top_reasons"],
+                })
+        except Exception as e:
+            logger.warning("Denial trend lookup failed", error=str(e))
+        
         # Calculate overall score (weighted average)
         # Weights are configurable via environment variables or config (see app.config.risk_weights)
         overall_score = (
@@ -207,6 +235,7 @@ class RiskScorer:
             self.db.add(risk_score)
         
         self.db.flush()
+        RISK_SCORE_SECONDS.observe(time.perf_counter() - started)
 
         logger.info(
             "Risk score calculated",
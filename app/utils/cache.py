@@ -3,19 +3,21 @@ import json
 import hashlib
 from typing import Any, Callable, Optional, TypeVar, cast
 from functools import wraps
-from threading import Lock
-from collections import defaultdict
 
 from app.config.redis import get_redis_client
 from app.utils.logger import get_logger
+from app.utils.metrics import CACHE_REQUESTS, Counter, cache_key_prefix
 
 logger = get_logger(__name__)
 
 T = TypeVar("T")
 
-# Cache statistics tracking
-_cache_stats = defaultdict(lambda: {"hits": 0, "misses": 0})
-_stats_lock = Lock()
+# Per-key cache statistics tracking (not exported to /metrics: key cardinality is
+# unbounded). Counter accumulates into per-thread shards, so recording a hit or
+# miss on the read path never takes a lock.
+_cache_stats = Counter(
+    "marb_cache_key_requests", "Cache lookups by full key.", labelnames=("key", "result")
+)
 
 
 class Cache:
@@ -213,13 +215,13 @@ class Cache:
 
     def _record_hit(self, key: str) -> None:
         """Record a cache hit."""
-        with _stats_lock:
-            _cache_stats[key]["hits"] += 1
+        _cache_stats.inc(key=key, result="hits")
+        CACHE_REQUESTS.inc(prefix=cache_key_prefix(key), result="hit")
 
     def _record_miss(self, key: str) -> None:
         """Record a cache miss."""
-        with _stats_lock:
-            _cache_stats[key]["misses"] += 1
+        _cache_stats.inc(key=key, result="misses")
+        CACHE_REQUESTS.inc(prefix=cache_key_prefix(key), result="miss")
 
     def get_stats(self, key: Optional[str] = None) -> dict:
         """
@@ -231,50 +233,54 @@ class Cache:
         Returns:
             Dictionary with cache statistics
         """
-        with _stats_lock:
-            if key:
-                stats = _cache_stats.get(key, {"hits": 0, "misses": 0})
-                total = stats["hits"] + stats["misses"]
-                hit_rate = (stats["hits"] / total * 100) if total > 0 else 0.0
-                return {
-                    "key": key,
+        all_stats = {}
+        for (stats_key, result), count in _cache_stats.collect().items():
+            stats = all_stats.setdefault(stats_key, {"hits": 0, "misses": 0})
+            stats[result] += int(count)
+        
+        if key:
+            stats = all_stats.get(key, {"hits": 0, "misses": 0})
+            total = stats["hits"] + stats["misses"]
+            hit_rate = (stats["hits"] / total * 100) if total > 0 else 0.0
+            return {
+                "key": key,
+                "hits": stats["hits"],
+                "misses": stats["misses"],
+                "total": total,
+                "hit_rate": round(hit_rate, 2),
+            }
+        else:
+            # Aggregate stats
+            total_hits = sum(s["hits"] for s in all_stats.values())
+            total_misses = sum(s["misses"] for s in all_stats.values())
+            total_requests = total_hits + total_misses
+            overall_hit_rate = (
+                (total_hits / total_requests * 100) if total_requests > 0 else 0.0
+            )
+            
+            # Per-key stats
+            key_stats = {}
+            for k, stats in all_stats.items():
+                key_total = stats["hits"] + stats["misses"]
+                key_hit_rate = (
+                    (stats["hits"] / key_total * 100) if key_total > 0 else 0.0
+                )
+                key_stats[k] = {
                     "hits": stats["hits"],
                     "misses": stats["misses"],
-                    "total": total,
-                    "hit_rate": round(hit_rate, 2),
-                }
-            else:
-                # Aggregate stats
-                total_hits = sum(s["hits"] for s in _cache_stats.values())
-                total_misses = sum(s["misses"] for s in _cache_stats.values())
-                total_requests = total_hits + total_misses
-                overall_hit_rate = (
-                    (total_hits / total_requests * 100) if total_requests > 0 else 0.0
-                )
-                
-                # Per-key stats
-                key_stats = {}
-                for k, stats in _cache_stats.items():
-                    key_total = stats["hits"] + stats["misses"]
-                    key_hit_rate = (
-                        (stats["hits"] / key_total * 100) if key_total > 0 else 0.0
-                    )
-                    key_stats[k] = {
-                        "hits": stats["hits"],
-                        "misses": stats["misses"],
-                        "total": key_total,
-                        "hit_rate": round(key_hit_rate, 2),
-                    }
-                
-                return {
-                    "overall": {
-                        "hits": total_hits,
-                        "misses": total_misses,
-                        "total": total_requests,
-                        "hit_rate": round(overall_hit_rate, 2),
-                    },
-                    "by_key": key_stats,
+                    "total": key_total,
+                    "hit_rate": round(key_hit_rate, 2),
                 }
+            
+            return {
+                "overall": {
+                    "hits": total_hits,
+                    "misses": total_misses,
+                    "total": total_requests,
+                    "hit_rate": round(overall_hit_rate, 2),
+                },
+                "by_key": key_stats,
+            }
 
     def reset_stats(self, key: Optional[str] = None) -> None:
         """
@@ -283,11 +289,11 @@ class Cache:
         Args:
             key: Optional specific key to reset. If None, resets all stats.
         """
-        with _stats_lock:
-            if key:
-                _cache_stats.pop(key, None)
-            else:
-                _cache_stats.clear()
+        if key:
+            _cache_stats.remove(key=key, result="hits")
+            _cache_stats.remove(key=key, result="misses")
+        else:
+            _cache_stats.clear()
 
     def get_many(self, keys: list[str], track_stats: bool = True) -> dict[str, Any]:
         """
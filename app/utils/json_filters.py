@@ -0,0 +1,131 @@
+"""
+SQL predicates on JSON array columns.
+
+Denial reasons, adjustment reasons and diagnosis codes are JSON arrays. On
+PostgreSQL they are JSONB with GIN (jsonb_path_ops) indexes, so element
+lookups compile to containment (``@>``), which the index serves. Elsewhere
+(SQLite in tests) they compile to ``json_each`` subqueries with the same
+result.
+
+Usage:
+    query.filter(json_array_contains(Remittance.denial_reasons, "CO45", key="code"))
+"""
+import json
+from typing import Any, Optional
+
+from sqlalchemy import Boolean, literal, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class _ArrayHasElement(FunctionElement):
+    """Array contains a scalar element (column, document, value)."""
+
+    type = Boolean()
+    inherit_cache = True
+    name = "json_array_has_element"
+
+
+class _ArrayHasObjectWithKey(FunctionElement):
+    """Array contains an object whose ``key`` equals a value (column, document, value, path)."""
+
+    type = Boolean()
+    inherit_cache = True
+    name = "json_array_has_object_with_key"
+
+
+class _ArrayAny(FunctionElement):
+    """Column is a JSON array with at least one truthy element."""
+
+    type = Boolean()
+    inherit_cache = True
+    name = "json_array_any"
+
+
+@compiles(_ArrayHasElement, "postgresql")
+@compiles(_ArrayHasObjectWithKey, "postgresql")
+def _compile_contains_postgresql(element, compiler, **kw):
+    column, document = list(element.clauses)[:2]
+    return f"({compiler.process(column, **kw)} @> CAST({compiler.process(document, **kw)} AS JSONB))"
+
+
+@compiles(_ArrayHasElement)
+def _compile_has_element(element, compiler, **kw):
+    column, _, value = element.clauses
+    return (
+        f"EXISTS (SELECT 1 FROM json_each({compiler.process(column, **kw)}) "
+        f"WHERE json_each.atom = {compiler.process(value, **kw)})"
+    )
+
+
+@compiles(_ArrayHasObjectWithKey)
+def _compile_has_object_with_key(element, compiler, **kw):
+    column, _, value, path = element.clauses
+    return (
+        f"EXISTS (SELECT 1 FROM json_each({compiler.process(column, **kw)}) "
+        f"WHERE json_extract(CASE WHEN json_each.type = 'object' THEN json_each.value END, "
+        f"{compiler.process(path, **kw)}) = {compiler.process(value, **kw)})"
+    )
+
+
+@compiles(_ArrayAny, "postgresql")
+def _compile_any_postgresql(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    return (
+        f"EXISTS (SELECT 1 FROM jsonb_array_elements("
+        f"CASE WHEN jsonb_typeof({column}) = 'array' THEN {column} END) AS element "
+        f"WHERE element NOT IN ('null', 'false', '0', '\"\"', '[]', '{{}}'))"
+    )
+
+
+@compiles(_ArrayAny)
+def _compile_any(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    return (
+        f"EXISTS (SELECT 1 FROM json_each(CASE WHEN json_type({column}) = 'array' THEN {column} END) "
+        f"WHERE json_each.type NOT IN ('null', 'false') "
+        f"AND NOT (json_each.type IN ('integer', 'real') AND json_each.value = 0) "
+        f"AND NOT (json_each.type = 'text' AND json_each.value = '') "
+        f"AND NOT (json_each.type IN ('array', 'object') AND json_each.value IN ('[]', '{{}}')))"
+    )
+
+
+def json_array_contains(column: Any, value: str, key: Optional[str] = None) -> ColumnElement:
+    """
+    Predicate: the JSON array ``column`` contains ``value``.
+
+    Args:
+        column: JSON array column (e.g. Remittance.denial_reasons)
+        value: Element to look for
+        key: Also match object elements whose ``key`` equals ``value``
+            (e.g. ``{"code": "CO45"}`` with key="code")
+
+    Returns:
+        Boolean SQL expression (GIN-indexable on PostgreSQL)
+    """
+    condition = _ArrayHasElement(column, literal(json.dumps([value])), literal(value))
+    if key is None:
+        return condition
+    return or_(
+        condition,
+        _ArrayHasObjectWithKey(
+            column, literal(json.dumps([{key: value}])), literal(value), literal(f"$.{key}")
+        ),
+    )
+
+
+def json_array_any(column: Any) -> ColumnElement:
+    """
+    Predicate: ``column`` is a JSON array with a truthy element (like Python's ``any()``).
+
+    Null, false, 0, "" and empty arrays or objects are falsy elements; NULL,
+    JSON null and non-array values are false.
+
+    Args:
+        column: JSON column
+
+    Returns:
+        Boolean SQL expression
+    """
+    return _ArrayAny(column)
@@ -3,6 +3,11 @@ import os
 import sys
 from typing import Dict, Optional, Tuple
 from app.utils.logger import get_logger
+from app.utils.metrics import (
+    MEMORY_THRESHOLD_EXCEEDED,
+    PROCESS_MEMORY_MB,
+    SYSTEM_MEMORY_PERCENT,
+)
 
 logger = get_logger(__name__)
 
@@ -253,6 +258,14 @@ def check_memory_thresholds(
                 system_threshold_pct=SYSTEM_MEMORY_WARNING_PCT,
             )
 
+    # Publish to the metrics registry so memory shows up on dashboards, not just logs
+    PROCESS_MEMORY_MB.set(memory_stats.process_memory_mb)
+    if memory_stats.system_memory_percent is not None:
+        SYSTEM_MEMORY_PERCENT.set(memory_stats.system_memory_percent)
+    for threshold, exceeded in results.items():
+        if exceeded:
+            MEMORY_THRESHOLD_EXCEEDED.inc(threshold=threshold)
+
     return results
 
 
@@ -298,3 +311,44 @@ def log_memory_checkpoint(
 
     return memory_stats
 
+
+
+# Levels returned by memory_pressure()
+PRESSURE_NONE = "none"
+PRESSURE_WARNING = "warning"
+PRESSURE_CRITICAL = "critical"
+
+
+def memory_pressure(baseline_mb: Optional[float] = None) -> str:
+    """
+    Classify current memory pressure without logging (cheap enough to call per batch).
+
+    Process growth is measured against ``baseline_mb`` rather than absolute RSS so
+    that data a task already holds (e.g. a parsed file) does not count as pressure
+    from the work being throttled.
+
+    Args:
+        baseline_mb: Process memory when the throttled work started
+
+    Returns:
+        PRESSURE_CRITICAL, PRESSURE_WARNING or PRESSURE_NONE (also if psutil is unavailable)
+    """
+    if not PSUTIL_AVAILABLE:
+        return PRESSURE_NONE
+
+    try:
+        system_percent = psutil.virtual_memory().percent
+        delta_mb = (
+            psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024) - baseline_mb
+            if baseline_mb is not None
+            else 0.0
+        )
+    except Exception as e:
+        logger.debug("Failed to sample memory pressure", error=str(e))
+        return PRESSURE_NONE
+
+    if system_percent >= SYSTEM_MEMORY_CRITICAL_PCT or delta_mb >= MEMORY_DELTA_CRITICAL_MB:
+        return PRESSURE_CRITICAL
+    if system_percent >= SYSTEM_MEMORY_WARNING_PCT or delta_mb >= MEMORY_DELTA_WARNING_MB:
+        return PRESSURE_WARNING
+    return PRESSURE_NONE
@@ -0,0 +1,501 @@
+"""
+Low-overhead Prometheus-style metrics.
+
+Provides counters, gauges and histograms that can be rendered in the Prometheus text
+exposition format (served at ``/metrics`` by the API) or exported from Celery workers
+through a node_exporter textfile or a Pushgateway (see ``app/config/celery.py``).
+
+Hot-path updates are lock-free: counters and histograms accumulate into a per-thread
+shard that only its owning thread writes to, and shards are summed when metrics are
+collected. A lock is only taken the first time a thread touches a metric.
+
+Usage:
+    from app.utils.metrics import DB_FLUSH_SECONDS
+
+    with DB_FLUSH_SECONDS.time(entity="claim"):
+        db.bulk_save_objects(claims)
+        db.flush()
+"""
+import bisect
+import math
+import os
+import socket
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Latency buckets in seconds (5ms to 2 minutes)
+DEFAULT_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+# Throughput buckets (MB/s or thousands of rows/s scale)
+THROUGHPUT_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0)
+ROWS_PER_SECOND_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value != value:  # NaN
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labelnames: Sequence[str], key: LabelKey, extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, key)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric(ABC):
+    """Base class for metrics with per-thread shards."""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _label_key(self, labels: Dict[str, object]) -> LabelKey:
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError:
+            pass
+        raise ValueError(
+            f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+        )
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard: dict = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def _snapshot_shards(self) -> List[List[tuple]]:
+        # list(dict.items()) is a single C-level copy, so it is safe against a
+        # concurrent writer inserting a new label set into its own shard.
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [list(shard.items()) for shard in shards]
+
+    def remove(self, **labels) -> None:
+        """Drop one label set from all shards."""
+        key = self._label_key(labels)
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all recorded values."""
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Sample lines in the Prometheus text format."""
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Increment the counter for a label set."""
+        key = self._label_key(labels) if labels or self.labelnames else ()
+        shard = self._shard()
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def collect(self) -> Dict[LabelKey, float]:
+        """Sum all shards into ``{label_values: total}``."""
+        totals: Dict[LabelKey, float] = {}
+        for items in self._snapshot_shards():
+            for key, value in items:
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def value(self, **labels) -> float:
+        """Current total for one label set."""
+        key = self._label_key(labels) if labels or self.labelnames else ()
+        return sum(value for items in self._snapshot_shards() for k, value in items if k == key)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.collect().items())
+        ]
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down.
+
+    ``set`` is a plain dict assignment (atomic under the GIL); ``inc``/``dec`` take a
+    lock since they read-modify-write shared state. A gauge can also be bound to a
+    callback that is evaluated at collection time.
+    """
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        """Set the gauge for a label set."""
+        self._values[self._label_key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Increment the gauge for a label set."""
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        """Decrement the gauge for a label set."""
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Evaluate ``function`` at collection time (unlabelled gauges only)."""
+        if self.labelnames:
+            raise ValueError("set_function is only supported for unlabelled gauges")
+        self._function = function
+
+    def collect(self) -> Dict[LabelKey, float]:
+        values = dict(self._values)
+        if self._function is not None:
+            try:
+                values[()] = float(self._function())
+            except Exception as e:
+                logger.warning("Gauge callback failed", metric=self.name, error=str(e))
+        return values
+
+    def value(self, **labels) -> Optional[float]:
+        """Current value for one label set."""
+        return self.collect().get(self._label_key(labels))
+
+    def remove(self, **labels) -> None:
+        self._values.pop(self._label_key(labels), None)
+
+    def clear(self) -> None:
+        self._values.clear()
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.collect().items())
+        ]
+
+
+class Histogram(_Metric):
+    """
+    Histogram with fixed buckets.
+
+    Each shard entry is ``[bucket_counts..., sum, count]`` with non-cumulative bucket
+    counts; cumulative counts are computed at collection time.
+    """
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self._n = len(self.buckets) + 1  # +Inf bucket
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation for a label set."""
+        key = self._label_key(labels) if labels or self.labelnames else ()
+        shard = self._shard()
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = [0.0] * (self._n + 2)
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[self._n] += value
+        entry[self._n + 1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Context manager that observes the elapsed wall-clock seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self) -> Dict[LabelKey, List[float]]:
+        """Sum all shards into ``{label_values: [buckets..., sum, count]}``."""
+        totals: Dict[LabelKey, List[float]] = {}
+        for items in self._snapshot_shards():
+            for key, entry in items:
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = list(entry)
+                else:
+                    for i, v in enumerate(entry):
+                        total[i] += v
+        return totals
+
+    def count(self, **labels) -> float:
+        """Number of observations for one label set."""
+        key = self._label_key(labels) if labels or self.labelnames else ()
+        entry = self.collect().get(key)
+        return entry[self._n + 1] if entry else 0.0
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, entry in sorted(self.collect().items()):
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), entry[: self._n]):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} "
+                    f"{_format_value(cumulative)}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(entry[self._n])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(entry[self._n + 1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registry of named metrics with Prometheus text rendering and exporters."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.metric_type}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._get_or_create(Counter, name, documentation, labelnames=labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self._get_or_create(Gauge, name, documentation, labelnames=labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Get or create a histogram."""
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames=labelnames, buckets=buckets
+        )
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Look up a registered metric by name."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clear all recorded values (metrics stay registered). Intended for tests."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+    def write_textfile(self, path: str) -> None:
+        """
+        Atomically write all metrics to a file for the node_exporter textfile collector.
+
+        Args:
+            path: Target ``.prom`` file path
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def push_to_gateway(
+        self,
+        gateway_url: str,
+        job: str,
+        grouping_key: Optional[Dict[str, str]] = None,
+        timeout: float = 5.0,
+    ) -> None:
+        """
+        Push all metrics to a Prometheus Pushgateway (replaces the group's metrics).
+
+        Args:
+            gateway_url: Pushgateway base URL, e.g. ``http://pushgateway:9091``
+            job: Job name
+            grouping_key: Additional grouping labels (e.g. ``{"instance": "worker-1"}``)
+            timeout: HTTP timeout in seconds
+        """
+        import httpx
+
+        url = f"{gateway_url.rstrip('/')}/metrics/job/{job}"
+        for name, value in (grouping_key or {}).items():
+            url += f"/{name}/{value}"
+        response = httpx.put(
+            url,
+            content=self.render().encode("utf-8"),
+            headers={"Content-Type": PROMETHEUS_CONTENT_TYPE},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+
+
+registry = MetricsRegistry()
+
+
+def instance_name() -> str:
+    """Identifier for this process, used for per-worker textfiles and push groups."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+# ---------------------------------------------------------------------------
+# Pipeline metrics
+# ---------------------------------------------------------------------------
+
+EDI_PARSE_BYTES = registry.counter(
+    "marb_edi_parse_bytes_total",
+    "Bytes of EDI content parsed.",
+    labelnames=("file_type",),
+)
+EDI_PARSE_MB_PER_SECOND = registry.histogram(
+    "marb_edi_parse_mb_per_second",
+    "Parser throughput per file in MB/s.",
+    labelnames=("file_type",),
+    buckets=THROUGHPUT_BUCKETS,
+)
+EDI_ROWS_TRANSFORMED = registry.counter(
+    "marb_edi_rows_transformed_total",
+    "Claims and remittances transformed into ORM rows.",
+    labelnames=("entity",),
+)
+EDI_TRANSFORM_ROWS_PER_SECOND = registry.histogram(
+    "marb_edi_transform_rows_per_second",
+    "Transformer throughput per file in rows/s.",
+    labelnames=("entity",),
+    buckets=ROWS_PER_SECOND_BUCKETS,
+)
+DB_FLUSH_SECONDS = registry.histogram(
+    "marb_db_flush_seconds",
+    "Latency of batched bulk_save_objects + flush during ingest.",
+    labelnames=("entity",),
+)
+INGEST_BATCH_SIZE = registry.gauge(
+    "marb_ingest_batch_size",
+    "Current adaptive ingest batch size.",
+    labelnames=("entity",),
+)
+INGEST_BACKPRESSURE_SECONDS = registry.counter(
+    "marb_ingest_backpressure_seconds_total",
+    "Time ingest paused waiting for system memory headroom.",
+    labelnames=("entity",),
+)
+EPISODE_LINK_SECONDS = registry.histogram(
+    "marb_episode_link_seconds",
+    "Latency of linking one remittance to its claims.",
+    labelnames=("outcome",),
+)
+RISK_SCORE_SECONDS = registry.histogram(
+    "marb_risk_score_seconds",
+    "Latency of a full risk score calculation.",
+)
+CACHE_REQUESTS = registry.counter(
+    "marb_cache_requests_total",
+    "Cache lookups by key prefix and result (hit or miss).",
+    labelnames=("prefix", "result"),
+)
+CELERY_QUEUE_WAIT_SECONDS = registry.histogram(
+    "marb_celery_queue_wait_seconds",
+    "Time between a task being published and a worker starting it.",
+    labelnames=("task",),
+)
+CELERY_TASK_SECONDS = registry.histogram(
+    "marb_celery_task_seconds",
+    "Celery task run time.",
+    labelnames=("task", "state"),
+)
+PROCESS_MEMORY_MB = registry.gauge(
+    "marb_process_memory_mb",
+    "Resident memory of this process in MB (sampled at memory checkpoints and scrapes).",
+)
+SYSTEM_MEMORY_PERCENT = registry.gauge(
+    "marb_system_memory_percent",
+    "System memory utilisation in percent (sampled at memory checkpoints).",
+)
+MEMORY_THRESHOLD_EXCEEDED = registry.counter(
+    "marb_memory_threshold_exceeded_total",
+    "Memory checkpoints that exceeded a warning or critical threshold.",
+    labelnames=("threshold",),
+)
+WEBSOCKET_MESSAGES_DROPPED = registry.counter(
+    "marb_websocket_messages_dropped_total",
+    "Notifications dropped because a client's send queue was full (oldest dropped first).",
+)
+
+
+def cache_key_prefix(key: str) -> str:
+    """Low-cardinality label for a cache key (``claim:123`` -> ``claim``)."""
+    return key.split(":", 1)[0]
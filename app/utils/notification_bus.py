@@ -0,0 +1,157 @@
+"""
+Redis pub/sub bridge for WebSocket notifications.
+
+Celery workers have no WebSocket clients, so notifications raised there are
+published to a Redis channel. Every API process runs a NotificationSubscriber
+that relays messages from the channel to its own ConnectionManager. Messages are
+published already serialized and forwarded to clients as-is, so each
+notification is encoded once no matter how many processes or sockets receive it.
+
+Configuration (environment):
+- NOTIFICATIONS_PUBSUB_ENABLED: "true" (default) or "false" (local delivery only).
+  Always disabled when TESTING=true.
+- NOTIFICATIONS_CHANNEL: Redis channel name (default "marb:notifications")
+"""
+import asyncio
+import json
+import os
+from typing import Optional
+
+from app.api.routes.websocket import manager
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+NOTIFICATIONS_CHANNEL = os.getenv("NOTIFICATIONS_CHANNEL", "marb:notifications")
+PUBSUB_ENABLED = (
+    os.getenv("NOTIFICATIONS_PUBSUB_ENABLED", "true").lower() == "true"
+    and os.getenv("TESTING", "false").lower() != "true"
+)
+
+# Reconnect backoff for the subscriber
+RECONNECT_DELAY_SECONDS = 1.0
+MAX_RECONNECT_DELAY_SECONDS = 30.0
+
+
+def publish_notification(text: str) -> bool:
+    """
+    Publish a serialized notification to all API processes.
+    
+    Args:
+        text: JSON-encoded notification (see build_notification)
+        
+    Returns:
+        True if the message was published, False if pub/sub is disabled or Redis failed
+    """
+    if not PUBSUB_ENABLED:
+        return False
+    
+    try:
+        from app.config.redis import get_redis_client
+        
+        get_redis_client().publish(NOTIFICATIONS_CHANNEL, text)
+        return True
+    except Exception as e:
+        logger.warning("Failed to publish notification", error=str(e))
+        return False
+
+
+class NotificationSubscriber:
+    """
+    Relay notifications from the Redis channel to local WebSocket connections.
+    
+    Runs as a background task in API processes (started from the application
+    lifespan) and reconnects with exponential backoff if Redis goes away.
+    """
+
+    def __init__(self, manager, channel: str = NOTIFICATIONS_CHANNEL):
+        """
+        Initialize subscriber.
+        
+        Args:
+            manager: ConnectionManager to deliver messages to
+            channel: Redis channel to subscribe to
+        """
+        self.manager = manager
+        self.channel = channel
+        self.connected = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether messages published now will reach this process's clients."""
+        return self.connected and self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the subscriber task (no-op when pub/sub is disabled)."""
+        if not PUBSUB_ENABLED or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run(), name="NotificationSubscriber")
+
+    async def stop(self) -> None:
+        """Stop the subscriber task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def deliver(self, text: str) -> int:
+        """
+        Deliver one serialized notification to local connections.
+        
+        Args:
+            text: JSON-encoded notification
+            
+        Returns:
+            Number of connections the message was queued for
+        """
+        try:
+            notification = json.loads(text)
+            if not isinstance(notification, dict):
+                raise ValueError("notification is not an object")
+        except ValueError as e:
+            logger.warning("Ignoring malformed notification", error=str(e))
+            return 0
+        return await self.manager.dispatch(notification, text)
+
+    async def _run(self) -> None:
+        from app.config.redis import create_async_redis_client
+        
+        delay = RECONNECT_DELAY_SECONDS
+        while True:
+            client = create_async_redis_client()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                self.connected = True
+                delay = RECONNECT_DELAY_SECONDS
+                logger.info("Subscribed to notification channel", channel=self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        await self.deliver(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(
+                    "Notification subscriber disconnected",
+                    channel=self.channel,
+                    error=str(e),
+                    retry_in=delay,
+                )
+            finally:
+                self.connected = False
+                try:
+                    await pubsub.aclose()
+                    await client.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+
+
+# Process-wide subscriber for the WebSocket connection manager (started by API processes)
+subscriber = NotificationSubscriber(manager)
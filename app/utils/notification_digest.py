@@ -0,0 +1,204 @@
+"""
+Coalescing and throttling for bulk notifications.
+
+Bulk operations (a 20k-claim 837 file, auto-linking a large remittance batch)
+used to emit one WebSocket notification per entity. This module provides:
+
+- NotificationAggregator: collects per-entity events for a short window and
+  emits one ``digest`` notification per group, e.g.
+  ``"claims.edi: 5,000 claims processed"`` with the IDs as compact ranges.
+  The per-entity items are published with the digest (one pub/sub message per
+  group, not one per entity, but its size grows with the group). The API
+  process strips them before sending the digest to clients and expands them
+  into one event per entity only for clients that opted in to details (see
+  ConnectionManager.broadcast_digest).
+- ProgressThrottle: limits progress updates to one per time interval.
+
+Configuration (environment):
+- NOTIFICATION_DIGEST_WINDOW_SECONDS: how long events are collected (default 0.5)
+- NOTIFICATION_DIGEST_MAX_ITEMS: flush a group early at this size (default 5000)
+- NOTIFICATION_PROGRESS_INTERVAL_SECONDS: minimum time between progress updates (default 1.0)
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.api.routes.websocket import NotificationType
+from app.utils.logger import get_logger
+from app.utils.notifications import _run_sync, _send_notification
+
+logger = get_logger(__name__)
+
+DIGEST_WINDOW_SECONDS = float(os.getenv("NOTIFICATION_DIGEST_WINDOW_SECONDS", "0.5"))
+DIGEST_MAX_ITEMS = int(os.getenv("NOTIFICATION_DIGEST_MAX_ITEMS", "5000"))
+PROGRESS_INTERVAL_SECONDS = float(os.getenv("NOTIFICATION_PROGRESS_INTERVAL_SECONDS", "1.0"))
+
+# Entity ID field and human-readable label for each event type that can be coalesced
+DIGEST_EVENTS = {
+    NotificationType.CLAIM_PROCESSED: ("claim_id", "claims processed"),
+    NotificationType.REMITTANCE_PROCESSED: ("remittance_id", "remittances processed"),
+    NotificationType.EPISODE_LINKED: ("episode_id", "episodes linked"),
+}
+
+GroupKey = Tuple[NotificationType, Tuple[Tuple[str, Any], ...]]
+
+
+def compress_id_ranges(ids: Sequence[int]) -> List[List[int]]:
+    """
+    Compress IDs into sorted inclusive ranges.
+
+    IDs from bulk inserts are mostly consecutive, so thousands of IDs usually
+    collapse into a handful of ranges.
+
+    Args:
+        ids: Entity IDs (any order, duplicates allowed)
+
+    Returns:
+        List of [start, end] pairs, e.g. [1, 2, 3, 7] -> [[1, 3], [7, 7]]
+    """
+    ranges: List[List[int]] = []
+    for entity_id in sorted(set(ids)):
+        if ranges and entity_id == ranges[-1][1] + 1:
+            ranges[-1][1] = entity_id
+        else:
+            ranges.append([entity_id, entity_id])
+    return ranges
+
+
+class NotificationAggregator:
+    """
+    Coalesce per-entity events into digest notifications.
+
+    Events are grouped by event type and context (for example filename, task and
+    practice). A group is emitted when its window elapses, when it reaches
+    ``max_items``, or when flush() is called. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = DIGEST_WINDOW_SECONDS,
+        max_items: int = DIGEST_MAX_ITEMS,
+    ):
+        """
+        Initialize aggregator.
+
+        Args:
+            window_seconds: How long to collect events before emitting a digest
+            max_items: Emit a group immediately once it holds this many events
+        """
+        self.window_seconds = window_seconds
+        self.max_items = max_items
+        self._groups: Dict[GroupKey, List[Dict[str, Any]]] = {}
+        self._timers: Dict[GroupKey, threading.Timer] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        event: NotificationType,
+        item: Dict[str, Any],
+        context: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Add one per-entity event.
+
+        Args:
+            event: Event type (must be in DIGEST_EVENTS)
+            item: Per-entity data, as the individual notification would carry it
+            context: Data shared by the whole group (filename, task_id, practice_id, ...)
+        """
+        if event not in DIGEST_EVENTS:
+            raise ValueError(f"Event type {event.value} cannot be coalesced")
+
+        key = (event, tuple(sorted((context or {}).items())))
+        ready = None
+        with self._lock:
+            items = self._groups.setdefault(key, [])
+            items.append(item)
+            if len(items) >= self.max_items:
+                ready = self._pop_group(key)
+            elif key not in self._timers and self.window_seconds > 0:
+                timer = threading.Timer(self.window_seconds, self._flush_key, args=(key,))
+                timer.daemon = True
+                self._timers[key] = timer
+                timer.start()
+
+        if ready is not None:
+            self._emit(key, ready)
+        elif self.window_seconds <= 0:
+            self._flush_key(key)
+
+    def flush(self) -> None:
+        """Emit all pending groups now (e.g. at the end of a task)."""
+        with self._lock:
+            pending = [(key, self._pop_group(key)) for key in list(self._groups)]
+        for key, items in pending:
+            self._emit(key, items)
+
+    def pending(self) -> int:
+        """Number of events waiting to be emitted."""
+        with self._lock:
+            return sum(len(items) for items in self._groups.values())
+
+    def _pop_group(self, key: GroupKey) -> List[Dict[str, Any]]:
+        # Caller holds self._lock
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        return self._groups.pop(key, [])
+
+    def _flush_key(self, key: GroupKey) -> None:
+        with self._lock:
+            items = self._pop_group(key)
+        if items:
+            self._emit(key, items)
+
+    def _emit(self, key: GroupKey, items: List[Dict[str, Any]]) -> None:
+        event, context_items = key
+        context = dict(context_items)
+        id_field, label = DIGEST_EVENTS[event]
+        ids = [item[id_field] for item in items if item.get(id_field) is not None]
+
+        data = {
+            "event": event.value,
+            "count": len(items),
+            "id_ranges": compress_id_ranges(ids),
+            **context,
+        }
+        filename = context.get("filename")
+        message = f"{filename}: {len(items):,} {label}" if filename else f"{len(items):,} {label}"
+
+        try:
+            _run_sync(_send_notification(NotificationType.DIGEST, data, message, items=items))
+        except Exception as e:
+            logger.warning("Failed to send digest notification", event_type=event.value, count=len(items), error=str(e))
+
+
+class ProgressThrottle:
+    """
+    Allow at most one progress update per interval.
+
+    The first update is always allowed so clients see progress start immediately.
+    """
+
+    def __init__(self, interval_seconds: float = PROGRESS_INTERVAL_SECONDS):
+        """
+        Initialize throttle.
+
+        Args:
+            interval_seconds: Minimum time between allowed updates
+        """
+        self.interval_seconds = interval_seconds
+        self._last_sent: Optional[float] = None
+
+    def ready(self) -> bool:
+        """Return True (and start a new interval) if an update may be sent now."""
+        now = time.monotonic()
+        if self._last_sent is not None and now - self._last_sent < self.interval_seconds:
+            return False
+        self._last_sent = now
+        return True
+
+
+# Process-wide aggregator used by Celery tasks and the episode linker
+digest_aggregator = NotificationAggregator()
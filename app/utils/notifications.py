@@ -1,9 +1,19 @@
-"""Utility functions for sending WebSocket notifications."""
-from typing import Dict, Any, Optional
+"""
+Utility functions for sending WebSocket notifications.
+
+Notifications are serialized once and published to Redis (see
+``app/utils/notification_bus.py``) so that clients connected to any API process
+receive them, including notifications raised inside Celery workers. When
+pub/sub is unavailable, or this process is not subscribed, they are also
+delivered to this process's own connections.
+"""
+from typing import Dict, Any, List, Optional
 import asyncio
+import json
 import threading
-from app.api.routes.websocket import manager, NotificationType
+from app.api.routes.websocket import manager, NotificationType, build_notification
 from app.utils.logger import get_logger
+from app.utils.notification_bus import publish_notification, subscriber
 
 logger = get_logger(__name__)
 
@@ -53,10 +63,21 @@ def get_sync_event_loop():
     return _sync_event_loop
 
 
-async def _send_notification(notification_type: NotificationType, data: Dict[str, Any], message: str):
+async def _send_notification(
+    notification_type: NotificationType,
+    data: Dict[str, Any],
+    message: str,
+    items: Optional[List[Dict[str, Any]]] = None,
+):
     """Reusable function to send the notification."""
     try:
-        await manager.send_notification(notification_type=notification_type, data=data, message=message)
+        notification = build_notification(notification_type, data, message, items=items)
+        text = json.dumps(notification)
+        published = publish_notification(text)
+        # If this process is subscribed, the message comes back through the
+        # subscriber; otherwise deliver it to local connections directly.
+        if not (published and subscriber.running):
+            await manager.dispatch(notification, text)
     except Exception as e:
         logger.warning(
             "Failed to send notification",
@@ -126,6 +147,7 @@ def notify_claim_processed(claim_id: int, claim_data: Dict[str, Any]):
         "claim_id": claim_id,
         "claim_control_number": claim_data.get("claim_control_number"),
         "status": claim_data.get("status"),
+        "practice_id": claim_data.get("practice_id"),
     }
     message = f"Claim {claim_id} processed successfully"
     _run_sync(_send_notification(NotificationType.CLAIM_PROCESSED, data, message))
@@ -145,6 +167,7 @@ def notify_remittance_processed(remittance_id: int, remittance_data: Dict[str, A
         "claim_control_number": remittance_data.get("claim_control_number"),
         "payment_amount": remittance_data.get("payment_amount"),
         "status": remittance_data.get("status"),
+        "practice_id": remittance_data.get("practice_id"),
     }
     message = f"Remittance {remittance_id} processed successfully"
     _run_sync(_send_notification(NotificationType.REMITTANCE_PROCESSED, data, message))
@@ -187,7 +210,13 @@ def notify_episode_completed(episode_id: int, episode_data: Dict[str, Any]):
     _run_sync(_send_notification(NotificationType.EPISODE_COMPLETED, data, message))
 
 
-def notify_file_processed(filename: str, file_type: str, result: Dict[str, Any]):
+def notify_file_processed(
+    filename: str,
+    file_type: str,
+    result: Dict[str, Any],
+    task_id: Optional[str] = None,
+    practice_id: Optional[str] = None,
+):
     """
     Send notification when a file is processed.
     Works in both sync and async contexts.
@@ -196,15 +225,20 @@ def notify_file_processed(filename: str, file_type: str, result: Dict[str, Any])
         filename: Name of the processed file
         file_type: Type of file (837 or 835)
         result: Processing result dictionary
+        task_id: Optional Celery task ID (for ``task:<id>`` subscribers)
+        practice_id: Optional practice ID (for ``practice:<id>`` subscribers)
     """
     data = {
         "filename": filename,
         "file_type": file_type,
+        "task_id": task_id,
+        "practice_id": practice_id,
         "status": result.get("status"),
         "claims_created": result.get("claims_created", 0),
         "remittances_created": result.get("remittances_created", 0),
     }
-    message = f"{file_type.upper()} file {filename} processed successfully"
+    outcome = "failed" if result.get("status") == "failed" else "processed successfully"
+    message = f"{file_type.upper()} file {filename} {outcome}"
     _run_sync(_send_notification(NotificationType.FILE_PROCESSED, data, message))
 
 
@@ -217,6 +251,7 @@ def notify_file_progress(
     current: int,
     total: int,
     message: Optional[str] = None,
+    practice_id: Optional[str] = None,
 ):
     """
     Send progress notification for file processing.
@@ -231,6 +266,7 @@ def notify_file_progress(
         current: Current item number
         total: Total items to process
         message: Optional custom message
+        practice_id: Optional practice ID (for ``practice:<id>`` subscribers)
     """
     data = {
         "filename": filename,
@@ -240,6 +276,7 @@ def notify_file_progress(
         "progress": progress,  # 0.0 to 1.0
         "current": current,
         "total": total,
+        "practice_id": practice_id,
     }
     message = message or f"Processing {filename}: {stage} ({progress:.1%})"
     _run_sync(_send_notification(NotificationType.FILE_PROGRESS, data, message))
@@ -0,0 +1,217 @@
+"""
+Pagination helpers for list endpoints.
+
+Provides opaque keyset cursors over ``(created_at, id)`` and cheap total counts.
+
+Keyset pagination replaces ``OFFSET`` scans: each page is fetched with
+``WHERE (created_at, id) > (:created_at, :id) ORDER BY created_at, id LIMIT n``,
+which is served directly from the ``(created_at, id)`` composite index no matter
+how deep the page is. Offset pagination (``skip``/``limit``) is still supported
+for existing clients and uses the same ordering so both modes return stable pages.
+
+Totals can be:
+- ``exact``: ``COUNT(*)`` cached in Redis (see ``count_cache_key``)
+- ``approximate``: PostgreSQL planner statistics (``pg_class.reltuples`` for
+  unfiltered lists, the ``EXPLAIN`` row estimate for filtered lists). Falls back
+  to the exact count on other databases or when the estimate is small enough
+  that counting is cheap anyway.
+- ``none``: skip counting entirely
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Query, Session
+
+from app.config.cache_ttl import get_count_ttl
+from app.utils.cache import cache, count_cache_key
+from app.utils.errors import ValidationError
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TOTAL_MODE_EXACT = "exact"
+TOTAL_MODE_APPROXIMATE = "approximate"
+TOTAL_MODE_NONE = "none"
+TOTAL_MODES = (TOTAL_MODE_EXACT, TOTAL_MODE_APPROXIMATE, TOTAL_MODE_NONE)
+TOTAL_MODE_PATTERN = f"^({'|'.join(TOTAL_MODES)})$"
+
+# Below this estimate an exact COUNT(*) is cheap, so return the exact value instead
+APPROXIMATE_COUNT_THRESHOLD = 10_000
+
+
+def encode_cursor(created_at: datetime, record_id: int) -> str:
+    """
+    Encode the position of a record as an opaque cursor.
+
+    Args:
+        created_at: Record creation timestamp
+        record_id: Record primary key
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([created_at.isoformat(), record_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string from a previous response
+
+    Returns:
+        Tuple of (created_at, record_id)
+
+    Raises:
+        ValidationError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(record_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValidationError("Invalid pagination cursor", details={"cursor": cursor}) from e
+
+
+def paginate(
+    query: Query,
+    model: Any,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of results ordered by (created_at, id).
+
+    When a cursor is given, ``skip`` is ignored and the page starts right after
+    the cursor position. One extra row is fetched to know whether a next page exists.
+
+    Args:
+        query: Filtered query for the model (without ordering or pagination)
+        model: Model class with ``created_at`` and ``id`` columns
+        limit: Page size
+        skip: Offset for legacy skip/limit pagination
+        cursor: Cursor from a previous page's ``next_cursor``
+
+    Returns:
+        Tuple of (records, next_cursor). next_cursor is None on the last page.
+
+    Raises:
+        ValidationError: If limit is not positive or skip is negative
+    """
+    if limit < 1 or skip < 0:
+        raise ValidationError(
+            "Invalid pagination parameters", details={"limit": limit, "skip": skip}
+        )
+    query = query.order_by(model.created_at, model.id)
+    if cursor:
+        created_at, record_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) > (created_at, record_id))
+    elif skip:
+        query = query.offset(skip)
+
+    records = query.limit(limit + 1).all()
+    if len(records) <= limit:
+        return records, None
+
+    records = records[:limit]
+    last = records[-1]
+    return records, encode_cursor(last.created_at, last.id)
+
+
+def _is_postgresql(db: Session) -> bool:
+    bind = db.get_bind()
+    return bind is not None and bind.dialect.name == "postgresql"
+
+
+def estimate_count(db: Session, query: Query, model: Any, filtered: bool) -> Optional[int]:
+    """
+    Estimate the row count of a query from PostgreSQL planner statistics.
+
+    Args:
+        db: Database session
+        query: Filtered query for the model
+        model: Model class being counted
+        filtered: Whether the query has filters (uses EXPLAIN instead of pg_class)
+
+    Returns:
+        Estimated row count, or None if no estimate is available
+    """
+    if not _is_postgresql(db):
+        return None
+
+    try:
+        if not filtered:
+            estimate = db.execute(
+                text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+                {"table": model.__tablename__},
+            ).scalar()
+        else:
+            compiled = query.statement.compile(dialect=db.get_bind().dialect)
+            plan = (
+                db.connection()
+                .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+                .scalar()
+            )
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = plan[0]["Plan"]["Plan Rows"]
+    except Exception as e:
+        logger.warning("Failed to estimate row count", table=model.__tablename__, error=str(e))
+        return None
+
+    # reltuples is -1 for tables that have never been vacuumed/analyzed
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+def get_total(
+    db: Session,
+    query: Query,
+    model: Any,
+    model_name: str,
+    mode: str = TOTAL_MODE_APPROXIMATE,
+    **filters: Any,
+) -> Tuple[Optional[int], bool]:
+    """
+    Get the total number of records for a list endpoint.
+
+    Exact counts are cached under ``count_cache_key(model_name, **filters)`` so
+    existing cache invalidation (``count:<model>*``) keeps working.
+
+    Args:
+        db: Database session
+        query: Filtered query for the model
+        model: Model class being counted
+        model_name: Name used in the count cache key (e.g. "claim")
+        mode: One of "exact", "approximate" or "none"
+        **filters: Active filters (None values are ignored)
+
+    Returns:
+        Tuple of (total, is_exact). total is None when mode is "none".
+    """
+    if mode == TOTAL_MODE_NONE:
+        return None, False
+
+    filters = {k: v for k, v in filters.items() if v is not None}
+
+    if mode == TOTAL_MODE_APPROXIMATE:
+        estimate = estimate_count(db, query, model, filtered=bool(filters))
+        if estimate is not None and estimate >= APPROXIMATE_COUNT_THRESHOLD:
+            return estimate, False
+
+    count_key = count_cache_key(model_name, **filters)
+    cached_count = cache.get(count_key)
+    if cached_count is not None:
+        return cached_count, True
+
+    # Count without ordering/eager loading
+    total = query.order_by(None).count()
+    cache.set(count_key, total, ttl_seconds=get_count_ttl())
+    return total, True
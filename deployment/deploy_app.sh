@@ -301,7 +301,9 @@ fi
 echo -e "${GREEN}Step 9: Enabling and starting services...${NC}"
 
 # Verify service files exist before attempting to manage them
-SERVICE_FILES=("marb2.0.service" "marb2.0-celery.service")
+# One Celery worker service per queue (see deployment/systemd-services.sh)
+CELERY_SERVICES=("marb2.0-celery-ingest.service" "marb2.0-celery-link.service" "marb2.0-celery-score.service" "marb2.0-celery-learning.service")
+SERVICE_FILES=("marb2.0.service" "${CELERY_SERVICES[@]}")
 for SERVICE_FILE in "${SERVICE_FILES[@]}"; do
     if [ ! -f "/etc/systemd/system/$SERVICE_FILE" ]; then
         echo -e "${RED}✗ Service file not found: /etc/systemd/system/$SERVICE_FILE${NC}"
@@ -336,18 +338,20 @@ if [ $ENABLE_EXIT -ne 0 ]; then
 fi
 echo -e "${GREEN}✓ marb2.0.service enabled${NC}"
 
-# Enable Celery service
-echo -e "${GREEN}Enabling marb2.0-celery.service...${NC}"
-ENABLE_CELERY_OUTPUT=$(systemctl enable marb2.0-celery.service 2>&1)
-ENABLE_CELERY_EXIT=$?
-if [ $ENABLE_CELERY_EXIT -ne 0 ]; then
-    echo -e "${RED}✗ Failed to enable marb2.0-celery.service${NC}"
-    echo "Error output: $ENABLE_CELERY_OUTPUT"
-    echo "Check service file: sudo cat /etc/systemd/system/marb2.0-celery.service"
-    echo "Check service file syntax: sudo systemd-analyze verify marb2.0-celery.service"
-    exit 1
-fi
-echo -e "${GREEN}✓ marb2.0-celery.service enabled${NC}"
+# Enable Celery services
+for CELERY_SERVICE in "${CELERY_SERVICES[@]}"; do
+    echo -e "${GREEN}Enabling $CELERY_SERVICE...${NC}"
+    ENABLE_CELERY_OUTPUT=$(systemctl enable "$CELERY_SERVICE" 2>&1)
+    ENABLE_CELERY_EXIT=$?
+    if [ $ENABLE_CELERY_EXIT -ne 0 ]; then
+        echo -e "${RED}✗ Failed to enable $CELERY_SERVICE${NC}"
+        echo "Error output: $ENABLE_CELERY_OUTPUT"
+        echo "Check service file: sudo cat /etc/systemd/system/$CELERY_SERVICE"
+        echo "Check service file syntax: sudo systemd-analyze verify $CELERY_SERVICE"
+        exit 1
+    fi
+    echo -e "${GREEN}✓ $CELERY_SERVICE enabled${NC}"
+done
 
 # Start main service
 echo -e "${GREEN}Starting marb2.0.service...${NC}"
@@ -363,19 +367,21 @@ if [ $START_EXIT -ne 0 ]; then
 fi
 echo -e "${GREEN}✓ marb2.0.service started${NC}"
 
-# Start Celery service (non-critical, but log if it fails)
-echo -e "${GREEN}Starting marb2.0-celery.service...${NC}"
-START_CELERY_OUTPUT=$(systemctl start marb2.0-celery.service 2>&1)
-START_CELERY_EXIT=$?
-if [ $START_CELERY_EXIT -ne 0 ]; then
-    echo -e "${YELLOW}⚠ Failed to start marb2.0-celery.service (check logs)${NC}"
-    echo "Error output: $START_CELERY_OUTPUT"
-    echo "Check logs: sudo journalctl -u marb2.0-celery.service -n 50 --no-pager"
-    echo "Check service status: sudo systemctl status marb2.0-celery.service"
-    echo "Check service file: sudo cat /etc/systemd/system/marb2.0-celery.service"
-else
-    echo -e "${GREEN}✓ marb2.0-celery.service started${NC}"
-fi
+# Start Celery services (non-critical, but log if they fail)
+for CELERY_SERVICE in "${CELERY_SERVICES[@]}"; do
+    echo -e "${GREEN}Starting $CELERY_SERVICE...${NC}"
+    START_CELERY_OUTPUT=$(systemctl start "$CELERY_SERVICE" 2>&1)
+    START_CELERY_EXIT=$?
+    if [ $START_CELERY_EXIT -ne 0 ]; then
+        echo -e "${YELLOW}⚠ Failed to start $CELERY_SERVICE (check logs)${NC}"
+        echo "Error output: $START_CELERY_OUTPUT"
+        echo "Check logs: sudo journalctl -u $CELERY_SERVICE -n 50 --no-pager"
+        echo "Check service status: sudo systemctl status $CELERY_SERVICE"
+        echo "Check service file: sudo cat /etc/systemd/system/$CELERY_SERVICE"
+    else
+        echo -e "${GREEN}✓ $CELERY_SERVICE started${NC}"
+    fi
+done
 
 # Wait a moment for services to start
 sleep 2
@@ -389,12 +395,14 @@ else
     exit 1
 fi
 
-if systemctl is-active --quiet marb2.0-celery.service; then
-    echo -e "${GREEN}✓ Celery service is running${NC}"
-else
-    echo -e "${YELLOW}⚠ Celery service failed to start (check logs)${NC}"
-    echo "Check logs: sudo journalctl -u marb2.0-celery.service -n 50"
-fi
+for CELERY_SERVICE in "${CELERY_SERVICES[@]}"; do
+    if systemctl is-active --quiet "$CELERY_SERVICE"; then
+        echo -e "${GREEN}✓ $CELERY_SERVICE is running${NC}"
+    else
+        echo -e "${YELLOW}⚠ $CELERY_SERVICE failed to start (check logs)${NC}"
+        echo "Check logs: sudo journalctl -u $CELERY_SERVICE -n 50"
+    fi
+done
 
 # Clean up temporary keys file if it exists
 if [ -f "$APP_DIR/.keys.tmp" ]; then
@@ -422,7 +430,7 @@ echo "For now, you can test HTTP endpoints."
 echo ""
 echo "Service management:"
 echo "  sudo systemctl status marb2.0.service"
-echo "  sudo systemctl status marb2.0-celery.service"
+echo "  sudo systemctl status 'marb2.0-celery-*.service'"
 echo "  sudo journalctl -u marb2.0.service -f"
 echo ""
 
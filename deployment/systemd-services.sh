@@ -9,7 +9,10 @@
 #   API_HOST: API server host (default: 127.0.0.1)
 #   API_PORT: API server port (default: 8000)
 #   API_WORKERS: Number of uvicorn workers (default: 4)
-#   CELERY_CONCURRENCY: Celery worker concurrency (default: 4)
+#   CELERY_INGEST_CONCURRENCY: Worker concurrency for the ingest queue (default: 2)
+#   CELERY_LINK_CONCURRENCY: Worker concurrency for the link queue (default: 8)
+#   CELERY_SCORE_CONCURRENCY: Worker concurrency for the score queue (default: 4)
+#   CELERY_LEARNING_CONCURRENCY: Worker concurrency for the learning queue (default: 1)
 #   FLOWER_PORT: Flower monitoring port (default: 5555)
 #   REDIS_HOST: Redis host (default: localhost)
 #   REDIS_PORT: Redis port (default: 6379)
@@ -22,7 +25,13 @@ VENV_PATH="${VENV_PATH:-$APP_DIR/venv}"
 API_HOST="${API_HOST:-127.0.0.1}"
 API_PORT="${API_PORT:-8000}"
 API_WORKERS="${API_WORKERS:-4}"
-CELERY_CONCURRENCY="${CELERY_CONCURRENCY:-4}"
+CELERY_INGEST_CONCURRENCY="${CELERY_INGEST_CONCURRENCY:-2}"
+CELERY_LINK_CONCURRENCY="${CELERY_LINK_CONCURRENCY:-8}"
+CELERY_SCORE_CONCURRENCY="${CELERY_SCORE_CONCURRENCY:-4}"
+CELERY_LEARNING_CONCURRENCY="${CELERY_LEARNING_CONCURRENCY:-1}"
+
+# One worker service per queue (see app/config/celery.py)
+CELERY_QUEUES="ingest link score learning"
 FLOWER_PORT="${FLOWER_PORT:-5555}"
 REDIS_HOST="${REDIS_HOST:-localhost}"
 REDIS_PORT="${REDIS_PORT:-6379}"
@@ -77,10 +86,13 @@ if ! [[ "$API_WORKERS" =~ ^[0-9]+$ ]] || [ "$API_WORKERS" -lt 1 ]; then
     exit 1
 fi
 
-if ! [[ "$CELERY_CONCURRENCY" =~ ^[0-9]+$ ]] || [ "$CELERY_CONCURRENCY" -lt 1 ]; then
-    echo "Error: CELERY_CONCURRENCY must be a positive number, got: $CELERY_CONCURRENCY"
-    exit 1
-fi
+for QUEUE in $CELERY_QUEUES; do
+    CONCURRENCY_VAR="CELERY_${QUEUE^^}_CONCURRENCY"
+    if ! [[ "${!CONCURRENCY_VAR}" =~ ^[0-9]+$ ]] || [ "${!CONCURRENCY_VAR}" -lt 1 ]; then
+        echo "Error: $CONCURRENCY_VAR must be a positive number, got: ${!CONCURRENCY_VAR}"
+        exit 1
+    fi
+done
 
 if ! [[ "$FLOWER_PORT" =~ ^[0-9]+$ ]] || [ "$FLOWER_PORT" -lt 1 ] || [ "$FLOWER_PORT" -gt 65535 ]; then
     echo "Error: FLOWER_PORT must be a number between 1 and 65535, got: $FLOWER_PORT"
@@ -120,10 +132,13 @@ StandardError=journal
 WantedBy=multi-user.target
 EOF
 
-# Create Celery worker service
-cat > /etc/systemd/system/marb2.0-celery.service << EOF
+# Create Celery worker services, one per queue, so long file loads
+# cannot starve episode linking or scoring
+for QUEUE in $CELERY_QUEUES; do
+CONCURRENCY_VAR="CELERY_${QUEUE^^}_CONCURRENCY"
+cat > /etc/systemd/system/marb2.0-celery-$QUEUE.service << EOF
 [Unit]
-Description=mARB 2.0 Celery Worker
+Description=mARB 2.0 Celery Worker ($QUEUE queue)
 After=network.target redis.service postgresql.service
 
 [Service]
@@ -133,7 +148,7 @@ Group=$APP_USER
 WorkingDirectory=$APP_DIR
 Environment="PATH=$VENV_PATH/bin"
 EnvironmentFile=$APP_DIR/.env
-ExecStart=$VENV_PATH/bin/celery -A app.services.queue.tasks worker --loglevel=info --concurrency=$CELERY_CONCURRENCY
+ExecStart=$VENV_PATH/bin/celery -A app.services.queue.tasks worker --loglevel=info -Q $QUEUE --hostname=$QUEUE@%%H --concurrency=${!CONCURRENCY_VAR}
 Restart=always
 RestartSec=10
 StandardOutput=journal
@@ -142,8 +157,9 @@ StandardError=journal
 [Install]
 WantedBy=multi-user.target
 EOF
+done
 
-# Create Celery beat service (optional - for scheduled tasks)
+# Create Celery beat service (scheduled tasks such as partition maintenance)
 cat > /etc/systemd/system/marb2.0-celery-beat.service << EOF
 [Unit]
 Description=mARB 2.0 Celery Beat
@@ -195,10 +211,12 @@ if ! chmod 644 /etc/systemd/system/marb2.0.service 2>/dev/null; then
     exit 1
 fi
 
-if ! chmod 644 /etc/systemd/system/marb2.0-celery.service 2>/dev/null; then
-    echo "Error: Failed to set permissions on marb2.0-celery.service"
-    exit 1
-fi
+for QUEUE in $CELERY_QUEUES; do
+    if ! chmod 644 /etc/systemd/system/marb2.0-celery-$QUEUE.service 2>/dev/null; then
+        echo "Error: Failed to set permissions on marb2.0-celery-$QUEUE.service"
+        exit 1
+    fi
+done
 
 if ! chmod 644 /etc/systemd/system/marb2.0-celery-beat.service 2>/dev/null; then
     echo "Error: Failed to set permissions on marb2.0-celery-beat.service"
@@ -215,10 +233,12 @@ if ! chown root:root /etc/systemd/system/marb2.0.service 2>/dev/null; then
     exit 1
 fi
 
-if ! chown root:root /etc/systemd/system/marb2.0-celery.service 2>/dev/null; then
-    echo "Error: Failed to set ownership on marb2.0-celery.service"
-    exit 1
-fi
+for QUEUE in $CELERY_QUEUES; do
+    if ! chown root:root /etc/systemd/system/marb2.0-celery-$QUEUE.service 2>/dev/null; then
+        echo "Error: Failed to set ownership on marb2.0-celery-$QUEUE.service"
+        exit 1
+    fi
+done
 
 if ! chown root:root /etc/systemd/system/marb2.0-celery-beat.service 2>/dev/null; then
     echo "Error: Failed to set ownership on marb2.0-celery-beat.service"
@@ -239,7 +259,10 @@ echo "  VENV_PATH: $VENV_PATH"
 echo "  API_HOST: $API_HOST"
 echo "  API_PORT: $API_PORT"
 echo "  API_WORKERS: $API_WORKERS"
-echo "  CELERY_CONCURRENCY: $CELERY_CONCURRENCY"
+echo "  CELERY_INGEST_CONCURRENCY: $CELERY_INGEST_CONCURRENCY"
+echo "  CELERY_LINK_CONCURRENCY: $CELERY_LINK_CONCURRENCY"
+echo "  CELERY_SCORE_CONCURRENCY: $CELERY_SCORE_CONCURRENCY"
+echo "  CELERY_LEARNING_CONCURRENCY: $CELERY_LEARNING_CONCURRENCY"
 echo "  FLOWER_PORT: $FLOWER_PORT"
 echo "  REDIS_HOST: $REDIS_HOST"
 echo "  REDIS_PORT: $REDIS_PORT"
@@ -248,12 +271,11 @@ echo ""
 echo "To enable and start services:"
 echo "  sudo systemctl daemon-reload"
 echo "  sudo systemctl enable marb2.0.service"
-echo "  sudo systemctl enable marb2.0-celery.service"
+echo "  sudo systemctl enable marb2.0-celery-{ingest,link,score,learning,beat}.service"
 echo "  sudo systemctl start marb2.0.service"
-echo "  sudo systemctl start marb2.0-celery.service"
+echo "  sudo systemctl start marb2.0-celery-{ingest,link,score,learning,beat}.service"
 echo ""
 echo "Optional services:"
-echo "  sudo systemctl enable marb2.0-celery-beat.service  # For scheduled tasks"
 echo "  sudo systemctl enable marb2.0-flower.service      # For Celery monitoring"
 echo ""
 echo "To customize configuration, set environment variables before running this script:"
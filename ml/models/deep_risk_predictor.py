@@ -1,10 +1,13 @@
 """Deep learning risk prediction model using PyTorch."""
-from typing import Optional, Dict, Tuple
+import copy
+import math
+import os
+from typing import Optional, Dict, Iterator, Tuple
 import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import Dataset
 import joblib
 from pathlib import Path
 from sklearn.preprocessing import StandardScaler
@@ -13,6 +16,13 @@ from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Intra-op threads for CPU inference (0 keeps torch's default of one per core)
+DEEP_MODEL_NUM_THREADS = int(os.getenv("DEEP_MODEL_NUM_THREADS", "0"))
+# Largest difference from the float model accepted for the int8 CPU model
+DEEP_MODEL_QUANTIZATION_TOLERANCE = float(os.getenv("DEEP_MODEL_QUANTIZATION_TOLERANCE", "0.02"))
+# Synthetic samples for the parity check when no reference features are given
+DEEP_MODEL_PARITY_SAMPLES = int(os.getenv("DEEP_MODEL_PARITY_SAMPLES", "1000"))
+
 
 class ClaimDataset(Dataset):
     """PyTorch dataset for claim features."""
@@ -47,6 +57,60 @@ class ClaimDataset(Dataset):
         return self.features[idx], None
 
 
+class TensorBatches:
+    """
+    Mini-batches sliced from feature and label tensors held on the device.
+
+    A drop-in for DataLoader over ClaimDataset: each batch is one indexing
+    operation instead of batch_size calls to __getitem__ plus a collate and a
+    host-to-device copy.
+    """
+
+    def __init__(
+        self,
+        features: np.ndarray,
+        labels: np.ndarray,
+        batch_size: int,
+        shuffle: bool = False,
+        device: Optional[torch.device] = None,
+    ):
+        """
+        Copy features and labels to the device once.
+
+        Args:
+            features: Feature array (n_samples, n_features)
+            labels: Labels (n_samples,)
+            batch_size: Samples per batch
+            shuffle: Draw a new permutation every epoch
+            device: Device to hold the tensors on (default: CPU)
+        """
+        self.device = device or torch.device("cpu")
+        self.features = torch.as_tensor(features, dtype=torch.float32).to(self.device)
+        self.labels = torch.as_tensor(labels, dtype=torch.float32).to(self.device)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+
+    def __len__(self) -> int:
+        """Return the number of batches per epoch."""
+        return math.ceil(len(self.features) / self.batch_size)
+
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        """Yield (features, labels) batches for one epoch."""
+        n_samples = len(self.features)
+        if not self.shuffle:
+            for start in range(0, n_samples, self.batch_size):
+                yield (
+                    self.features[start:start + self.batch_size],
+                    self.labels[start:start + self.batch_size],
+                )
+            return
+
+        order = torch.randperm(n_samples, device=self.device)
+        for start in range(0, n_samples, self.batch_size):
+            batch = order[start:start + self.batch_size]
+            yield self.features[batch], self.labels[batch]
+
+
 class RiskPredictionNet(nn.Module):
     """Neural network for risk prediction."""
 
@@ -90,6 +154,39 @@ class RiskPredictionNet(nn.Module):
         return self.network(x).squeeze()
 
 
+class ScaledRiskPredictionNet(nn.Module):
+    """RiskPredictionNet with the StandardScaler applied as tensor ops."""
+
+    def __init__(self, network: RiskPredictionNet, scaler: StandardScaler):
+        """
+        Wrap a trained network and its fitted scaler.
+
+        Args:
+            network: Trained network
+            scaler: Scaler fitted on the training features
+        """
+        super(ScaledRiskPredictionNet, self).__init__()
+        n_features = network.network[0].in_features
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+
+        self.network = network
+        self.register_buffer("mean", torch.as_tensor(mean, dtype=torch.float32))
+        self.register_buffer("scale", torch.as_tensor(scale, dtype=torch.float32))
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """
+        Forward pass on unscaled features.
+
+        Args:
+            x: Raw input features
+
+        Returns:
+            Predicted denial rate (0.0 to 1.0)
+        """
+        return self.network((x - self.mean) / self.scale)
+
+
 class DeepRiskPredictor:
     """
     Deep learning model for predicting claim denial risk.
@@ -112,6 +209,10 @@ class DeepRiskPredictor:
         self.model_version = "1.0"
         self.is_trained = False
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # Traced CPU model from export_cpu(); predict() prefers it when set
+        self.cpu_model: Optional[torch.jit.ScriptModule] = None
+        self.cpu_model_quantized = False
+        self.num_threads = DEEP_MODEL_NUM_THREADS
 
         if model_path and Path(model_path).exists():
             self.load_model(model_path)
@@ -175,14 +276,14 @@ class DeepRiskPredictor:
         criterion = nn.MSELoss()
         optimizer = optim.Adam(self.model.parameters(), lr=learning_rate)
 
-        # Create datasets
-        train_dataset = ClaimDataset(X_train_scaled, y_train)
-        train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True)
+        # Hold the data on the device and slice batches from it
+        train_loader = TensorBatches(
+            X_train_scaled, y_train, batch_size, shuffle=True, device=self.device
+        )
 
         val_loader = None
         if X_val_scaled is not None and y_val is not None:
-            val_dataset = ClaimDataset(X_val_scaled, y_val)
-            val_loader = DataLoader(val_dataset, batch_size=batch_size, shuffle=False)
+            val_loader = TensorBatches(X_val_scaled, y_val, batch_size, device=self.device)
 
         # Training loop
         best_val_loss = float("inf")
@@ -195,9 +296,6 @@ class DeepRiskPredictor:
             self.model.train()
             train_loss = 0.0
             for features, labels in train_loader:
-                features = features.to(self.device)
-                labels = labels.to(self.device)
-
                 optimizer.zero_grad()
                 outputs = self.model(features)
                 loss = criterion(outputs, labels)
@@ -216,8 +314,6 @@ class DeepRiskPredictor:
                 val_loss = 0.0
                 with torch.no_grad():
                     for features, labels in val_loader:
-                        features = features.to(self.device)
-                        labels = labels.to(self.device)
                         outputs = self.model(features)
                         loss = criterion(outputs, labels)
                         val_loss += loss.item()
@@ -245,22 +341,21 @@ class DeepRiskPredictor:
 
         # Mark as trained before calculating metrics (so predict() works)
         self.is_trained = True
-        
+        # A model exported before retraining no longer matches the weights
+        self.cpu_model = None
+        self.cpu_model_quantized = False
+
         # Calculate final metrics
         self.model.eval()
         with torch.no_grad():
             # Use internal prediction to avoid is_trained check
-            X_train_scaled = self.scaler.transform(X_train)
-            X_train_tensor = torch.FloatTensor(X_train_scaled).to(self.device)
-            train_pred = self.model(X_train_tensor).cpu().numpy().flatten()
+            train_pred = self.model(train_loader.features).cpu().numpy().flatten()
             train_pred = np.clip(train_pred, 0.0, 1.0)
             train_r2 = self._calculate_r2(y_train, train_pred)
             train_rmse = np.sqrt(np.mean((y_train - train_pred) ** 2))
 
-            if X_val is not None and y_val is not None:
-                X_val_scaled = self.scaler.transform(X_val)
-                X_val_tensor = torch.FloatTensor(X_val_scaled).to(self.device)
-                val_pred = self.model(X_val_tensor).cpu().numpy().flatten()
+            if val_loader is not None:
+                val_pred = self.model(val_loader.features).cpu().numpy().flatten()
                 val_pred = np.clip(val_pred, 0.0, 1.0)
                 val_r2 = self._calculate_r2(y_val, val_pred)
                 val_rmse = np.sqrt(np.mean((y_val - val_pred) ** 2))
@@ -295,12 +390,15 @@ class DeepRiskPredictor:
         if not self.is_trained or self.model is None or self.scaler is None:
             raise ValueError("Model not trained. Call train() first or load a saved model.")
 
-        self.model.eval()
-        X_scaled = self.scaler.transform(X)
-        X_tensor = torch.FloatTensor(X_scaled).to(self.device)
+        if self.cpu_model is not None:
+            predictions = self._predict_cpu(X)
+        else:
+            self.model.eval()
+            X_scaled = self.scaler.transform(X)
+            X_tensor = torch.FloatTensor(X_scaled).to(self.device)
 
-        with torch.no_grad():
-            predictions = self.model(X_tensor).cpu().numpy()
+            with torch.no_grad():
+                predictions = self.model(X_tensor).cpu().numpy()
 
         # Ensure predictions are in [0, 1] range
         predictions = np.clip(predictions, 0.0, 1.0)
@@ -313,6 +411,110 @@ class DeepRiskPredictor:
 
         return predictions
 
+    def _predict_cpu(self, X: np.ndarray) -> np.ndarray:
+        """Run the exported CPU model with the configured intra-op threads."""
+        X_tensor = torch.from_numpy(np.ascontiguousarray(X, dtype=np.float32))
+        previous_threads = torch.get_num_threads()
+        if self.num_threads and self.num_threads != previous_threads:
+            torch.set_num_threads(self.num_threads)
+        try:
+            with torch.inference_mode():
+                return self.cpu_model(X_tensor).numpy()
+        finally:
+            if torch.get_num_threads() != previous_threads:
+                torch.set_num_threads(previous_threads)
+
+    def export_cpu(
+        self,
+        X_reference: Optional[np.ndarray] = None,
+        quantize: bool = True,
+        tolerance: float = DEEP_MODEL_QUANTIZATION_TOLERANCE,
+        num_threads: Optional[int] = None,
+    ) -> Dict[str, float]:
+        """
+        Export a traced CPU model that predict() and predict_single() then use.
+
+        The scaler becomes part of the traced graph, and with ``quantize`` the
+        linear layers get dynamic int8 quantization. The exported model is
+        always compared with the float model, on the reference features or,
+        without them (e.g. when a saved model is loaded), on
+        DEEP_MODEL_PARITY_SAMPLES synthetic samples drawn from the scaler's
+        feature means and scales. A quantized model that differs by more than
+        ``tolerance`` is replaced by a float trace.
+
+        Args:
+            X_reference: Features for the parity check (n_samples, n_features);
+                held-out data is preferred over the synthetic batch
+            quantize: Quantize linear layers to int8
+            tolerance: Largest accepted absolute difference from the float model
+            num_threads: Intra-op threads for inference (default: DEEP_MODEL_NUM_THREADS)
+
+        Returns:
+            Dictionary with the export settings and parity metrics
+        """
+        if not self.is_trained or self.model is None or self.scaler is None:
+            raise ValueError("Model not trained. Call train() first or load a saved model.")
+
+        if num_threads is not None:
+            self.num_threads = num_threads
+
+        network = copy.deepcopy(self.model).cpu().eval()
+        scaled = ScaledRiskPredictionNet(network, self.scaler).eval()
+        quantize = quantize and torch.backends.quantized.engine != "none"
+
+        cpu_model = self._trace(scaled, quantize)
+        metrics = {
+            "quantized": quantize,
+            "num_threads": self.num_threads,
+            "parity_reference": "given" if X_reference is not None and len(X_reference) else "synthetic",
+        }
+
+        if metrics["parity_reference"] == "synthetic":
+            X_reference = self._synthetic_reference()
+        X_tensor = torch.from_numpy(np.ascontiguousarray(X_reference, dtype=np.float32))
+        with torch.inference_mode():
+            expected = scaled(X_tensor).reshape(-1).numpy()
+            exported = cpu_model(X_tensor).reshape(-1).numpy()
+        max_abs_diff = float(np.max(np.abs(expected - exported)))
+        metrics.update({
+            "max_abs_diff": max_abs_diff,
+            "mean_abs_diff": float(np.mean(np.abs(expected - exported))),
+            "label_agreement": float(np.mean((expected >= 0.5) == (exported >= 0.5))),
+        })
+        if quantize and max_abs_diff > tolerance:
+            logger.warning(
+                "Quantized model differs from float model, exporting float model",
+                max_abs_diff=max_abs_diff,
+                tolerance=tolerance,
+            )
+            cpu_model = self._trace(scaled, quantize=False)
+            metrics["quantized"] = False
+
+        self.cpu_model = cpu_model
+        self.cpu_model_quantized = metrics["quantized"]
+
+        logger.info("Deep learning model exported for CPU inference", **metrics)
+
+        return metrics
+
+    def _synthetic_reference(self) -> np.ndarray:
+        """Features drawn from the scaler's per-feature means and scales (fixed seed)."""
+        rng = np.random.default_rng(0)
+        return rng.normal(
+            self.scaler.mean_, self.scaler.scale_, size=(DEEP_MODEL_PARITY_SAMPLES, len(self.scaler.mean_))
+        ).astype(np.float32)
+
+    def _trace(self, scaled: ScaledRiskPredictionNet, quantize: bool) -> torch.jit.ScriptModule:
+        """Trace the scaled network, optionally with int8 linear layers."""
+        module = scaled
+        if quantize:
+            module = torch.ao.quantization.quantize_dynamic(
+                copy.deepcopy(scaled), {nn.Linear}, dtype=torch.qint8
+            )
+        example = torch.zeros(2, scaled.mean.shape[0])
+        with torch.no_grad():
+            return torch.jit.trace(module, example).eval()
+
     def predict_single(self, features: np.ndarray) -> float:
         """
         Predict denial risk for a single claim.
@@ -406,6 +608,8 @@ class DeepRiskPredictor:
             "model_version": self.model_version,
             "feature_names": feature_names or self.feature_names,
             "is_trained": self.is_trained,
+            # The traced model is rebuilt on load rather than pickled
+            "cpu_export": {"quantized": self.cpu_model_quantized} if self.cpu_model is not None else None,
         }
 
         joblib.dump(model_data, model_path)
@@ -440,5 +644,10 @@ class DeepRiskPredictor:
         self.is_trained = model_data.get("is_trained", True)
         self.model_path = model_path
 
+        self.cpu_model = None
+        cpu_export = model_data.get("cpu_export")
+        if cpu_export is not None and self.device.type == "cpu":
+            self.export_cpu(quantize=cpu_export["quantized"])
+
         logger.info("Deep learning model loaded", model_path=model_path, version=self.model_version)
 
@@ -1,4 +1,398 @@
-"""Pattern learning model."""
-# Placeholder for pattern learning model
-# This will be implemented when training data is available
+"""
+Denial pattern learning by frequent-itemset mining over claim attributes.
 
+Each claim episode is a transaction of attribute items (principal diagnosis,
+other diagnosis codes, procedure codes, facility type, charge bucket) with
+the denial reason codes of its remittance as outcomes. PatternLearner finds
+attribute combinations after which a denial reason is markedly more likely
+than for the payer's claims overall, and expresses each as
+DenialPattern.conditions with its support, confidence and lift.
+
+Mining is Eclat-style over a vertical representation: every frequent item
+has a bitset of the episodes containing it (a Python int, so intersection is
+``&`` and support is ``int.bit_count``). For each denial reason the bitsets
+are projected onto the episodes with that reason, which are far fewer, and
+the depth-first search prunes on those; the full-length bitsets are only
+intersected for itemsets that survive.
+"""
+import bisect
+import json
+import math
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ATTRIBUTE_PATTERN_TYPE = "attribute_combination"
+
+# Lower edges of the total charge buckets; the last bucket is open-ended
+CHARGE_BUCKET_EDGES = (0.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0, 10000.0, 25000.0)
+
+# Condition keys that describe claim attributes (the rest are rule statistics)
+ATTRIBUTE_CONDITION_KEYS = (
+    "principal_diagnosis",
+    "diagnosis_codes",
+    "procedure_codes",
+    "facility_type_code",
+    "charge_amount_min",
+    "charge_amount_max",
+)
+
+Item = Tuple[str, object]
+
+
+def charge_bucket(amount: Optional[float]) -> int:
+    """Index into CHARGE_BUCKET_EDGES of the bucket holding ``amount``."""
+    return max(bisect.bisect_right(CHARGE_BUCKET_EDGES, amount or 0.0) - 1, 0)
+
+
+def diagnosis_code_values(diagnosis_codes: Optional[Iterable]) -> Set[str]:
+    """
+    Diagnosis code strings of a claim.
+
+    The 837 parser stores Claim.diagnosis_codes as {"code", "qualifier"}
+    dicts; plain strings are accepted as well.
+
+    Args:
+        diagnosis_codes: Claim.diagnosis_codes entries
+
+    Returns:
+        Set of diagnosis code strings
+    """
+    return {code.get("code") if isinstance(code, dict) else code for code in diagnosis_codes or ()}
+
+
+def claim_items(
+    principal_diagnosis: Optional[str],
+    diagnosis_codes: Optional[Iterable],
+    procedure_codes: Optional[Iterable[str]],
+    facility_type_code: Optional[str],
+    total_charge_amount: Optional[float],
+) -> List[Item]:
+    """
+    Attribute items of a claim.
+
+    The principal diagnosis is not repeated among the diagnosis code items,
+    so the two never form a redundant combination.
+
+    Args:
+        principal_diagnosis: Principal diagnosis code
+        diagnosis_codes: All diagnosis codes of the claim, as strings or parsed dicts
+        procedure_codes: Procedure codes of the claim lines
+        facility_type_code: Facility type code
+        total_charge_amount: Total charge amount
+
+    Returns:
+        List of (attribute, value) items without duplicates
+    """
+    items = []
+    if principal_diagnosis:
+        items.append(("principal_diagnosis", principal_diagnosis))
+    for code in diagnosis_code_values(diagnosis_codes):
+        if code and code != principal_diagnosis:
+            items.append(("diagnosis_codes", code))
+    for code in set(procedure_codes or ()):
+        if code:
+            items.append(("procedure_codes", code))
+    if facility_type_code:
+        items.append(("facility_type_code", facility_type_code))
+    items.append(("charge_bucket", charge_bucket(total_charge_amount)))
+    return items
+
+
+def itemset_conditions(itemset: Iterable[Item]) -> Dict:
+    """
+    Express an itemset as DenialPattern.conditions.
+
+    Args:
+        itemset: (attribute, value) items
+
+    Returns:
+        Conditions in the format PatternDetector matches claims against
+    """
+    conditions = {}
+    for attribute, value in sorted(itemset):
+        if attribute in ("diagnosis_codes", "procedure_codes"):
+            conditions.setdefault(attribute, []).append(value)
+        elif attribute == "charge_bucket":
+            conditions["charge_amount_min"] = CHARGE_BUCKET_EDGES[value]
+            conditions["charge_amount_max"] = (
+                CHARGE_BUCKET_EDGES[value + 1] if value + 1 < len(CHARGE_BUCKET_EDGES) else None
+            )
+        else:
+            conditions[attribute] = value
+    return conditions
+
+
+def pattern_key(conditions: Optional[Dict]) -> str:
+    """Canonical string of the attribute part of conditions, for finding a stored pattern."""
+    attributes = {key: (conditions or {})[key] for key in ATTRIBUTE_CONDITION_KEYS if key in (conditions or {})}
+    return json.dumps(attributes, sort_keys=True)
+
+
+def conditions_match(conditions: Dict, claim) -> bool:
+    """
+    Whether a claim has every attribute in a mined pattern's conditions.
+
+    Args:
+        conditions: Conditions from itemset_conditions (statistics are ignored)
+        claim: Claim with its claim_lines loaded
+
+    Returns:
+        True if the claim satisfies all conditions
+    """
+    if "principal_diagnosis" in conditions and claim.principal_diagnosis != conditions["principal_diagnosis"]:
+        return False
+    if "facility_type_code" in conditions and claim.facility_type_code != conditions["facility_type_code"]:
+        return False
+    if not set(conditions.get("diagnosis_codes", ())) <= diagnosis_code_values(claim.diagnosis_codes):
+        return False
+    if "procedure_codes" in conditions:
+        procedure_codes = {line.procedure_code for line in (claim.claim_lines or ())}
+        if not set(conditions["procedure_codes"]) <= procedure_codes:
+            return False
+
+    amount = claim.total_charge_amount or 0.0
+    if conditions.get("charge_amount_min") is not None and amount < conditions["charge_amount_min"]:
+        return False
+    if conditions.get("charge_amount_max") is not None and amount >= conditions["charge_amount_max"]:
+        return False
+    return True
+
+
+def _bitset(positions: np.ndarray, size: int) -> int:
+    """Python int with the bits at ``positions`` set."""
+    bits = np.zeros(size, dtype=bool)
+    bits[positions] = True
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+def _describe(reason_code: str, conditions: Dict, confidence: float, lift: float) -> str:
+    """Human-readable pattern description."""
+    parts = []
+    if "principal_diagnosis" in conditions:
+        parts.append(f"principal diagnosis {conditions['principal_diagnosis']}")
+    if "diagnosis_codes" in conditions:
+        parts.append("diagnosis " + ", ".join(conditions["diagnosis_codes"]))
+    if "procedure_codes" in conditions:
+        parts.append("procedure " + ", ".join(conditions["procedure_codes"]))
+    if "facility_type_code" in conditions:
+        parts.append(f"facility type {conditions['facility_type_code']}")
+    if "charge_amount_min" in conditions:
+        if conditions["charge_amount_max"] is None:
+            parts.append(f"charges over {conditions['charge_amount_min']:,.0f}")
+        else:
+            parts.append(
+                f"charges {conditions['charge_amount_min']:,.0f}-{conditions['charge_amount_max']:,.0f}"
+            )
+    return (
+        f"Denial reason code {reason_code} with {'; '.join(parts)} "
+        f"(confidence {confidence:.0%}, lift {lift:.1f})"
+    )
+
+
+class PatternLearner:
+    """
+    Mines claim attribute combinations associated with denial reasons.
+
+    A rule "itemset -> reason" is kept when:
+    - its episodes (with the itemset and the reason) are at least
+      ``min_support`` of all episodes and at least ``min_occurrences``
+    - its confidence (share of episodes with the itemset denied for the
+      reason) is at least ``min_confidence``
+    - its lift (confidence over the reason's overall rate) is at least ``min_lift``
+    - its confidence beats every rule one item shorter by ``min_improvement``
+      and by ``improvement_z`` standard errors, so that an item added to a
+      strong rule by chance does not make a second rule
+    """
+
+    def __init__(
+        self,
+        min_support: float = 0.001,
+        min_confidence: float = 0.2,
+        min_lift: float = 1.5,
+        max_length: int = 3,
+        min_occurrences: int = 5,
+        min_improvement: float = 0.05,
+        improvement_z: float = 3.0,
+        max_patterns: int = 50,
+    ):
+        """
+        Initialize learner.
+
+        Args:
+            min_support: Minimum share of all episodes a rule must cover
+            min_confidence: Minimum confidence of a rule
+            min_lift: Minimum lift of a rule
+            max_length: Maximum number of attribute items in a rule
+            min_occurrences: Minimum number of episodes a rule must cover
+            min_improvement: Confidence a rule must add over its sub-rules
+            improvement_z: Standard errors the added confidence must exceed
+            max_patterns: Maximum number of rules returned (highest lift first)
+        """
+        self.min_support = min_support
+        self.min_confidence = min_confidence
+        self.min_lift = min_lift
+        self.max_length = max_length
+        self.min_occurrences = min_occurrences
+        self.min_improvement = min_improvement
+        self.improvement_z = improvement_z
+        self.max_patterns = max_patterns
+
+    def fit(self, transactions: Sequence[Sequence[Item]], outcomes: Sequence[Iterable[str]]) -> List[Dict]:
+        """
+        Mine denial rules.
+
+        Args:
+            transactions: Attribute items per episode (see claim_items)
+            outcomes: Denial reason codes per episode (empty when paid)
+
+        Returns:
+            Rules, highest lift first, each with ``denial_reason_code``,
+            ``itemset``, ``conditions`` (attributes plus support, confidence
+            and lift), ``occurrence_count``, ``support``, ``confidence``,
+            ``lift`` and ``description``
+        """
+        n_episodes = len(transactions)
+        if n_episodes == 0:
+            return []
+        min_count = max(self.min_occurrences, math.ceil(self.min_support * n_episodes))
+
+        items, pair_episodes, pair_items = self._item_pairs(transactions)
+        outcome_episodes = defaultdict(set)
+        for episode, codes in enumerate(outcomes):
+            for code in codes:
+                outcome_episodes[code].add(episode)
+
+        # Episodes of item k are sorted_episodes[boundaries[k]:boundaries[k + 1]];
+        # numpy radix-sorts 16-bit keys, which is linear in the number of pairs
+        sort_keys = pair_items.astype(np.uint16) if len(items) <= 1 << 16 else pair_items
+        sorted_episodes = pair_episodes[np.argsort(sort_keys, kind="stable")]
+        counts = np.bincount(pair_items, minlength=len(items))
+        boundaries = np.concatenate(([0], np.cumsum(counts)))
+
+        full_bitsets = {
+            item_id: _bitset(sorted_episodes[boundaries[item_id]:boundaries[item_id + 1]], n_episodes)
+            for item_id in np.flatnonzero(counts >= min_count).tolist()
+        }
+
+        rules = []
+        for reason_code, episodes in outcome_episodes.items():
+            if len(episodes) < min_count:
+                continue
+            rules.extend(
+                self._mine_reason(
+                    reason_code, episodes, items, full_bitsets, sorted_episodes, boundaries, n_episodes, min_count
+                )
+            )
+
+        rules.sort(key=lambda rule: (-rule["lift"], -rule["occurrence_count"]))
+        logger.info(
+            "Denial pattern mining complete",
+            episodes=n_episodes,
+            frequent_items=len(full_bitsets),
+            reason_codes=len(outcome_episodes),
+            rules=len(rules),
+        )
+        return rules[: self.max_patterns]
+
+    def _item_pairs(self, transactions: Sequence[Sequence[Item]]) -> Tuple[List[Item], np.ndarray, np.ndarray]:
+        """Item vocabulary and parallel arrays of (episode, item id) pairs."""
+        # Flattening, deduplicating and lookups all run in C; this is the
+        # only pass over individual items
+        flat = list(chain.from_iterable(transactions))
+        items = list(dict.fromkeys(flat))
+        vocabulary = {item: item_id for item_id, item in enumerate(items)}
+        item_ids = np.fromiter(map(vocabulary.__getitem__, flat), dtype=np.int64, count=len(flat))
+        episode_ids = np.repeat(
+            np.arange(len(transactions), dtype=np.int64),
+            np.fromiter(map(len, transactions), dtype=np.int64, count=len(transactions)),
+        )
+        return items, episode_ids, item_ids
+
+    def _mine_reason(
+        self,
+        reason_code: str,
+        episodes: set,
+        items: List[Item],
+        full_bitsets: Dict[int, int],
+        sorted_episodes: np.ndarray,
+        boundaries: np.ndarray,
+        n_episodes: int,
+        min_count: int,
+    ) -> List[Dict]:
+        """Eclat search for the rules of one denial reason."""
+        # Positions of the reason's episodes among themselves
+        in_reason = np.zeros(n_episodes, dtype=bool)
+        in_reason[list(episodes)] = True
+        reason_rank = np.cumsum(in_reason) - 1
+        base_rate = len(episodes) / n_episodes
+
+        candidates = []
+        for item_id, full in full_bitsets.items():
+            item_episodes = sorted_episodes[boundaries[item_id]:boundaries[item_id + 1]]
+            projected = reason_rank[item_episodes[in_reason[item_episodes]]]
+            if len(projected) >= min_count:
+                candidates.append((item_id, _bitset(projected, len(episodes)), full))
+        # Rarest first keeps the intersections small
+        candidates.sort(key=lambda candidate: candidate[1].bit_count())
+
+        confidences = {}
+        found = []
+
+        def search(prefix: Tuple[int, ...], candidates: List[Tuple[int, int, int]]):
+            for index, (item_id, projected, full) in enumerate(candidates):
+                itemset = prefix + (item_id,)
+                joint = projected.bit_count()
+                covered = full.bit_count()
+                confidence = joint / covered
+                confidences[frozenset(itemset)] = confidence
+                found.append((itemset, joint, covered, confidence))
+
+                if len(itemset) < self.max_length:
+                    extensions = []
+                    for other_id, other_projected, other_full in candidates[index + 1:]:
+                        joint_bits = projected & other_projected
+                        if joint_bits.bit_count() >= min_count:
+                            extensions.append((other_id, joint_bits, full & other_full))
+                    if extensions:
+                        search(itemset, extensions)
+
+        search((), candidates)
+
+        rules = []
+        for itemset, joint, covered, confidence in found:
+            lift = confidence / base_rate
+            if confidence < self.min_confidence or lift < self.min_lift:
+                continue
+            if len(itemset) > 1:
+                best_subset = max(
+                    confidences[frozenset(itemset) - {item_id}] for item_id in itemset
+                )
+                # Binomial standard error of the rule's confidence if the
+                # extra item made no difference
+                standard_error = math.sqrt(best_subset * (1 - best_subset) / covered)
+                if confidence < best_subset + max(self.min_improvement, self.improvement_z * standard_error):
+                    continue
+
+            conditions = itemset_conditions(items[item_id] for item_id in itemset)
+            support = joint / n_episodes
+            statistics = {
+                "support": round(support, 6),
+                "confidence": round(confidence, 4),
+                "lift": round(lift, 4),
+            }
+            rules.append({
+                "denial_reason_code": reason_code,
+                "itemset": sorted(items[item_id] for item_id in itemset),
+                "conditions": {**conditions, **statistics},
+                "occurrence_count": joint,
+                **statistics,
+                "description": _describe(reason_code, conditions, confidence, lift),
+            })
+        return rules
@@ -1,5 +1,7 @@
 """Risk prediction model using scikit-learn."""
-from typing import Optional, Dict, Tuple
+import math
+from datetime import datetime
+from typing import Optional, Dict, List, Tuple
 import numpy as np
 import joblib
 from pathlib import Path
@@ -9,6 +11,7 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 
 from app.utils.logger import get_logger
+from ml.services.feature_pipeline import FEATURE_SCHEMA_VERSION
 
 logger = get_logger(__name__)
 
@@ -22,6 +25,9 @@ class RiskPredictor:
         model_path: Path to the saved model file (if loaded from disk)
         feature_names: List of feature names used during training (for feature importance analysis)
         model_version: Version string of the model (default: "1.0")
+        feature_schema_version: FEATURE_SCHEMA_VERSION of the features the model was trained on
+            (None for models saved before the schema was versioned)
+        lineage: Training runs that produced the model, oldest first (see record_training)
         is_trained: Boolean indicating whether the model has been trained or loaded
     """
 
@@ -36,6 +42,8 @@ class RiskPredictor:
         self.model_path = model_path
         self.feature_names: Optional[list] = None
         self.model_version = "1.0"
+        self.feature_schema_version: Optional[int] = FEATURE_SCHEMA_VERSION
+        self.lineage: List[Dict] = []
         self.is_trained = False
 
         if model_path and Path(model_path).exists():
@@ -123,6 +131,129 @@ class RiskPredictor:
 
         return metrics
 
+    def update(self, X_new: np.ndarray, y_new: np.ndarray, max_estimators: int) -> Dict[str, float]:
+        """
+        Warm-start the trained model on new outcomes only.
+        
+        A random forest grows trees fitted to the new samples, in proportion to
+        their share of all samples the model has seen, and drops its oldest
+        trees beyond max_estimators (a rolling window over the data). Gradient
+        boosting continues with stages fitted to the residuals on the new
+        samples. The scaler is not refitted: existing trees split on its scale.
+        
+        Args:
+            X_new: New features (n_samples, n_features), same columns as training
+            y_new: New labels (denial rate: 0.0 to 1.0)
+            max_estimators: Maximum trees or boosting stages after the update
+            
+        Returns:
+            Dictionary with update metrics
+            
+        Raises:
+            ValueError: If the model is not trained, or cannot take more stages
+                (retrain from scratch instead)
+        """
+        if not self.is_trained or self.model is None:
+            raise ValueError("Model not trained. Call train() first or load a saved model.")
+
+        regressor = self.model.named_steps["regressor"]
+        current = len(regressor.estimators_)
+        added = self.estimators_to_add(X_new.shape[0], current)
+        if isinstance(regressor, GradientBoostingRegressor) and current + added > max_estimators:
+            raise ValueError(
+                f"Gradient boosting model has {current} stages; adding {added} exceeds {max_estimators}"
+            )
+
+        logger.info(
+            "Updating risk prediction model",
+            model_type=type(regressor).__name__,
+            n_samples=X_new.shape[0],
+            estimators=current,
+            estimators_added=added,
+        )
+
+        X_scaled = self.model.named_steps["scaler"].transform(X_new)
+        regressor.set_params(warm_start=True, n_estimators=current + added)
+        try:
+            regressor.fit(X_scaled, y_new)
+        finally:
+            regressor.set_params(warm_start=False)
+
+        dropped = 0
+        if isinstance(regressor, RandomForestRegressor) and len(regressor.estimators_) > max_estimators:
+            dropped = len(regressor.estimators_) - max_estimators
+            regressor.estimators_ = regressor.estimators_[dropped:]
+            regressor.n_estimators = max_estimators
+
+        metrics = {
+            "update_r2": float(self.model.score(X_new, y_new)),
+            "estimators": float(len(regressor.estimators_)),
+            "estimators_added": float(added),
+            "estimators_dropped": float(dropped),
+        }
+
+        logger.info("Model update complete", **metrics)
+
+        return metrics
+
+    def estimators_to_add(self, n_new_samples: int, current_estimators: int) -> int:
+        """
+        Trees or stages to fit to new samples: their share of all samples seen.
+        
+        Args:
+            n_new_samples: Samples in the update
+            current_estimators: Trees or stages in the model
+            
+        Returns:
+            Number of estimators to add (at least 1, at most current_estimators)
+        """
+        seen = sum(run.get("samples", 0) for run in self.lineage) or n_new_samples
+        added = math.ceil(current_estimators * n_new_samples / seen)
+        return max(1, min(added, current_estimators))
+
+    def record_training(self, run: str, samples: int, through_episode_id: Optional[int], **details) -> Dict:
+        """
+        Append a training run to the model lineage.
+        
+        Args:
+            run: 'full' (trained from scratch) or 'incremental' (update)
+            samples: Samples the run fitted
+            through_episode_id: Highest claim episode ID the run's data could include
+                (the high-water mark the next incremental run continues from)
+            **details: Other run metadata (e.g. parent model path, estimators added,
+                recent_episode_ids)
+            
+        Returns:
+            The lineage entry
+        """
+        if run == "full":
+            self.lineage = []
+        entry = {
+            "run": run,
+            "trained_at": datetime.now().isoformat(),
+            "samples": samples,
+            "through_episode_id": through_episode_id,
+            **details,
+        }
+        self.lineage.append(entry)
+        return entry
+
+    @property
+    def through_episode_id(self) -> Optional[int]:
+        """High-water mark of episodes the model was trained on (None if unknown)."""
+        return self.lineage[-1].get("through_episode_id") if self.lineage else None
+
+    @property
+    def recent_episode_ids(self) -> Optional[List[int]]:
+        """Episode IDs the model has seen within the overlap below its high-water mark (None if unknown)."""
+        return self.lineage[-1].get("recent_episode_ids") if self.lineage else None
+
+    @property
+    def last_full_training(self) -> Optional[datetime]:
+        """When the model was last trained from scratch (None if unknown)."""
+        full = [run for run in self.lineage if run["run"] == "full"]
+        return datetime.fromisoformat(full[-1]["trained_at"]) if full else None
+
     def predict(self, X: np.ndarray) -> np.ndarray:
         """
         Predict denial risk for claims.
@@ -217,6 +348,8 @@ class RiskPredictor:
             "model": self.model,
             "model_version": self.model_version,
             "feature_names": feature_names or self.feature_names,
+            "feature_schema_version": self.feature_schema_version,
+            "lineage": self.lineage,
             "is_trained": self.is_trained,
         }
 
@@ -240,6 +373,8 @@ class RiskPredictor:
         self.model = model_data["model"]
         self.model_version = model_data.get("model_version", "1.0")
         self.feature_names = model_data.get("feature_names")
+        self.feature_schema_version = model_data.get("feature_schema_version")
+        self.lineage = model_data.get("lineage", [])
         self.is_trained = model_data.get("is_trained", True)
         self.model_path = model_path
 
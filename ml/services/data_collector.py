@@ -1,5 +1,6 @@
 """Data collection utilities for ML model training."""
-from typing import List, Dict, Optional, Tuple
+import os
+from typing import Iterable, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
@@ -7,10 +8,38 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, func, case
 
 from app.models.database import Claim, Remittance, ClaimEpisode, RiskScore
+from app.utils.json_filters import json_array_any
 from app.utils.logger import get_logger
+from ml.services.feature_pipeline import FEATURE_SCHEMA_VERSION, build_feature_matrix, feature_names
+from ml.services.feature_store import FeatureStore
 
 logger = get_logger(__name__)
 
+# Episode IDs below a high-water mark that the next incremental run rescans: an
+# episode linked in a transaction that commits after the mark is read can hold
+# a lower ID than the mark
+ML_EPISODE_ID_OVERLAP = int(os.getenv("ML_EPISODE_ID_OVERLAP", "1000"))
+
+
+def recent_episode_ids(episode_ids: Iterable[int], through_episode_id: Optional[int]) -> List[int]:
+    """
+    Episode IDs within ML_EPISODE_ID_OVERLAP below a high-water mark.
+
+    Recorded with a trained model, so the next incremental run can rescan
+    the overlap and skip the episodes the model has already seen.
+
+    Args:
+        episode_ids: IDs of the episodes a run's data included
+        through_episode_id: The run's high-water mark
+
+    Returns:
+        Sorted IDs above through_episode_id - ML_EPISODE_ID_OVERLAP
+    """
+    if through_episode_id is None:
+        return []
+    window_start = through_episode_id - ML_EPISODE_ID_OVERLAP
+    return sorted({int(episode_id) for episode_id in episode_ids if episode_id > window_start})
+
 
 class DataCollector:
     """Collect and prepare training data from historical claims and remittances."""
@@ -24,6 +53,9 @@ class DataCollector:
         end_date: Optional[datetime] = None,
         min_episodes: int = 100,
         include_historical: bool = True,
+        after_episode_id: Optional[int] = None,
+        through_episode_id: Optional[int] = None,
+        exclude_episode_ids: Optional[List[int]] = None,
     ) -> pd.DataFrame:
         """
         Collect training data from claims with known outcomes (remittances).
@@ -33,9 +65,14 @@ class DataCollector:
             end_date: End date for data collection (default: today)
             min_episodes: Minimum number of episodes required
             include_historical: Whether to include historical features (slower but more informative)
+            after_episode_id: Only episodes with a higher ID (outcomes new since a
+                previous collection's through_episode_id)
+            through_episode_id: Only episodes up to this ID (see latest_episode_id)
+            exclude_episode_ids: Episodes to leave out (already seen by the model
+                being updated, see recent_episode_ids)
             
         Returns:
-            DataFrame with features and labels (denial_rate, payment_rate)
+            DataFrame with claim_id, episode_id, features and labels (denial_rate, payment_rate)
         """
         if not start_date:
             start_date = datetime.now() - timedelta(days=180)
@@ -53,7 +90,7 @@ class DataCollector:
         # Use eager loading to avoid N+1 queries
         from sqlalchemy.orm import joinedload
 
-        episodes = (
+        query = (
             self.db.query(ClaimEpisode)
             .join(Claim)
             .join(Remittance, isouter=True)
@@ -65,11 +102,20 @@ class DataCollector:
                 and_(
                     Claim.created_at >= start_date,
                     Claim.created_at <= end_date,
+                    # Implied by the claim bound (episodes are created after their claim);
+                    # lets PostgreSQL skip older claim_episodes partitions
+                    ClaimEpisode.created_at >= start_date,
                     ClaimEpisode.remittance_id.isnot(None),  # Only claims with outcomes
                 )
             )
-            .all()
         )
+        if after_episode_id is not None:
+            query = query.filter(ClaimEpisode.id > after_episode_id)
+        if through_episode_id is not None:
+            query = query.filter(ClaimEpisode.id <= through_episode_id)
+        if exclude_episode_ids:
+            query = query.filter(ClaimEpisode.id.notin_(exclude_episode_ids))
+        episodes = query.all()
 
         if len(episodes) < min_episodes:
             logger.warning(
@@ -84,8 +130,10 @@ class DataCollector:
 
         logger.info("Found episodes with outcomes", count=len(episodes))
 
-        # Build training dataset
-        training_data = []
+        # Build training dataset: features for all claims at once, labels per episode
+        labeled = []
+        labeled_episode_ids = []
+        label_rows = []
         skipped_count = 0
         
         for episode in episodes:
@@ -97,64 +145,31 @@ class DataCollector:
                 continue
 
             try:
-                # Extract features from claim
-                features = self._extract_claim_features(claim, include_historical=include_historical)
-
-                # Extract labels from remittance
-                labels = self._extract_outcome_labels(remittance, episode)
-
-                # Combine features and labels
-                row = {**features, **labels}
-                training_data.append(row)
-            except KeyError as e:
-                # Missing key in data structure - log and skip
-                logger.warning(
-                    "Missing key during feature extraction",
-                    episode_id=episode.id,
-                    error=str(e),
-                    error_type=type(e).__name__,
-                )
-                skipped_count += 1
-                continue
-            except AttributeError as e:
-                # Missing attribute errors - log and skip
+                label_rows.append(self._extract_outcome_labels(remittance, episode))
+                labeled.append(claim)
+                labeled_episode_ids.append(episode.id)
+            except (KeyError, AttributeError) as e:
+                # Missing data - log and skip
                 logger.warning(
-                    "Missing attribute during feature extraction",
+                    "Missing data during label extraction",
                     episode_id=episode.id,
                     error=str(e),
                     error_type=type(e).__name__,
                 )
                 skipped_count += 1
-                continue
-            except ValueError as e:
-                # Data validation errors - log and re-raise as they may indicate data issues
-                logger.error(
-                    "Invalid value during feature extraction",
-                    episode_id=episode.id,
-                    error=str(e),
-                    error_type=type(e).__name__,
-                )
-                raise
-            except Exception as e:
-                # Unexpected errors - log with full context and re-raise if critical
-                logger.error(
-                    "Unexpected error during feature extraction",
-                    episode_id=episode.id,
-                    error=str(e),
-                    error_type=type(e).__name__,
-                    exc_info=True,
-                )
-                # For critical errors (database, memory), re-raise to stop processing
-                if isinstance(e, (MemoryError, SystemError)):
-                    raise
-                skipped_count += 1
-                continue
+
+        # Stored vectors; missing ones are computed but not stored (this may be a replica)
+        features = FeatureStore(self.db).feature_matrix(
+            labeled, include_historical=include_historical, persist=False
+        )
+        df = pd.DataFrame(features, columns=feature_names(include_historical))
+        df.insert(0, "claim_id", [claim.id for claim in labeled])
+        df.insert(1, "episode_id", labeled_episode_ids)
+        df = pd.concat([df, pd.DataFrame(label_rows, index=df.index)], axis=1)
 
         if skipped_count > 0:
             logger.warning("Skipped episodes during data collection", count=skipped_count)
 
-        df = pd.DataFrame(training_data)
-        
         # Validate data quality
         self._validate_data_quality(df)
         
@@ -163,10 +178,29 @@ class DataCollector:
             rows=len(df),
             columns=len(df.columns),
             skipped=skipped_count,
+            feature_schema_version=FEATURE_SCHEMA_VERSION,
         )
 
         return df
 
+    def latest_episode_id(self) -> Optional[int]:
+        """
+        Highest ID of the episodes with outcomes (the high-water mark for training).
+        
+        Read before collecting and passed as through_episode_id, so episodes
+        linked during the collection are left for the next run. Links that
+        commit late can still get IDs below the mark; incremental runs rescan
+        ML_EPISODE_ID_OVERLAP IDs below it for them.
+        
+        Returns:
+            Episode ID, or None if no episode has an outcome
+        """
+        return (
+            self.db.query(func.max(ClaimEpisode.id))
+            .filter(ClaimEpisode.remittance_id.isnot(None))
+            .scalar()
+        )
+
     def _extract_claim_features(self, claim: Claim, include_historical: bool = True) -> Dict:
         """
         Extract features from a claim for training.
@@ -175,125 +209,8 @@ class DataCollector:
             claim: The claim to extract features from
             include_historical: Whether to include historical features
         """
-        claim_lines = claim.claim_lines or []
-        diagnosis_codes = claim.diagnosis_codes or []
-
-        # Basic features
-        features = {
-            "claim_id": claim.id,
-            "total_charge_amount": claim.total_charge_amount or 0.0,
-            "is_incomplete": 1.0 if claim.is_incomplete else 0.0,
-            "has_principal_diagnosis": 1.0 if claim.principal_diagnosis else 0.0,
-            "diagnosis_count": len(diagnosis_codes),
-            "claim_line_count": len(claim_lines),
-            "facility_type_code": claim.facility_type_code or "",
-            "payer_id": claim.payer_id or 0,
-            "provider_id": claim.provider_id or 0,
-        }
-
-        # Coding features
-        procedure_codes = [line.procedure_code for line in claim_lines if line.procedure_code]
-        modifiers = [line.procedure_modifier for line in claim_lines if line.procedure_modifier]
-        revenue_codes = [line.revenue_code for line in claim_lines if line.revenue_code]
-
-        features.update(
-            {
-                "unique_procedure_codes": len(set(procedure_codes)),
-                "modifier_count": len(modifiers),
-                "unique_modifiers": len(set(modifiers)),
-                "has_revenue_code": 1.0 if any(revenue_codes) else 0.0,
-                "revenue_code_count": len([rc for rc in revenue_codes if rc]),
-            }
-        )
-
-        # Financial features
-        line_amounts = [line.charge_amount or 0.0 for line in claim_lines]
-        if line_amounts:
-            features.update(
-                {
-                    "total_line_charges": sum(line_amounts),
-                    "max_line_charge": max(line_amounts),
-                    "min_line_charge": min(line_amounts),
-                    "avg_line_charge": sum(line_amounts) / len(line_amounts),
-                    "median_line_charge": sorted(line_amounts)[len(line_amounts) // 2] if line_amounts else 0.0,
-                    "std_line_charge": float(np.std(line_amounts)) if len(line_amounts) > 1 else 0.0,
-                }
-            )
-        else:
-            features.update(
-                {
-                    "total_line_charges": 0.0,
-                    "max_line_charge": 0.0,
-                    "min_line_charge": 0.0,
-                    "avg_line_charge": 0.0,
-                    "median_line_charge": 0.0,
-                    "std_line_charge": 0.0,
-                }
-            )
-
-        # Provider features
-        features.update(
-            {
-                "has_attending_provider": 1.0 if claim.attending_provider_npi else 0.0,
-                "has_operating_provider": 1.0 if claim.operating_provider_npi else 0.0,
-                "has_referring_provider": 1.0 if claim.referring_provider_npi else 0.0,
-                "provider_count": sum([
-                    1 if claim.attending_provider_npi else 0,
-                    1 if claim.operating_provider_npi else 0,
-                    1 if claim.referring_provider_npi else 0,
-                ]),
-            }
-        )
-
-        # Date features (temporal patterns)
-        if claim.service_date:
-            features["service_date_day_of_week"] = claim.service_date.weekday()
-            features["service_date_month"] = claim.service_date.month
-            features["service_date_quarter"] = (claim.service_date.month - 1) // 3 + 1
-            features["service_date_is_weekend"] = 1.0 if claim.service_date.weekday() >= 5 else 0.0
-        else:
-            features["service_date_day_of_week"] = 0
-            features["service_date_month"] = 0
-            features["service_date_quarter"] = 0
-            features["service_date_is_weekend"] = 0.0
-
-        # Claim age (days since creation)
-        if claim.created_at:
-            days_since_creation = (datetime.now() - claim.created_at).days
-            features["claim_age_days"] = float(days_since_creation)
-        else:
-            features["claim_age_days"] = 0.0
-
-        # Interaction features (combinations that might be predictive)
-        features["charge_per_line"] = (
-            features["total_charge_amount"] / features["claim_line_count"]
-            if features["claim_line_count"] > 0
-            else 0.0
-        )
-        features["diagnosis_per_line"] = (
-            features["diagnosis_count"] / features["claim_line_count"]
-            if features["claim_line_count"] > 0
-            else 0.0
-        )
-
-        # Historical features (if requested)
-        if include_historical:
-            try:
-                historical_stats = self.get_historical_statistics(claim, lookback_days=90)
-                features.update(historical_stats)
-            except Exception as e:
-                logger.warning("Failed to extract historical features", claim_id=claim.id, error=str(e))
-                # Add placeholder historical features
-                features.update(
-                    {
-                        "historical_payer_denial_rate": 0.0,
-                        "historical_provider_denial_rate": 0.0,
-                        "historical_diagnosis_denial_rate": 0.0,
-                        "historical_avg_payment_rate": 0.0,
-                    }
-                )
-
-        return features
+        features = build_feature_matrix([claim], include_historical=include_historical, db_session=self.db)
+        return {"claim_id": claim.id, **dict(zip(feature_names(include_historical), features[0].tolist()))}
 
     def _extract_outcome_labels(self, remittance: Remittance, episode: ClaimEpisode) -> Dict:
         """Extract outcome labels from remittance."""
@@ -370,35 +287,43 @@ class DataCollector:
             "historical_avg_payment_rate": avg_payment_rate,
         }
 
-    def _calculate_payer_denial_rate(self, payer_id: Optional[int], cutoff_date: datetime) -> float:
-        """Calculate historical denial rate for a payer."""
-        if not payer_id:
-            return 0.0
+    def _denial_rate(self, cutoff_date: datetime, *criteria) -> float:
+        """
+        Share of linked episodes since ``cutoff_date`` whose remittance has denial reasons.
 
-        episodes = (
-            self.db.query(ClaimEpisode)
-            .join(Claim)
-            .join(Remittance)
+        A remittance counts as denied if any of its denial reasons is truthy,
+        as in _extract_outcome_labels.
+
+        Counted in one aggregate query instead of loading the episodes.
+
+        Args:
+            cutoff_date: Earliest claim creation date
+            *criteria: Extra filters on Claim (payer, provider, diagnosis)
+
+        Returns:
+            Denial rate (0.0 when there are no episodes)
+        """
+        total, denied = (
+            self.db.query(
+                func.count(ClaimEpisode.id),
+                func.coalesce(func.sum(case((json_array_any(Remittance.denial_reasons), 1), else_=0)), 0),
+            )
+            .join(Claim, ClaimEpisode.claim_id == Claim.id)
+            .join(Remittance, ClaimEpisode.remittance_id == Remittance.id)
             .filter(
-                and_(
-                    Claim.payer_id == payer_id,
-                    Claim.created_at >= cutoff_date,
-                    ClaimEpisode.remittance_id.isnot(None),
-                )
+                Claim.created_at >= cutoff_date,
+                ClaimEpisode.created_at >= cutoff_date,
+                *criteria,
             )
-            .all()
+            .one()
         )
+        return float(denied) / float(total) if total else 0.0
 
-        if not episodes:
+    def _calculate_payer_denial_rate(self, payer_id: Optional[int], cutoff_date: datetime) -> float:
+        """Calculate historical denial rate for a payer."""
+        if not payer_id:
             return 0.0
-
-        denied_count = sum(
-            1
-            for ep in episodes
-            if ep.remittance and ep.remittance.denial_reasons and any(ep.remittance.denial_reasons)
-        )
-
-        return denied_count / len(episodes)
+        return self._denial_rate(cutoff_date, Claim.payer_id == payer_id)
 
     def _calculate_provider_denial_rate(
         self, provider_id: Optional[int], cutoff_date: datetime
@@ -406,31 +331,7 @@ class DataCollector:
         """Calculate historical denial rate for a provider."""
         if not provider_id:
             return 0.0
-
-        episodes = (
-            self.db.query(ClaimEpisode)
-            .join(Claim)
-            .join(Remittance)
-            .filter(
-                and_(
-                    Claim.provider_id == provider_id,
-                    Claim.created_at >= cutoff_date,
-                    ClaimEpisode.remittance_id.isnot(None),
-                )
-            )
-            .all()
-        )
-
-        if not episodes:
-            return 0.0
-
-        denied_count = sum(
-            1
-            for ep in episodes
-            if ep.remittance and ep.remittance.denial_reasons and any(ep.remittance.denial_reasons)
-        )
-
-        return denied_count / len(episodes)
+        return self._denial_rate(cutoff_date, Claim.provider_id == provider_id)
 
     def _calculate_diagnosis_denial_rate(
         self, diagnosis_code: Optional[str], cutoff_date: datetime
@@ -438,40 +339,7 @@ class DataCollector:
         """Calculate historical denial rate for a diagnosis code."""
         if not diagnosis_code:
             return 0.0
-
-        # Optimized query: join claims, episodes, and remittances in a single query
-        # This avoids N+1 queries by loading all related data at once
-        # Use eager loading to avoid additional queries when accessing remittance data
-        from sqlalchemy.orm import joinedload
-
-        episodes = (
-            self.db.query(ClaimEpisode)
-            .join(Claim, ClaimEpisode.claim_id == Claim.id)
-            .join(Remittance, ClaimEpisode.remittance_id == Remittance.id)
-            .options(joinedload(ClaimEpisode.remittance))
-            .filter(
-                and_(
-                    Claim.created_at >= cutoff_date,
-                    Claim.principal_diagnosis == diagnosis_code,
-                    ClaimEpisode.remittance_id.isnot(None),
-                )
-            )
-            .all()
-        )
-
-        if not episodes:
-            return 0.0
-
-        # Count denials: check if remittance has denial_reasons (non-null, non-empty array)
-        denied_count = sum(
-            1
-            for ep in episodes
-            if ep.remittance
-            and ep.remittance.denial_reasons
-            and any(ep.remittance.denial_reasons)
-        )
-
-        return float(denied_count) / float(len(episodes))
+        return self._denial_rate(cutoff_date, Claim.principal_diagnosis == diagnosis_code)
 
     def _calculate_avg_payment_rate(
         self,
@@ -487,6 +355,7 @@ class DataCollector:
             .filter(
                 and_(
                     Claim.created_at >= cutoff_date,
+                    ClaimEpisode.created_at >= cutoff_date,
                     ClaimEpisode.remittance_id.isnot(None),
                 )
             )
@@ -552,7 +421,7 @@ class DataCollector:
         numeric_cols = df.select_dtypes(include=[np.number]).columns
         constant_features = []
         for col in numeric_cols:
-            if col not in ["claim_id", "is_denied", "denial_rate", "payment_rate"]:
+            if col not in ["claim_id", "episode_id", "is_denied", "denial_rate", "payment_rate"]:
                 if df[col].nunique() <= 1:
                     constant_features.append(col)
 
@@ -0,0 +1,349 @@
+"""
+Vectorized claim features shared by model training and serving.
+
+The feature set is defined once, here, and computed for a whole batch of
+claims at a time: claims are flattened into claim-level and line-level NumPy
+arrays, and per-claim line statistics (counts, sums, min/max/median/std,
+distinct codes) are grouped reductions over the line arrays instead of Python
+loops per claim. DataCollector (training) and MLService (serving) both call
+build_feature_matrix, so a model is always served the features it was
+trained on.
+
+FEATURE_SCHEMA_VERSION is saved with trained models; bump it whenever a
+feature is added, removed, reordered or its definition changes.
+
+Usage:
+    matrix = build_feature_matrix(claims)                  # (n_claims, n_features)
+    df = pd.DataFrame(matrix, columns=feature_names())
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FEATURE_SCHEMA_VERSION = 1
+
+BASIC_FEATURES = [
+    "total_charge_amount",
+    "is_incomplete",
+    "has_principal_diagnosis",
+    "diagnosis_count",
+    "claim_line_count",
+    "charge_per_line",
+    "diagnosis_per_line",
+    "claim_age_days",
+]
+CODING_FEATURES = [
+    "unique_procedure_codes",
+    "modifier_count",
+    "unique_modifiers",
+    "has_revenue_code",
+    "revenue_code_count",
+]
+FINANCIAL_FEATURES = [
+    "total_line_charges",
+    "max_line_charge",
+    "min_line_charge",
+    "avg_line_charge",
+    "median_line_charge",
+    "std_line_charge",
+]
+PROVIDER_FEATURES = [
+    "has_attending_provider",
+    "has_operating_provider",
+    "has_referring_provider",
+    "has_provider",
+    "provider_count",
+]
+TEMPORAL_FEATURES = [
+    "service_date_day_of_week",
+    "service_date_month",
+    "service_date_quarter",
+    "service_date_is_weekend",
+]
+HISTORICAL_FEATURES = [
+    "historical_payer_denial_rate",
+    "historical_provider_denial_rate",
+    "historical_diagnosis_denial_rate",
+    "historical_avg_payment_rate",
+]
+
+# Days of outcomes before a claim's creation the historical features look at
+HISTORICAL_LOOKBACK_DAYS = 90
+
+# Features that depend on when they are computed, not only on the claim
+TIME_DEPENDENT_FEATURES = ["claim_age_days"]
+
+FEATURE_NAMES = BASIC_FEATURES + CODING_FEATURES + FINANCIAL_FEATURES + PROVIDER_FEATURES + TEMPORAL_FEATURES
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES + HISTORICAL_FEATURES)}
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+# 1970-01-01 was a Thursday (weekday 3)
+_EPOCH_WEEKDAY = 3
+_SECONDS_PER_DAY = 86400.0
+
+
+def feature_names(include_historical: bool = False) -> List[str]:
+    """
+    Column names of the feature matrix, in order.
+
+    Args:
+        include_historical: Whether the historical features are appended
+
+    Returns:
+        Feature names
+    """
+    return FEATURE_NAMES + HISTORICAL_FEATURES if include_historical else list(FEATURE_NAMES)
+
+
+def _code_ids(codes, vocabulary: Dict[str, int]) -> np.ndarray:
+    """Integer ids of codes (0 = no code); ids are only comparable within one batch."""
+    return np.array(
+        [vocabulary.setdefault(code, len(vocabulary) + 1) if code else 0 for code in codes], dtype=np.int64
+    )
+
+
+def _created_at_seconds(claims: Sequence) -> np.ndarray:
+    """Claim creation times in seconds since the epoch (NaN when missing)."""
+    return np.array(
+        [(claim.created_at - _EPOCH).total_seconds() if claim.created_at else np.nan for claim in claims],
+        dtype=np.float64,
+    )
+
+
+def _claim_age_days(created_at: np.ndarray, now: Optional[datetime]) -> np.ndarray:
+    """Whole days between creation and ``now`` (0 when creation is unknown)."""
+    reference = ((now or datetime.now()) - _EPOCH).total_seconds()
+    return np.nan_to_num(np.floor((reference - created_at) / _SECONDS_PER_DAY), nan=0.0)
+
+
+def claim_arrays(claims: Sequence) -> Dict[str, np.ndarray]:
+    """
+    Flatten claims and their lines into arrays.
+
+    Claim-level arrays have one entry per claim; ``line_*`` arrays have one
+    entry per claim line, with ``line_claim`` the position of the line's claim
+    in ``claims``. Timestamps are seconds and dates are days since the Unix
+    epoch (NaN when missing); line codes are integer ids, 0 meaning no code.
+    Any source that produces these arrays (e.g. a columnar SQL query) can be
+    passed to compute_features directly.
+
+    This is the only per-claim Python work: one attribute read per column.
+
+    Args:
+        claims: Claims with their claim_lines loaded
+
+    Returns:
+        Dict of arrays
+    """
+    claims = list(claims)
+
+    def flags(attribute):
+        return np.array([bool(getattr(claim, attribute)) for claim in claims], dtype=bool)
+
+    lines_per_claim = [claim.claim_lines or () for claim in claims]
+    lines = [line for claim_lines in lines_per_claim for line in claim_lines]
+    vocabulary = {}
+
+    return {
+        "total_charge_amount": np.array(
+            [claim.total_charge_amount or 0.0 for claim in claims], dtype=np.float64
+        ),
+        "is_incomplete": flags("is_incomplete"),
+        "has_principal_diagnosis": flags("principal_diagnosis"),
+        "diagnosis_count": np.array([len(claim.diagnosis_codes or ()) for claim in claims], dtype=np.float64),
+        "created_at": _created_at_seconds(claims),
+        "service_date": np.array(
+            [
+                claim.service_date.toordinal() - _EPOCH_ORDINAL if claim.service_date else np.nan
+                for claim in claims
+            ],
+            dtype=np.float64,
+        ),
+        "has_attending_provider": flags("attending_provider_npi"),
+        "has_operating_provider": flags("operating_provider_npi"),
+        "has_referring_provider": flags("referring_provider_npi"),
+        "has_provider": flags("provider_id"),
+        "line_claim": np.repeat(
+            np.arange(len(claims), dtype=np.int64),
+            np.array([len(claim_lines) for claim_lines in lines_per_claim], dtype=np.int64),
+        ),
+        "line_charge_amount": np.array([line.charge_amount or 0.0 for line in lines], dtype=np.float64),
+        "line_procedure_code": _code_ids([line.procedure_code for line in lines], vocabulary),
+        "line_modifier": _code_ids([line.procedure_modifier for line in lines], vocabulary),
+        "line_revenue_code": _code_ids([line.revenue_code for line in lines], vocabulary),
+    }
+
+
+def _count_codes(line_claim: np.ndarray, codes: np.ndarray, n_claims: int):
+    """Per-claim count and distinct count of codes (ids > 0)."""
+    present = codes > 0
+    claims_with_code = line_claim[present]
+    count = np.bincount(claims_with_code, minlength=n_claims).astype(np.float64)
+    # Sort (claim, code) pairs; each change of pair starts a distinct code of a claim
+    width = int(codes.max(initial=0)) + 1
+    pairs = np.sort(claims_with_code * width + codes[present])
+    first = np.ones(len(pairs), dtype=bool)
+    first[1:] = pairs[1:] != pairs[:-1]
+    distinct = np.bincount(pairs[first] // width, minlength=n_claims)
+    return count, distinct.astype(np.float64)
+
+
+def compute_features(arrays: Dict[str, np.ndarray], now: Optional[datetime] = None) -> np.ndarray:
+    """
+    Compute the feature matrix from claim_arrays() output.
+
+    Args:
+        arrays: Claim and line arrays (see claim_arrays)
+        now: Reference time for claim age (default: now)
+
+    Returns:
+        Float64 array of shape (n_claims, len(FEATURE_NAMES))
+    """
+    n_claims = len(arrays["total_charge_amount"])
+    # One contiguous row per feature while filling, transposed at the end
+    features = np.zeros((len(FEATURE_NAMES), n_claims), dtype=np.float64)
+    column = dict(zip(FEATURE_NAMES, features))
+
+    # Line statistics as grouped reductions over the line arrays
+    line_claim = arrays["line_claim"]
+    amounts = arrays["line_charge_amount"]
+    counts = np.bincount(line_claim, minlength=n_claims)
+    line_count = counts.astype(np.float64)
+    has_lines = counts > 0
+    safe_count = np.maximum(line_count, 1.0)
+
+    line_sum = np.bincount(line_claim, weights=amounts, minlength=n_claims)
+    mean = line_sum / safe_count
+    # Two-pass variance, like np.std (population, ddof=0)
+    squared_deviation = np.bincount(line_claim, weights=(amounts - mean[line_claim]) ** 2, minlength=n_claims)
+    column["std_line_charge"][:] = np.where(counts > 1, np.sqrt(squared_deviation / safe_count), 0.0)
+    column["total_line_charges"][:] = line_sum
+    column["avg_line_charge"][:] = mean
+
+    # Order lines by (claim, amount): rank the amounts, then sort one integer key
+    amount_rank = np.empty(len(amounts), dtype=np.int64)
+    amount_rank[np.argsort(amounts)] = np.arange(len(amounts))
+    sorted_amounts = amounts[np.argsort(line_claim * len(amounts) + amount_rank)]
+    starts = (np.cumsum(counts) - counts)[has_lines]
+    sizes = counts[has_lines]
+    column["min_line_charge"][has_lines] = sorted_amounts[starts]
+    column["max_line_charge"][has_lines] = sorted_amounts[starts + sizes - 1]
+    # Upper median (element n // 2 of the sorted amounts), as models were trained on
+    column["median_line_charge"][has_lines] = sorted_amounts[starts + sizes // 2]
+
+    # Basic
+    total_charge = arrays["total_charge_amount"]
+    diagnosis_count = arrays["diagnosis_count"]
+    column["total_charge_amount"][:] = total_charge
+    column["is_incomplete"][:] = arrays["is_incomplete"]
+    column["has_principal_diagnosis"][:] = arrays["has_principal_diagnosis"]
+    column["diagnosis_count"][:] = diagnosis_count
+    column["claim_line_count"][:] = line_count
+    column["charge_per_line"][:] = np.where(has_lines, total_charge / safe_count, 0.0)
+    column["diagnosis_per_line"][:] = np.where(has_lines, diagnosis_count / safe_count, 0.0)
+    column["claim_age_days"][:] = _claim_age_days(arrays["created_at"], now)
+
+    # Coding
+    _, column["unique_procedure_codes"][:] = _count_codes(line_claim, arrays["line_procedure_code"], n_claims)
+    column["modifier_count"][:], column["unique_modifiers"][:] = _count_codes(
+        line_claim, arrays["line_modifier"], n_claims
+    )
+    revenue_count, _ = _count_codes(line_claim, arrays["line_revenue_code"], n_claims)
+    column["revenue_code_count"][:] = revenue_count
+    column["has_revenue_code"][:] = revenue_count > 0
+
+    # Provider
+    for name in ("has_attending_provider", "has_operating_provider", "has_referring_provider", "has_provider"):
+        column[name][:] = arrays[name]
+    column["provider_count"][:] = (
+        column["has_attending_provider"] + column["has_operating_provider"] + column["has_referring_provider"]
+    )
+
+    # Temporal
+    service_date = arrays["service_date"]
+    has_date = ~np.isnan(service_date)
+    days = service_date[has_date].astype(np.int64)
+    weekday = (days + _EPOCH_WEEKDAY) % 7
+    month = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) % 12 + 1
+    column["service_date_day_of_week"][has_date] = weekday
+    column["service_date_month"][has_date] = month
+    column["service_date_quarter"][has_date] = (month - 1) // 3 + 1
+    column["service_date_is_weekend"][has_date] = weekday >= 5
+
+    return np.ascontiguousarray(features.T)
+
+
+def refresh_time_dependent_features(
+    features: np.ndarray, claims: Sequence, now: Optional[datetime] = None
+) -> np.ndarray:
+    """
+    Recompute TIME_DEPENDENT_FEATURES of previously computed rows, in place.
+
+    Args:
+        features: Feature matrix of ``claims`` (FEATURE_NAMES columns first)
+        claims: Claims of the rows
+        now: Reference time for claim age (default: now)
+
+    Returns:
+        ``features``
+    """
+    features[:, FEATURE_INDEX["claim_age_days"]] = _claim_age_days(_created_at_seconds(claims), now)
+    return features
+
+
+def historical_features(claims: Sequence, db_session) -> np.ndarray:
+    """
+    Historical denial and payment rates per claim (database queries).
+
+    Args:
+        claims: Claims to look up
+        db_session: Database session (zeros without one)
+
+    Returns:
+        Float64 array of shape (n_claims, len(HISTORICAL_FEATURES))
+    """
+    features = np.zeros((len(claims), len(HISTORICAL_FEATURES)), dtype=np.float64)
+    if db_session is None:
+        return features
+
+    # Import here to avoid circular dependency
+    from ml.services.data_collector import DataCollector
+
+    collector = DataCollector(db_session)
+    for row, claim in enumerate(claims):
+        try:
+            stats = collector.get_historical_statistics(claim, lookback_days=HISTORICAL_LOOKBACK_DAYS)
+            features[row] = [stats.get(name, 0.0) for name in HISTORICAL_FEATURES]
+        except Exception as e:
+            logger.warning("Failed to extract historical features", claim_id=claim.id, error=str(e))
+    return features
+
+
+def build_feature_matrix(
+    claims: Sequence,
+    include_historical: bool = False,
+    db_session: Optional[object] = None,
+    now: Optional[datetime] = None,
+) -> np.ndarray:
+    """
+    Feature matrix for a batch of claims.
+
+    Args:
+        claims: Claims with their claim_lines loaded
+        include_historical: Whether to append the historical features
+        db_session: Database session for the historical features
+        now: Reference time for claim age (default: now)
+
+    Returns:
+        Float64 array of shape (n_claims, len(feature_names(include_historical)))
+    """
+    features = compute_features(claim_arrays(claims), now=now)
+    if include_historical:
+        features = np.hstack([features, historical_features(claims, db_session)])
+    return features
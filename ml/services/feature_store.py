@@ -0,0 +1,259 @@
+"""
+Persisted claim feature vectors.
+
+Feature extraction (historical queries included) runs once per claim instead of
+on every score request: vectors are computed in bulk after claims are loaded
+(compute_feature_vectors task) and stored in claim_feature_vectors, keyed by
+claim and FEATURE_SCHEMA_VERSION. Scoring and training read them through
+FeatureStore.feature_matrix, which computes any vector that is missing, stale
+or older than its claim, and refreshes the time-dependent features (claim age)
+on read.
+
+The historical features of a claim move as outcomes for its payer and provider
+arrive. Episode linking calls record_outcomes(), which marks the vectors of a
+payer or provider stale once the outcomes linked since they were computed reach
+FEATURE_STORE_REFRESH_FRACTION of the outcomes they were computed from; a
+denial rate over N outcomes can move by at most k / (N + k) after k more, so
+smaller changes are not worth recomputing for. Diagnosis denial rates are only
+refreshed along with their payer or provider.
+"""
+import os
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.database import Claim, ClaimEpisode, ClaimFeatureVector
+from app.utils.logger import get_logger
+from ml.services.feature_pipeline import (
+    FEATURE_NAMES,
+    FEATURE_SCHEMA_VERSION,
+    HISTORICAL_LOOKBACK_DAYS,
+    build_feature_matrix,
+    feature_names,
+    refresh_time_dependent_features,
+)
+
+logger = get_logger(__name__)
+
+# Claims loaded, computed and stored together
+FEATURE_STORE_BATCH_SIZE = int(os.getenv("FEATURE_STORE_BATCH_SIZE", "1000"))
+# New outcomes, relative to those already counted, that make vectors stale
+FEATURE_STORE_REFRESH_FRACTION = float(os.getenv("FEATURE_STORE_REFRESH_FRACTION", "0.1"))
+
+# Stored vectors hold every feature, historical included
+_VECTOR_WIDTH = len(feature_names(include_historical=True))
+_VECTOR_DTYPE = np.dtype("<f8")
+
+
+class FeatureStore:
+    """Read, compute and invalidate persisted feature vectors."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def compute(self, claim_ids: Sequence[int]) -> int:
+        """
+        Compute and store the vectors of claims, replacing existing ones.
+
+        The caller commits.
+
+        Args:
+            claim_ids: Claims to compute
+
+        Returns:
+            Number of vectors stored
+        """
+        claim_ids = list(claim_ids)
+        stored = 0
+        for start in range(0, len(claim_ids), FEATURE_STORE_BATCH_SIZE):
+            claims = (
+                self.db.query(Claim)
+                .options(selectinload(Claim.claim_lines))
+                .filter(Claim.id.in_(claim_ids[start:start + FEATURE_STORE_BATCH_SIZE]))
+                .all()
+            )
+            features = build_feature_matrix(claims, include_historical=True, db_session=self.db)
+            self._save(claims, features)
+            stored += len(claims)
+        return stored
+
+    def refresh_stale(self, limit: Optional[int] = None) -> int:
+        """
+        Recompute stale vectors of the current schema version.
+
+        The caller commits.
+
+        Args:
+            limit: Maximum number of vectors to recompute
+
+        Returns:
+            Number of vectors recomputed
+        """
+        query = (
+            self.db.query(ClaimFeatureVector.claim_id)
+            .filter(
+                ClaimFeatureVector.schema_version == FEATURE_SCHEMA_VERSION,
+                ClaimFeatureVector.stale.is_(True),
+            )
+            .order_by(ClaimFeatureVector.claim_id)
+        )
+        if limit:
+            query = query.limit(limit)
+        return self.compute([claim_id for (claim_id,) in query.all()])
+
+    def feature_matrix(
+        self,
+        claims: Sequence[Claim],
+        include_historical: bool = True,
+        persist: bool = True,
+        now=None,
+    ) -> np.ndarray:
+        """
+        Feature matrix of claims, read from their stored vectors.
+
+        Vectors that are missing, stale or older than their claim's last update
+        are computed; with ``persist`` they are also stored (the caller
+        commits). Use ``persist=False`` on read-only sessions.
+
+        Args:
+            claims: Claims with their claim_lines loaded
+            include_historical: Whether to return the historical features
+            persist: Whether to store the vectors computed here
+            now: Reference time for claim age (default: now)
+
+        Returns:
+            Float64 array of shape (n_claims, len(feature_names(include_historical)))
+        """
+        claims = list(claims)
+        stored = self._load([claim.id for claim in claims])
+        features = np.zeros((len(claims), _VECTOR_WIDTH), dtype=np.float64)
+        missing = []
+        for row, claim in enumerate(claims):
+            vector = stored.get(claim.id)
+            if vector is None or self._outdated(vector, claim):
+                missing.append(row)
+            else:
+                features[row] = np.frombuffer(vector.features, dtype=_VECTOR_DTYPE)
+
+        if missing and not include_historical:
+            # Only the cheap features are needed; not worth storing partial vectors
+            computed = build_feature_matrix([claims[row] for row in missing], now=now)
+            features[missing, :len(FEATURE_NAMES)] = computed
+        elif missing:
+            computed_claims = [claims[row] for row in missing]
+            computed = build_feature_matrix(
+                computed_claims, include_historical=True, db_session=self.db, now=now
+            )
+            features[missing] = computed
+            if persist:
+                self._save(computed_claims, computed)
+
+        if stored:
+            logger.debug("Read stored feature vectors", hits=len(claims) - len(missing), misses=len(missing))
+        refresh_time_dependent_features(features, claims, now=now)
+        return features if include_historical else features[:, :len(FEATURE_NAMES)]
+
+    def record_outcomes(self, claims: Sequence[Claim]) -> int:
+        """
+        Mark vectors stale for the payers and providers of newly linked claims
+        whose outcome history has moved enough since the vectors were computed.
+
+        The caller commits.
+
+        Args:
+            claims: Claims whose episodes were just linked to remittances
+
+        Returns:
+            Number of vectors marked stale
+        """
+        marked = 0
+        for vector_column, claim_column, attribute in (
+            (ClaimFeatureVector.payer_id, Claim.payer_id, "payer_id"),
+            (ClaimFeatureVector.provider_id, Claim.provider_id, "provider_id"),
+        ):
+            values = {getattr(claim, attribute) for claim in claims} - {None}
+            for value in sorted(values):
+                if not self._history_moved(vector_column, claim_column, value):
+                    continue
+                count = (
+                    self.db.query(ClaimFeatureVector)
+                    .filter(
+                        vector_column == value,
+                        ClaimFeatureVector.schema_version == FEATURE_SCHEMA_VERSION,
+                        ClaimFeatureVector.stale.is_(False),
+                    )
+                    .update({ClaimFeatureVector.stale: True}, synchronize_session=False)
+                )
+                logger.info("Marked feature vectors stale", key=attribute, value=value, vectors=count)
+                marked += count
+        return marked
+
+    def _history_moved(self, vector_column, claim_column, value: int) -> bool:
+        """Whether outcomes linked since the oldest fresh vector are enough to recompute."""
+        oldest_query = self.db.query(func.min(ClaimFeatureVector.updated_at)).filter(
+            vector_column == value,
+            ClaimFeatureVector.schema_version == FEATURE_SCHEMA_VERSION,
+            ClaimFeatureVector.stale.is_(False),
+        )
+        oldest = oldest_query.scalar()
+        if oldest is None:
+            return False
+
+        # Compared in SQL so both sides are database timestamps
+        since_oldest = ClaimEpisode.created_at >= oldest_query.scalar_subquery()
+        total, new = (
+            self.db.query(
+                func.count(ClaimEpisode.id),
+                func.coalesce(func.sum(case((since_oldest, 1), else_=0)), 0),
+            )
+            .join(Claim, ClaimEpisode.claim_id == Claim.id)
+            .filter(
+                claim_column == value,
+                ClaimEpisode.remittance_id.isnot(None),
+                ClaimEpisode.created_at >= oldest - timedelta(days=HISTORICAL_LOOKBACK_DAYS),
+            )
+            .one()
+        )
+        return new > 0 and new >= max(total - new, 1) * FEATURE_STORE_REFRESH_FRACTION
+
+    @staticmethod
+    def _outdated(vector, claim) -> bool:
+        """Whether a stored vector must be recomputed before use."""
+        if vector.stale or len(vector.features) != _VECTOR_WIDTH * _VECTOR_DTYPE.itemsize:
+            return True
+        claim_updated_at = getattr(claim, "updated_at", None)
+        return bool(claim_updated_at and vector.updated_at and claim_updated_at > vector.updated_at)
+
+    def _load(self, claim_ids: List[int]) -> Dict[int, ClaimFeatureVector]:
+        """Stored vectors of the current schema version by claim ID."""
+        vectors = {}
+        for start in range(0, len(claim_ids), FEATURE_STORE_BATCH_SIZE):
+            rows = (
+                self.db.query(ClaimFeatureVector)
+                .filter(
+                    ClaimFeatureVector.claim_id.in_(claim_ids[start:start + FEATURE_STORE_BATCH_SIZE]),
+                    ClaimFeatureVector.schema_version == FEATURE_SCHEMA_VERSION,
+                )
+                .all()
+            )
+            vectors.update((vector.claim_id, vector) for vector in rows)
+        return vectors
+
+    def _save(self, claims: Sequence[Claim], features: np.ndarray) -> None:
+        """Insert or replace the vectors of claims."""
+        existing = self._load([claim.id for claim in claims])
+        for claim, row in zip(claims, features):
+            vector = existing.get(claim.id)
+            if vector is None:
+                vector = ClaimFeatureVector(claim_id=claim.id, schema_version=FEATURE_SCHEMA_VERSION)
+                self.db.add(vector)
+            vector.payer_id = claim.payer_id
+            vector.provider_id = claim.provider_id
+            vector.features = np.ascontiguousarray(row, dtype=_VECTOR_DTYPE).tobytes()
+            vector.stale = False
+            # Bumped even when the values did not change: this is when they were checked
+            vector.updated_at = func.now()
+        self.db.flush()
@@ -0,0 +1,518 @@
+"""
+Inference benchmark for the risk prediction models.
+
+Trains every model variant on the same fixed synthetic feature matrix, then
+measures each one in a fresh process:
+
+- model load time and the resident memory the loaded model adds
+- single-claim latency (p50/p99 of predict_single)
+- batch throughput (rows per second of predict on one batch)
+
+The report is JSON. With --history, it is compared with the last report of
+the same configuration on the same machine, and the run fails when a metric
+is worse by more than --tolerance; passing runs are appended as the new
+baseline.
+
+Usage:
+    python ml/training/benchmark_inference.py --history ml/models/benchmarks/inference.jsonl
+    python ml/training/benchmark_inference.py --variants random_forest deep_cpu_int8 --output report.json
+"""
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import sklearn
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.utils.logger import get_logger
+from app.utils.memory_monitor import get_memory_usage
+from ml.services.feature_pipeline import feature_names
+
+logger = get_logger(__name__)
+
+# Variant name -> (predictor kind, training settings)
+VARIANTS = {
+    "random_forest": ("risk", {"model_type": "random_forest"}),
+    "gradient_boosting": ("risk", {"model_type": "gradient_boosting"}),
+    "deep": ("deep", {}),
+    "deep_cpu_float": ("deep", {"export": {"quantize": False}}),
+    "deep_cpu_int8": ("deep", {"export": {"quantize": True}}),
+}
+
+# Metric -> whether higher values are better
+BENCHMARK_METRICS = {
+    "single_p50_ms": False,
+    "single_p99_ms": False,
+    "batch_rows_per_second": True,
+    "load_seconds": False,
+    "model_memory_mb": False,
+}
+
+# Differences below these are measurement noise, whatever the ratio
+_NOISE_FLOORS = {
+    "single_p50_ms": 0.1,
+    "single_p99_ms": 0.2,
+    "batch_rows_per_second": 0.0,
+    "load_seconds": 0.01,
+    "model_memory_mb": 2.0,
+}
+
+
+def torch_available() -> bool:
+    """Whether the deep learning variants can run."""
+    return importlib.util.find_spec("torch") is not None
+
+
+def synthetic_feature_matrix(n_samples: int, seed: int = 42) -> Dict[str, np.ndarray]:
+    """
+    Generate a fixed claim feature matrix and denial-rate labels.
+
+    Columns follow ``feature_names(include_historical=True)``: charges are
+    log-normal, ``has_``/``is_`` flags binary, rates uniform, the rest counts.
+
+    Args:
+        n_samples: Number of rows
+        seed: Random seed; the same seed gives the same matrix
+
+    Returns:
+        Dictionary with ``X`` (float32) and ``y`` (0.0 to 1.0)
+    """
+    rng = np.random.default_rng(seed)
+    columns = []
+    for name in feature_names(include_historical=True):
+        if "charge" in name:
+            columns.append(rng.lognormal(mean=5.0, sigma=1.0, size=n_samples))
+        elif name.startswith(("has_", "is_")):
+            columns.append(rng.integers(0, 2, size=n_samples))
+        elif "rate" in name:
+            columns.append(rng.uniform(size=n_samples))
+        else:
+            columns.append(rng.poisson(3.0, size=n_samples))
+    X = np.column_stack(columns).astype(np.float32)
+
+    standardized = (X - X.mean(axis=0)) / (X.std(axis=0) + 1e-6)
+    weights = rng.normal(scale=0.5, size=X.shape[1])
+    logits = standardized @ weights + rng.normal(scale=0.5, size=n_samples)
+    y = (1.0 / (1.0 + np.exp(-logits))).astype(np.float32)
+    return {"X": X, "y": y}
+
+
+def build_variant(name: str, X: np.ndarray, y: np.ndarray, model_dir: Path, n_estimators: int = 100) -> Path:
+    """
+    Train one variant on the synthetic data and save it.
+
+    Args:
+        name: Key of VARIANTS
+        X: Training features
+        y: Training labels
+        model_dir: Directory to save the model in
+        n_estimators: Trees or boosting stages for the scikit-learn variants
+
+    Returns:
+        Path of the saved model
+    """
+    kind, settings = VARIANTS[name]
+    model_path = Path(model_dir) / f"{name}.pkl"
+
+    if kind == "risk":
+        from ml.models.risk_predictor import RiskPredictor
+
+        predictor = RiskPredictor()
+        predictor.train(X, y, model_type=settings["model_type"], n_estimators=n_estimators)
+    else:
+        from ml.models.deep_risk_predictor import DeepRiskPredictor
+
+        predictor = DeepRiskPredictor()
+        predictor.train(X, y, epochs=20, batch_size=256)
+        if "export" in settings:
+            predictor.export_cpu(X[:1000], **settings["export"])
+
+    predictor.save_model(str(model_path))
+    return model_path
+
+
+def model_kind(model_path: Path) -> str:
+    """Whether a saved model is a RiskPredictor ("risk") or DeepRiskPredictor ("deep")."""
+    import joblib
+
+    return "deep" if "model_config" in joblib.load(model_path) else "risk"
+
+
+def measure_model(
+    kind: str,
+    model_path: str,
+    features_path: str,
+    single_rows: int = 1000,
+    batch_size: int = 10000,
+    repeats: int = 5,
+) -> Dict[str, float]:
+    """
+    Load a saved model and time its predictions.
+
+    Run this in a fresh process (see run_benchmark): the memory figures are
+    the process's resident set size, so models loaded earlier would count.
+
+    Args:
+        kind: "risk" or "deep"
+        model_path: Saved model
+        features_path: .npy file of features to score
+        single_rows: Number of single-claim predictions to time
+        batch_size: Rows per batch prediction
+        repeats: Number of batch predictions to time (the median is reported)
+
+    Returns:
+        Dictionary with the BENCHMARK_METRICS and supporting figures
+    """
+    if kind == "deep":
+        from ml.models.deep_risk_predictor import DeepRiskPredictor as predictor_class
+    else:
+        from ml.models.risk_predictor import RiskPredictor as predictor_class
+
+    X = np.load(features_path)
+    batch = X[:batch_size]
+
+    memory_before = get_memory_usage()
+    started = time.perf_counter()
+    predictor = predictor_class(model_path=model_path)
+    load_seconds = time.perf_counter() - started
+    model_memory_mb = get_memory_usage() - memory_before
+
+    # Warm up lazy initialisation (thread pools, allocator) before timing
+    predictor.predict(batch)
+    predictor.predict_single(X[0])
+
+    single_seconds = []
+    for index in range(single_rows):
+        row = X[index % len(X)]
+        started = time.perf_counter()
+        predictor.predict_single(row)
+        single_seconds.append(time.perf_counter() - started)
+
+    batch_seconds = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        predictor.predict(batch)
+        batch_seconds.append(time.perf_counter() - started)
+    batch_median = float(np.median(batch_seconds))
+
+    single_ms = np.array(single_seconds) * 1000
+    return {
+        "load_seconds": round(load_seconds, 4),
+        "model_memory_mb": round(model_memory_mb, 2),
+        "resident_memory_mb": round(get_memory_usage(), 2),
+        "model_bytes": Path(model_path).stat().st_size,
+        "single_rows": single_rows,
+        "single_p50_ms": round(float(np.percentile(single_ms, 50)), 4),
+        "single_p99_ms": round(float(np.percentile(single_ms, 99)), 4),
+        "batch_size": len(batch),
+        "batch_seconds": round(batch_median, 5),
+        "batch_rows_per_second": round(len(batch) / batch_median, 1),
+    }
+
+
+def _environment() -> Dict:
+    """Software and hardware the benchmark ran on."""
+    environment = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+    }
+    if torch_available():
+        import torch
+
+        environment["torch"] = torch.__version__
+        environment["torch_threads"] = torch.get_num_threads()
+    return environment
+
+
+def run_benchmark(
+    variants: Optional[List[str]] = None,
+    model_paths: Optional[List[str]] = None,
+    n_samples: int = 20000,
+    single_rows: int = 1000,
+    batch_size: int = 10000,
+    repeats: int = 5,
+    n_estimators: int = 100,
+    seed: int = 42,
+    work_dir: Optional[str] = None,
+    isolated: bool = True,
+) -> Dict:
+    """
+    Train the variants on synthetic data and benchmark them and any saved models.
+
+    Args:
+        variants: Keys of VARIANTS to train and measure (default: all)
+        model_paths: Saved models to measure as well, named by file stem
+        n_samples: Rows in the training matrix and in the scoring matrix
+        single_rows: Single-claim predictions timed per model
+        batch_size: Rows per batch prediction
+        repeats: Batch predictions timed per model
+        n_estimators: Trees or boosting stages for the scikit-learn variants
+        seed: Seed of the synthetic matrices
+        work_dir: Where to keep the models and features (default: a temporary directory)
+        isolated: Measure each model in its own process (memory figures are
+            only meaningful then)
+
+    Returns:
+        Report with ``created_at``, ``environment``, ``config`` and ``results``
+        per variant; variants that cannot run have a ``skipped`` reason instead
+    """
+    variants = list(VARIANTS) if variants is None else variants
+    config = {
+        "variants": variants,
+        "n_samples": n_samples,
+        "n_features": len(feature_names(include_historical=True)),
+        "single_rows": single_rows,
+        "batch_size": batch_size,
+        "repeats": repeats,
+        "n_estimators": n_estimators,
+        "seed": seed,
+    }
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as scratch:
+        scratch = Path(scratch)
+        train = synthetic_feature_matrix(n_samples, seed=seed)
+        score = synthetic_feature_matrix(n_samples, seed=seed + 1)
+        features_path = scratch / "features.npy"
+        np.save(features_path, score["X"])
+
+        models = {}
+        results = {}
+        for name in variants:
+            if VARIANTS[name][0] == "deep" and not torch_available():
+                results[name] = {"skipped": "torch is not installed"}
+                continue
+            logger.info("Training benchmark variant", variant=name)
+            models[name] = (VARIANTS[name][0], build_variant(name, train["X"], train["y"], scratch, n_estimators))
+        for model_path in model_paths or []:
+            models[Path(model_path).stem] = (model_kind(Path(model_path)), Path(model_path))
+
+        for name, (kind, model_path) in models.items():
+            logger.info("Measuring model inference", variant=name, model_path=str(model_path))
+            args = (kind, str(model_path), str(features_path), single_rows, batch_size, repeats)
+            if isolated:
+                spawn = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+                    results[name] = executor.submit(measure_model, *args).result()
+            else:
+                results[name] = measure_model(*args)
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "environment": _environment(),
+        "config": config,
+        "results": results,
+    }
+
+
+def compare_reports(current: Dict, baseline: Dict, tolerance: float = 0.20) -> List[Dict]:
+    """
+    Compare each variant's metrics with a baseline report.
+
+    A metric regresses when it is worse than the baseline by more than
+    ``tolerance`` (a fraction) and by more than its noise floor.
+
+    Args:
+        current: Report from run_benchmark
+        baseline: Earlier report
+        tolerance: Accepted relative slowdown or growth
+
+    Returns:
+        One entry per variant and metric present in both reports, with
+        ``change`` (positive is worse) and ``regression``
+    """
+    comparisons = []
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or "skipped" in result or "skipped" in previous:
+            continue
+        for metric, higher_is_better in BENCHMARK_METRICS.items():
+            if metric not in result or metric not in previous:
+                continue
+            new, old = result[metric], previous[metric]
+            if higher_is_better:
+                change = old / new - 1 if new else float("inf")
+            else:
+                change = new / old - 1 if old else 0.0
+            worse_by = old - new if higher_is_better else new - old
+            comparisons.append({
+                "variant": name,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": round(change, 4),
+                "regression": change > tolerance and worse_by > _NOISE_FLOORS[metric],
+            })
+    return comparisons
+
+
+def load_baseline(history_path: Path, report: Dict) -> Optional[Dict]:
+    """
+    Find the latest report in a history file that ``report`` can be compared with.
+
+    Reports match when their config is the same and they ran on the same
+    platform with the same number of CPUs.
+
+    Args:
+        history_path: JSONL file of earlier reports
+        report: Report from run_benchmark
+
+    Returns:
+        The matching report, or None
+    """
+    if not Path(history_path).exists():
+        return None
+
+    environment = report["environment"]
+    baseline = None
+    with open(history_path) as history:
+        for line in history:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if (
+                entry.get("config") == report["config"]
+                and entry["environment"].get("platform") == environment["platform"]
+                and entry["environment"].get("cpu_count") == environment["cpu_count"]
+            ):
+                baseline = entry
+    return baseline
+
+
+def append_history(history_path: Path, report: Dict):
+    """Append a report to a JSONL history file."""
+    Path(history_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(history_path, "a") as history:
+        history.write(json.dumps(report) + "\n")
+
+
+def print_report(report: Dict):
+    """Print a table of the results and any regressions."""
+    print("\n" + "=" * 96)
+    print("MODEL INFERENCE BENCHMARK")
+    print("=" * 96)
+    print(
+        f"{'variant':<22}{'load s':>9}{'model MB':>10}{'RSS MB':>9}"
+        f"{'p50 ms':>10}{'p99 ms':>10}{'batch rows/s':>15}{'size KB':>11}"
+    )
+    for name, result in report["results"].items():
+        if "skipped" in result:
+            print(f"{name:<22}skipped: {result['skipped']}")
+            continue
+        print(
+            f"{name:<22}{result['load_seconds']:>9.3f}{result['model_memory_mb']:>10.1f}"
+            f"{result['resident_memory_mb']:>9.1f}{result['single_p50_ms']:>10.3f}"
+            f"{result['single_p99_ms']:>10.3f}{result['batch_rows_per_second']:>15,.0f}"
+            f"{result['model_bytes'] / 1024:>11,.0f}"
+        )
+
+    comparison = report.get("comparison")
+    if comparison:
+        print(f"\nCompared with {comparison['baseline_created_at']} (tolerance {comparison['tolerance']:.0%}):")
+        regressions = [entry for entry in comparison["changes"] if entry["regression"]]
+        for entry in regressions:
+            print(
+                f"  REGRESSION {entry['variant']} {entry['metric']}: "
+                f"{entry['baseline']} -> {entry['current']} ({entry['change']:+.1%})"
+            )
+        if not regressions:
+            print("  No regressions")
+    print("=" * 96)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark risk model inference")
+    parser.add_argument(
+        "--variants",
+        nargs="+",
+        choices=list(VARIANTS),
+        default=list(VARIANTS),
+        help="Model variants to train and measure (default: all)",
+    )
+    parser.add_argument(
+        "--model-path",
+        action="append",
+        default=[],
+        help="Saved model to measure as well (repeatable)",
+    )
+    parser.add_argument("--samples", type=int, default=20000, help="Rows in the synthetic matrices")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per batch prediction")
+    parser.add_argument("--single-rows", type=int, default=1000, help="Single-claim predictions to time")
+    parser.add_argument("--repeats", type=int, default=5, help="Batch predictions to time")
+    parser.add_argument("--n-estimators", type=int, default=100, help="Trees for the scikit-learn variants")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the synthetic matrices")
+    parser.add_argument("--output", type=str, help="Write the JSON report to this file")
+    parser.add_argument(
+        "--history",
+        type=str,
+        help="JSONL history: compare with the last matching report, and append this one if it passes",
+    )
+    parser.add_argument("--baseline", type=str, help="JSON report to compare with instead of the history")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.20,
+        help="Accepted relative regression per metric (default: 0.20)",
+    )
+
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        variants=args.variants,
+        model_paths=args.model_path,
+        n_samples=args.samples,
+        single_rows=args.single_rows,
+        batch_size=args.batch_size,
+        repeats=args.repeats,
+        n_estimators=args.n_estimators,
+        seed=args.seed,
+    )
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    elif args.history:
+        baseline = load_baseline(Path(args.history), report)
+
+    regressions = []
+    if baseline is not None:
+        changes = compare_reports(report, baseline, tolerance=args.tolerance)
+        regressions = [entry for entry in changes if entry["regression"]]
+        report["comparison"] = {
+            "baseline_created_at": baseline["created_at"],
+            "tolerance": args.tolerance,
+            "changes": changes,
+        }
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"Report written to {args.output}")
+    if args.history and not regressions:
+        append_history(Path(args.history), report)
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark denial pattern mining time against episode count.
+
+Generates synthetic episodes in which one attribute combination (principal
+diagnosis E01.1 with procedure 99213) is usually denied for CO50, mines each
+size with PatternLearner and reports the time, the number of rules and
+whether the planted rule was found.
+
+Usage:
+    python ml/training/benchmark_pattern_mining.py --episodes 10000 100000 1000000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from ml.models.pattern_learner import PatternLearner, claim_items
+
+PLANTED_CONDITIONS = {"principal_diagnosis": "E01.1", "procedure_codes": ["99213"]}
+
+
+def synthetic_episodes(n_episodes: int, seed: int = 42) -> Tuple[List[List], List[List[str]]]:
+    """
+    Generate claim attribute items and denial reasons with one planted pattern.
+
+    Every episode has a principal diagnosis out of 10, three other diagnosis
+    codes out of 200, one to three procedures out of 20, a facility type and
+    a log-normal charge. CO45 denials are random (5%); CO50 hits 70% of
+    E01.1 + 99213 claims and 3% of the rest.
+
+    Args:
+        n_episodes: Number of episodes
+        seed: Random seed
+
+    Returns:
+        Tuple of (items per episode, reason codes per episode)
+    """
+    rng = np.random.default_rng(seed)
+    diagnoses = np.array([f"E{major:02d}.{minor}" for major in range(40) for minor in range(5)])
+    procedures = np.array([str(99200 + offset) for offset in range(20)])
+    facility_types = np.array(["11", "12", "13", "21"])
+
+    principal = diagnoses[rng.integers(0, 10, n_episodes)].tolist()
+    other = diagnoses[rng.integers(0, len(diagnoses), (n_episodes, 3))]
+    procedure_counts = rng.integers(1, 4, n_episodes)
+    procedure = procedures[rng.integers(0, len(procedures), (n_episodes, 3))]
+    facility = facility_types[rng.integers(0, len(facility_types), n_episodes)].tolist()
+    charge = rng.lognormal(6.5, 1.0, n_episodes).tolist()
+    co45 = rng.random(n_episodes) < 0.05
+    co50_draw = rng.random(n_episodes)
+
+    transactions = []
+    outcomes = []
+    for index in range(n_episodes):
+        procedure_codes = procedure[index, :procedure_counts[index]].tolist()
+        transactions.append(
+            claim_items(principal[index], other[index].tolist(), procedure_codes, facility[index], charge[index])
+        )
+        planted = principal[index] == "E01.1" and "99213" in procedure_codes
+        codes = ["CO45"] if co45[index] else []
+        if co50_draw[index] < (0.7 if planted else 0.03):
+            codes.append("CO50")
+        outcomes.append(codes)
+    return transactions, outcomes
+
+
+def benchmark_mining(episode_counts: List[int], seed: int = 42, learner: Optional[PatternLearner] = None) -> List[Dict]:
+    """
+    Time PatternLearner.fit for each episode count.
+
+    Args:
+        episode_counts: Sizes to mine
+        seed: Seed of the synthetic episodes
+        learner: Learner to benchmark (default: PatternLearner())
+
+    Returns:
+        One result per size with ``episodes``, ``items``, ``seconds``,
+        ``episodes_per_second``, ``rules`` and ``planted_rule_found``
+    """
+    learner = learner or PatternLearner()
+    results = []
+    for n_episodes in episode_counts:
+        transactions, outcomes = synthetic_episodes(n_episodes, seed=seed)
+        started = time.perf_counter()
+        rules = learner.fit(transactions, outcomes)
+        seconds = time.perf_counter() - started
+        results.append({
+            "episodes": n_episodes,
+            "items": sum(len(items) for items in transactions),
+            "seconds": round(seconds, 3),
+            "episodes_per_second": round(n_episodes / seconds),
+            "rules": len(rules),
+            "planted_rule_found": any(
+                rule["denial_reason_code"] == "CO50"
+                and all(rule["conditions"].get(key) == value for key, value in PLANTED_CONDITIONS.items())
+                for rule in rules
+            ),
+        })
+    return results
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark denial pattern mining")
+    parser.add_argument(
+        "--episodes",
+        type=int,
+        nargs="+",
+        default=[10000, 100000, 1000000],
+        help="Episode counts to mine (default: 10000 100000 1000000)",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the synthetic episodes")
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this file")
+
+    args = parser.parse_args()
+
+    results = benchmark_mining(args.episodes, seed=args.seed)
+
+    print(f"\n{'episodes':>12}{'items':>12}{'seconds':>10}{'episodes/s':>14}{'rules':>8}  planted rule")
+    for result in results:
+        print(
+            f"{result['episodes']:>12,}{result['items']:>12,}{result['seconds']:>10.3f}"
+            f"{result['episodes_per_second']:>14,}{result['rules']:>8}  "
+            f"{'found' if result['planted_rule_found'] else 'MISSING'}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ from sqlalchemy.orm import Session
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from app.config.database import get_db
+from app.config.database import open_read_session
 from app.models.database import Claim, Remittance, ClaimEpisode
 from app.utils.logger import get_logger
 
@@ -245,8 +245,8 @@ def main():
 
     args = parser.parse_args()
 
-    # Get database session
-    db = next(get_db())
+    # Get database session (read replica when configured)
+    db = open_read_session()
 
     try:
         # Check data availability
@@ -11,6 +11,7 @@ This script automates the ML model development workflow:
 Can be run manually or scheduled via cron/Celery.
 """
 import argparse
+import os
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -20,10 +21,22 @@ import json
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from app.config.database import get_db
-from ml.services.data_collector import DataCollector
+from app.config.database import get_db, open_replica_session
+from ml.services.data_collector import ML_EPISODE_ID_OVERLAP, DataCollector, recent_episode_ids
 from ml.models.risk_predictor import RiskPredictor
-from ml.training.train_models import train_model, prepare_features_and_labels
+from ml.training.dataset_cache import (
+    TRAINING_DATASET_CACHE_DIR,
+    DatasetCache,
+    default_date_range,
+    load_training_dataset,
+)
+from ml.training.train_models import (
+    latest_model_path,
+    model_output_path,
+    prepare_features_and_labels,
+    train_model,
+)
+from ml.services.feature_pipeline import FEATURE_SCHEMA_VERSION
 from ml.training.evaluate_models import evaluate_model_comprehensive, print_evaluation_report
 from app.services.learning.pattern_detector import PatternDetector
 from app.models.database import Payer
@@ -32,14 +45,33 @@ import pandas as pd
 
 logger = get_logger(__name__)
 
+# Incremental retraining: fewer new outcomes wait for the next run
+ML_INCREMENTAL_MIN_EPISODES = int(os.getenv("ML_INCREMENTAL_MIN_EPISODES", "50"))
+# Trees (random forest) or boosting stages a model may grow to through updates
+ML_MAX_ESTIMATORS = int(os.getenv("ML_MAX_ESTIMATORS", "500"))
+# Days of updates after which the model is retrained from scratch
+ML_FULL_RETRAIN_DAYS = int(os.getenv("ML_FULL_RETRAIN_DAYS", "30"))
+
 
 class ContinuousLearningPipeline:
     """Automated pipeline for continuous model learning and pattern detection."""
 
-    def __init__(self, db_session):
+    def __init__(self, db_session, read_session=None, dataset_cache: Optional[DatasetCache] = None):
+        """
+        Initialize pipeline.
+        
+        Args:
+            db_session: Database session (pattern writes)
+            read_session: Session for training data and history scans, e.g. on a
+                read replica (defaults to db_session)
+            dataset_cache: Cache of training matrices shared with the other
+                workflow stages (None: collect every run)
+        """
         self.db = db_session
-        self.data_collector = DataCollector(db_session)
-        self.pattern_detector = PatternDetector(db_session)
+        self.read_db = read_session or db_session
+        self.dataset_cache = dataset_cache
+        self.data_collector = DataCollector(self.read_db)
+        self.pattern_detector = PatternDetector(db_session, read_db=self.read_db)
 
     def run_full_pipeline(
         self,
@@ -51,10 +83,18 @@ class ContinuousLearningPipeline:
         output_dir: str = "ml/models/saved",
         run_pattern_detection: bool = True,
         min_episodes: int = 100,
+        incremental: bool = False,
     ) -> Dict:
         """
         Run the complete continuous learning pipeline.
         
+        With ``incremental``, the latest model in output_dir is updated with the
+        outcomes linked since it was trained (its lineage records the high-water
+        mark), so the cost follows the new data rather than the whole history.
+        It is retrained from scratch instead when there is no usable model, the
+        feature schema or model type changed, or its last full training is older
+        than ML_FULL_RETRAIN_DAYS.
+        
         Args:
             start_date: Start date for training data (default: 6 months ago)
             end_date: End date for training data (default: today)
@@ -64,6 +104,7 @@ class ContinuousLearningPipeline:
             output_dir: Directory to save trained models
             run_pattern_detection: Whether to run pattern detection
             min_episodes: Minimum episodes required for training
+            incremental: Whether to update the latest model with new outcomes only
             
         Returns:
             Dictionary with pipeline results and metrics
@@ -75,7 +116,78 @@ class ContinuousLearningPipeline:
             "metrics": {},
         }
 
-        logger.info("Starting continuous learning pipeline")
+        logger.info("Starting continuous learning pipeline", incremental=incremental)
+
+        full_training = not incremental
+        if incremental:
+            try:
+                logger.info("Updating model with new outcomes")
+                full_training = not self._update_model(results, start_date, end_date, model_type, output_dir)
+            except Exception as e:
+                error_msg = f"Model update failed: {str(e)}"
+                results["errors"].append(error_msg)
+                logger.error(error_msg, exc_info=True)
+                # Continue to pattern detection; the next run retries from the same high-water mark
+
+        if full_training and not self._train_full_model(
+            results, start_date, end_date, model_type, n_estimators, output_dir, min_episodes
+        ):
+            return results
+
+        # Step 4: Run pattern detection
+        if run_pattern_detection:
+            try:
+                logger.info("Step 4: Running pattern detection")
+                pattern_results = self._run_pattern_detection(days_back)
+                results["pattern_detection"] = pattern_results
+                results["steps_completed"].append("pattern_detection")
+                logger.info("Pattern detection completed", **pattern_results)
+            except Exception as e:
+                error_msg = f"Pattern detection failed: {str(e)}"
+                results["errors"].append(error_msg)
+                logger.error(error_msg, exc_info=True)
+
+        results["completed_at"] = datetime.now().isoformat()
+        results["duration_seconds"] = (
+            datetime.fromisoformat(results["completed_at"])
+            - datetime.fromisoformat(results["started_at"])
+        ).total_seconds()
+
+        logger.info(
+            "Continuous learning pipeline completed",
+            steps_completed=len(results["steps_completed"]),
+            errors=len(results["errors"]),
+            duration_seconds=results["duration_seconds"],
+        )
+
+        return results
+
+    def _train_full_model(
+        self,
+        results: Dict,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        model_type: str,
+        n_estimators: int,
+        output_dir: str,
+        min_episodes: int,
+    ) -> bool:
+        """
+        Check data, then train and evaluate a model on the whole date range.
+        
+        Args:
+            results: Pipeline results to record steps, metrics and errors in
+            start_date: Start date for training data
+            end_date: End date for training data
+            model_type: Type of model to train
+            n_estimators: Number of trees for ensemble models
+            output_dir: Directory to save trained models
+            min_episodes: Minimum episodes required for training
+            
+        Returns:
+            False if the pipeline must stop (no usable training data)
+        """
+        results["training_mode"] = "full"
 
         # Step 1: Check data availability
         try:
@@ -87,7 +199,7 @@ class ContinuousLearningPipeline:
                 error_msg = f"Insufficient data: {data_stats['episodes_with_outcomes']} episodes, need {min_episodes}"
                 results["errors"].append(error_msg)
                 logger.error(error_msg)
-                return results
+                return False
             
             results["steps_completed"].append("data_check")
             logger.info("Data availability check passed", **data_stats)
@@ -95,48 +207,51 @@ class ContinuousLearningPipeline:
             error_msg = f"Data check failed: {str(e)}"
             results["errors"].append(error_msg)
             logger.error(error_msg, exc_info=True)
-            return results
+            return False
 
         # Step 2: Collect and prepare training data
         try:
             logger.info("Step 2: Collecting training data")
-            df = self.data_collector.collect_training_data(
+            dataset = load_training_dataset(
+                self.data_collector,
                 start_date=start_date,
                 end_date=end_date,
                 min_episodes=min_episodes,
-                include_historical=True,
+                cache=self.dataset_cache,
             )
-            results["training_data_rows"] = len(df)
-            results["training_data_columns"] = len(df.columns)
+            results["training_data_rows"] = dataset.X.shape[0]
+            results["training_data_columns"] = dataset.X.shape[1]
+            results["training_dataset"] = dataset.describe()
             results["steps_completed"].append("data_collection")
-            logger.info("Training data collected", rows=len(df))
+            logger.info("Training data loaded", rows=dataset.X.shape[0], cached=dataset.cached)
         except Exception as e:
             error_msg = f"Data collection failed: {str(e)}"
             results["errors"].append(error_msg)
             logger.error(error_msg, exc_info=True)
-            return results
+            return False
 
         # Step 3: Train model
         try:
             logger.info("Step 3: Training model")
             model = train_model(
-                db_session=self.db,
+                db_session=self.read_db,
                 start_date=start_date,
                 end_date=end_date,
                 model_type=model_type,
                 n_estimators=n_estimators,
                 output_dir=output_dir,
+                min_episodes=min_episodes,
+                dataset=dataset,
             )
             
             # Get training metrics
-            X, y, feature_names = prepare_features_and_labels(df)
             from sklearn.model_selection import train_test_split
             X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
+                dataset.X, dataset.y, test_size=0.2, random_state=42
             )
             
             comprehensive_metrics = evaluate_model_comprehensive(
-                model, X_test, y_test, feature_names
+                model, X_test, y_test, dataset.feature_names
             )
             
             results["model_metrics"] = {
@@ -155,33 +270,133 @@ class ContinuousLearningPipeline:
             logger.error(error_msg, exc_info=True)
             # Continue to pattern detection even if training fails
 
-        # Step 4: Run pattern detection
-        if run_pattern_detection:
-            try:
-                logger.info("Step 4: Running pattern detection")
-                pattern_results = self._run_pattern_detection(days_back)
-                results["pattern_detection"] = pattern_results
-                results["steps_completed"].append("pattern_detection")
-                logger.info("Pattern detection completed", **pattern_results)
-            except Exception as e:
-                error_msg = f"Pattern detection failed: {str(e)}"
-                results["errors"].append(error_msg)
-                logger.error(error_msg, exc_info=True)
-
-        results["completed_at"] = datetime.now().isoformat()
-        results["duration_seconds"] = (
-            datetime.fromisoformat(results["completed_at"])
-            - datetime.fromisoformat(results["started_at"])
-        ).total_seconds()
+        return True
 
+    def _update_model(
+        self,
+        results: Dict,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        model_type: str,
+        output_dir: str,
+    ) -> bool:
+        """
+        Warm-start the latest model with the outcomes linked since it was trained.
+        
+        Episodes within ML_EPISODE_ID_OVERLAP below the model's high-water mark
+        are rescanned, skipping those the model has seen, so outcomes linked in
+        transactions that committed after the mark was read are not missed.
+        The latest model is first evaluated on the new outcomes it has not seen
+        (these are the reported metrics), then updated with them and saved as
+        a new model whose lineage extends its parent's.
+        
+        Args:
+            results: Pipeline results to record steps, metrics and errors in
+            start_date: Start date for training data
+            end_date: End date for training data
+            model_type: Type of model to train
+            output_dir: Directory of trained models
+            
+        Returns:
+            False if the model must be retrained from scratch instead
+        """
+        parent_path = latest_model_path(output_dir)
+        parent = RiskPredictor(model_path=str(parent_path)) if parent_path else None
+        reason = self._full_retrain_reason(parent, model_type)
+        if reason:
+            results["full_retrain_reason"] = reason
+            logger.info("Retraining model from scratch", reason=reason)
+            return False
+
+        through_episode_id = self.data_collector.latest_episode_id()
+        after_episode_id = parent.through_episode_id
+        seen_episode_ids = parent.recent_episode_ids
+        results["training_mode"] = "incremental"
+        results["parent_model_path"] = str(parent_path)
+        try:
+            # Links committed after the parent's mark was read may hold lower IDs
+            df = self.data_collector.collect_training_data(
+                start_date=start_date,
+                end_date=end_date,
+                min_episodes=ML_INCREMENTAL_MIN_EPISODES,
+                include_historical=True,
+                after_episode_id=after_episode_id - ML_EPISODE_ID_OVERLAP,
+                through_episode_id=through_episode_id,
+                exclude_episode_ids=seen_episode_ids,
+            )
+        except ValueError as e:
+            # Too few new outcomes: they are collected with the next run's
+            logger.info("Model is up to date", reason=str(e), through_episode_id=after_episode_id)
+            results["new_episodes"] = 0
+            results["model_path"] = str(parent_path)
+            results["steps_completed"].append("model_up_to_date")
+            return True
+        X, y, feature_names = prepare_features_and_labels(df)
+        if feature_names != parent.feature_names:
+            results["full_retrain_reason"] = "feature columns changed"
+            logger.info("Retraining model from scratch", reason=results["full_retrain_reason"])
+            return False
+        results["new_episodes"] = len(df)
+        results["steps_completed"].append("data_collection")
+
+        # Prequential evaluation: the model on outcomes it was not trained on
+        metrics = evaluate_model_comprehensive(parent, X, y, feature_names)
+        try:
+            update_metrics = parent.update(X, y, max_estimators=ML_MAX_ESTIMATORS)
+        except ValueError as e:
+            results["full_retrain_reason"] = str(e)
+            logger.info("Retraining model from scratch", reason=str(e))
+            return False
+
+        parent.record_training(
+            "incremental",
+            samples=len(X),
+            through_episode_id=through_episode_id,
+            recent_episode_ids=recent_episode_ids(
+                seen_episode_ids + df["episode_id"].tolist(), through_episode_id
+            ),
+            parent=str(parent_path),
+            estimators_added=int(update_metrics["estimators_added"]),
+            estimators_dropped=int(update_metrics["estimators_dropped"]),
+        )
+        model_path = model_output_path(output_dir, model_type)
+        parent.save_model(str(model_path), feature_names=feature_names)
+
+        results["model_metrics"] = {
+            "r2_score": metrics.get("r2_score", 0.0),
+            "rmse": metrics.get("rmse", 0.0),
+            "mae": metrics.get("mae", 0.0),
+            "accuracy": metrics.get("accuracy", 0.0),
+            "f1_score": metrics.get("f1_score", 0.0),
+        }
+        results["model_path"] = str(model_path)
+        results["lineage"] = parent.lineage
+        results["steps_completed"].append("model_update")
         logger.info(
-            "Continuous learning pipeline completed",
-            steps_completed=len(results["steps_completed"]),
-            errors=len(results["errors"]),
-            duration_seconds=results["duration_seconds"],
+            "Model updated",
+            new_episodes=len(df),
+            model_path=str(model_path),
+            **results["model_metrics"],
         )
-
-        return results
+        return True
+
+    def _full_retrain_reason(self, model: Optional[RiskPredictor], model_type: str) -> Optional[str]:
+        """Why a model cannot be updated incrementally (None if it can)."""
+        if model is None or not model.is_trained:
+            return "no trained model"
+        if model.through_episode_id is None:
+            return "model has no training high-water mark"
+        if model.recent_episode_ids is None:
+            return "model has no record of episodes below its high-water mark"
+        if model.feature_schema_version != FEATURE_SCHEMA_VERSION:
+            return "feature schema changed"
+        trained_type = type(model.model.named_steps["regressor"]).__name__
+        if trained_type != {"random_forest": "RandomForestRegressor"}.get(model_type, "GradientBoostingRegressor"):
+            return "model type changed"
+        last_full = model.last_full_training
+        if last_full is None or datetime.now() - last_full > timedelta(days=ML_FULL_RETRAIN_DAYS):
+            return f"last full training over {ML_FULL_RETRAIN_DAYS} days ago"
+        return None
 
     def _check_data_availability(
         self, start_date: Optional[datetime], end_date: Optional[datetime], min_episodes: int
@@ -189,7 +404,7 @@ class ContinuousLearningPipeline:
         """Check if sufficient data is available for training."""
         from ml.training.check_historical_data import check_historical_data
         
-        stats = check_historical_data(self.db)
+        stats = check_historical_data(self.read_db)
         
         # Filter by date range if provided
         if start_date or end_date:
@@ -197,7 +412,7 @@ class ContinuousLearningPipeline:
             from sqlalchemy import and_
             
             query = (
-                self.db.query(ClaimEpisode)
+                self.read_db.query(ClaimEpisode)
                 .join(Claim)
                 .join(Remittance)
                 .filter(ClaimEpisode.remittance_id.isnot(None))
@@ -304,6 +519,22 @@ def main():
         default=100,
         help="Minimum episodes required for training",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Update the latest model with outcomes linked since it was trained",
+    )
+    parser.add_argument(
+        "--dataset-cache-dir",
+        type=str,
+        default=TRAINING_DATASET_CACHE_DIR,
+        help="Directory of cached training matrices shared with the other workflow stages",
+    )
+    parser.add_argument(
+        "--no-dataset-cache",
+        action="store_true",
+        help="Collect the training data without reading or writing the dataset cache",
+    )
     parser.add_argument(
         "--output-json",
         type=str,
@@ -312,23 +543,24 @@ def main():
 
     args = parser.parse_args()
 
-    # Parse dates
+    # Parse dates (defaults aligned to whole days, so other stages hit the same cached dataset)
+    start_date, end_date = default_date_range()
     if args.start_date:
         start_date = datetime.fromisoformat(args.start_date)
-    else:
-        start_date = datetime.now() - timedelta(days=180)
-    
     if args.end_date:
         end_date = datetime.fromisoformat(args.end_date)
-    else:
-        end_date = datetime.now()
 
-    # Get database session
+    # Get database sessions (training reads use the replica when configured)
     db = next(get_db())
+    read_db = open_replica_session()
 
     try:
         # Run pipeline
-        pipeline = ContinuousLearningPipeline(db)
+        pipeline = ContinuousLearningPipeline(
+            db,
+            read_session=read_db,
+            dataset_cache=None if args.no_dataset_cache else DatasetCache(args.dataset_cache_dir),
+        )
         results = pipeline.run_full_pipeline(
             start_date=start_date,
             end_date=end_date,
@@ -338,6 +570,7 @@ def main():
             output_dir=args.output_dir,
             run_pattern_detection=not args.skip_pattern_detection,
             min_episodes=args.min_episodes,
+            incremental=args.incremental,
         )
 
         # Print summary
@@ -356,6 +589,9 @@ def main():
             for error in results["errors"]:
                 print(f"  ✗ {error}")
         
+        if "training_dataset" in results:
+            print(f"\nTraining Data: {results['training_dataset']}")
+
         if "model_metrics" in results:
             print("\nModel Metrics:")
             for key, value in results["model_metrics"].items():
@@ -383,6 +619,8 @@ def main():
         logger.error("Pipeline failed", error=str(e), exc_info=True)
         raise
     finally:
+        if read_db is not None:
+            read_db.close()
         db.close()
 
 
@@ -0,0 +1,332 @@
+"""
+Content-keyed cache of training matrices shared by the ML workflow stages.
+
+Preparing, training, evaluating and tuning each used to collect the same
+episodes and rebuild the same features. A dataset is identified by its date
+range, the feature schema version and the data high-water mark (the highest
+episode ID with an outcome, see DataCollector.latest_episode_id), so a stage
+finding the same key on disk loads X, y and the feature names instead of
+querying the database. The arrays are .npy files opened with
+``mmap_mode="r"``: loading costs no copy, and pages are read on first use.
+
+A new outcome raises the high-water mark, and a feature change bumps
+FEATURE_SCHEMA_VERSION; either gives a new key, so a stale matrix is never
+reused. Outcomes backfilled below the mark are not detected; clear the cache
+directory after such a backfill.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ml.services.data_collector import recent_episode_ids
+from ml.services.feature_pipeline import FEATURE_SCHEMA_VERSION
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Cached training matrices (one directory per dataset key)
+TRAINING_DATASET_CACHE_DIR = os.getenv("TRAINING_DATASET_CACHE_DIR", "ml/models/dataset_cache")
+# Datasets kept; the least recently used are removed when a new one is stored
+TRAINING_DATASET_CACHE_MAX_ENTRIES = int(os.getenv("TRAINING_DATASET_CACHE_MAX_ENTRIES", "5"))
+
+
+def default_date_range(days: int = 180, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """
+    Training date range ending with today, aligned to whole days.
+
+    Aligned so that stages run on the same day compute the same dataset key.
+
+    Args:
+        days: Days before today to start from
+        now: Current time (default: datetime.now())
+
+    Returns:
+        Tuple of (midnight ``days`` days ago, midnight tomorrow)
+    """
+    today = (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=days), today + timedelta(days=1)
+
+
+def dataset_key(start_date: datetime, end_date: datetime, through_episode_id: Optional[int]) -> str:
+    """
+    Key of the training dataset for a date range and high-water mark.
+
+    Args:
+        start_date: Start date of the training data
+        end_date: End date of the training data
+        through_episode_id: Highest episode ID included (None: no outcomes yet)
+
+    Returns:
+        16 hex digit key
+    """
+    payload = json.dumps(
+        {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "through_episode_id": through_episode_id,
+            "feature_schema_version": FEATURE_SCHEMA_VERSION,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class TrainingDataset:
+    """Features, labels and feature names of one training data collection."""
+
+    def __init__(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+        feature_names: List[str],
+        key: str,
+        metadata: Dict,
+        path: Optional[Path] = None,
+        cached: bool = False,
+    ):
+        """
+        Initialize dataset.
+
+        Args:
+            X: Features (n_samples, n_features), memory-mapped when loaded from the cache
+            y: Labels (denial rate)
+            feature_names: Feature column names in schema order
+            key: Dataset key (see dataset_key)
+            metadata: Date range, high-water mark and schema version of the data
+            path: Cache directory of the dataset (None if not cached)
+            cached: Whether the dataset was loaded from the cache rather than collected
+        """
+        self.X = X
+        self.y = y
+        self.feature_names = feature_names
+        self.key = key
+        self.metadata = metadata
+        self.path = path
+        self.cached = cached
+
+    @property
+    def through_episode_id(self) -> Optional[int]:
+        """Highest episode ID included in the dataset."""
+        return self.metadata.get("through_episode_id")
+
+    @property
+    def recent_episode_ids(self) -> List[int]:
+        """Included episode IDs within the overlap below the high-water mark (see recent_episode_ids)."""
+        return self.metadata.get("recent_episode_ids", [])
+
+    def describe(self) -> str:
+        """
+        One-line summary of the dataset and where it came from, for CLI output.
+
+        Returns:
+            Summary line
+        """
+        source = "Reused cached" if self.cached else "Collected"
+        where = f" at {self.path}" if self.path else ""
+        return (
+            f"{source} training dataset {self.key}{where} "
+            f"({self.X.shape[0]:,} rows x {self.X.shape[1]} features, "
+            f"through episode {self.through_episode_id})"
+        )
+
+
+class DatasetCache:
+    """Directory of training datasets keyed by dataset_key."""
+
+    def __init__(
+        self,
+        cache_dir: str = TRAINING_DATASET_CACHE_DIR,
+        max_entries: int = TRAINING_DATASET_CACHE_MAX_ENTRIES,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            cache_dir: Directory holding one subdirectory per dataset
+            max_entries: Datasets kept before the least recently used are removed
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+
+    def load(self, key: str) -> Optional[TrainingDataset]:
+        """
+        Memory-map a cached dataset.
+
+        Args:
+            key: Dataset key
+
+        Returns:
+            Dataset with read-only memory-mapped X and y, or None if not cached
+        """
+        path = self.cache_dir / key
+        try:
+            metadata = json.loads((path / "dataset.json").read_text())
+            X = np.load(path / "X.npy", mmap_mode="r")
+            y = np.load(path / "y.npy", mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        # Recently used datasets are kept longest
+        os.utime(path)
+        return TrainingDataset(
+            X, y, metadata.pop("feature_names"), key, metadata, path=path, cached=True
+        )
+
+    def store(
+        self,
+        key: str,
+        X: np.ndarray,
+        y: np.ndarray,
+        feature_names: List[str],
+        metadata: Dict,
+    ) -> TrainingDataset:
+        """
+        Write a dataset and memory-map it back.
+
+        The files are written to a temporary directory that is renamed into
+        place, so readers never see a partial dataset; if another process
+        stored the same key first, its copy is used.
+
+        Args:
+            key: Dataset key
+            X: Features
+            y: Labels
+            feature_names: Feature column names
+            metadata: Date range, high-water mark and schema version of the data
+
+        Returns:
+            The stored dataset (``cached`` is False: it was just collected)
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_dir))
+        try:
+            np.save(staging / "X.npy", np.ascontiguousarray(X, dtype=np.float32))
+            np.save(staging / "y.npy", np.ascontiguousarray(y, dtype=np.float32))
+            (staging / "dataset.json").write_text(
+                json.dumps({**metadata, "feature_names": feature_names}, indent=2)
+            )
+            os.replace(staging, self.cache_dir / key)
+        except OSError:
+            # Another process stored the same dataset; theirs is identical
+            shutil.rmtree(staging, ignore_errors=True)
+        self._evict()
+
+        dataset = self.load(key)
+        if dataset is None:
+            raise OSError(f"Training dataset {key} could not be cached in {self.cache_dir}")
+        dataset.cached = False
+        logger.info("Cached training dataset", key=key, rows=X.shape[0], path=str(dataset.path))
+        return dataset
+
+    def _evict(self) -> None:
+        """Remove the least recently used datasets beyond max_entries."""
+        entries = sorted(
+            (path for path in self.cache_dir.iterdir() if path.is_dir() and not path.name.startswith(".")),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        for path in entries[self.max_entries:]:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info("Evicted cached training dataset", key=path.name)
+
+
+def store_training_frame(
+    cache: Optional[DatasetCache],
+    df,
+    start_date: datetime,
+    end_date: datetime,
+    through_episode_id: Optional[int],
+) -> TrainingDataset:
+    """
+    Build the training matrix of a collected dataframe and cache it.
+
+    Args:
+        cache: Dataset cache (None: keep the matrix in memory only)
+        df: Training dataframe from DataCollector.collect_training_data
+            (collected with historical features)
+        start_date: Start date it was collected for
+        end_date: End date it was collected for
+        through_episode_id: High-water mark it was collected up to
+
+    Returns:
+        Training dataset
+    """
+    # Imported here: train_models imports this module
+    from ml.training.train_models import prepare_features_and_labels
+
+    X, y, feature_names = prepare_features_and_labels(df)
+    key = dataset_key(start_date, end_date, through_episode_id)
+    metadata = {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "through_episode_id": through_episode_id,
+        "recent_episode_ids": recent_episode_ids(df["episode_id"], through_episode_id),
+        "feature_schema_version": FEATURE_SCHEMA_VERSION,
+        "created_at": datetime.now().isoformat(),
+    }
+    if cache is None:
+        return TrainingDataset(X, y, feature_names, key, metadata)
+    return cache.store(key, X, y, feature_names, metadata)
+
+
+def load_training_dataset(
+    collector,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    min_episodes: int = 100,
+    cache: Optional[DatasetCache] = None,
+) -> TrainingDataset:
+    """
+    Training matrix for a date range, from the cache or collected.
+
+    The high-water mark is read first and bounds the collection, so the
+    matrix matches its key even if outcomes are linked meanwhile.
+
+    Args:
+        collector: DataCollector on the database to train from
+        start_date: Start date of the training data (default: 6 months ago)
+        end_date: End date of the training data (default: now)
+        min_episodes: Minimum episodes required
+        cache: Dataset cache (None: always collect, keep in memory)
+
+    Returns:
+        Training dataset
+
+    Raises:
+        ValueError: If fewer than min_episodes episodes have outcomes
+    """
+    start_date = start_date or datetime.now() - timedelta(days=180)
+    end_date = end_date or datetime.now()
+    through_episode_id = collector.latest_episode_id()
+
+    if cache is not None:
+        dataset = cache.load(dataset_key(start_date, end_date, through_episode_id))
+        if dataset is not None:
+            if dataset.X.shape[0] < min_episodes:
+                raise ValueError(
+                    f"Insufficient training data: found {dataset.X.shape[0]} episodes, "
+                    f"minimum {min_episodes} required"
+                )
+            logger.info(
+                "Reusing cached training dataset",
+                key=dataset.key,
+                rows=dataset.X.shape[0],
+                through_episode_id=through_episode_id,
+            )
+            return dataset
+
+    df = collector.collect_training_data(
+        start_date=start_date,
+        end_date=end_date,
+        min_episodes=min_episodes,
+        include_historical=True,
+        through_episode_id=through_episode_id,
+    )
+    logger.info("Training data collected", rows=len(df), columns=len(df.columns))
+    return store_training_frame(cache, df, start_date, end_date, through_episode_id)
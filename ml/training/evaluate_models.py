@@ -2,7 +2,7 @@
 import argparse
 import sys
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 import pandas as pd
 import numpy as np
@@ -28,10 +28,15 @@ from sklearn.metrics import (
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from app.config.database import get_db
+from app.config.database import open_read_session
 from ml.services.data_collector import DataCollector
 from ml.models.risk_predictor import RiskPredictor
-from ml.training.train_models import prepare_features_and_labels
+from ml.training.dataset_cache import (
+    TRAINING_DATASET_CACHE_DIR,
+    DatasetCache,
+    default_date_range,
+    load_training_dataset,
+)
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -269,41 +274,44 @@ def main():
         default=None,
         help="Output file for evaluation report (CSV)",
     )
+    parser.add_argument(
+        "--dataset-cache-dir",
+        type=str,
+        default=TRAINING_DATASET_CACHE_DIR,
+        help="Directory of cached training matrices shared with training and tuning",
+    )
+    parser.add_argument(
+        "--no-dataset-cache",
+        action="store_true",
+        help="Collect the data without reading or writing the dataset cache",
+    )
 
     args = parser.parse_args()
 
-    # Parse dates
-    start_date = None
-    end_date = None
-
+    # Parse dates (defaults aligned to whole days, as in train_models)
+    start_date, end_date = default_date_range()
     if args.start_date:
         start_date = datetime.strptime(args.start_date, "%Y-%m-%d")
-    else:
-        start_date = datetime.now() - timedelta(days=180)
-
     if args.end_date:
         end_date = datetime.strptime(args.end_date, "%Y-%m-%d")
-    else:
-        end_date = datetime.now()
 
-    # Get database session
-    db = next(get_db())
+    # Get database session (read replica when configured)
+    db = open_read_session()
 
     try:
         # Load model
         logger.info("Loading model", model_path=args.model_path)
         model = RiskPredictor(model_path=args.model_path)
 
-        # Collect data
-        collector = DataCollector(db)
-        df = collector.collect_training_data(
-            start_date=start_date, end_date=end_date, include_historical=True
+        # Collect data (or reuse the matrix training cached)
+        dataset = load_training_dataset(
+            DataCollector(db),
+            start_date=start_date,
+            end_date=end_date,
+            cache=None if args.no_dataset_cache else DatasetCache(args.dataset_cache_dir),
         )
-
-        logger.info("Data collected", rows=len(df), columns=len(df.columns))
-
-        # Prepare features and labels
-        X, y, feature_names = prepare_features_and_labels(df)
+        X, y, feature_names = dataset.X, dataset.y, dataset.feature_names
+        print(dataset.describe())
 
         # Split data (use same random state as training)
         from sklearn.model_selection import train_test_split
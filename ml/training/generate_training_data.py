@@ -4,8 +4,12 @@ This creates clearinghouse-quality 837 (claims) and 835 (remittances) EDI files
 with realistic denial patterns, payment scenarios, and diverse claim types.
 """
 import argparse
+import os
+import shutil
 import sys
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Optional
@@ -369,7 +373,9 @@ PROVIDER_SPECIALTIES = [
     ("207P00000X", "Emergency Medicine", "emergency"),
 ]
 
-PROVIDER_NPIS = [f"{random.randint(1000000000, 9999999999)}" for _ in range(50)]
+# Fixed seed so every worker process (and every run) uses the same providers
+_npi_random = random.Random(50)
+PROVIDER_NPIS = [f"{_npi_random.randint(1000000000, 9999999999)}" for _ in range(50)]
 
 # ============================================================================
 # FACILITY TYPES
@@ -598,8 +604,9 @@ def generate_837_header(
     sender_id: str = "MEDPRACTICE001",
     receiver_id: str = "CLEARINGHOUSE",
     transaction_date: datetime = None,
+    control_number: int = 1,
 ) -> str:
-    """Generate ISA/GS/ST header for 837 file."""
+    """Generate ISA/GS/ST header for 837 file (close with generate_envelope_trailer)."""
     if transaction_date is None:
         transaction_date = datetime.now()
     
@@ -607,9 +614,9 @@ def generate_837_header(
     time_str = transaction_date.strftime("%H%M")
     full_date = transaction_date.strftime("%Y%m%d")
     
-    return f"""ISA*00*          *00*          *ZZ*{sender_id:<15}*ZZ*{receiver_id:<15}*{date_str}*{time_str}*^*00501*000000001*0*P*:~
-GS*HC*{sender_id}*{receiver_id}*{date_str}*{time_str}*1*X*005010X222A1~
-ST*837*0001*005010X222A1~
+    return f"""ISA*00*          *00*          *ZZ*{sender_id:<15}*ZZ*{receiver_id:<15}*{date_str}*{time_str}*^*00501*{control_number:09d}*0*P*:~
+GS*HC*{sender_id}*{receiver_id}*{date_str}*{time_str}*{control_number}*X*005010X222A1~
+ST*837*{control_number:04d}*005010X222A1~
 BHT*0019*00*{random.randint(1000000000, 9999999999)}*{date_str}*{time_str}*CH~
 NM1*41*2*SAMPLE MEDICAL PRACTICE*****46*1234567890~
 PER*IC*CONTACT NAME*TE*5551234567~
@@ -678,8 +685,6 @@ def generate_837_claim(
             rev_code, rev_desc, rev_freq = weighted_choice(REVENUE_CODES, [r[2] for r in REVENUE_CODES])
             revenue_code = rev_code
         
-        service_date_str = service_date.strftime("%Y%m%d")
-        
         # Build service line
         sv1_line = f"SV1*HC:{cpt_code}"
         if modifier:
@@ -700,7 +705,8 @@ def generate_837_claim(
     
     # Build claim segments
     service_date_str = service_date.strftime("%Y%m%d")
-    statement_date = service_date  # Usually same as service date for professional claims
+    # Statement date is usually the service date for professional claims
+    statement_date_str = service_date_str
     
     # Safely get payer information with defaults
     payer_name = payer_config.get("name", "UNKNOWN PAYER")
@@ -712,8 +718,8 @@ NM1*IL*1*{patient['last_name']}*{patient['first_name']}*{patient['middle_initial
 DMG*D8*{patient['birth_date']}*{patient['gender']}~
 NM1*PR*2*{payer_name}*****PI*{payer_id}~
 CLM*{claim_num}*{total_charge:.2f}***11:A:1*Y*A*Y*I~
-DTP*431*D8*{statement_date.strftime('%Y%m%d')}~
-DTP*484*D8*{statement_date.strftime('%Y%m%d')}~
+DTP*431*D8*{statement_date_str}~
+DTP*484*D8*{statement_date_str}~
 REF*D9*{patient['patient_num']}~"""
     
     # Add diagnosis codes
@@ -752,8 +758,9 @@ def generate_835_header(
     receiver_id: str = "MEDPRACTICE001",
     payment_date: datetime = None,
     total_amount: float = None,
+    control_number: int = 1,
 ) -> str:
-    """Generate ISA/GS/ST header for 835 file."""
+    """Generate ISA/GS/ST header for 835 file (close with generate_envelope_trailer)."""
     if payment_date is None:
         payment_date = datetime.now()
     if total_amount is None:
@@ -767,9 +774,9 @@ def generate_835_header(
     trace_num = random.randint(100000000, 999999999)
     ref_num = random.randint(100000000, 999999999)
     
-    return f"""ISA*00*          *00*          *ZZ*{sender_id:<15}*ZZ*{receiver_id:<15}*{date_str}*{time_str}*^*00501*000000001*0*P*:~
-GS*HP*{sender_id}*{receiver_id}*{date_str}*{time_str}*1*X*005010X221A1~
-ST*835*0001*005010X221A1~
+    return f"""ISA*00*          *00*          *ZZ*{sender_id:<15}*ZZ*{receiver_id:<15}*{date_str}*{time_str}*^*00501*{control_number:09d}*0*P*:~
+GS*HP*{sender_id}*{receiver_id}*{date_str}*{time_str}*{control_number}*X*005010X221A1~
+ST*835*{control_number:04d}*005010X221A1~
 BPR*I*{total_amount:.2f}*C*{check_num}*{full_date}*{trace_num}*01*{ref_num}*DA*{random.randint(1000000000, 9999999999)}*{full_date}~
 TRN*1*REM{date_str}001*{trace_num}~
 REF*EV*REM{date_str}001~
@@ -781,6 +788,35 @@ N4*CHICAGO*IL*60601~
 PER*BL*CLAIMS DEPARTMENT*TE*8005551234*FX*8005555678~"""
 
 
+def header_transaction_segments(header: str) -> int:
+    """
+    Segments of a header that belong to its transaction set (ST onwards).
+
+    Args:
+        header: Output of generate_837_header or generate_835_header
+
+    Returns:
+        Segment count, excluding the ISA and GS segments
+    """
+    return header.count("~") - 2
+
+
+def generate_envelope_trailer(transaction_segments: int, control_number: int = 1) -> str:
+    """
+    Generate the SE/GE/IEA trailer matching a header's control number.
+
+    Args:
+        transaction_segments: Segments from ST up to, but not including, SE
+        control_number: Control number passed to the header
+
+    Returns:
+        Trailer segments (SE01 counts ST through SE)
+    """
+    return f"""SE*{transaction_segments + 1}*{control_number:04d}~
+GE*1*{control_number}~
+IEA*1*{control_number:09d}~"""
+
+
 def generate_835_remittance(
     remit_idx: int,
     claim_metadata: Dict,
@@ -1003,6 +1039,119 @@ CAS*{adj_group_code}*{adj_reason_code}*{line_adj_amount:.2f}~"""
     return remit_content, metadata
 
 
+# ============================================================================
+# EPISODE GENERATION
+# ============================================================================
+
+# Output buffer for streamed EDI files
+_WRITE_BUFFER_BYTES = 16 * 1024 * 1024
+# Episodes generated by one corpus worker task
+CORPUS_SHARD_SIZE = 50_000
+
+
+def _outcome_counts(num_episodes: int, denial_rate: float) -> Dict[str, int]:
+    """Number of episodes of each outcome."""
+    num_denied = int(num_episodes * denial_rate)
+    num_partial = int(num_episodes * 0.15)
+    num_adjusted = int(num_episodes * 0.10)
+    return {
+        "denied": num_denied,
+        "partial": num_partial,
+        "adjusted": num_adjusted,
+        "paid": num_episodes - num_denied - num_partial - num_adjusted,
+    }
+
+
+def _shuffled_outcomes(outcome_counts: Dict[str, int]) -> List[str]:
+    """Outcome of each episode, in random order."""
+    outcomes = []
+    for outcome in ("denied", "partial", "adjusted", "paid"):
+        outcomes.extend([outcome] * outcome_counts[outcome])
+    random.shuffle(outcomes)
+    return outcomes
+
+
+def _generate_episode_claim(
+    episode_idx: int,
+    start_date: datetime,
+    specialties_used: Dict[str, int],
+) -> Tuple[str, Dict]:
+    """Generate the 837 claim of an episode with a random payer, specialty and service date."""
+    # Vary service dates over 6 months (business days preferred)
+    days_offset = random.randint(0, 180)
+    service_date = get_business_day(start_date + timedelta(days=days_offset), days_back=random.randint(0, 5))
+    
+    # Select payer (weighted)
+    payer_config = random.choice(PAYERS)
+    
+    # Select specialty (weighted)
+    specialties = list(SPECIALTY_WEIGHTS.keys())
+    weights = list(SPECIALTY_WEIGHTS.values())
+    specialty = weighted_choice(
+        [(s, w) for s, w in zip(specialties, weights)],
+        weights
+    )[0]
+    specialties_used[specialty] += 1
+    
+    return generate_837_claim(
+        episode_idx + 2,  # Start at 2 (HL*1 is in header)
+        episode_idx % 10000,  # Cycle through patients
+        service_date,
+        payer_config,
+        specialty,
+    )
+
+
+def _generate_episode_remittance(episode_idx: int, claim_meta: Dict, outcome: str) -> Tuple[str, Dict]:
+    """Generate the 835 remittance paying (or denying) an episode's claim."""
+    # Validate and get required keys from claim_meta with defaults
+    service_date_str = claim_meta.get("service_date")
+    if not service_date_str:
+        logger.error(
+            "Missing service_date in claim metadata",
+            claim_index=episode_idx,
+            available_keys=list(claim_meta.keys()),
+        )
+        raise KeyError(f"Missing required key 'service_date' in claim_meta at index {episode_idx}")
+    
+    # Payment date is typically 30-60 days after service
+    try:
+        service_date = datetime.strptime(service_date_str, "%Y%m%d")
+    except ValueError as e:
+        logger.error(
+            "Invalid service_date format in claim metadata",
+            claim_index=episode_idx,
+            service_date=service_date_str,
+            error=str(e),
+        )
+        raise ValueError(f"Invalid service_date format '{service_date_str}' in claim_meta at index {episode_idx}: {e}")
+    
+    payment_date_episode = get_business_day(
+        service_date + timedelta(days=random.randint(30, 60)),
+        days_back=random.randint(0, 3)
+    )
+    
+    # Get payer config for this claim
+    payer_id = claim_meta.get("payer_id")
+    if not payer_id:
+        logger.warning("Missing payer_id in claim metadata, using default", claim_index=episode_idx)
+        if not PAYERS:
+            raise ValueError("No payers available in PAYERS configuration")
+        payer_config = PAYERS[0]
+    else:
+        if not PAYERS:
+            raise ValueError("No payers available in PAYERS configuration")
+        payer_config = next((p for p in PAYERS if p.get("id") == payer_id), PAYERS[0])
+    
+    return generate_835_remittance(
+        episode_idx + 1,
+        claim_meta,
+        payment_date_episode,
+        payer_config,
+        outcome,
+    )
+
+
 def generate_training_dataset(
     num_episodes: int = 500,
     output_dir: Path = Path("samples/training"),
@@ -1037,68 +1186,33 @@ def generate_training_dataset(
     )
     
     # Determine outcomes for each episode
-    outcomes = []
-    num_denied = int(num_episodes * denial_rate)
-    num_partial = int(num_episodes * 0.15)
-    num_adjusted = int(num_episodes * 0.10)
-    num_paid = num_episodes - num_denied - num_partial - num_adjusted
-    
-    outcomes.extend(["denied"] * num_denied)
-    outcomes.extend(["partial"] * num_partial)
-    outcomes.extend(["adjusted"] * num_adjusted)
-    outcomes.extend(["paid"] * num_paid)
-    random.shuffle(outcomes)
-    
-    # Generate 837 file
+    outcome_counts = _outcome_counts(num_episodes, denial_rate)
+    num_denied = outcome_counts["denied"]
+    num_partial = outcome_counts["partial"]
+    num_adjusted = outcome_counts["adjusted"]
+    num_paid = outcome_counts["paid"]
+    outcomes = _shuffled_outcomes(outcome_counts)
+    
+    # Generate 837 file, writing claims as they are generated
     logger.info("Generating 837 claims file...")
     transaction_date = get_business_day(datetime.now())
-    claims_content = generate_837_header(transaction_date=transaction_date)
-    claims_segments = len(claims_content.split("~")) - 1
-    
+    claims_file = output_dir / claims_filename
     claims_metadata = []
     specialties_used = defaultdict(int)
     
-    for i in range(num_episodes):
-        # Vary service dates over 6 months (business days preferred)
-        days_offset = random.randint(0, 180)
-        service_date = get_business_day(start_date + timedelta(days=days_offset), days_back=random.randint(0, 5))
-        
-        # Select payer (weighted)
-        payer_config = random.choice(PAYERS)
-        
-        # Select specialty (weighted)
-        specialties = list(SPECIALTY_WEIGHTS.keys())
-        weights = list(SPECIALTY_WEIGHTS.values())
-        specialty = weighted_choice(
-            [(s, w) for s, w in zip(specialties, weights)],
-            weights
-        )[0]
-        specialties_used[specialty] += 1
-        
-        claim_content, claim_meta = generate_837_claim(
-            i + 2,  # Start at 2 (HL*1 is in header)
-            i % 10000,  # Cycle through patients
-            service_date,
-            payer_config,
-            specialty,
-        )
-        
-        claims_content += claim_content
-        claims_metadata.append(claim_meta)
-        claims_segments += len(claim_content.split("~")) - 1
-    
-    # Add footer
-    claims_segments += 3  # SE/GE/IEA
-    claims_footer = f"""SE*{claims_segments}*0001~
-GE*1*1~
-IEA*1*000000001~"""
-    claims_content += claims_footer
-    
-    # Write 837 file (use configurable path)
-    claims_file = output_dir / claims_filename
     try:
-        with open(claims_file, "w", encoding="utf-8") as f:
-            f.write(claims_content)
+        with open(claims_file, "w", encoding="utf-8", buffering=_WRITE_BUFFER_BYTES) as f:
+            header = generate_837_header(transaction_date=transaction_date)
+            f.write(header)
+            claims_segments = header_transaction_segments(header)
+            
+            for i in range(num_episodes):
+                claim_content, claim_meta = _generate_episode_claim(i, start_date, specialties_used)
+                f.write(claim_content)
+                claims_metadata.append(claim_meta)
+                claims_segments += claim_content.count("~")
+            
+            f.write(generate_envelope_trailer(claims_segments))
         logger.info(f"Generated 837 file: {claims_file} ({num_episodes} claims)")
     except (IOError, OSError) as e:
         logger.error("Failed to write 837 file", file=str(claims_file), error=str(e))
@@ -1114,75 +1228,30 @@ IEA*1*000000001~"""
         for claim_meta in claims_metadata
     )
     
-    remittances_content = generate_835_header(payment_date=payment_date, total_amount=total_payment)
-    remittances_segments = len(remittances_content.split("~")) - 1
-    
-    remittances_metadata = []
+    remittances_file = output_dir / remittances_filename
+    try:
+        remittances_out = open(remittances_file, "w", encoding="utf-8", buffering=_WRITE_BUFFER_BYTES)
+    except (IOError, OSError) as e:
+        logger.error("Failed to write 835 file", file=str(remittances_file), error=str(e))
+        raise
+    header = generate_835_header(payment_date=payment_date, total_amount=total_payment)
+    remittances_out.write(header)
+    remittances_segments = header_transaction_segments(header)
     
     for i, (claim_meta, outcome) in enumerate(zip(claims_metadata, outcomes)):
-        # Validate and get required keys from claim_meta with defaults
-        service_date_str = claim_meta.get("service_date")
-        if not service_date_str:
-            logger.error(
-                "Missing service_date in claim metadata",
-                claim_index=i,
-                available_keys=list(claim_meta.keys()),
-            )
-            raise KeyError(f"Missing required key 'service_date' in claim_meta at index {i}")
+        remit_content, _ = _generate_episode_remittance(i, claim_meta, outcome)
         
-        # Payment date is typically 30-60 days after service
         try:
-            service_date = datetime.strptime(service_date_str, "%Y%m%d")
-        except ValueError as e:
-            logger.error(
-                "Invalid service_date format in claim metadata",
-                claim_index=i,
-                service_date=service_date_str,
-                error=str(e),
-            )
-            raise ValueError(f"Invalid service_date format '{service_date_str}' in claim_meta at index {i}: {e}")
-        
-        payment_date_episode = get_business_day(
-            service_date + timedelta(days=random.randint(30, 60)),
-            days_back=random.randint(0, 3)
-        )
-        
-        # Get payer config for this claim
-        payer_id = claim_meta.get("payer_id")
-        if not payer_id:
-            logger.warning("Missing payer_id in claim metadata, using default", claim_index=i)
-            if not PAYERS:
-                raise ValueError("No payers available in PAYERS configuration")
-            payer_config = PAYERS[0]
-        else:
-            if not PAYERS:
-                raise ValueError("No payers available in PAYERS configuration")
-            payer_config = next((p for p in PAYERS if p.get("id") == payer_id), PAYERS[0])
-        
-        remit_content, remit_meta = generate_835_remittance(
-            i + 1,
-            claim_meta,
-            payment_date_episode,
-            payer_config,
-            outcome,
-        )
-        
-        remittances_content += remit_content
-        remittances_metadata.append(remit_meta)
-        remittances_segments += len(remit_content.split("~")) - 1
-    
-    # Add footer
-    remittances_segments += 3  # SE/GE/IEA
-    remittances_footer = f"""SE*{remittances_segments}*0001~
-GE*1*1~
-IEA*1*000000001~"""
-    remittances_content += remittances_footer
-    
-    # Write 835 file (use configurable path)
-    remittances_file = output_dir / remittances_filename
+            remittances_out.write(remit_content)
+        except (IOError, OSError) as e:
+            remittances_out.close()
+            logger.error("Failed to write 835 file", file=str(remittances_file), error=str(e))
+            raise
+        remittances_segments += remit_content.count("~")
+    
     try:
-        with open(remittances_file, "w", encoding="utf-8") as f:
-            f.write(remittances_content)
+        remittances_out.write(generate_envelope_trailer(remittances_segments))
+        remittances_out.close()
         logger.info(f"Generated 835 file: {remittances_file} ({num_episodes} remittances)")
     except (IOError, OSError) as e:
         logger.error("Failed to write 835 file", file=str(remittances_file), error=str(e))
@@ -1238,6 +1307,282 @@ IEA*1*000000001~"""
     print("=" * 70)
 
 
+def _corpus_shard_paths(output_dir: Path, shard_index: int) -> Tuple[Path, Path]:
+    """Paths of a shard's 837 and 835 bodies (transaction segments without envelope)."""
+    return (
+        output_dir / f".shard-{shard_index:05d}.837.part",
+        output_dir / f".shard-{shard_index:05d}.835.part",
+    )
+
+
+def _envelope_dates(start_date: datetime) -> Tuple[datetime, datetime]:
+    """Transaction and payment dates of corpus envelopes, fixed by the start date."""
+    transaction_date = get_business_day(start_date + timedelta(days=180))
+    return transaction_date, get_business_day(transaction_date - timedelta(days=30))
+
+
+def _write_enveloped(
+    path: Path,
+    header: str,
+    bodies: List[Tuple[Path, int]],
+    control_number: int,
+) -> None:
+    """Write header, shard bodies and a trailer counting their segments to path."""
+    segments = header_transaction_segments(header) + sum(count for _, count in bodies)
+    with open(path, "w", encoding="utf-8") as out:
+        out.write(header)
+        out.flush()
+        for body_path, _ in bodies:
+            with open(body_path, "r", encoding="utf-8") as body:
+                shutil.copyfileobj(body, out, _WRITE_BUFFER_BYTES)
+        out.write(generate_envelope_trailer(segments, control_number=control_number))
+
+
+def _generate_corpus_shard(spec: Dict) -> Dict:
+    """
+    Generate the episodes of one corpus shard (runs in a worker process).
+    
+    Each claim is followed by its remittance, so memory stays constant however
+    large the shard. The random state is seeded from the corpus seed and the
+    shard index alone, so output does not depend on the number of workers.
+    
+    Args:
+        spec: Shard index, first episode, episode count, seed, dates and output
+            settings from generate_corpus
+    
+    Returns:
+        Shard statistics: segment counts, total paid, outcomes and specialties
+    """
+    shard_index = spec["shard_index"]
+    first_episode = spec["first_episode"]
+    num_episodes = spec["num_episodes"]
+    output_dir = Path(spec["output_dir"])
+    random.seed(f"corpus:{spec['seed']}:{shard_index}")
+    
+    # Differences of cumulative counts, so shards add up to the corpus-wide split
+    before = _outcome_counts(first_episode, spec["denial_rate"])
+    through = _outcome_counts(first_episode + num_episodes, spec["denial_rate"])
+    outcome_counts = {outcome: through[outcome] - before[outcome] for outcome in through}
+    # Shards of a handful of episodes can see several quotas step at once
+    for outcome in ("adjusted", "partial", "denied"):
+        excess = max(-outcome_counts["paid"], 0)
+        moved = min(excess, outcome_counts[outcome])
+        outcome_counts[outcome] -= moved
+        outcome_counts["paid"] += moved
+    outcomes = _shuffled_outcomes(outcome_counts)
+    specialties_used = defaultdict(int)
+    claims_segments = 0
+    remittances_segments = 0
+    total_paid = 0.0
+    
+    claims_body, remittances_body = _corpus_shard_paths(output_dir, shard_index)
+    with open(claims_body, "w", encoding="utf-8", buffering=_WRITE_BUFFER_BYTES) as claims_out, \
+            open(remittances_body, "w", encoding="utf-8", buffering=_WRITE_BUFFER_BYTES) as remittances_out:
+        for offset, outcome in enumerate(outcomes):
+            episode_idx = first_episode + offset
+            claim_content, claim_meta = _generate_episode_claim(episode_idx, spec["start_date"], specialties_used)
+            remit_content, remit_meta = _generate_episode_remittance(episode_idx, claim_meta, outcome)
+            claims_out.write(claim_content)
+            remittances_out.write(remit_content)
+            claims_segments += claim_content.count("~")
+            remittances_segments += remit_content.count("~")
+            total_paid += remit_meta["paid_amount"]
+    
+    stats = {
+        "shard_index": shard_index,
+        "num_episodes": num_episodes,
+        "claims_segments": claims_segments,
+        "remittances_segments": remittances_segments,
+        "total_paid": round(total_paid, 2),
+        "outcomes": outcome_counts,
+        "specialties": dict(specialties_used),
+    }
+    
+    if spec["split_shards"]:
+        # Each shard is its own interchange, numbered after the shard
+        control_number = shard_index + 1
+        transaction_date, payment_date = spec["envelope_dates"]
+        stats["claims_file"] = str(output_dir / spec["claims_filename"].format(shard=shard_index))
+        stats["remittances_file"] = str(output_dir / spec["remittances_filename"].format(shard=shard_index))
+        _write_enveloped(
+            Path(stats["claims_file"]),
+            generate_837_header(transaction_date=transaction_date, control_number=control_number),
+            [(claims_body, claims_segments)],
+            control_number,
+        )
+        _write_enveloped(
+            Path(stats["remittances_file"]),
+            generate_835_header(payment_date=payment_date, total_amount=total_paid, control_number=control_number),
+            [(remittances_body, remittances_segments)],
+            control_number,
+        )
+        claims_body.unlink()
+        remittances_body.unlink()
+    
+    return stats
+
+
+def generate_corpus(
+    num_episodes: int,
+    output_dir: Path = Path("samples/corpus"),
+    shard_size: int = CORPUS_SHARD_SIZE,
+    workers: Optional[int] = None,
+    seed: int = 0,
+    start_date: datetime = None,
+    denial_rate: float = 0.25,
+    split_shards: bool = False,
+    claims_filename: str = "corpus_837_claims.edi",
+    remittances_filename: str = "corpus_835_remittances.edi",
+    metadata_filename: str = "corpus_metadata.json",
+) -> Dict:
+    """
+    Generate a large linked 837/835 corpus for load testing, in parallel.
+    
+    Episodes are generated in shards of ``shard_size`` by a process pool, each
+    shard streaming its claims and remittances to disk. Claim N of the 837 is
+    paid by remittance N of the 835. The files are then enveloped (SE segment
+    counts and control numbers) by copying the shard bodies, so no file is ever
+    held in memory. Output is a function of ``seed`` and ``shard_size`` only.
+    
+    Args:
+        num_episodes: Number of claim/remittance pairs to generate
+        output_dir: Output directory for generated files
+        shard_size: Episodes per shard
+        workers: Worker processes (default: CPU count; 1 generates inline)
+        seed: Corpus seed
+        start_date: Start date for claims (default: 6 months ago)
+        denial_rate: Percentage of claims that should be denied (0.0-1.0)
+        split_shards: Write one 837/835 pair per shard instead of one pair
+        claims_filename: Filename for the 837 file ({shard} is the shard index
+            when split_shards is set)
+        remittances_filename: Filename for the 835 file (same as claims_filename)
+        metadata_filename: Filename for metadata JSON file
+    
+    Returns:
+        Corpus metadata, also written to metadata_filename
+    """
+    if start_date is None:
+        start_date = datetime.now() - timedelta(days=180)
+    if split_shards:
+        stem_claims, stem_remittances = Path(claims_filename), Path(remittances_filename)
+        if "{shard}" not in claims_filename:
+            claims_filename = f"{stem_claims.stem}_{{shard:05d}}{stem_claims.suffix}"
+        if "{shard}" not in remittances_filename:
+            remittances_filename = f"{stem_remittances.stem}_{{shard:05d}}{stem_remittances.suffix}"
+    workers = workers or os.cpu_count() or 1
+    output_dir.mkdir(parents=True, exist_ok=True)
+    envelope_dates = _envelope_dates(start_date)
+    
+    specs = [
+        {
+            "shard_index": shard_index,
+            "first_episode": first_episode,
+            "num_episodes": min(shard_size, num_episodes - first_episode),
+            "output_dir": str(output_dir),
+            "seed": seed,
+            "start_date": start_date,
+            "envelope_dates": envelope_dates,
+            "denial_rate": denial_rate,
+            "split_shards": split_shards,
+            "claims_filename": claims_filename,
+            "remittances_filename": remittances_filename,
+        }
+        for shard_index, first_episode in enumerate(range(0, num_episodes, shard_size))
+    ]
+    
+    logger.info(
+        "Generating corpus",
+        num_episodes=num_episodes,
+        shards=len(specs),
+        workers=workers,
+        output_dir=str(output_dir),
+    )
+    started = time.perf_counter()
+    
+    try:
+        if workers == 1 or len(specs) == 1:
+            shards = [_generate_corpus_shard(spec) for spec in specs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(specs))) as pool:
+                shards = list(pool.map(_generate_corpus_shard, specs))
+        
+        if split_shards:
+            files = [
+                {"claims_file": shard["claims_file"], "remittances_file": shard["remittances_file"]}
+                for shard in shards
+            ]
+        else:
+            random.seed(f"corpus:{seed}:envelope")
+            transaction_date, payment_date = envelope_dates
+            total_paid = round(sum(shard["total_paid"] for shard in shards), 2)
+            bodies = [_corpus_shard_paths(output_dir, shard["shard_index"]) for shard in shards]
+            files = [{
+                "claims_file": str(output_dir / claims_filename),
+                "remittances_file": str(output_dir / remittances_filename),
+            }]
+            _write_enveloped(
+                output_dir / claims_filename,
+                generate_837_header(transaction_date=transaction_date),
+                [(claims, shard["claims_segments"]) for (claims, _), shard in zip(bodies, shards)],
+                1,
+            )
+            _write_enveloped(
+                output_dir / remittances_filename,
+                generate_835_header(payment_date=payment_date, total_amount=total_paid),
+                [(remittances, shard["remittances_segments"]) for (_, remittances), shard in zip(bodies, shards)],
+                1,
+            )
+    except (IOError, OSError) as e:
+        logger.error("Failed to write corpus", output_dir=str(output_dir), error=str(e))
+        raise
+    finally:
+        for spec in specs:
+            for body in _corpus_shard_paths(output_dir, spec["shard_index"]):
+                body.unlink(missing_ok=True)
+    
+    outcomes = defaultdict(int)
+    specialties_used = defaultdict(int)
+    for shard in shards:
+        for outcome, count in shard["outcomes"].items():
+            outcomes[outcome] += count
+        for specialty, count in shard["specialties"].items():
+            specialties_used[specialty] += count
+    elapsed = time.perf_counter() - started
+    
+    metadata = {
+        "num_episodes": num_episodes,
+        "denial_rate": denial_rate,
+        "seed": seed,
+        "shard_size": shard_size,
+        "workers": workers,
+        "outcomes": dict(outcomes),
+        "specialties": dict(specialties_used),
+        "files": files,
+        "shards": [
+            {key: shard[key] for key in ("shard_index", "num_episodes", "total_paid")}
+            for shard in shards
+        ],
+        "elapsed_seconds": round(elapsed, 3),
+        "generated_at": datetime.now().isoformat(),
+    }
+    metadata_file = output_dir / metadata_filename
+    try:
+        with open(metadata_file, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+    except (IOError, OSError) as e:
+        logger.error("Failed to write metadata file", file=str(metadata_file), error=str(e))
+        raise
+    
+    logger.info(
+        "Generated corpus",
+        num_episodes=num_episodes,
+        files=len(files),
+        elapsed_seconds=round(elapsed, 1),
+        episodes_per_second=round(num_episodes / elapsed) if elapsed else None,
+    )
+    return metadata
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -1284,6 +1629,34 @@ def main():
         default="training_metadata.json",
         help="Filename for metadata JSON file (default: training_metadata.json)",
     )
+    parser.add_argument(
+        "--corpus",
+        action="store_true",
+        help="Generate a sharded load-testing corpus in parallel (no episode limit)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Corpus worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=CORPUS_SHARD_SIZE,
+        help=f"Episodes per corpus shard (default: {CORPUS_SHARD_SIZE})",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Corpus seed; the same seed and shard size give the same files (default: 0)",
+    )
+    parser.add_argument(
+        "--split-shards",
+        action="store_true",
+        help="Write one 837/835 file pair per corpus shard",
+    )
     
     args = parser.parse_args()
     
@@ -1298,7 +1671,7 @@ def main():
         parser.error(f"--episodes must be an integer, got: {type(args.episodes).__name__}")
     if args.episodes < 1:
         parser.error(f"--episodes must be at least 1, got: {args.episodes}")
-    if args.episodes > 1000000:
+    if args.episodes > 1000000 and not args.corpus:
         parser.error(f"--episodes must be at most 1,000,000, got: {args.episodes}")
     
     # Validate output directory
@@ -1312,6 +1685,10 @@ def main():
         parser.error("--remittances-filename cannot be empty")
     if not args.metadata_filename or not args.metadata_filename.strip():
         parser.error("--metadata-filename cannot be empty")
+    if args.workers is not None and args.workers < 1:
+        parser.error(f"--workers must be at least 1, got: {args.workers}")
+    if args.shard_size < 1:
+        parser.error(f"--shard-size must be at least 1, got: {args.shard_size}")
     
     # Validate filename characters (basic sanitization)
     invalid_chars = ['<', '>', ':', '"', '|', '?', '*', '\\', '/']
@@ -1326,6 +1703,22 @@ def main():
         except ValueError as e:
             parser.error(f"--start-date must be in YYYY-MM-DD format, got: {args.start_date} (error: {e})")
     
+    if args.corpus:
+        generate_corpus(
+            num_episodes=args.episodes,
+            output_dir=args.output_dir,
+            shard_size=args.shard_size,
+            workers=args.workers,
+            seed=args.seed,
+            start_date=start_date,
+            denial_rate=args.denial_rate,
+            split_shards=args.split_shards,
+            claims_filename=args.claims_filename,
+            remittances_filename=args.remittances_filename,
+            metadata_filename=args.metadata_filename,
+        )
+        return
+    
     generate_training_dataset(
         num_episodes=args.episodes,
         output_dir=args.output_dir,
@@ -15,21 +15,30 @@ Usage:
     python ml/training/ml_workflow.py train                    # Train model
     python ml/training/ml_workflow.py evaluate                 # Evaluate model
     python ml/training/ml_workflow.py patterns                 # Run pattern detection
+    python ml/training/ml_workflow.py benchmark                # Benchmark model inference
     python ml/training/ml_workflow.py full                     # Run full pipeline
+
+The prepare, train, evaluate and full commands (and tune_hyperparameters.py)
+share a cache of training matrices keyed by date range, feature schema version
+and the highest episode ID with an outcome (see dataset_cache.py): a stage run
+on the same data as an earlier one loads the memory-mapped matrix instead of
+collecting it again, and says so in its output.
 """
 import argparse
 import sys
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from app.config.database import get_db
+from app.config.database import get_db, open_read_session, open_replica_session
+from ml.training.dataset_cache import TRAINING_DATASET_CACHE_DIR, DatasetCache, default_date_range
 from ml.training.check_historical_data import check_historical_data, print_data_sources
 from ml.training.prepare_data import main as prepare_data_main
 from ml.training.train_models import train_model
 from ml.training.evaluate_models import main as evaluate_models_main
+from ml.training.benchmark_inference import main as benchmark_inference_main
 from ml.training.run_pattern_detection import run_pattern_detection_for_all_payers, print_pattern_summary
 from ml.training.continuous_learning_pipeline import ContinuousLearningPipeline
 from app.utils.logger import get_logger
@@ -39,7 +48,7 @@ logger = get_logger(__name__)
 
 def cmd_check(args):
     """Check data availability."""
-    db = next(get_db())
+    db = open_read_session()
     try:
         stats = check_historical_data(db)
         if args.show_sources:
@@ -55,22 +64,26 @@ def cmd_prepare(args):
     prepare_data_main()
 
 
+def _parse_dates(args):
+    """Date range of the train and full commands (defaults aligned to whole days)."""
+    start_date, end_date = default_date_range()
+    if args.start_date:
+        start_date = datetime.fromisoformat(args.start_date)
+    if args.end_date:
+        end_date = datetime.fromisoformat(args.end_date)
+    return start_date, end_date
+
+
+def _dataset_cache(args):
+    """Training dataset cache of the train and full commands."""
+    return None if args.no_dataset_cache else DatasetCache(args.dataset_cache_dir)
+
+
 def cmd_train(args):
     """Train model."""
-    db = next(get_db())
+    db = open_read_session()
     try:
-        # Parse dates
-        start_date = (
-            datetime.fromisoformat(args.start_date)
-            if args.start_date
-            else datetime.now() - timedelta(days=180)
-        )
-        end_date = (
-            datetime.fromisoformat(args.end_date)
-            if args.end_date
-            else datetime.now()
-        )
-        
+        start_date, end_date = _parse_dates(args)
         train_model(
             db_session=db,
             start_date=start_date,
@@ -79,6 +92,7 @@ def cmd_train(args):
             n_estimators=args.n_estimators,
             max_depth=args.max_depth,
             output_dir=args.output_dir,
+            dataset_cache=_dataset_cache(args),
         )
     finally:
         db.close()
@@ -90,6 +104,12 @@ def cmd_evaluate(args):
     evaluate_models_main()
 
 
+def cmd_benchmark(args):
+    """Benchmark model inference."""
+    sys.argv = ["benchmark_inference.py"] + (args.extra_args or [])
+    benchmark_inference_main()
+
+
 def cmd_patterns(args):
     """Run pattern detection."""
     db = next(get_db())
@@ -107,20 +127,12 @@ def cmd_patterns(args):
 def cmd_full(args):
     """Run full continuous learning pipeline."""
     db = next(get_db())
+    read_db = open_replica_session()
     try:
-        # Parse dates
-        start_date = (
-            datetime.fromisoformat(args.start_date)
-            if args.start_date
-            else datetime.now() - timedelta(days=180)
-        )
-        end_date = (
-            datetime.fromisoformat(args.end_date)
-            if args.end_date
-            else datetime.now()
+        start_date, end_date = _parse_dates(args)
+        pipeline = ContinuousLearningPipeline(
+            db, read_session=read_db, dataset_cache=_dataset_cache(args)
         )
-        
-        pipeline = ContinuousLearningPipeline(db)
         results = pipeline.run_full_pipeline(
             start_date=start_date,
             end_date=end_date,
@@ -145,6 +157,9 @@ def cmd_full(args):
             for error in results["errors"]:
                 print(f"  ✗ {error}")
         
+        if "training_dataset" in results:
+            print(f"\nTraining Data: {results['training_dataset']}")
+        
         if "model_metrics" in results:
             print("\nModel Metrics:")
             for key, value in results["model_metrics"].items():
@@ -155,9 +170,26 @@ def cmd_full(args):
         if results["errors"]:
             sys.exit(1)
     finally:
+        if read_db is not None:
+            read_db.close()
         db.close()
 
 
+def _add_dataset_cache_arguments(parser):
+    """Add the training dataset cache options to a command parser."""
+    parser.add_argument(
+        "--dataset-cache-dir",
+        type=str,
+        default=TRAINING_DATASET_CACHE_DIR,
+        help="Directory of cached training matrices shared between commands",
+    )
+    parser.add_argument(
+        "--no-dataset-cache",
+        action="store_true",
+        help="Collect the training data without reading or writing the dataset cache",
+    )
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -237,6 +269,7 @@ Examples:
         default="ml/models/saved",
         help="Output directory",
     )
+    _add_dataset_cache_arguments(train_parser)
     train_parser.set_defaults(func=cmd_train)
     
     # Evaluate command
@@ -248,6 +281,15 @@ Examples:
     )
     eval_parser.set_defaults(func=cmd_evaluate)
     
+    # Benchmark command
+    benchmark_parser = subparsers.add_parser("benchmark", help="Benchmark model inference")
+    benchmark_parser.add_argument(
+        "extra_args",
+        nargs=argparse.REMAINDER,
+        help="Additional arguments passed to benchmark_inference.py",
+    )
+    benchmark_parser.set_defaults(func=cmd_benchmark)
+    
     # Patterns command
     patterns_parser = subparsers.add_parser("patterns", help="Run pattern detection")
     patterns_parser.add_argument(
@@ -311,6 +353,7 @@ Examples:
         default=100,
         help="Minimum episodes required",
     )
+    _add_dataset_cache_arguments(full_parser)
     full_parser.set_defaults(func=cmd_full)
     
     args = parser.parse_args()
@@ -1,4 +1,5 @@
 """Data preparation utility for ML training."""
+import argparse
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -8,8 +9,14 @@ import pandas as pd
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from app.config.database import get_db
+from app.config.database import open_read_session
 from ml.services.data_collector import DataCollector
+from ml.training.dataset_cache import (
+    TRAINING_DATASET_CACHE_DIR,
+    DatasetCache,
+    default_date_range,
+    store_training_frame,
+)
 from ml.training.explore_data import explore_dataset
 from app.utils.logger import get_logger
 
@@ -23,6 +30,7 @@ def prepare_training_dataset(
     min_episodes: int = 100,
     include_historical: bool = True,
     explore: bool = True,
+    dataset_cache: Optional[DatasetCache] = None,
 ) -> pd.DataFrame:
     """
     Prepare and export training dataset.
@@ -32,6 +40,11 @@ def prepare_training_dataset(
         end_date: End date for data collection
         output_file: Path to save CSV file
         min_episodes: Minimum number of episodes required
+        include_historical: Whether to include historical features
+        explore: Whether to print a data exploration report
+        dataset_cache: Cache to store the training matrix in for the train,
+            evaluate and tune stages (only with historical features, which
+            the models are trained on)
         
     Returns:
         Training dataframe
@@ -47,17 +60,19 @@ def prepare_training_dataset(
         end_date=end_date.isoformat(),
     )
 
-    # Get database session
-    db = next(get_db())
+    # Get database session (read replica when configured)
+    db = open_read_session()
 
     try:
         # Collect data
         collector = DataCollector(db)
+        through_episode_id = collector.latest_episode_id()
         df = collector.collect_training_data(
             start_date=start_date,
             end_date=end_date,
             min_episodes=min_episodes,
             include_historical=include_historical,
+            through_episode_id=through_episode_id,
         )
 
         # Save to CSV
@@ -72,6 +87,10 @@ def prepare_training_dataset(
             output_file=output_file,
         )
 
+        if dataset_cache is not None and include_historical:
+            dataset = store_training_frame(dataset_cache, df, start_date, end_date, through_episode_id)
+            print(dataset.describe())
+
         # Explore dataset if requested
         if explore:
             explore_dataset(df)
@@ -83,9 +102,8 @@ def prepare_training_dataset(
         raise
 
 
-if __name__ == "__main__":
-    import argparse
-
+def main():
+    """Main entry point."""
     parser = argparse.ArgumentParser(description="Prepare training dataset")
     parser.add_argument(
         "--start-date",
@@ -121,12 +139,22 @@ if __name__ == "__main__":
         action="store_true",
         help="Skip data exploration",
     )
+    parser.add_argument(
+        "--dataset-cache-dir",
+        type=str,
+        default=TRAINING_DATASET_CACHE_DIR,
+        help="Directory of cached training matrices for the train, evaluate and tune stages",
+    )
+    parser.add_argument(
+        "--no-dataset-cache",
+        action="store_true",
+        help="Do not cache the training matrix",
+    )
 
     args = parser.parse_args()
 
-    start_date = None
-    end_date = None
-
+    # Defaults aligned to whole days, so later stages hit the same cached dataset
+    start_date, end_date = default_date_range()
     if args.start_date:
         start_date = datetime.strptime(args.start_date, "%Y-%m-%d")
     if args.end_date:
@@ -139,5 +167,10 @@ if __name__ == "__main__":
         min_episodes=args.min_episodes,
         include_historical=not args.no_historical,
         explore=not args.no_explore,
+        dataset_cache=None if args.no_dataset_cache else DatasetCache(args.dataset_cache_dir),
     )
 
+
+if __name__ == "__main__":
+    main()
+
@@ -2,8 +2,8 @@
 import argparse
 import sys
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Tuple
+from datetime import datetime
+from typing import Optional, Tuple
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -14,6 +14,14 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from app.config.database import get_db
 from ml.services.data_collector import DataCollector
 from ml.models.risk_predictor import RiskPredictor
+from ml.services.feature_pipeline import feature_names
+from ml.training.dataset_cache import (
+    TRAINING_DATASET_CACHE_DIR,
+    DatasetCache,
+    TrainingDataset,
+    default_date_range,
+    load_training_dataset,
+)
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -29,29 +37,13 @@ def prepare_features_and_labels(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarra
     Returns:
         Tuple of (features, labels) as numpy arrays
     """
-    # Feature columns (exclude labels and IDs)
-    exclude_cols = [
-        "claim_id",
-        "denial_rate",
-        "payment_rate",
-        "is_denied",
-        "denial_count",
-        "adjustment_count",
-        "payment_amount",
-    ]
-
-    feature_cols = [col for col in df.columns if col not in exclude_cols]
-
-    # Handle categorical columns (one-hot encode)
-    categorical_cols = ["facility_type_code"]
-    df_encoded = pd.get_dummies(df, columns=categorical_cols, prefix=categorical_cols)
-
-    # Update feature columns after encoding
-    feature_cols = [col for col in df_encoded.columns if col not in exclude_cols]
+    # Feature columns in schema order (labels, IDs and unknown columns are not features),
+    # so the trained model's feature_names line up with what serving computes
+    feature_cols = [col for col in feature_names(include_historical=True) if col in df.columns]
 
     # Extract features and labels
-    X = df_encoded[feature_cols].values.astype(np.float32)
-    y = df_encoded["denial_rate"].values.astype(np.float32)  # Use denial_rate as target
+    X = df[feature_cols].values.astype(np.float32)
+    y = df["denial_rate"].values.astype(np.float32)  # Use denial_rate as target
 
     # Handle NaN values
     X = np.nan_to_num(X, nan=0.0, posinf=0.0, neginf=0.0)
@@ -67,6 +59,43 @@ def prepare_features_and_labels(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarra
     return X, y, feature_cols
 
 
+def model_output_path(output_dir: str, model_type: str) -> Path:
+    """
+    Path for a newly trained model (the newest file is the one served).
+    
+    Args:
+        output_dir: Directory to save trained models
+        model_type: Type of model ('random_forest' or 'gradient_boosting')
+        
+    Returns:
+        Timestamped path in output_dir (created if missing)
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    model_path = output_path / f"risk_predictor_{model_type}_{timestamp}.pkl"
+    # Never overwrite a model saved in the same second (it may be this one's parent)
+    suffix = 1
+    while model_path.exists():
+        model_path = output_path / f"risk_predictor_{model_type}_{timestamp}_{suffix}.pkl"
+        suffix += 1
+    return model_path
+
+
+def latest_model_path(output_dir: str) -> Optional[Path]:
+    """
+    Most recently saved model in output_dir.
+    
+    Args:
+        output_dir: Directory of trained models
+        
+    Returns:
+        Path of the newest risk_predictor_*.pkl, or None if there is none
+    """
+    model_files = list(Path(output_dir).glob("risk_predictor_*.pkl"))
+    return max(model_files, key=lambda p: p.stat().st_mtime) if model_files else None
+
+
 def train_model(
     db_session,
     start_date: datetime = None,
@@ -77,6 +106,9 @@ def train_model(
     test_size: float = 0.2,
     random_state: int = 42,
     output_dir: str = "ml/models/saved",
+    min_episodes: int = 100,
+    dataset_cache: Optional[DatasetCache] = None,
+    dataset: Optional[TrainingDataset] = None,
 ) -> RiskPredictor:
     """
     Train risk prediction model.
@@ -91,20 +123,28 @@ def train_model(
         test_size: Proportion of data for testing
         random_state: Random seed
         output_dir: Directory to save trained model
+        min_episodes: Minimum episodes required for training
+        dataset_cache: Cache to reuse the training matrix from, or store it in
+            for later stages (None: always collect)
+        dataset: Training data already loaded by the caller (skips collection)
         
     Returns:
         Trained RiskPredictor model
     """
     logger.info("Starting model training", model_type=model_type)
 
-    # Collect training data
-    collector = DataCollector(db_session)
-    df = collector.collect_training_data(start_date=start_date, end_date=end_date)
-
-    logger.info("Training data collected", rows=len(df), columns=len(df.columns))
-
-    # Prepare features and labels
-    X, y, feature_names = prepare_features_and_labels(df)
+    # Collect training data (up to a high-water mark incremental runs continue from)
+    if dataset is None:
+        dataset = load_training_dataset(
+            DataCollector(db_session),
+            start_date=start_date,
+            end_date=end_date,
+            min_episodes=min_episodes,
+            cache=dataset_cache,
+        )
+    X, y, feature_names = dataset.X, dataset.y, dataset.feature_names
+    through_episode_id = dataset.through_episode_id
+    print(f"\n{dataset.describe()}")
 
     # Split into train and test sets
     X_train, X_test, y_train, y_test = train_test_split(
@@ -130,6 +170,15 @@ def train_model(
         random_state=random_state,
     )
 
+    model.record_training(
+        "full",
+        samples=X_train.shape[0],
+        through_episode_id=through_episode_id,
+        recent_episode_ids=dataset.recent_episode_ids,
+        model_type=model_type,
+        estimators=n_estimators,
+    )
+
     # Evaluate on test set
     test_metrics = model.evaluate(X_test, y_test)
 
@@ -161,13 +210,7 @@ def train_model(
             print(f"{feature}: {importance:.4f}")
 
     # Save model
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
-
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    model_filename = f"risk_predictor_{model_type}_{timestamp}.pkl"
-    model_path = output_path / model_filename
-
+    model_path = model_output_path(output_dir, model_type)
     model.save_model(str(model_path), feature_names=feature_names)
 
     print("\n" + "=" * 60)
@@ -229,22 +272,26 @@ def main():
         default=42,
         help="Random seed for reproducibility",
     )
+    parser.add_argument(
+        "--dataset-cache-dir",
+        type=str,
+        default=TRAINING_DATASET_CACHE_DIR,
+        help="Directory of cached training matrices shared with evaluation and tuning",
+    )
+    parser.add_argument(
+        "--no-dataset-cache",
+        action="store_true",
+        help="Collect the training data without reading or writing the dataset cache",
+    )
 
     args = parser.parse_args()
 
-    # Parse dates
-    start_date = None
-    end_date = None
-
+    # Parse dates (defaults aligned to whole days, so later stages hit the same cached dataset)
+    start_date, end_date = default_date_range()
     if args.start_date:
         start_date = datetime.strptime(args.start_date, "%Y-%m-%d")
-    else:
-        start_date = datetime.now() - timedelta(days=180)
-
     if args.end_date:
         end_date = datetime.strptime(args.end_date, "%Y-%m-%d")
-    else:
-        end_date = datetime.now()
 
     # Get database session
     db = next(get_db())
@@ -261,6 +308,7 @@ def main():
             test_size=args.test_size,
             random_state=args.random_state,
             output_dir=args.output_dir,
+            dataset_cache=None if args.no_dataset_cache else DatasetCache(args.dataset_cache_dir),
         )
 
         logger.info("Model training completed successfully")
@@ -1,12 +1,30 @@
-"""Hyperparameter tuning for risk prediction models."""
+"""Hyperparameter tuning for risk prediction models.
+
+Two search strategies are available:
+
+- ``randomized``: RandomizedSearchCV, every candidate fitted on all training
+  data in every fold.
+- ``halving``: successive halving (successive_halving_search). Candidates are
+  first fitted with a small budget of samples or estimators, and only the best
+  1/factor of each rung go on with factor times the budget, so weak
+  configurations are dropped after cheap fits. The feature matrix and fold
+  splits are cached once as .npy files that workers memory-map instead of
+  receiving pickled copies, and every fold score is appended to a journal so
+  an interrupted search resumes where it stopped.
+"""
 import argparse
+import hashlib
+import json
+import math
+import os
 import sys
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import GridSearchCV, RandomizedSearchCV
+from joblib import Parallel, delayed
+from sklearn.model_selection import GridSearchCV, KFold, ParameterSampler, RandomizedSearchCV
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
@@ -14,14 +32,299 @@ from sklearn.preprocessing import StandardScaler
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from app.config.database import get_db
+from app.config.database import open_read_session
 from ml.services.data_collector import DataCollector
 from ml.models.risk_predictor import RiskPredictor
-from ml.training.train_models import prepare_features_and_labels
+from ml.training.dataset_cache import (
+    TRAINING_DATASET_CACHE_DIR,
+    DatasetCache,
+    default_date_range,
+    load_training_dataset,
+)
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Cached feature matrices and search journals
+TUNING_CACHE_DIR = os.getenv("TUNING_CACHE_DIR", "ml/models/tuning_cache")
+
+RANDOM_FOREST_PARAM_DISTRIBUTIONS = {
+    "regressor__n_estimators": [50, 100, 200, 300, 500],
+    "regressor__max_depth": [None, 10, 20, 30, 50],
+    "regressor__min_samples_split": [2, 5, 10],
+    "regressor__min_samples_leaf": [1, 2, 4],
+    "regressor__max_features": ["sqrt", "log2", None],
+}
+
+GRADIENT_BOOSTING_PARAM_DISTRIBUTIONS = {
+    "regressor__n_estimators": [50, 100, 200, 300],
+    "regressor__max_depth": [3, 5, 7, 10],
+    "regressor__learning_rate": [0.01, 0.05, 0.1, 0.2],
+    "regressor__min_samples_split": [2, 5, 10],
+    "regressor__min_samples_leaf": [1, 2, 4],
+    "regressor__subsample": [0.8, 0.9, 1.0],
+}
+
+# Smallest budget worth fitting a candidate with
+_MIN_RESOURCE = {"n_samples": 50, "n_estimators": 10}
+
+
+def _build_pipeline(model_type: str, random_state: int, n_jobs: Optional[int] = None) -> Pipeline:
+    """Scaler and regressor pipeline tuned through its ``regressor__`` parameters."""
+    if model_type == "random_forest":
+        regressor = RandomForestRegressor(random_state=random_state, n_jobs=n_jobs)
+    elif model_type == "gradient_boosting":
+        regressor = GradientBoostingRegressor(random_state=random_state)
+    else:
+        raise ValueError(f"Unknown model type: {model_type}")
+    return Pipeline([("scaler", StandardScaler()), ("regressor", regressor)])
+
+
+def cache_training_matrix(
+    X: np.ndarray,
+    y: np.ndarray,
+    cv: int = 5,
+    cache_dir: str = TUNING_CACHE_DIR,
+    random_state: int = 42,
+) -> Path:
+    """
+    Write features, labels and shuffled fold indices once for memory-mapping.
+    
+    The cache directory is named after a hash of the data, fold count and
+    seed, so calling again with the same inputs reuses it.
+    
+    Args:
+        X: Features (n_samples, n_features)
+        y: Labels
+        cv: Number of CV folds
+        cache_dir: Directory holding cached matrices
+        random_state: Seed of the fold split and of each fold's sample order
+        
+    Returns:
+        Directory with X.npy, y.npy and fold_<k>_train.npy / fold_<k>_test.npy
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.ascontiguousarray(y, dtype=np.float32)
+    digest = hashlib.sha256()
+    digest.update(f"{X.shape}:{cv}:{random_state}".encode())
+    digest.update(X.tobytes())
+    digest.update(y.tobytes())
+    path = Path(cache_dir) / digest.hexdigest()[:16]
+
+    if (path / "complete").exists():
+        logger.info("Reusing cached training matrix", path=str(path))
+        return path
+
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / "X.npy", X)
+    np.save(path / "y.npy", y)
+    rng = np.random.default_rng(random_state)
+    for fold, (train_idx, test_idx) in enumerate(
+        KFold(n_splits=cv, shuffle=True, random_state=random_state).split(X)
+    ):
+        # Shuffled, so a budget of n samples is simply the first n indices
+        np.save(path / f"fold_{fold}_train.npy", rng.permutation(train_idx))
+        np.save(path / f"fold_{fold}_test.npy", test_idx)
+    (path / "complete").write_text(json.dumps({"cv": cv, "n_samples": len(X)}))
+
+    logger.info("Cached training matrix", path=str(path), n_samples=len(X), cv=cv)
+    return path
+
+
+def _score_candidate(
+    cache_path: str,
+    model_type: str,
+    params: Dict,
+    n_samples: Optional[int],
+    fold: int,
+    random_state: int,
+) -> float:
+    """Validation MSE of one candidate on one fold (runs in a worker)."""
+    cache = Path(cache_path)
+    X = np.load(cache / "X.npy", mmap_mode="r")
+    y = np.load(cache / "y.npy", mmap_mode="r")
+    train_idx = np.load(cache / f"fold_{fold}_train.npy", mmap_mode="r")[:n_samples]
+    test_idx = np.load(cache / f"fold_{fold}_test.npy", mmap_mode="r")
+
+    # Workers run in parallel already; trees are fitted on one core each
+    pipeline = _build_pipeline(model_type, random_state, n_jobs=1).set_params(**params)
+    pipeline.fit(X[train_idx], y[train_idx])
+    predictions = pipeline.predict(X[test_idx])
+    return float(np.mean((predictions - y[test_idx]) ** 2))
+
+
+def _halving_rungs(n_candidates: int, max_resource: int, min_resource: int, factor: int) -> List[Tuple[int, int]]:
+    """(candidates, budget) of each rung; budgets grow by factor up to max_resource."""
+    n_rungs = 1 + int(math.log(max(n_candidates, 1), factor) + 1e-9)
+    budgets = [max_resource // factor ** k for k in reversed(range(n_rungs))]
+    budgets = [budget for budget in budgets if budget >= min_resource] or [max_resource]
+    return [(max(1, math.ceil(n_candidates / factor ** rung)), budget) for rung, budget in enumerate(budgets)]
+
+
+def successive_halving_search(
+    model_type: str,
+    X: np.ndarray,
+    y: np.ndarray,
+    n_candidates: int = 20,
+    cv: int = 5,
+    resource: str = "n_samples",
+    factor: int = 3,
+    n_jobs: Optional[int] = -1,
+    random_state: int = 42,
+    cache_dir: str = TUNING_CACHE_DIR,
+    param_distributions: Optional[Dict] = None,
+) -> Dict:
+    """
+    Successive-halving hyperparameter search with a resumable journal.
+    
+    Candidates are sampled from the parameter distributions and all scored
+    (mean validation MSE over the cached folds) with the smallest budget; the
+    best 1/factor continue to the next rung with factor times the budget, the
+    last rung using all training samples (``n_samples``) or the largest
+    ``n_estimators`` in the distributions (``n_estimators``, which is then not
+    tuned). Each fold score is appended to a journal in the cache directory,
+    and scores already in the journal are not recomputed.
+    
+    Args:
+        model_type: 'random_forest' or 'gradient_boosting'
+        X: Training features
+        y: Training labels
+        n_candidates: Number of configurations in the first rung
+        cv: Number of CV folds
+        resource: Budget grown across rungs ('n_samples' or 'n_estimators')
+        factor: Rung-to-rung candidate reduction and budget growth
+        n_jobs: Number of parallel jobs
+        random_state: Random seed
+        cache_dir: Directory holding cached matrices and journals
+        param_distributions: Parameter lists to sample (default: the model's)
+        
+    Returns:
+        Dictionary with best parameters, best score (MSE), the best estimator
+        refitted on all data, and per-rung results
+    """
+    if resource not in _MIN_RESOURCE:
+        raise ValueError(f"Unknown resource: {resource}")
+    if param_distributions is None:
+        param_distributions = (
+            RANDOM_FOREST_PARAM_DISTRIBUTIONS if model_type == "random_forest"
+            else GRADIENT_BOOSTING_PARAM_DISTRIBUTIONS
+        )
+    param_distributions = dict(param_distributions)
+
+    cache_path = cache_training_matrix(X, y, cv=cv, cache_dir=cache_dir, random_state=random_state)
+    if resource == "n_estimators":
+        max_resource = max(param_distributions.pop("regressor__n_estimators"))
+    else:
+        # Size of the smallest training fold
+        max_resource = len(X) - math.ceil(len(X) / cv)
+    min_resource = min(_MIN_RESOURCE[resource], max_resource)
+    # Without replacement from the grid, which may have fewer points than asked for
+    n_candidates = min(n_candidates, math.prod(len(values) for values in param_distributions.values()))
+    candidates = list(ParameterSampler(param_distributions, n_candidates, random_state=random_state))
+    rungs = _halving_rungs(len(candidates), max_resource, min_resource, factor)
+
+    search_key = hashlib.sha256(
+        json.dumps(
+            [model_type, resource, factor, random_state, candidates, rungs], sort_keys=True, default=str
+        ).encode()
+    ).hexdigest()[:16]
+    journal_path = cache_path / f"journal_{search_key}.jsonl"
+    journal = {}
+    journal_text = journal_path.read_text() if journal_path.exists() else ""
+    for line in journal_text.splitlines():
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # blank, or cut short by the interruption
+        journal[(entry["candidate"], entry["resource"], entry["fold"])] = entry["mse"]
+
+    logger.info(
+        "Starting successive halving search",
+        model_type=model_type,
+        candidates=len(candidates),
+        rungs=[{"candidates": count, resource: budget} for count, budget in rungs],
+        journaled=len(journal),
+        cache=str(cache_path),
+    )
+
+    def params_of(index: int, budget: int) -> Dict:
+        if resource == "n_estimators":
+            return {**candidates[index], "regressor__n_estimators": budget}
+        return candidates[index]
+
+    # Candidate indices, best first after each rung
+    alive = list(range(len(candidates)))
+    rung_results = []
+    evaluated = 0
+    with open(journal_path, "a", encoding="utf-8") as journal_file, \
+            Parallel(n_jobs=n_jobs, return_as="generator") as parallel:
+        if journal_text and not journal_text.endswith("\n"):
+            journal_file.write("\n")  # after a line cut short
+        for count, budget in rungs:
+            alive = alive[:count]
+            pending = [
+                (index, fold) for index in alive for fold in range(cv)
+                if (index, budget, fold) not in journal
+            ]
+            scores = parallel(
+                delayed(_score_candidate)(
+                    str(cache_path),
+                    model_type,
+                    params_of(index, budget),
+                    budget if resource == "n_samples" else None,
+                    fold,
+                    random_state,
+                )
+                for index, fold in pending
+            )
+            # Journaled as they arrive, so an interruption loses at most the running fits
+            for position, mse in enumerate(scores):
+                index, fold = pending[position]
+                journal[(index, budget, fold)] = mse
+                journal_file.write(json.dumps(
+                    {"candidate": index, "resource": budget, "fold": fold, "mse": mse,
+                     "params": params_of(index, budget)},
+                    default=str,
+                ) + "\n")
+                journal_file.flush()
+            evaluated += len(pending)
+
+            mean_mse = {
+                index: float(np.mean([journal[(index, budget, fold)] for fold in range(cv)]))
+                for index in alive
+            }
+            alive.sort(key=lambda index: mean_mse[index])  # stable: ties keep sampling order
+            rung_results.append({"resource": budget, "candidates": len(alive), "best_mse": mean_mse[alive[0]]})
+            logger.info(
+                "Completed halving rung",
+                resource=resource,
+                budget=budget,
+                candidates=len(alive),
+                evaluated=len(pending),
+                best_mse=mean_mse[alive[0]],
+            )
+
+    best_params = params_of(alive[0], rungs[-1][1])
+    best_score = rung_results[-1]["best_mse"]
+    best_estimator = _build_pipeline(model_type, random_state, n_jobs=n_jobs).set_params(**best_params)
+    best_estimator.fit(X, y)
+
+    logger.info(
+        "Successive halving search complete",
+        best_params=best_params,
+        best_score=best_score,
+        evaluations=evaluated,
+        journaled_evaluations=sum(count for count, _ in rungs) * cv - evaluated,
+    )
+
+    return {
+        "best_params": best_params,
+        "best_score": best_score,
+        "best_estimator": best_estimator,
+        "rungs": rung_results,
+        "evaluations": evaluated,
+    }
+
 
 def tune_random_forest(
     X_train: np.ndarray,
@@ -30,44 +333,44 @@ def tune_random_forest(
     cv: int = 5,
     n_jobs: int = -1,
     random_state: int = 42,
+    strategy: str = "randomized",
+    resource: str = "n_samples",
+    factor: int = 3,
+    cache_dir: str = TUNING_CACHE_DIR,
 ) -> Dict:
     """
-    Tune Random Forest hyperparameters using randomized search.
+    Tune Random Forest hyperparameters using randomized search or successive halving.
     
     Args:
         X_train: Training features
         y_train: Training labels
-        n_iter: Number of iterations for randomized search
+        n_iter: Number of iterations for randomized search (first-rung candidates when halving)
         cv: Number of CV folds
         n_jobs: Number of parallel jobs
         random_state: Random seed
+        strategy: 'randomized' or 'halving' (see successive_halving_search)
+        resource: Halving budget ('n_samples' or 'n_estimators')
+        factor: Halving reduction factor
+        cache_dir: Halving cache and journal directory
         
     Returns:
         Dictionary with best parameters and best score
     """
-    logger.info("Tuning Random Forest hyperparameters", n_iter=n_iter, cv=cv)
-
-    # Parameter grid for Random Forest
-    param_distributions = {
-        "regressor__n_estimators": [50, 100, 200, 300, 500],
-        "regressor__max_depth": [None, 10, 20, 30, 50],
-        "regressor__min_samples_split": [2, 5, 10],
-        "regressor__min_samples_leaf": [1, 2, 4],
-        "regressor__max_features": ["sqrt", "log2", None],
-    }
+    logger.info("Tuning Random Forest hyperparameters", n_iter=n_iter, cv=cv, strategy=strategy)
+
+    if strategy == "halving":
+        return successive_halving_search(
+            "random_forest", X_train, y_train, n_candidates=n_iter, cv=cv, resource=resource,
+            factor=factor, n_jobs=n_jobs, random_state=random_state, cache_dir=cache_dir,
+        )
 
     # Create pipeline
-    pipeline = Pipeline(
-        [
-            ("scaler", StandardScaler()),
-            ("regressor", RandomForestRegressor(random_state=random_state, n_jobs=n_jobs)),
-        ]
-    )
+    pipeline = _build_pipeline("random_forest", random_state, n_jobs=n_jobs)
 
     # Randomized search
     search = RandomizedSearchCV(
         pipeline,
-        param_distributions,
+        RANDOM_FOREST_PARAM_DISTRIBUTIONS,
         n_iter=n_iter,
         cv=cv,
         scoring="neg_mean_squared_error",
@@ -100,47 +403,49 @@ def tune_gradient_boosting(
     n_iter: int = 20,
     cv: int = 5,
     random_state: int = 42,
+    strategy: str = "randomized",
+    resource: str = "n_samples",
+    factor: int = 3,
+    cache_dir: str = TUNING_CACHE_DIR,
+    n_jobs: Optional[int] = None,
 ) -> Dict:
     """
-    Tune Gradient Boosting hyperparameters using randomized search.
+    Tune Gradient Boosting hyperparameters using randomized search or successive halving.
     
     Args:
         X_train: Training features
         y_train: Training labels
-        n_iter: Number of iterations for randomized search
+        n_iter: Number of iterations for randomized search (first-rung candidates when halving)
         cv: Number of CV folds
         random_state: Random seed
+        strategy: 'randomized' or 'halving' (see successive_halving_search)
+        resource: Halving budget ('n_samples' or 'n_estimators')
+        factor: Halving reduction factor
+        cache_dir: Halving cache and journal directory
+        n_jobs: Number of parallel jobs (default: one)
         
     Returns:
         Dictionary with best parameters and best score
     """
-    logger.info("Tuning Gradient Boosting hyperparameters", n_iter=n_iter, cv=cv)
-
-    # Parameter grid for Gradient Boosting
-    param_distributions = {
-        "regressor__n_estimators": [50, 100, 200, 300],
-        "regressor__max_depth": [3, 5, 7, 10],
-        "regressor__learning_rate": [0.01, 0.05, 0.1, 0.2],
-        "regressor__min_samples_split": [2, 5, 10],
-        "regressor__min_samples_leaf": [1, 2, 4],
-        "regressor__subsample": [0.8, 0.9, 1.0],
-    }
+    logger.info("Tuning Gradient Boosting hyperparameters", n_iter=n_iter, cv=cv, strategy=strategy)
+
+    if strategy == "halving":
+        return successive_halving_search(
+            "gradient_boosting", X_train, y_train, n_candidates=n_iter, cv=cv, resource=resource,
+            factor=factor, n_jobs=n_jobs, random_state=random_state, cache_dir=cache_dir,
+        )
 
     # Create pipeline
-    pipeline = Pipeline(
-        [
-            ("scaler", StandardScaler()),
-            ("regressor", GradientBoostingRegressor(random_state=random_state)),
-        ]
-    )
+    pipeline = _build_pipeline("gradient_boosting", random_state)
 
     # Randomized search
     search = RandomizedSearchCV(
         pipeline,
-        param_distributions,
+        GRADIENT_BOOSTING_PARAM_DISTRIBUTIONS,
         n_iter=n_iter,
         cv=cv,
         scoring="neg_mean_squared_error",
+        n_jobs=n_jobs,
         random_state=random_state,
         verbose=1,
     )
@@ -197,6 +502,41 @@ def main():
         default=5,
         help="Number of CV folds",
     )
+    parser.add_argument(
+        "--search",
+        choices=["randomized", "halving"],
+        default="randomized",
+        help="Search strategy (halving: successive halving with a resumable journal)",
+    )
+    parser.add_argument(
+        "--resource",
+        choices=["n_samples", "n_estimators"],
+        default="n_samples",
+        help="Budget grown across halving rungs",
+    )
+    parser.add_argument(
+        "--factor",
+        type=int,
+        default=3,
+        help="Halving reduction factor",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=TUNING_CACHE_DIR,
+        help="Directory for cached feature matrices and halving journals",
+    )
+    parser.add_argument(
+        "--dataset-cache-dir",
+        type=str,
+        default=TRAINING_DATASET_CACHE_DIR,
+        help="Directory of cached training matrices shared with training and evaluation",
+    )
+    parser.add_argument(
+        "--no-dataset-cache",
+        action="store_true",
+        help="Collect the training data without reading or writing the dataset cache",
+    )
     parser.add_argument(
         "--output-dir",
         type=str,
@@ -212,35 +552,26 @@ def main():
 
     args = parser.parse_args()
 
-    # Parse dates
-    start_date = None
-    end_date = None
-
+    # Parse dates (defaults aligned to whole days, as in train_models)
+    start_date, end_date = default_date_range()
     if args.start_date:
         start_date = datetime.strptime(args.start_date, "%Y-%m-%d")
-    else:
-        start_date = datetime.now() - timedelta(days=180)
-
     if args.end_date:
         end_date = datetime.strptime(args.end_date, "%Y-%m-%d")
-    else:
-        end_date = datetime.now()
 
-    # Get database session
-    db = next(get_db())
+    # Get database session (read replica when configured)
+    db = open_read_session()
 
     try:
-        # Collect training data
-        logger.info("Collecting training data")
-        collector = DataCollector(db)
-        df = collector.collect_training_data(
-            start_date=start_date, end_date=end_date, include_historical=True
+        # Collect training data (or reuse the matrix an earlier stage cached)
+        dataset = load_training_dataset(
+            DataCollector(db),
+            start_date=start_date,
+            end_date=end_date,
+            cache=None if args.no_dataset_cache else DatasetCache(args.dataset_cache_dir),
         )
-
-        logger.info("Training data collected", rows=len(df), columns=len(df.columns))
-
-        # Prepare features and labels
-        X, y, feature_names = prepare_features_and_labels(df)
+        X, y, feature_names = dataset.X, dataset.y, dataset.feature_names
+        print(dataset.describe())
 
         logger.info(
             "Features and labels prepared",
@@ -249,20 +580,28 @@ def main():
         )
 
         # Tune hyperparameters
+        search_options = {
+            "strategy": args.search,
+            "resource": args.resource,
+            "factor": args.factor,
+            "cache_dir": args.cache_dir,
+        }
         if args.model_type == "random_forest":
             results = tune_random_forest(
-                X, y, n_iter=args.n_iter, cv=args.cv, random_state=args.random_state
+                X, y, n_iter=args.n_iter, cv=args.cv, random_state=args.random_state, **search_options
             )
         else:
             results = tune_gradient_boosting(
-                X, y, n_iter=args.n_iter, cv=args.cv, random_state=args.random_state
+                X, y, n_iter=args.n_iter, cv=args.cv, random_state=args.random_state, **search_options
             )
 
         # Print results
         print("\n" + "=" * 70)
         print(f"HYPERPARAMETER TUNING RESULTS: {args.model_type.upper()}")
         print("=" * 70)
-        print(f"\nBest CV Score (RMSE): {results['best_score']:.4f}")
+        print(f"\nBest CV Score (MSE): {results['best_score']:.4f}")
+        for rung in results.get("rungs", []):
+            print(f"  {args.resource} {rung['resource']}: {rung['candidates']} candidates, best MSE {rung['best_mse']:.4f}")
         print("\nBest Parameters:")
         for param, value in results["best_params"].items():
             print(f"  {param}: {value}")
@@ -6,6 +6,9 @@ to various endpoints.
 
 Usage:
     python scripts/load_test.py --base-url http://localhost:8000 --concurrent 10 --requests 100
+
+Compare the p99 column before and after a change at the same --concurrent
+level; tail latency is what grows when requests block the event loop.
 """
 import argparse
 import asyncio
@@ -16,6 +19,13 @@ import httpx
 from statistics import mean, median, stdev
 
 
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of durations."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
 class LoadTestResults:
     """Store load test results."""
 
@@ -61,6 +71,8 @@ class LoadTestResults:
                 "median": round(median(times), 3),
                 "min": round(min(times), 3),
                 "max": round(max(times), 3),
+                "p95": round(percentile(times, 95), 3),
+                "p99": round(percentile(times, 99), 3),
                 "stdev": round(stdev(times), 3) if len(times) > 1 else 0.0,
             }
 
@@ -78,6 +90,8 @@ class LoadTestResults:
                 "median": round(median(durations), 3),
                 "min": round(min(durations), 3),
                 "max": round(max(durations), 3),
+                "p95": round(percentile(durations, 95), 3),
+                "p99": round(percentile(durations, 99), 3),
                 "stdev": round(stdev(durations), 3) if len(durations) > 1 else 0.0,
             },
             "by_endpoint": endpoint_stats,
@@ -99,6 +113,8 @@ class LoadTestResults:
         print(f"  Median: {stats['overall']['median']:.3f}s")
         print(f"  Min:    {stats['overall']['min']:.3f}s")
         print(f"  Max:    {stats['overall']['max']:.3f}s")
+        print(f"  P95:    {stats['overall']['p95']:.3f}s")
+        print(f"  P99:    {stats['overall']['p99']:.3f}s")
         print(f"  StdDev: {stats['overall']['stdev']:.3f}s")
         
         print("\nStatus Code Distribution:")
@@ -113,6 +129,7 @@ class LoadTestResults:
             print(f"    Median:   {ep_stats['median']:.3f}s")
             print(f"    Min:      {ep_stats['min']:.3f}s")
             print(f"    Max:      {ep_stats['max']:.3f}s")
+            print(f"    P99:      {ep_stats['p99']:.3f}s")
         
         if self.errors:
             print("\nErrors:")
@@ -255,6 +272,7 @@ def main():
         {"path": "/api/v1/claims", "method": "GET", "count": args.requests},
         {"path": "/api/v1/remits", "method": "GET", "count": args.requests},
         {"path": "/api/v1/episodes", "method": "GET", "count": args.requests},
+        {"path": "/api/v1/claims/1", "method": "GET", "count": args.requests},
         {"path": "/api/v1/cache/stats", "method": "GET", "count": args.requests // 2},
     ]
     
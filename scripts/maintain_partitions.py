@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Create upcoming monthly partitions and detach expired ones.
+
+Runs the same maintenance as the maintain_partitions Celery task, for cron or
+manual use on PostgreSQL.
+
+Usage:
+    python scripts/maintain_partitions.py
+    python scripts/maintain_partitions.py --months-ahead 6 --dry-run
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.config.database import engine
+from app.services.maintenance.partitions import PARTITION_PREMAKE_MONTHS, maintain_partitions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintain monthly table partitions")
+    parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=PARTITION_PREMAKE_MONTHS,
+        help=f"Months of partitions to create ahead (default: {PARTITION_PREMAKE_MONTHS})",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Show the changes and roll them back")
+    args = parser.parse_args()
+
+    with engine.connect() as connection:
+        results = maintain_partitions(connection, months_ahead=args.months_ahead)
+        if args.dry_run:
+            connection.rollback()
+        else:
+            connection.commit()
+
+    if not results:
+        print("No partitioned tables found (PostgreSQL migration e6f2a9c4b1d8 not applied)")
+        return 0
+
+    prefix = "Would have " if args.dry_run else ""
+    for table, changes in results.items():
+        print(f"{table}:")
+        print(f"  {prefix}created: {', '.join(changes['created']) or '-'}")
+        print(f"  {prefix}detached: {', '.join(changes['detached']) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -70,7 +70,7 @@ echo -e "${GREEN}Terminal 2 - Celery Worker:${NC}"
 echo "   # IMPORTANT: Activate virtual environment first"
 echo "   source venv/bin/activate"
 echo "   # Then start Celery worker"
-echo "   celery -A app.services.queue.tasks worker --loglevel=info"
+echo "   celery -A app.services.queue.tasks worker --loglevel=info -Q ingest,link,score,learning"
 echo ""
 echo -e "${GREEN}Terminal 3 - FastAPI Server:${NC}"
 echo "   # IMPORTANT: Activate virtual environment first"
@@ -2,13 +2,15 @@
 import os
 import secrets
 import string
-from typing import AsyncGenerator, Generator
+import uuid
+from typing import AsyncGenerator, Callable, Generator, List
 from unittest.mock import MagicMock, patch
 
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 # Set test environment variables BEFORE any app imports
 os.environ["TESTING"] = "true"
@@ -65,10 +67,11 @@ _redis_patcher_cache.start()
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
 
-from app.config.database import Base, get_db
+from app.config.database import Base, create_async_session_factory, get_async_db, get_async_read_db, get_db
 from app.main import app
 from app.models.database import (
     Claim,
+    ClaimEpisode,
     ClaimLine,
     Payer,
     Provider,
@@ -105,9 +108,10 @@ def clear_cache():
 @pytest.fixture(scope="function")
 def test_db() -> Generator[Session, None, None]:
     """Create a test database session with transaction rollback."""
-    # Use SQLite in-memory database for tests
+    # Use SQLite in-memory database for tests. Shared-cache mode lets the
+    # aiosqlite connections of async_test_engine open the same database.
     engine = create_engine(
-        "sqlite:///:memory:",
+        f"sqlite:///file:test_{uuid.uuid4().hex}?mode=memory&cache=shared&uri=true",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
@@ -161,10 +165,40 @@ def override_get_db(db_session: Session):
     return _get_db
 
 
+def _read_uncommitted(dbapi_connection, connection_record):
+    """Let async sessions see rows the test session has flushed but not committed."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA read_uncommitted = 1")
+    cursor.close()
+
+
+@pytest.fixture(scope="function")
+def async_test_engine(db_session: Session) -> AsyncEngine:
+    """Async engine on the test database (one aiosqlite connection per session)."""
+    url = db_session.get_bind().url.set(drivername="sqlite+aiosqlite")
+    engine = create_async_engine(url, poolclass=NullPool)
+    event.listen(engine.sync_engine, "connect", _read_uncommitted)
+    return engine
+
+
+@pytest.fixture(scope="function")
+def override_get_async_db(async_test_engine: AsyncEngine):
+    """Override the get_async_db dependency."""
+    session_factory = create_async_session_factory(async_test_engine)
+
+    async def _get_async_db() -> AsyncGenerator[AsyncSession, None]:
+        async with session_factory() as session:
+            yield session
+
+    return _get_async_db
+
+
 @pytest.fixture(scope="function")
-def client(override_get_db) -> Generator[TestClient, None, None]:
+def client(override_get_db, override_get_async_db) -> Generator[TestClient, None, None]:
     """Create a test client for the FastAPI app."""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
     # Set raise_server_exceptions=False so that 500 errors return responses instead of raising
     with TestClient(app, raise_server_exceptions=False) as test_client:
         yield test_client
@@ -172,9 +206,11 @@ def client(override_get_db) -> Generator[TestClient, None, None]:
 
 
 @pytest.fixture(scope="function")
-async def async_client(override_get_db) -> AsyncGenerator[AsyncClient, None]:
+async def async_client(override_get_db, override_get_async_db) -> AsyncGenerator[AsyncClient, None]:
     """Create an async test client for the FastAPI app."""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
     app.dependency_overrides.clear()
@@ -286,3 +322,18 @@ def sample_claim_with_lines(
     db_session.refresh(sample_claim)
     return sample_claim
 
+
+@pytest.fixture
+def make_training_episodes(db_session: Session) -> Callable[[int], List[ClaimEpisode]]:
+    """Create linked episodes to train models on (every third remittance is denied)."""
+
+    def _make(count: int) -> List[ClaimEpisode]:
+        episodes = []
+        for index in range(count):
+            claim = ClaimFactory(total_charge_amount=100.0 + index)
+            ClaimLineFactory(claim=claim, charge_amount=100.0 + index)
+            remittance = RemittanceFactory(denial_reasons=["CO45"] if index % 3 == 0 else None)
+            episodes.append(ClaimEpisodeFactory(claim=claim, remittance=remittance))
+        return episodes
+
+    return _make
@@ -0,0 +1,126 @@
+"""Tests for adaptive ingest batch sizes and memory backpressure."""
+from unittest.mock import patch
+
+import pytest
+
+from app.services.edi import adaptive_batch
+from app.services.edi.adaptive_batch import AdaptiveBatchSizer, wait_for_memory_headroom
+from app.utils import memory_monitor
+from app.utils.memory_monitor import PRESSURE_CRITICAL, PRESSURE_NONE, PRESSURE_WARNING, memory_pressure
+from app.utils.metrics import INGEST_BATCH_SIZE
+
+
+def _sizer(**kwargs):
+    options = {"initial_size": 100, "min_size": 10, "max_size": 1000, "target_seconds": 1.0}
+    options.update(kwargs)
+    return AdaptiveBatchSizer("test", **options)
+
+
+@pytest.fixture
+def pressure():
+    """Patch the memory pressure seen by the sizer (PRESSURE_NONE unless changed)."""
+    with patch("app.services.edi.adaptive_batch.memory_pressure", return_value=PRESSURE_NONE) as mock_pressure:
+        yield mock_pressure
+
+
+@pytest.mark.unit
+class TestAdaptiveBatchSizer:
+    """Tests for batch size adjustments."""
+
+    def test_grows_on_fast_full_batches(self, pressure):
+        """Test growth while full batches flush well under the target."""
+        sizer = _sizer()
+
+        assert sizer.record(100, 0.1) == 150
+        assert sizer.record(150, 0.1) == 225
+        assert INGEST_BATCH_SIZE.value(entity="test") == 225
+
+    def test_partial_batch_does_not_grow(self, pressure):
+        """Test that the short last batch of a file says nothing about headroom."""
+        assert _sizer().record(20, 0.01) == 100
+
+    def test_shrinks_on_slow_flush(self, pressure):
+        """Test shrinking in proportion to the latency overshoot, at most by half."""
+        assert _sizer().record(100, 1.25) == 80
+        assert _sizer().record(100, 10.0) == 50
+
+    def test_memory_pressure(self, pressure):
+        """Test halving on warnings and dropping to the minimum on critical pressure."""
+        sizer = _sizer()
+
+        pressure.return_value = PRESSURE_WARNING
+        assert sizer.record(100, 0.1) == 50
+
+        pressure.return_value = PRESSURE_CRITICAL
+        assert sizer.record(50, 0.1) == 10
+
+    def test_bounds(self, pressure):
+        """Test that the size stays within min and max."""
+        sizer = _sizer(initial_size=900)
+        assert sizer.record(900, 0.1) == 1000
+        assert _sizer(initial_size=1).size == 10
+
+    def test_batches_use_current_size(self, pressure):
+        """Test that record() between batches changes the next slice."""
+        sizer = _sizer(initial_size=10)
+        sizes = []
+        for batch in sizer.batches(list(range(100))):
+            sizes.append(len(batch))
+            sizer.record(len(batch), 0.1)
+
+        assert sizes == [10, 15, 22, 33, 20]
+
+
+@pytest.mark.unit
+class TestBackpressure:
+    """Tests for pausing ingest on critical system memory."""
+
+    def test_no_pause_with_headroom(self, pressure):
+        """Test that ingest continues immediately."""
+        with patch("app.services.edi.adaptive_batch.time.sleep") as mock_sleep:
+            assert wait_for_memory_headroom("test") == 0.0
+        mock_sleep.assert_not_called()
+
+    def test_pause_until_headroom(self, pressure):
+        """Test waiting until pressure clears, then resuming at the minimum size."""
+        pressure.side_effect = [PRESSURE_CRITICAL, PRESSURE_CRITICAL, PRESSURE_CRITICAL, PRESSURE_NONE]
+        sizer = _sizer()
+
+        with patch("app.services.edi.adaptive_batch.time.sleep") as mock_sleep:
+            sizer.wait_for_headroom()
+
+        assert mock_sleep.call_count == 2
+        assert sizer.paused_seconds == 2 * adaptive_batch.INGEST_BACKPRESSURE_POLL_SECONDS
+        assert sizer.size == 10
+
+    def test_pause_is_bounded(self, pressure):
+        """Test that ingest resumes after the maximum wait even without headroom."""
+        pressure.return_value = PRESSURE_CRITICAL
+
+        with patch.object(adaptive_batch, "INGEST_BACKPRESSURE_MAX_WAIT_SECONDS", 2.0), \
+                patch("app.services.edi.adaptive_batch.time.sleep") as mock_sleep:
+            assert wait_for_memory_headroom("test") == 2.0
+        assert mock_sleep.call_count == 4
+
+
+@pytest.mark.unit
+class TestMemoryPressure:
+    """Tests for memory_pressure levels."""
+
+    def _pressure(self, system_percent, rss_mb, baseline_mb):
+        with patch.object(memory_monitor.psutil, "virtual_memory") as mock_memory, \
+                patch.object(memory_monitor.psutil, "Process") as mock_process:
+            mock_memory.return_value.percent = system_percent
+            mock_process.return_value.memory_info.return_value.rss = rss_mb * 1024 * 1024
+            return memory_pressure(baseline_mb)
+
+    def test_levels(self):
+        """Test system utilisation and process growth against the thresholds."""
+        assert self._pressure(10.0, 4000, 3900) == PRESSURE_NONE
+        assert self._pressure(memory_monitor.SYSTEM_MEMORY_WARNING_PCT, 100, None) == PRESSURE_WARNING
+        assert self._pressure(memory_monitor.SYSTEM_MEMORY_CRITICAL_PCT, 100, None) == PRESSURE_CRITICAL
+        assert self._pressure(10.0, 100 + memory_monitor.MEMORY_DELTA_CRITICAL_MB, 100) == PRESSURE_CRITICAL
+
+    def test_absolute_rss_is_not_pressure(self):
+        """Test that memory held before the baseline is ignored."""
+        assert self._pressure(10.0, 4000, None) == PRESSURE_NONE
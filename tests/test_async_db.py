@@ -0,0 +1,176 @@
+"""Tests for async database sessions used by read-heavy routes."""
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from sqlalchemy.util import await_only
+
+from app.api.routes import claims
+from app.config import database
+from app.config.database import (
+    Base,
+    create_async_database_engine,
+    create_async_session_factory,
+    dispose_async_engine,
+    get_async_database_url,
+    get_async_db,
+    get_db,
+)
+from app.models.database import Claim, ClaimLine
+from tests.factories import ClaimFactory
+
+
+@pytest.mark.unit
+class TestAsyncDatabaseUrl:
+    """Tests for mapping database URLs to async drivers."""
+
+    @pytest.mark.parametrize(
+        "url, expected",
+        [
+            ("postgresql://u:p@db:5432/marb", "postgresql+asyncpg://u:p@db:5432/marb"),
+            ("postgresql+psycopg2://u:p@db/marb", "postgresql+asyncpg://u:p@db/marb"),
+            ("postgresql://u:p@localhost/marb?sslmode=disable", "postgresql+asyncpg://u:p@localhost/marb?ssl=disable"),
+            ("sqlite:///./test.db", "sqlite+aiosqlite:///./test.db"),
+            ("sqlite+aiosqlite:///:memory:", "sqlite+aiosqlite:///:memory:"),
+        ],
+    )
+    def test_async_driver(self, url, expected):
+        """Test driver and SSL parameter mapping."""
+        assert get_async_database_url(url) == expected
+
+    def test_postgres_pool_settings(self, monkeypatch):
+        """Test that the async pool is sized from its own settings."""
+        monkeypatch.setenv("DATABASE_ASYNC_POOL_SIZE", "4")
+        monkeypatch.setenv("DATABASE_ASYNC_MAX_OVERFLOW", "2")
+
+        engine = create_async_database_engine("postgresql://u:p@db/marb")
+
+        assert engine.dialect.driver == "asyncpg"
+        assert engine.pool.size() == 4
+        assert engine.pool._max_overflow == 2
+
+
+@pytest.mark.unit
+class TestGetAsyncDb:
+    """Tests for the get_async_db dependency."""
+
+    async def test_yields_async_session(self):
+        """Test a session from the module-level engine (DATABASE_URL)."""
+        try:
+            async for session in get_async_db():
+                assert isinstance(session, AsyncSession)
+                assert (await session.execute(text("SELECT 1"))).scalar() == 1
+        finally:
+            await dispose_async_engine()
+
+        assert database._async_engine is None
+
+
+@pytest.mark.api
+class TestAsyncReadRoutes:
+    """Read routes on async sessions see the test session's data."""
+
+    def test_claim_flushed_in_test_session(self, client, db_session):
+        """Test that rows flushed but not committed are visible."""
+        claim = ClaimFactory.build(claim_control_number="FLUSHED1")
+        db_session.add(claim)
+        db_session.flush()
+
+        response = client.get(f"/api/v1/claims/{claim.id}")
+
+        assert response.status_code == 200
+        assert response.json()["claim_control_number"] == "FLUSHED1"
+
+    def test_list_and_missing(self, client, db_session):
+        """Test a list route and a not-found detail route."""
+        ClaimFactory.create_batch(3)
+
+        assert len(client.get("/api/v1/claims").json()["claims"]) == 3
+        assert client.get("/api/v1/risk/999999").status_code == 404
+        assert client.get("/api/v1/patterns/payer/999999").status_code == 404
+
+
+# Simulated database round trip per statement
+QUERY_LATENCY = 0.02
+CONCURRENT_REQUESTS = 50
+
+
+def _slow_statement(statement):
+    """sqlite3 trace callback; runs on the thread executing the statement."""
+    time.sleep(QUERY_LATENCY)
+
+
+async def _p99(client: httpx.AsyncClient, path: str) -> float:
+    async def timed_request():
+        start = time.perf_counter()
+        response = await client.get(path)
+        assert response.status_code == 200
+        return time.perf_counter() - start
+
+    latencies = await asyncio.gather(*(timed_request() for _ in range(CONCURRENT_REQUESTS)))
+    return float(np.percentile(latencies, 99))
+
+
+@pytest.mark.performance
+async def test_benchmark_concurrent_claim_reads(tmp_path):
+    """Compare p99 latency of concurrent claim reads on sync and async sessions."""
+    # A file database: connections to a shared-cache memory database serialize
+    url = f"sqlite:///{tmp_path / 'bench.db'}"
+    sync_engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=NullPool)
+    async_engine = create_async_engine(get_async_database_url(url), poolclass=NullPool)
+    Base.metadata.create_all(bind=sync_engine)
+    with Session(sync_engine) as session:
+        claim = Claim(claim_control_number="BENCH1", claim_lines=[ClaimLine(line_number=str(n)) for n in range(3)])
+        session.add(claim)
+        session.commit()
+        claim_id = claim.id
+
+    @event.listens_for(sync_engine, "connect")
+    def _slow_sync_connection(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(_slow_statement)
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _slow_async_connection(dbapi_connection, connection_record):
+        await_only(dbapi_connection.driver_connection.set_trace_callback(_slow_statement))
+
+    def _get_db():
+        with Session(sync_engine) as session:
+            yield session
+
+    async_session_factory = create_async_session_factory(async_engine)
+
+    async def _get_async_db():
+        async with async_session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(claims.router)
+
+    @app.get("/blocking/claims/{claim_id}")
+    async def get_claim_blocking(claim_id: int, db: Session = Depends(get_db)):
+        # Previous implementation: sync session queried on the event loop
+        return claims._claim_detail(db, claim_id)
+
+    app.dependency_overrides[get_db] = _get_db
+    app.dependency_overrides[get_async_db] = _get_async_db
+
+    with patch.object(claims, "cache") as mock_cache:
+        mock_cache.get.return_value = None
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            blocking_p99 = await _p99(client, f"/blocking/claims/{claim_id}")
+            async_p99 = await _p99(client, f"/claims/{claim_id}")
+    sync_engine.dispose()
+
+    print(f"\n{CONCURRENT_REQUESTS} concurrent claim reads, {QUERY_LATENCY * 1000:.0f}ms per statement: "
+          f"p99 sync {blocking_p99 * 1000:.0f}ms, async {async_p99 * 1000:.0f}ms "
+          f"({blocking_p99 / async_p99:.1f}x)")
+    assert async_p99 < blocking_p99 / 2
@@ -0,0 +1,116 @@
+"""Tests for the model inference benchmark harness."""
+import numpy as np
+import pytest
+
+from ml.training.benchmark_inference import (
+    append_history,
+    compare_reports,
+    load_baseline,
+    run_benchmark,
+    synthetic_feature_matrix,
+    torch_available,
+)
+
+
+def _report(created_at="2024-01-01T00:00:00", cpu_count=4, n_samples=1000, **metrics):
+    result = {
+        "single_p50_ms": 1.0,
+        "single_p99_ms": 2.0,
+        "batch_rows_per_second": 100000.0,
+        "load_seconds": 0.5,
+        "model_memory_mb": 50.0,
+    }
+    result.update(metrics)
+    return {
+        "created_at": created_at,
+        "environment": {"platform": "Linux-x86_64", "cpu_count": cpu_count},
+        "config": {"n_samples": n_samples},
+        "results": {"random_forest": result, "deep": {"skipped": "torch is not installed"}},
+    }
+
+
+@pytest.mark.unit
+class TestCompareReports:
+    """Tests for compare_reports and the history file."""
+
+    def test_regressions(self):
+        """Test that only changes beyond the tolerance and noise floor regress."""
+        current = _report(single_p99_ms=2.5, batch_rows_per_second=80000.0, load_seconds=0.504)
+
+        changes = {entry["metric"]: entry for entry in compare_reports(current, _report(), tolerance=0.2)}
+
+        assert set(changes) == {
+            "single_p50_ms", "single_p99_ms", "batch_rows_per_second", "load_seconds", "model_memory_mb"
+        }
+        assert changes["single_p99_ms"]["regression"]
+        assert changes["single_p99_ms"]["change"] == pytest.approx(0.25)
+        # 25% fewer rows per second is a 25% slowdown
+        assert changes["batch_rows_per_second"]["regression"]
+        assert not changes["single_p50_ms"]["regression"]
+
+    def test_noise_floor(self):
+        """Test that a large ratio of tiny numbers is not a regression."""
+        current = _report(single_p50_ms=0.02)
+
+        changes = compare_reports(current, _report(single_p50_ms=0.01))
+
+        assert not any(entry["regression"] for entry in changes)
+
+    def test_baseline_matches_config_and_machine(self, tmp_path):
+        """Test that the latest comparable report in the history is the baseline."""
+        history = tmp_path / "history.jsonl"
+        append_history(history, _report("2024-01-01T00:00:00"))
+        append_history(history, _report("2024-01-02T00:00:00"))
+        append_history(history, _report("2024-01-03T00:00:00", cpu_count=8))
+        append_history(history, _report("2024-01-04T00:00:00", n_samples=5))
+
+        assert load_baseline(history, _report())["created_at"] == "2024-01-02T00:00:00"
+        assert load_baseline(tmp_path / "missing.jsonl", _report()) is None
+
+
+@pytest.mark.unit
+def test_synthetic_matrix_fixed():
+    """Test that the seed fixes the synthetic matrix."""
+    first = synthetic_feature_matrix(50, seed=7)
+
+    assert np.array_equal(first["X"], synthetic_feature_matrix(50, seed=7)["X"])
+    assert first["X"].dtype == np.float32
+    assert ((first["y"] >= 0) & (first["y"] <= 1)).all()
+
+
+@pytest.mark.integration
+def test_run_benchmark(tmp_path):
+    """Test that each variant is measured in its own process and saved models can be added."""
+    report = run_benchmark(
+        variants=["gradient_boosting", "deep"],
+        n_samples=300,
+        single_rows=20,
+        batch_size=100,
+        repeats=2,
+        n_estimators=5,
+        work_dir=str(tmp_path),
+    )
+
+    result = report["results"]["gradient_boosting"]
+    assert result["batch_size"] == 100
+    assert 0 < result["single_p50_ms"] <= result["single_p99_ms"]
+    assert result["batch_rows_per_second"] > 0
+    assert result["resident_memory_mb"] > 0
+    if not torch_available():
+        assert report["results"]["deep"] == {"skipped": "torch is not installed"}
+    assert report["config"]["n_features"] == 32
+    assert list(tmp_path.iterdir()) == []
+
+    from ml.models.risk_predictor import RiskPredictor
+
+    data = synthetic_feature_matrix(100)
+    model = RiskPredictor()
+    model.train(data["X"], data["y"], n_estimators=3)
+    model.save_model(str(tmp_path / "saved_forest.pkl"))
+
+    report = run_benchmark(
+        variants=[], model_paths=[str(tmp_path / "saved_forest.pkl")], n_samples=100,
+        single_rows=5, batch_size=50, repeats=1, isolated=False,
+    )
+
+    assert report["results"]["saved_forest"]["batch_size"] == 50
@@ -0,0 +1,119 @@
+"""Tests for the blob spool used to hand uploads to workers."""
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.models.database import Claim
+from app.services.queue.blob_spool import BlobChecksumError, DirectoryBlobSpool, open_blob_spool
+from app.services.queue.tasks import process_edi_file
+from scripts.generate_large_edi_files import generate_837_file
+
+
+def _commit(spool, content):
+    with spool.writer() as writer:
+        writer.write(content)
+        return writer.commit()
+
+
+def _files(directory):
+    return [name for _, _, names in os.walk(directory) for name in names]
+
+
+@pytest.fixture
+def spool(tmp_path):
+    """Empty local spool."""
+    return DirectoryBlobSpool(str(tmp_path / "spool"), durable=False)
+
+
+@pytest.mark.unit
+class TestDirectoryBlobSpool:
+    """Tests for writing, reading and releasing blobs."""
+
+    def test_round_trip(self, spool):
+        """Test that a committed blob reads back through its handle."""
+        handle = _commit(spool, b"ISA*00~" * 1000)
+
+        assert handle["size"] == 7000
+        assert open_blob_spool(handle).read(handle) == b"ISA*00~" * 1000
+        assert _files(spool.tmp_dir) == []
+
+    def test_same_content_stored_once(self, spool):
+        """Test that the blob lives until its last reference is released."""
+        first = _commit(spool, b"same")
+        second = _commit(spool, b"same")
+
+        assert first["sha256"] == second["sha256"]
+        assert first["ref"] != second["ref"]
+        assert len(_files(spool.blob_dir)) == 1
+
+        assert spool.release(first) is False
+        assert spool.read(second) == b"same"
+        assert spool.release(second) is True
+        assert _files(spool.blob_dir) == []
+        assert os.listdir(spool.ref_dir) == []
+
+    def test_corrupt_blob(self, spool):
+        """Test that content not matching the handle is rejected."""
+        handle = _commit(spool, b"original")
+        with open(spool.blob_path(handle["sha256"]), "wb") as f:
+            f.write(b"modified")
+
+        with pytest.raises(BlobChecksumError):
+            spool.read(handle)
+
+    def test_missing_blob(self, spool):
+        """Test that reading a released blob fails."""
+        handle = _commit(spool, b"gone")
+        spool.release(handle)
+
+        with pytest.raises(FileNotFoundError):
+            spool.read(handle)
+
+    def test_failed_write_leaves_nothing(self, spool):
+        """Test that an uncommitted writer removes its temp file."""
+        with pytest.raises(RuntimeError):
+            with spool.writer() as writer:
+                writer.write(b"partial")
+                raise RuntimeError("client disconnected")
+
+        assert _files(spool.root) == []
+
+    def test_sweep_stale(self, spool):
+        """Test that sweep removes references and temp files of crashed holders."""
+        handle = _commit(spool, b"orphaned")
+        abandoned = spool.writer()
+        abandoned.write(b"abandoned")
+
+        assert spool.sweep(max_age_seconds=3600) == 0
+        assert spool.sweep(max_age_seconds=-1) == 1
+
+        assert _files(spool.root) == []
+        abandoned.abort()
+        with pytest.raises(FileNotFoundError):
+            spool.read(handle)
+
+
+@pytest.mark.integration
+class TestProcessSpooledFile:
+    """Tests for process_edi_file with a blob handle."""
+
+    def test_process_and_release(self, db_session, spool, tmp_path):
+        """Test that the worker loads the spooled file and releases it."""
+        generate_837_file(5, tmp_path / "claims_837.edi")
+        handle = _commit(spool, (tmp_path / "claims_837.edi").read_bytes())
+
+        with patch("app.services.queue.tasks.SessionLocal", return_value=db_session), \
+                patch("celery.app.task.Context", return_value=MagicMock(id="spool-task", retries=0)):
+            result = process_edi_file.run(blob_handle=handle, filename="spooled_837.edi", file_type="837")
+
+        assert result["status"] == "success"
+        assert result["claims_created"] == db_session.query(Claim).count() == 5
+        assert _files(spool.blob_dir) == []
+
+    def test_requires_one_source(self, spool):
+        """Test that a handle cannot be combined with inline content."""
+        handle = _commit(spool, b"ISA*00~")
+
+        with pytest.raises(ValueError):
+            process_edi_file.run(file_content="ISA*00~", blob_handle=handle, filename="x.edi")
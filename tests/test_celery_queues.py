@@ -0,0 +1,233 @@
+"""Tests for Celery queue routing and the chunked fan-out of large 837 files."""
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.exc import OperationalError
+
+import pytest
+
+from app.config.celery import CELERY_QUEUES, PRIORITY_HIGH, PRIORITY_LOW, celery_app
+from app.models.database import Claim, ClaimLine
+from app.services.edi.parser import EDIParser
+from app.services.edi.raw_store import RawBlockLocator
+from app.services.queue import tasks
+from scripts.generate_large_edi_files import generate_837_file
+
+
+def _route(task_name):
+    return celery_app.amqp.router.route({}, task_name)
+
+
+@pytest.fixture
+def eager_celery():
+    """Run tasks, groups and chords in-process."""
+    previous = celery_app.conf.task_always_eager
+    celery_app.conf.task_always_eager = True
+    yield
+    celery_app.conf.task_always_eager = previous
+
+
+@pytest.fixture
+def edi_837(tmp_path):
+    """A generated 837 file with 23 claims."""
+    path = tmp_path / "claims_837.edi"
+    generate_837_file(23, path)
+    return path.read_text()
+
+
+@pytest.mark.unit
+class TestRouting:
+    """Tests for task routes."""
+
+    @pytest.mark.parametrize(
+        "task_name, queue",
+        [
+            ("process_edi_file", "ingest"),
+            ("load_837_chunk", "ingest"),
+            ("finalize_edi_file", "ingest"),
+            ("fail_edi_file", "ingest"),
+            ("link_episodes", "link"),
+            ("detect_patterns", "learning"),
+            ("retrain_ml_model", "learning"),
+            ("maintain_partitions", "learning"),
+            ("sweep_blob_spool", "learning"),
+        ],
+    )
+    def test_task_queue(self, task_name, queue):
+        """Test that every task is routed to its queue."""
+        assert task_name in celery_app.tasks
+        assert _route(task_name)["queue"].name == queue
+
+    def test_priorities(self):
+        """Test per-task priorities."""
+        assert _route("finalize_edi_file")["priority"] == PRIORITY_HIGH
+        assert _route("fail_edi_file")["priority"] == PRIORITY_HIGH
+        assert _route("retrain_ml_model")["priority"] == PRIORITY_LOW
+
+    def test_queues_declared(self):
+        """Test that workers can consume every queue."""
+        assert sorted(queue.name for queue in celery_app.conf.task_queues) == sorted(CELERY_QUEUES)
+
+
+@pytest.mark.unit
+class TestEpisodeLinkingFanOut:
+    """Tests for batched link_episodes dispatch."""
+
+    def test_batches(self):
+        """Test that linking tasks are published as groups of FANOUT_BATCH_SIZE."""
+        with patch.object(tasks, "FANOUT_BATCH_SIZE", 2), patch("app.services.queue.tasks.group") as mock_group:
+            tasks._queue_episode_linking([1, 2, 3, 4, 5])
+
+        batches = [[signature.args[0] for signature in call.args[0]] for call in mock_group.call_args_list]
+        assert batches == [[1, 2], [3, 4], [5]]
+        assert mock_group.return_value.apply_async.call_count == 3
+
+    def test_failed_batch_does_not_stop_others(self):
+        """Test that a publish failure only loses its own batch."""
+        with patch.object(tasks, "FANOUT_BATCH_SIZE", 2), patch("app.services.queue.tasks.group") as mock_group:
+            mock_group.return_value.apply_async.side_effect = [ConnectionError("broker down"), MagicMock()]
+            tasks._queue_episode_linking([1, 2, 3])
+
+        assert mock_group.return_value.apply_async.call_count == 2
+
+
+@pytest.mark.unit
+class TestClaimBlocks:
+    """Tests for splitting 837 files into independently parsed ranges."""
+
+    def test_locator_base_offset(self):
+        """Test that ranges located in a slice map back to the whole file."""
+        raw = b"ISA*00~HL*1**20*1~CLM*A*10~HL*2*1*22*0~CLM*B*20~"
+        offset = raw.index(b"HL*2")
+
+        locator = RawBlockLocator("hash", raw[offset:], base_offset=offset)
+
+        assert locator.locate([["HL", "2", "1", "22", "0"], ["CLM", "B", "20"]]) == (offset, len(raw) - offset)
+
+    def test_parse_claim_blocks_matches_parse(self, edi_837):
+        """Test that parsing blocks in two ranges gives the same claims as parse()."""
+        parser = EDIParser(auto_detect_format=False)
+        expected = parser.parse(edi_837, "claims_837.edi")["claims"]
+
+        blocks = parser.split_claim_blocks(edi_837)
+        claims = parser.parse_claim_blocks(blocks[:10]) + parser.parse_claim_blocks(blocks[10:], first_index=10)
+
+        assert [c["claim_control_number"] for c in claims] == [c["claim_control_number"] for c in expected]
+        assert claims == expected
+
+
+@pytest.mark.integration
+class TestChunkedIngest:
+    """Tests for the chord of chunk tasks used for large 837 files."""
+
+    def _process(self, db_session, content, fanout_min_mb):
+        with patch("app.services.queue.tasks.SessionLocal", return_value=db_session), \
+                patch.object(tasks, "EDI_FANOUT_MIN_MB", fanout_min_mb), \
+                patch.object(tasks, "EDI_FANOUT_CHUNK_CLAIMS", 10), \
+                patch("app.services.queue.tasks.notify_file_processed") as mock_notify:
+            result = tasks.process_edi_file.apply(
+                kwargs={"file_content": content, "filename": "claims_837.edi", "file_type": "837"}
+            ).get()
+        return result, mock_notify
+
+    def _loaded(self, db_session):
+        claims = db_session.query(Claim).order_by(Claim.claim_control_number).all()
+        return [
+            (
+                claim.claim_control_number,
+                claim.total_charge_amount,
+                claim.raw_file_hash,
+                claim.raw_offset,
+                claim.raw_length,
+                sorted(line.procedure_code for line in claim.claim_lines),
+            )
+            for claim in claims
+        ]
+
+    def test_chunks_load_same_claims(self, db_session, eager_celery, edi_837):
+        """Test that a chunked load writes the same claims as an inline load."""
+        inline_result, _ = self._process(db_session, edi_837, fanout_min_mb=1024)
+        inline = self._loaded(db_session)
+        db_session.query(ClaimLine).delete()
+        db_session.query(Claim).delete()
+        db_session.commit()
+
+        result, mock_notify = self._process(db_session, edi_837, fanout_min_mb=0)
+
+        assert inline_result["claims_created"] == 23
+        assert result["status"] == "chunked"
+        assert result["chunks"] == 3
+        assert self._loaded(db_session) == inline
+
+        final = mock_notify.call_args.args[2]
+        assert final["claims_created"] == 23
+        assert final["chunks"] == 3
+
+    def test_falls_back_without_claim_blocks(self, db_session, eager_celery):
+        """Test that files without claim blocks are processed in one task."""
+        result, _ = self._process(db_session, "ISA*00~GS*HC~GE*0*1~IEA*1*1~", fanout_min_mb=0)
+
+        assert result["status"] == "success"
+        assert result["claims_created"] == 0
+
+    def test_unlocated_block_stops_chunking(self, db_session, edi_837):
+        """Test that chunking stops at the first claim block not found in the raw file."""
+        with patch.object(RawBlockLocator, "locate", return_value=None) as mock_locate, \
+                patch("app.services.queue.tasks.chord") as mock_chord:
+            result = tasks._fan_out_837(MagicMock(), db_session, edi_837, "claims_837.edi")
+
+        assert result is None
+        mock_locate.assert_called_once()
+        mock_chord.assert_not_called()
+
+    def test_chunk_retried_after_connection_error(self, db_session, eager_celery, edi_837):
+        """Test that a chunk whose database connection drops is retried."""
+        read_raw_range = tasks.read_raw_range
+        calls = []
+
+        def flaky_read(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise OperationalError("SELECT", {}, Exception("connection lost"))
+            return read_raw_range(*args, **kwargs)
+
+        with patch("app.services.queue.tasks.read_raw_range", side_effect=flaky_read), \
+                patch.object(tasks.load_837_chunk, "retry_backoff", False):
+            result, mock_notify = self._process(db_session, edi_837, fanout_min_mb=0)
+
+        assert result["chunks"] == 3
+        assert len(calls) == 4
+        assert db_session.query(Claim).count() == 23
+        assert mock_notify.call_args.args[2]["claims_created"] == 23
+
+    def test_claim_notifications_sent_by_chunks(self, db_session, eager_celery, edi_837):
+        """Test that chunks notify their own claims and return only counts."""
+        with patch.object(tasks, "NOTIFICATION_QUERY_BATCH_SIZE", 4), \
+                patch("app.services.queue.tasks.digest_aggregator") as mock_digest, \
+                patch.object(tasks.finalize_edi_file, "run", wraps=tasks.finalize_edi_file.run) as mock_finalize:
+            self._process(db_session, edi_837, fanout_min_mb=0)
+
+        notified = [call.args[1]["claim_id"] for call in mock_digest.add.call_args_list]
+        assert sorted(notified) == sorted(claim.id for claim in db_session.query(Claim))
+        assert {call.args[2]["task_id"] for call in mock_digest.add.call_args_list} != {None}
+        chunk_results = mock_finalize.call_args.args[0]
+        assert [chunk["claims_created"] for chunk in chunk_results] == [10, 10, 3]
+        assert all("claim_ids" not in chunk for chunk in chunk_results)
+
+    def test_failed_chunk_reports_file_failed(self, db_session, edi_837):
+        """Test that the chord reports the file failed when a chunk fails."""
+        with patch("app.services.queue.tasks.chord") as mock_chord, \
+                patch.object(tasks, "EDI_FANOUT_CHUNK_CLAIMS", 10):
+            tasks._fan_out_837(MagicMock(request=MagicMock(id="upload-task")), db_session, edi_837, "claims_837.edi")
+
+        finalize = mock_chord.return_value.call_args.args[0]
+        errback = finalize.options["link_error"][0]
+        assert errback["task"] == "fail_edi_file"
+        assert errback["kwargs"]["parent_task_id"] == "upload-task"
+
+        with patch("app.services.queue.tasks.notify_file_processed") as mock_notify:
+            result = tasks.fail_edi_file.apply(args=("finalize-task",), kwargs=errback["kwargs"]).get()
+
+        assert result["status"] == "failed"
+        mock_notify.assert_called_once_with(
+            "claims_837.edi", "837", result, task_id="upload-task", practice_id=None
+        )
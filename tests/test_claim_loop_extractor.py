@@ -0,0 +1,191 @@
+"""Tests for the single-pass claim loop extractor."""
+import time
+from pathlib import Path
+
+import pytest
+
+from app.services.edi.config import get_parser_config
+from app.services.edi.extractors.claim_extractor import ClaimExtractor
+from app.services.edi.extractors.claim_loop_extractor import ClaimLoopExtractor
+from app.services.edi.extractors.diagnosis_extractor import DiagnosisExtractor
+from app.services.edi.extractors.line_extractor import LineExtractor
+from app.services.edi.extractors.payer_extractor import PayerExtractor
+from app.services.edi.parser import EDIParser
+
+SAMPLES_DIR = Path(__file__).parent.parent / "samples"
+
+
+def _legacy_extract(config, block):
+    """Run the per-segment-type extractors the way the parsers used to."""
+    warnings = []
+    clm_seg = next(seg for seg in block if seg and seg[0] == "CLM")
+    claim_data = ClaimExtractor(config).extract(clm_seg, block, warnings)
+    claim_data.update(PayerExtractor(config).extract(block, warnings))
+    claim_data.update(DiagnosisExtractor(config).extract(block, warnings))
+    claim_data["lines"] = LineExtractor(config).extract(block, warnings)
+    return claim_data, warnings
+
+
+def _loop_extract(config, block):
+    warnings = []
+    clm_seg = next(seg for seg in block if seg and seg[0] == "CLM")
+    return ClaimLoopExtractor(config).extract(clm_seg, block, warnings), warnings
+
+
+def _institutional_block(line_count, clm=None):
+    """Build an institutional claim block with distinct service lines."""
+    block = [
+        ["HL", "2", "1", "22", "0"],
+        ["SBR", "P", "18", "GROUP1", "", "", "", "", "", "CI"],
+        ["NM1", "PR", "2", "BLUE CROSS", "", "", "", "", "PI", "BCBS01"],
+        clm or ["CLM", "CLAIM001", "1500.00", "", "", "13>A>1", "Y", "A", "Y", "I"],
+        ["DTP", "434", "RD8", "20240101-20240105"],
+        ["DTP", "435", "D8", "20240101"],
+        ["DTP", "096", "D8", "20240105"],
+        ["REF", "D9", "PATIENT1"],
+        ["HI", "ABK>E11.9", "ABF>I10"],
+        ["HI", "ABF>Z79.4"],
+    ]
+    for i in range(1, line_count + 1):
+        block.extend([
+            ["LX", str(i)],
+            ["SV2", "0450", f"HC>{99200 + i % 100:05d}", f"{100 + i}.00", "UN", str(i % 3 + 1)],
+            ["DTP", "472", "D8", f"202401{i % 28 + 1:02d}"],
+            ["REF", "6R", f"LINE{i}"],
+        ])
+    return block
+
+
+def _insert(block, anchor, offset, segments):
+    index = block.index(anchor) + offset
+    block[index:index] = segments
+
+
+def _replace(block, anchor, offset, segments):
+    index = block.index(anchor) + offset
+    block[index:index + max(len(segments), 1)] = segments
+
+
+@pytest.fixture
+def config():
+    """Parser configuration."""
+    return get_parser_config()
+
+
+@pytest.mark.unit
+class TestClaimLoopExtractorEquivalence:
+    """The single pass must produce the same output as the per-type extractors."""
+
+    def test_institutional_claim(self, config):
+        """Test a well-formed claim with several lines."""
+        block = _institutional_block(5)
+        claim_data, warnings = _loop_extract(config, block)
+
+        assert (claim_data, warnings) == _legacy_extract(config, block)
+        assert len(claim_data["lines"]) == 5
+        assert claim_data["lines"][2]["service_date"].day == 4
+        assert claim_data["admission_date"].day == 1
+
+    @pytest.mark.parametrize(
+        "edit",
+        [
+            # LX without an SV2 before the next LX
+            lambda b: _replace(b, ["LX", "2"], 1, []),
+            # LX without a line number
+            lambda b: _replace(b, ["LX", "2"], 0, [["LX"]]),
+            # SV2 with too few elements (no service date lookup)
+            lambda b: _replace(b, ["LX", "2"], 1, [["SV2", "0450", "HC>99213"]]),
+            # Service date beyond the 9-segment search window
+            lambda b: _insert(b, ["LX", "3"], 2, [["NTE", "ADD", "x"]] * 9),
+            # Invalid dates
+            lambda b: b.append(["DTP", "472", "D8", "20241399"]),
+            # Empty segments and a non-service-date DTP between SV2 and DTP*472
+            lambda b: _insert(b, ["LX", "1"], 2, [[], ["DTP", "573", "D8", "20240101"]]),
+            # LX at the very end of the block
+            lambda b: b.append(["LX", "99"]),
+            # A second claim in the same subscriber block
+            lambda b: _insert(b, ["LX", "3"], 1, [["CLM", "CLAIM002", "10"]]),
+            # No diagnosis codes
+            lambda b: _replace(b, ["HI", "ABK>E11.9", "ABF>I10"], 0, [["REF", "X", "Y"]] * 2),
+            # CLM segment too short
+            lambda b: _replace(b, b[3], 0, [["CLM"]]),
+        ],
+    )
+    def test_edge_cases(self, config, edit):
+        """Test malformed and unusual blocks."""
+        block = _institutional_block(4)
+        edit(block)
+
+        assert _loop_extract(config, block) == _legacy_extract(config, block)
+
+    @pytest.mark.parametrize(
+        "path",
+        [
+            SAMPLES_DIR / "sample_837.txt",
+            SAMPLES_DIR / "large" / "large_837_100claims.edi",
+            SAMPLES_DIR / "training" / "training_837_claims.edi",
+        ],
+        ids=lambda p: p.name,
+    )
+    def test_sample_files(self, config, path):
+        """Test every claim block of the sample files."""
+        parser = EDIParser()
+        blocks = parser._get_claim_blocks(parser._split_segments(path.read_text()))
+        blocks = [b for b in blocks if any(seg and seg[0] == "CLM" for seg in b)]
+        assert blocks
+
+        for block in blocks:
+            assert _loop_extract(config, block) == _legacy_extract(config, block)
+
+    def test_duplicate_lines_resolved_by_position(self, config):
+        """Test that identical SV2 segments keep their own service dates."""
+        block = _institutional_block(0) + [
+            ["LX", "1"],
+            ["SV2", "0450", "HC>99213", "100.00", "UN", "1"],
+            ["DTP", "472", "D8", "20240101"],
+            ["LX", "2"],
+            ["SV2", "0450", "HC>99213", "100.00", "UN", "1"],
+            ["DTP", "472", "D8", "20240202"],
+        ]
+        claim_data, _ = _loop_extract(config, block)
+
+        assert [line["service_date"].month for line in claim_data["lines"]] == [1, 2]
+
+
+@pytest.mark.unit
+def test_parser_uses_loop_extractor():
+    """Test that parsed institutional claims carry lines from the single pass."""
+    segments = _institutional_block(3)
+    content = "~".join("*".join(seg) for seg in segments) + "~"
+    parser = EDIParser(auto_detect_format=False)
+
+    claim = parser._parse_claim_block(parser._split_segments(content), 0)
+
+    assert [line["line_number"] for line in claim["lines"]] == ["1", "2", "3"]
+    assert claim["principal_diagnosis"] == "E11.9"
+    assert claim["payer_id"] == "BCBS01"
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("line_count", [50, 200, 1000])
+def test_benchmark_claims_with_many_lines(config, line_count):
+    """Benchmark single-pass extraction against the per-type extractors."""
+    block = _institutional_block(line_count)
+    rounds = 5
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        legacy = _legacy_extract(config, block)
+    legacy_time = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        single_pass = _loop_extract(config, block)
+    loop_time = (time.perf_counter() - start) / rounds
+
+    print(
+        f"\n{line_count} lines: per-type extractors {legacy_time * 1000:.2f}ms, "
+        f"single pass {loop_time * 1000:.2f}ms ({legacy_time / loop_time:.1f}x)"
+    )
+    assert single_pass == legacy
+    assert loop_time < legacy_time
@@ -54,8 +54,8 @@ class TestClaimsAPIComprehensive:
             with tempfile.TemporaryDirectory() as temp_dir:
                 with patch.dict(os.environ, {"TEMP_FILE_DIR": temp_dir}):
                     with patch("app.api.routes.claims.TEMP_DIR", temp_dir):
-                        # Mock tempfile.NamedTemporaryFile to raise error
-                        with patch("tempfile.NamedTemporaryFile", side_effect=OSError("Permission denied")):
+                        # Mock the spool's temp file creation to raise error
+                        with patch("app.services.queue.blob_spool.tempfile.mkstemp", side_effect=OSError("Permission denied")):
                             response = client.post(
                                 "/api/v1/claims/upload",
                                 files={"file": file}
@@ -424,7 +424,7 @@ class TestClaimsAPIComprehensive:
         # Clear cache
         cache.delete("count:claim")
         
-        with patch("app.api.routes.claims.cache") as mock_cache:
+        with patch("app.utils.pagination.cache") as mock_cache:
             mock_cache.get.return_value = None
             mock_cache.set = MagicMock()
             
@@ -0,0 +1,310 @@
+"""Tests for columnar claim batches and the batch loader."""
+import time
+from datetime import datetime
+from decimal import ROUND_HALF_UP
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.models.database import Claim, ClaimLine, ParserLog
+from app.services.edi.columnar import (
+    NULL_CENTS,
+    NULL_DAYS,
+    ClaimBatch,
+    amounts_to_cents,
+    cents_to_amounts,
+    datetimes_to_days,
+    days_to_datetimes,
+    iter_claim_batches,
+    parse_amounts,
+    parse_edi_dates,
+    valid_npi_mask,
+)
+from app.services.edi.parser import EDIParser
+from app.services.edi.transformer import EDITransformer
+from app.services.queue.tasks import process_edi_file
+from app.utils.decimal_utils import parse_financial_amount
+from tests.factories import ClaimFactory
+
+SAMPLES_DIR = Path(__file__).parent.parent / "samples"
+
+CLAIM_COLUMNS = (
+    "claim_control_number",
+    "patient_control_number",
+    "provider_id",
+    "payer_id",
+    "total_charge_amount",
+    "facility_type_code",
+    "claim_frequency_type",
+    "assignment_code",
+    "statement_date",
+    "admission_date",
+    "discharge_date",
+    "service_date",
+    "diagnosis_codes",
+    "principal_diagnosis",
+    "status",
+    "is_incomplete",
+    "parsing_warnings",
+    "practice_id",
+)
+LINE_COLUMNS = (
+    "line_number",
+    "revenue_code",
+    "procedure_code",
+    "procedure_modifier",
+    "charge_amount",
+    "unit_count",
+    "unit_type",
+    "service_date",
+)
+
+
+def _synthetic_claims(count, lines_per_claim=2):
+    """Parsed claims in the shape the parsers produce."""
+    claims = []
+    for i in range(count):
+        claims.append({
+            "claim_control_number": f"CLM{i:07d}",
+            "patient_control_number": f"PAT{i:07d}",
+            "attending_provider_npi": f"{1000000000 + i % 50}",
+            "payer_id": f"PAYER{i % 10}",
+            "payer_name": f"Payer {i % 10}",
+            "total_charge_amount": 100.0 + i % 1000 + 0.25,
+            "facility_type_code": "11",
+            "claim_frequency_type": "1",
+            "assignment_code": "Y",
+            "statement_date": datetime(2024, 1, 1 + i % 28),
+            "service_date": datetime(2024, 2, 1 + i % 28),
+            "diagnosis_codes": ["E11.9", "I10"],
+            "principal_diagnosis": "E11.9",
+            "warnings": ["No HI segments found"] if i % 7 == 0 else [],
+            "raw_block": [["CLM", f"CLM{i:07d}", "100"]],
+            "lines": [
+                {
+                    "line_number": str(n + 1),
+                    "revenue_code": "0450",
+                    "procedure_code": "99213",
+                    "charge_amount": 50.5 + n,
+                    "unit_count": 1.0,
+                    "unit_type": "UN",
+                    "service_date": datetime(2024, 2, 1 + i % 28),
+                }
+                for n in range(lines_per_claim)
+            ],
+        })
+    return claims
+
+
+def _rows(db_session, model, columns):
+    return [tuple(getattr(row, c) for c in columns) for row in db_session.query(model).order_by(model.id)]
+
+
+@pytest.mark.unit
+class TestColumnKernels:
+    """The vectorized conversions must match the scalar helpers."""
+
+    @pytest.mark.parametrize(
+        "value",
+        [None, "", " 20240229 ", "20230229", "240101", "2024011", "202401011", "20241301",
+         "20240100", "00000101", "abcdefgh", "2024-1-1", "99991231", "19691231"],
+    )
+    def test_parse_edi_dates(self, value):
+        """Test EDI date parsing against EDITransformer._parse_edi_date."""
+        expected = EDITransformer(None)._parse_edi_date(value) if value is not None else None
+
+        assert days_to_datetimes(parse_edi_dates([value])) == [expected]
+
+    @pytest.mark.parametrize(
+        "value",
+        [None, "", "0", "-0", "1520.00", "1.005", "-1.005", "1.004", "12.", ".5", "-.5",
+         "+5", "1e3", "1.235E0", "-1.235E0", "1-2", "--5", "abc", "1.2.3", " 7.99 ", "-", ".", "123456789012345678"],
+    )
+    def test_parse_amounts(self, value):
+        """Test amount parsing against parse_financial_amount."""
+        amount = parse_financial_amount(value) if value is not None else None
+        expected = NULL_CENTS if amount is None or abs(amount) >= 10 ** 15 else int(
+            (amount * 100).to_integral_value(ROUND_HALF_UP)
+        )
+
+        assert parse_amounts([value]).tolist() == [expected]
+
+    def test_typed_values_round_trip(self):
+        """Test conversion of values the parsers already typed."""
+        amounts = [None, 0.1, 1520.0, 12.34, -5.55, 99999999.99]
+        dates = [datetime(2024, 1, 2), None, datetime(1970, 1, 1)]
+
+        assert cents_to_amounts(amounts_to_cents(amounts)) == amounts
+        assert datetimes_to_days(dates).tolist() == [19724, NULL_DAYS, 0]
+        assert days_to_datetimes(datetimes_to_days(dates)) == dates
+
+    def test_valid_npi_mask(self):
+        """Test the 10-digit NPI check."""
+        mask = valid_npi_mask(["1234567890", " 1234567890 ", "123", None, 1234567890, "12345678a0"])
+
+        assert mask.tolist() == [True, True, False, False, True, False]
+
+    def test_empty_columns(self):
+        """Test conversions of empty columns."""
+        assert parse_edi_dates([]).dtype == np.int32
+        assert parse_amounts([]).dtype == np.int64
+        assert len(ClaimBatch([])) == 0
+
+
+@pytest.mark.unit
+class TestClaimBatch:
+    """Tests for building batches."""
+
+    def test_columns(self):
+        """Test typed claim and line columns."""
+        batch = ClaimBatch(_synthetic_claims(3))
+
+        assert batch.statement_date.dtype == np.int32
+        assert batch.total_charge_cents.tolist() == [10025, 10125, 10225]
+        assert batch.line_count == 6
+        assert batch.line_claim_index.tolist() == [0, 0, 1, 1, 2, 2]
+        assert batch.line_charge_cents.tolist() == [5050, 5150] * 3
+
+    def test_raw_string_values(self):
+        """Test that unconverted EDI strings are parsed per column."""
+        batch = ClaimBatch([
+            {"claim_control_number": "A", "total_charge_amount": "12.345", "service_date": "20240315"},
+            {"claim_control_number": "B", "total_charge_amount": "bad", "service_date": "20240230"},
+        ])
+
+        assert batch.total_charge_cents.tolist() == [1235, NULL_CENTS]
+        assert days_to_datetimes(batch.service_date) == [datetime(2024, 3, 15), None]
+
+    def test_iter_claim_batches(self):
+        """Test chunking a generator of claims."""
+        batches = list(iter_claim_batches(iter(_synthetic_claims(5)), batch_size=2))
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert batches[2].claim_control_number.tolist() == ["CLM0000004"]
+
+
+@pytest.mark.unit
+class TestLoad837Batch:
+    """load_837_batch must write the same rows as transform_837_claim."""
+
+    def _load_both_ways(self, db_session, claims):
+        transformer = EDITransformer(db_session, practice_id="practice-1", filename="test.edi")
+        for claim_data in claims:
+            db_session.add(transformer.transform_837_claim(dict(claim_data, warnings=list(claim_data.get("warnings", [])))))
+        db_session.flush()
+        expected = (
+            _rows(db_session, Claim, CLAIM_COLUMNS),
+            _rows(db_session, ClaimLine, LINE_COLUMNS),
+            _rows(db_session, ParserLog, ("message", "claim_control_number")),
+        )
+        db_session.rollback()
+
+        transformer = EDITransformer(db_session, practice_id="practice-1", filename="test.edi")
+        claim_ids = transformer.load_837_batch(ClaimBatch(claims))
+        actual = (
+            _rows(db_session, Claim, CLAIM_COLUMNS),
+            _rows(db_session, ClaimLine, LINE_COLUMNS),
+            _rows(db_session, ParserLog, ("message", "claim_control_number")),
+        )
+        return expected, actual, claim_ids
+
+    def test_synthetic_claims(self, db_session):
+        """Test claims with lines, warnings and shared providers/payers."""
+        expected, actual, claim_ids = self._load_both_ways(db_session, _synthetic_claims(60))
+
+        assert actual == expected
+        assert claim_ids == [row.id for row in db_session.query(Claim.id).order_by(Claim.id)]
+        assert len(actual[1]) == 120
+
+    @pytest.mark.parametrize(
+        "path",
+        [SAMPLES_DIR / "sample_837.txt", SAMPLES_DIR / "training" / "training_837_claims.edi"],
+        ids=lambda p: p.name,
+    )
+    def test_sample_files(self, db_session, path):
+        """Test parsed sample files."""
+        claims = EDIParser().parse(path.read_text(), path.name)["claims"]
+        expected, actual, _ = self._load_both_ways(db_session, claims)
+
+        assert actual == expected
+
+    def test_invalid_provider_and_payer(self, db_session):
+        """Test warnings for unusable NPIs and payer IDs."""
+        claims = _synthetic_claims(3, lines_per_claim=0)
+        claims[0]["attending_provider_npi"] = "12345"
+        claims[1]["payer_id"] = "   "
+        claims[2]["claim_control_number"] = None
+
+        expected, actual, _ = self._load_both_ways(db_session, claims)
+
+        assert actual[0][:2] == expected[0][:2]
+        assert actual[0][0][CLAIM_COLUMNS.index("provider_id")] is None
+        assert actual[0][0][CLAIM_COLUMNS.index("parsing_warnings")][-1] == "Invalid or missing provider NPI: 12345"
+        assert actual[0][1][CLAIM_COLUMNS.index("parsing_warnings")] == ["Invalid or missing payer ID:    "]
+        assert actual[0][2][0].startswith("TEMP_")
+        assert actual[2] == expected[2]
+
+    def test_lines_keep_raw_data(self, db_session):
+        """Test that line raw data is stored JSON-safe."""
+        transformer = EDITransformer(db_session)
+        transformer.load_837_batch(ClaimBatch(_synthetic_claims(1, lines_per_claim=1)))
+        db_session.commit()
+
+        line = db_session.query(ClaimLine).one()
+        assert line.raw_segment_data["service_date"] == "2024-02-01T00:00:00"
+
+
+@pytest.mark.unit
+class TestProcessEdiFileBatches:
+    """Tests for batch loading in process_edi_file."""
+
+    def _run(self, db_session, claims):
+        with patch("app.services.queue.tasks.SessionLocal", return_value=db_session), \
+                patch("app.services.queue.tasks.EDIParser") as mock_parser, \
+                patch("celery.app.task.Context") as mock_context_class:
+            mock_parser.return_value.parse.return_value = {"file_type": "837", "claims": claims}
+            mock_context_class.return_value = MagicMock(id="test-task", retries=0, max_retries=3)
+            return process_edi_file.run(file_content="ISA~", filename="test.edi", file_type="837")
+
+    def test_claims_and_lines_saved(self, db_session):
+        """Test that claims and their lines are persisted."""
+        result = self._run(db_session, _synthetic_claims(5))
+
+        assert result["claims_created"] == 5
+        assert db_session.query(ClaimLine).count() == 10
+
+    def test_failed_batch_falls_back_to_single_claims(self, db_session):
+        """Test that one duplicate claim does not drop the rest of its batch."""
+        ClaimFactory(claim_control_number="CLM0000001")
+
+        result = self._run(db_session, _synthetic_claims(3))
+
+        assert result["claims_created"] == 2
+        assert db_session.query(Claim).filter(Claim.claim_control_number == "CLM0000002").count() == 1
+
+
+@pytest.mark.performance
+def test_benchmark_batch_load(db_session):
+    """Benchmark the batch loader against per-claim transformation."""
+    claims = _synthetic_claims(5000)
+
+    transformer = EDITransformer(db_session, filename="bench.edi")
+    start = time.perf_counter()
+    objects = [transformer.transform_837_claim(dict(claim, warnings=list(claim["warnings"]))) for claim in claims]
+    db_session.add_all(objects)
+    db_session.flush()
+    per_claim = time.perf_counter() - start
+    db_session.rollback()
+
+    transformer = EDITransformer(db_session, filename="bench.edi")
+    start = time.perf_counter()
+    for batch in iter_claim_batches(claims):
+        transformer.load_837_batch(batch)
+    batched = time.perf_counter() - start
+
+    print(f"\n5000 claims: per-claim {per_claim * 1000:.0f}ms, columnar batches {batched * 1000:.0f}ms "
+          f"({per_claim / batched:.1f}x)")
+    assert db_session.query(ClaimLine).count() == 10000
+    assert batched < per_claim
@@ -90,3 +90,28 @@ class TestCeleryConfiguration:
         from app.config import celery
         assert celery is not None
 
+
+    def test_partition_maintenance_scheduled_daily(self):
+        """Test that beat runs partition maintenance every day."""
+        entries = [
+            entry for entry in celery_app.conf.beat_schedule.values()
+            if entry["task"] == "maintain_partitions"
+        ]
+
+        assert len(entries) == 1
+        schedule = entries[0]["schedule"]
+        assert schedule.day_of_week == set(range(7)) and schedule.day_of_month == set(range(1, 32))
+        assert len(schedule.hour) == 1 and len(schedule.minute) == 1
+        assert "maintain_partitions" in celery_app.tasks
+
+    def test_blob_spool_swept_hourly(self):
+        """Test that beat sweeps the blob spool every hour."""
+        entries = [
+            entry for entry in celery_app.conf.beat_schedule.values()
+            if entry["task"] == "sweep_blob_spool"
+        ]
+
+        assert len(entries) == 1
+        schedule = entries[0]["schedule"]
+        assert schedule.hour == set(range(24)) and len(schedule.minute) == 1
+        assert "sweep_blob_spool" in celery_app.tasks
@@ -0,0 +1,181 @@
+"""Tests for the training dataset cache shared by the ML workflow stages."""
+import os
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.services.data_collector import DataCollector
+from ml.services.feature_pipeline import feature_names
+from ml.training import dataset_cache
+from ml.training.continuous_learning_pipeline import ContinuousLearningPipeline
+from ml.training.dataset_cache import (
+    DatasetCache,
+    dataset_key,
+    default_date_range,
+    load_training_dataset,
+)
+from ml.training.train_models import train_model
+
+START = datetime(2026, 1, 1)
+END = datetime(2026, 7, 1)
+
+
+def _frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = feature_names(include_historical=True)
+    df = pd.DataFrame(rng.random((rows, len(columns))), columns=columns)
+    df["claim_id"] = range(rows)
+    df["episode_id"] = range(rows)
+    df["denial_rate"] = rng.random(rows)
+    return df
+
+
+def _collector(through_episode_id=7, rows=20):
+    collector = MagicMock()
+    collector.latest_episode_id.return_value = through_episode_id
+    collector.collect_training_data.return_value = _frame(rows)
+    return collector
+
+
+@pytest.mark.unit
+class TestDatasetKey:
+    """Tests for dataset_key and default_date_range."""
+
+    def test_key_inputs(self):
+        """Test that the dates, high-water mark and schema version each change the key."""
+        key = dataset_key(START, END, 7)
+
+        assert dataset_key(START, END, 7) == key
+        assert dataset_key(START, END, 8) != key
+        assert dataset_key(START, END, None) != key
+        assert dataset_key(START + timedelta(days=1), END, 7) != key
+        assert dataset_key(START, END + timedelta(days=1), 7) != key
+        with patch.object(dataset_cache, "FEATURE_SCHEMA_VERSION", "changed"):
+            assert dataset_key(START, END, 7) != key
+
+    def test_default_range_aligned_to_days(self):
+        """Test that runs on the same day get the same default range."""
+        morning = default_date_range(now=datetime(2026, 3, 10, 8, 15))
+
+        assert morning == default_date_range(now=datetime(2026, 3, 10, 23, 59))
+        assert morning == (datetime(2025, 9, 11), datetime(2026, 3, 11))
+
+
+@pytest.mark.unit
+class TestDatasetCache:
+    """Tests for DatasetCache and load_training_dataset."""
+
+    def test_round_trip_is_memory_mapped(self, tmp_path):
+        """Test that a stored dataset loads back memory-mapped and read-only."""
+        cache = DatasetCache(str(tmp_path))
+        X = np.arange(12, dtype=np.float32).reshape(4, 3)
+        y = np.array([0.0, 1.0, 0.5, 0.25], dtype=np.float32)
+
+        stored = cache.store("abc", X, y, ["a", "b", "c"], {"through_episode_id": 3})
+        loaded = cache.load("abc")
+
+        assert not stored.cached and loaded.cached
+        assert isinstance(loaded.X, np.memmap) and not loaded.X.flags.writeable
+        np.testing.assert_array_equal(loaded.X, X)
+        np.testing.assert_array_equal(loaded.y, y)
+        assert loaded.feature_names == ["a", "b", "c"]
+        assert loaded.through_episode_id == 3
+        assert "Reused cached training dataset abc" in loaded.describe()
+        assert cache.load("missing") is None
+
+    def test_reuse_until_high_water_mark_moves(self, tmp_path):
+        """Test that a second stage reuses the matrix until new outcomes arrive."""
+        cache = DatasetCache(str(tmp_path))
+        collector = _collector()
+
+        first = load_training_dataset(collector, START, END, min_episodes=10, cache=cache)
+        second = load_training_dataset(collector, START, END, min_episodes=10, cache=cache)
+
+        assert collector.collect_training_data.call_count == 1
+        assert collector.collect_training_data.call_args.kwargs["through_episode_id"] == 7
+        assert not first.cached and second.cached
+        assert second.key == first.key
+        np.testing.assert_array_equal(second.X, first.X)
+        assert second.feature_names == feature_names(include_historical=True)
+
+        collector.latest_episode_id.return_value = 8
+        third = load_training_dataset(collector, START, END, min_episodes=10, cache=cache)
+
+        assert collector.collect_training_data.call_count == 2
+        assert not third.cached and third.key != first.key
+
+    def test_cached_dataset_checks_min_episodes(self, tmp_path):
+        """Test that a cache hit enforces min_episodes like a collection does."""
+        cache = DatasetCache(str(tmp_path))
+        load_training_dataset(_collector(rows=20), START, END, min_episodes=10, cache=cache)
+
+        with pytest.raises(ValueError, match="Insufficient training data"):
+            load_training_dataset(_collector(rows=20), START, END, min_episodes=50, cache=cache)
+
+    def test_without_cache_collects_in_memory(self, tmp_path):
+        """Test that no files are written without a cache."""
+        collector = _collector()
+
+        dataset = load_training_dataset(collector, START, END, min_episodes=10)
+
+        assert dataset.path is None and not dataset.cached
+        assert dataset.X.shape == (20, len(feature_names(include_historical=True)))
+
+    def test_least_recently_used_evicted(self, tmp_path):
+        """Test that storing beyond max_entries removes the least recently used datasets."""
+        cache = DatasetCache(str(tmp_path), max_entries=2)
+        X = np.zeros((2, 2), dtype=np.float32)
+        y = np.zeros(2, dtype=np.float32)
+        # "used" is the older one, but is read after both were stored
+        for key, age in (("used", 300), ("old", 200)):
+            path = cache.store(key, X, y, ["a", "b"], {}).path
+            stamp = datetime.now().timestamp() - age
+            os.utime(path, (stamp, stamp))
+        cache.load("used")
+
+        cache.store("new", X, y, ["a", "b"], {})
+
+        assert cache.load("old") is None
+        assert cache.load("used") is not None and cache.load("new") is not None
+
+
+@pytest.mark.integration
+def test_workflow_stages_share_dataset(db_session, tmp_path, capsys, make_training_episodes):
+    """Test that the pipeline collects once and a later training run reuses its matrix."""
+    make_training_episodes(30)
+    cache = DatasetCache(str(tmp_path / "cache"))
+    start_date, end_date = default_date_range(days=1)
+    collect = patch.object(
+        DataCollector, "collect_training_data", autospec=True, side_effect=DataCollector.collect_training_data
+    )
+
+    with collect as mock_collect:
+        results = ContinuousLearningPipeline(db_session, dataset_cache=cache).run_full_pipeline(
+            start_date=start_date,
+            end_date=end_date,
+            n_estimators=10,
+            output_dir=str(tmp_path / "models"),
+            run_pattern_detection=False,
+            min_episodes=20,
+        )
+    assert results["errors"] == []
+    assert results["training_data_rows"] == 30
+    assert results["training_dataset"].startswith("Collected training dataset")
+    assert mock_collect.call_count == 1
+
+    with collect as mock_collect:
+        model = train_model(
+            db_session,
+            start_date=start_date,
+            end_date=end_date,
+            n_estimators=10,
+            output_dir=str(tmp_path / "models"),
+            min_episodes=20,
+            dataset_cache=cache,
+        )
+    mock_collect.assert_not_called()
+    assert "Reused cached training dataset" in capsys.readouterr().out
+    assert model.through_episode_id is not None
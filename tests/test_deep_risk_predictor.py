@@ -0,0 +1,124 @@
+"""Tests for DeepRiskPredictor batching and the exported CPU inference path."""
+import time
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from ml.models.deep_risk_predictor import DeepRiskPredictor, TensorBatches  # noqa: E402
+
+
+def _data(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(loc=100.0, scale=50.0, size=(n, 8)).astype(np.float32)
+    y = 1.0 / (1.0 + np.exp(-(X[:, 0] - 100.0) / 25.0))
+    return X, y.astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def trained():
+    """A small trained model (shared, so tests must not retrain it)."""
+    predictor = DeepRiskPredictor()
+    predictor.device = torch.device("cpu")
+    X, y = _data(2_000)
+    predictor.train(X, y, hidden_sizes=[32, 16], epochs=5, batch_size=64)
+    return predictor
+
+
+@pytest.mark.unit
+class TestTensorBatches:
+    """Tests for TensorBatches."""
+
+    def test_epoch_covers_every_sample(self):
+        """Test that a shuffled epoch yields each sample exactly once."""
+        X = np.arange(10, dtype=np.float32).reshape(-1, 1)
+        batches = TensorBatches(X, X[:, 0] * 2, batch_size=4, shuffle=True)
+
+        seen = [(features, labels) for features, labels in batches]
+
+        assert len(batches) == len(seen) == 3
+        features = torch.cat([features for features, _ in seen]).flatten()
+        labels = torch.cat([labels for _, labels in seen])
+        assert sorted(features.tolist()) == list(range(10))
+        assert torch.equal(labels, features * 2)
+
+    def test_unshuffled_order(self):
+        """Test that without shuffling, batches are contiguous slices."""
+        X = np.arange(5, dtype=np.float32).reshape(-1, 1)
+
+        batches = [features.flatten().tolist() for features, _ in TensorBatches(X, X[:, 0], batch_size=2)]
+
+        assert batches == [[0.0, 1.0], [2.0, 3.0], [4.0]]
+
+
+@pytest.mark.unit
+class TestExportCpu:
+    """Tests for DeepRiskPredictor.export_cpu."""
+
+    def test_quantized_parity(self, trained):
+        """Test that the int8 model agrees with the float model."""
+        X, _ = _data(1_000, seed=1)
+        trained.cpu_model = None
+        expected = trained.predict(X)
+
+        metrics = trained.export_cpu(X, quantize=True)
+
+        assert metrics["quantized"] is True
+        assert metrics["max_abs_diff"] <= 0.02
+        assert metrics["label_agreement"] >= 0.99
+        np.testing.assert_allclose(trained.predict(X), expected, atol=0.02)
+        assert trained.predict_single(X[0]) == pytest.approx(float(trained.predict(X[:1])[0]))
+
+    def test_falls_back_to_float(self, trained):
+        """Test that a quantized model outside the tolerance is not used."""
+        X, _ = _data(200, seed=2)
+        trained.cpu_model = None
+        expected = trained.predict(X)
+
+        metrics = trained.export_cpu(X, quantize=True, tolerance=-1.0)
+
+        assert metrics["quantized"] is False
+        assert trained.cpu_model_quantized is False
+        np.testing.assert_allclose(trained.predict(X), expected, atol=1e-6)
+
+    def test_parity_checked_without_reference(self, trained):
+        """Test that an export without reference features is checked on a synthetic batch."""
+        X, _ = _data(200, seed=5)
+        trained.cpu_model = None
+        expected = trained.predict(X)
+
+        metrics = trained.export_cpu(quantize=True, tolerance=-1.0)
+
+        assert metrics["parity_reference"] == "synthetic"
+        assert metrics["max_abs_diff"] > 0.0
+        assert metrics["quantized"] is False
+        np.testing.assert_allclose(trained.predict(X), expected, atol=1e-6)
+
+    def test_export_restored_on_load(self, trained, tmp_path):
+        """Test that a saved model is re-exported when loaded."""
+        X, _ = _data(100, seed=3)
+        trained.export_cpu(X, quantize=True, num_threads=1)
+        trained.save_model(str(tmp_path / "deep.pkl"))
+
+        loaded = DeepRiskPredictor(model_path=str(tmp_path / "deep.pkl"))
+
+        assert loaded.cpu_model is not None
+        assert loaded.cpu_model_quantized == trained.cpu_model_quantized
+        np.testing.assert_allclose(loaded.predict(X), trained.predict(X), atol=1e-6)
+
+
+@pytest.mark.performance
+def test_cpu_batch_scoring_speed(trained):
+    """Test that scoring a 10k-claim batch takes a few milliseconds."""
+    X, _ = _data(10_000, seed=4)
+    trained.export_cpu(X[:1_000], quantize=True)
+    trained.predict(X)
+
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        trained.predict(X)
+        timings.append(time.perf_counter() - started)
+
+    assert min(timings) < 0.02
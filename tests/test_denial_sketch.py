@@ -0,0 +1,331 @@
+"""Tests for streaming denial rate tracking."""
+import math
+import time
+from collections import defaultdict
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from celery import signals
+
+import app.config.celery  # noqa: F401 (connects the worker signal handlers)
+from app.models.database import EpisodeStatus
+from app.services.episodes.linker import EpisodeLinker
+from app.services.learning.denial_sketch import (
+    EPOCH_TIME_CONSTANTS,
+    CountMinSketch,
+    DenialRateTracker,
+    HeavyHitters,
+    denial_reason_codes,
+)
+from app.services.risk.scorer import RiskScorer
+from tests.factories import ClaimFactory, PayerFactory, RemittanceFactory
+
+DAY = 86400.0
+NOW = 1_700_000_000.0
+
+
+class _FakeRedis:
+    """Dict-backed Redis hashes, shared by trackers standing in for processes."""
+
+    def __init__(self):
+        self.hashes = defaultdict(dict)
+        self.ttls = {}
+        self.fail = False
+
+    def pipeline(self):
+        if self.fail:
+            raise ConnectionError("Redis unavailable")
+        return _FakePipeline(self)
+
+    def hgetall(self, key):
+        return {field: repr(value) for field, value in self.hashes.get(key, {}).items()}
+
+
+class _FakePipeline:
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self.commands = []
+
+    def hincrbyfloat(self, key, field, increment):
+        self.commands.append((key, field, increment))
+
+    def expire(self, key, seconds):
+        self.redis.ttls[key] = seconds
+
+    def execute(self):
+        for key, field, increment in self.commands:
+            self.redis.hashes[key][field] = self.redis.hashes[key].get(field, 0.0) + increment
+
+
+def _tracker(**kwargs):
+    kwargs.setdefault("sync_seconds", 0)
+    kwargs.setdefault("clock", lambda: NOW)
+    return DenialRateTracker(width=256, depth=4, top_k=4, **kwargs)
+
+
+@pytest.mark.unit
+class TestSketches:
+    """Tests for CountMinSketch and HeavyHitters."""
+
+    def test_count_min_bounds(self):
+        """Test that estimates never undercount and stay within the error bound."""
+        rng = np.random.default_rng(0)
+        keys = [f"key{index}" for index in rng.zipf(1.3, 20000) % 5000]
+        sketch = CountMinSketch(width=512, depth=4)
+        exact = defaultdict(int)
+        for key in keys:
+            sketch.add(key)
+            exact[key] += 1
+
+        errors = [sketch.estimate(key) - count for key, count in exact.items()]
+        assert min(errors) >= 0
+        bound = math.e / 512 * len(keys)
+        assert np.mean(np.array(errors) > bound) < 0.02
+        assert sketch.estimate("never added") <= bound
+
+    def test_heavy_hitters(self):
+        """Test that counts are exact within capacity and bounded after evictions."""
+        summary = HeavyHitters(capacity=3)
+        for key, weight in [("CO45", 5), ("CO50", 3), ("CO97", 1), ("CO45", 2)]:
+            summary.add(key, weight)
+
+        assert summary.top() == [("CO45", 7, 0), ("CO50", 3, 0), ("CO97", 1, 0)]
+
+        # CO16 replaces the smallest key and inherits its count as error
+        assert summary.add("CO16", 1) == (2, 1)
+        assert summary.top(2) == [("CO45", 7, 0), ("CO50", 3, 0)]
+        assert ("CO16", 2, 1) in summary.top()
+
+    def test_denial_reason_codes(self):
+        """Test that dict and plain reason entries are read."""
+        assert denial_reason_codes([{"code": "CO45"}, "CO50", {"description": "no code"}]) == ["CO45", "CO50"]
+        assert denial_reason_codes(None) == []
+
+
+@pytest.mark.unit
+class TestDenialRateTracker:
+    """Tests for DenialRateTracker reads, decay and sync."""
+
+    def test_rates(self):
+        """Test denial rates, reason rates and top reasons of a payer."""
+        tracker = _tracker()
+        for _ in range(6):
+            tracker.record_episode(1, [])
+        for _ in range(3):
+            tracker.record_episode(1, ["CO45"])
+        tracker.record_episode(1, ["CO50", "CO45", "CO50"])
+        tracker.record_episode(2, ["CO97"])
+
+        rates = tracker.denial_rates(1, "7d")
+        assert rates["episodes"] == pytest.approx(10)
+        assert rates["denied_episodes"] == pytest.approx(4)
+        assert rates["denial_rate"] == pytest.approx(0.4)
+        assert tracker.reason_rate(1, "CO45", "1d") == pytest.approx(0.4)
+        assert tracker.reason_rate(1, "CO50", "90d") == pytest.approx(0.1)
+        assert tracker.top_reasons(1, "7d") == [
+            {"denial_reason_code": "CO45", "rate": 0.4, "error": 0.0},
+            {"denial_reason_code": "CO50", "rate": 0.1, "error": 0.0},
+        ]
+        assert tracker.denial_rates(3)["denial_rate"] is None
+        assert tracker.top_reasons(3) == []
+        with pytest.raises(ValueError):
+            tracker.denial_rates(1, "30d")
+
+    def test_decay(self):
+        """Test that each window decays with its own time constant."""
+        tracker = _tracker()
+        tracker.record_episode(1, ["CO45"], at=NOW - DAY)
+        tracker.record_episode(1, [], at=NOW)
+
+        one_day = tracker.denial_rates(1, "1d")
+        assert one_day["denied_episodes"] == pytest.approx(math.exp(-1))
+        assert one_day["denial_rate"] == pytest.approx(math.exp(-1) / (1 + math.exp(-1)))
+        assert tracker.denial_rates(1, "7d")["denied_episodes"] == pytest.approx(math.exp(-1 / 7))
+        assert tracker.denial_rates(1, "1d", at=NOW + 30 * DAY)["episodes"] == pytest.approx(
+            math.exp(-30) * (1 + math.exp(-1))
+        )
+
+    def test_epoch_boundary(self):
+        """Test that moving the landmark does not change decayed counts."""
+        boundary = math.ceil(NOW / (EPOCH_TIME_CONSTANTS * DAY)) * EPOCH_TIME_CONSTANTS * DAY
+        tracker = _tracker()
+        tracker.record_episode(1, ["CO45"], at=boundary - 3600)
+        tracker.record_episode(1, ["CO45"], at=boundary + 3600)
+
+        expected = math.exp(-2 / 24) + 1
+        assert tracker.denial_rates(1, "1d", at=boundary + 3600)["episodes"] == pytest.approx(expected)
+        assert tracker.reason_rate(1, "CO45", "1d", at=boundary + 3600) == pytest.approx(1.0)
+
+    def test_denial_trend(self):
+        """Test that a recent spike over the 90d rate is reported."""
+        tracker = _tracker()
+        for day in range(30, 90):
+            for index in range(10):
+                tracker.record_episode(1, ["CO45"] if index == 0 else [], at=NOW - day * DAY)
+        assert tracker.denial_trend(1) is None
+
+        for index in range(30):
+            tracker.record_episode(1, ["CO50"] if index % 2 else [], at=NOW - 3600)
+
+        trend = tracker.denial_trend(1)
+        assert trend["recent_rate"] > 0.4
+        assert trend["baseline_rate"] < 0.2
+        assert trend["top_reasons"][0]["denial_reason_code"] == "CO50"
+
+    def test_sync_merges_processes(self):
+        """Test that trackers sharing Redis add up their counts."""
+        redis_client = _FakeRedis()
+        worker = _tracker(redis_client=redis_client)
+        api = _tracker(redis_client=redis_client)
+
+        worker.record_episode(1, ["CO45"])
+        worker.record_episode(1, [])
+        assert worker.sync()
+        assert api.sync()
+        assert api.denial_rates(1)["episodes"] == pytest.approx(2)
+
+        api.record_episode(1, ["CO50"])
+        worker.record_episode(1, ["CO45"])
+        assert api.sync() and worker.sync() and api.sync()
+
+        for tracker in (api, worker):
+            assert tracker.denial_rates(1)["denial_rate"] == pytest.approx(0.75)
+            assert tracker.reason_rate(1, "CO45") == pytest.approx(0.5)
+            assert [reason["denial_reason_code"] for reason in tracker.top_reasons(1)] == ["CO45", "CO50"]
+        assert all(ttl > 0 for ttl in redis_client.ttls.values())
+
+        # A new process starts from the snapshot
+        restarted = _tracker(redis_client=redis_client, sync_seconds=60)
+        assert restarted.denial_rates(1)["episodes"] == pytest.approx(4)
+
+    def test_sync_failure_keeps_increments(self):
+        """Test that increments are kept locally and flushed once Redis is back."""
+        redis_client = _FakeRedis()
+        tracker = _tracker(redis_client=redis_client)
+        redis_client.fail = True
+        tracker.record_episode(1, ["CO45"])
+
+        assert not tracker.sync()
+        assert tracker.denial_rates(1)["episodes"] == pytest.approx(1)
+
+        redis_client.fail = False
+        assert tracker.sync()
+        assert _tracker(redis_client=redis_client, sync_seconds=60).denial_rates(1)["denied_episodes"] == pytest.approx(1)
+
+    def test_periodic_sync(self):
+        """Test that reads and writes sync once per interval."""
+        redis_client = _FakeRedis()
+        clock = [NOW]
+        tracker = _tracker(redis_client=redis_client, sync_seconds=30, clock=lambda: clock[0])
+
+        tracker.record_episode(1, [])
+        tracker.record_episode(1, [])
+        # The first call synced; the second is still local
+        key = f"marb:denial_sketch:1d:{int(NOW // (EPOCH_TIME_CONSTANTS * DAY))}"
+        first = redis_client.hashes[key]["e:1"]
+        assert sum(len(fields) for fields in redis_client.hashes.values()) == 3
+
+        clock[0] += 31
+        assert tracker.denial_rates(1)["episodes"] == pytest.approx(2, rel=1e-3)
+        assert redis_client.hashes[key]["e:1"] == pytest.approx(2 * first)
+
+
+@pytest.mark.integration
+class TestDenialTrackingIntegration:
+    """Tests for the tracker in EpisodeLinker and the learning API."""
+
+    def test_linker_records_new_episodes(self, db_session):
+        """Test that linking counts each new episode once."""
+        tracker = DenialRateTracker(sync_seconds=0)
+        payer = PayerFactory()
+        claims = [ClaimFactory(payer=payer) for _ in range(2)]
+        denied = RemittanceFactory(
+            payer=payer,
+            claim_control_number=claims[0].claim_control_number,
+            denial_reasons=[{"code": "CO50"}],
+        )
+        paid = RemittanceFactory(payer=payer, claim_control_number=claims[1].claim_control_number)
+        linker = EpisodeLinker(db_session, tracker=tracker)
+
+        episode = linker.link_claim_to_remittance(claims[0].id, denied.id)
+        assert episode.status == EpisodeStatus.LINKED
+        assert tracker.denial_rates(payer.id)["episodes"] == 0
+        db_session.commit()
+        assert tracker.denial_rates(payer.id)["episodes"] == pytest.approx(1)
+
+        # The episode already exists
+        assert linker.auto_link_by_control_number(denied) == [episode]
+        db_session.commit()
+        assert tracker.denial_rates(payer.id)["episodes"] == pytest.approx(1)
+
+        assert len(linker.auto_link_by_control_number(paid)) == 1
+        db_session.commit()
+        rates = tracker.denial_rates(payer.id)
+        assert rates["episodes"] == pytest.approx(2)
+        assert rates["denial_rate"] == pytest.approx(0.5)
+        assert tracker.reason_rate(payer.id, "CO50") == pytest.approx(0.5)
+
+    def test_rolled_back_links_not_counted(self, db_session):
+        """Test that a link whose transaction rolls back is not counted, even when retried."""
+        tracker = DenialRateTracker(sync_seconds=0)
+        claim = ClaimFactory()
+        remittance = RemittanceFactory(payer=claim.payer, denial_reasons=[{"code": "CO50"}])
+        linker = EpisodeLinker(db_session, tracker=tracker)
+
+        linker.link_claim_to_remittance(claim.id, remittance.id)
+        db_session.rollback()
+        assert tracker.denial_rates(claim.payer_id)["episodes"] == 0
+
+        linker.link_claim_to_remittance(claim.id, remittance.id)
+        db_session.commit()
+        assert tracker.denial_rates(claim.payer_id)["episodes"] == pytest.approx(1)
+        assert tracker.reason_rate(claim.payer_id, "CO50") == pytest.approx(1)
+
+    def test_worker_shutdown_syncs(self, monkeypatch):
+        """Test that a worker process adds its unsynced counts to Redis on shutdown."""
+        tracker = DenialRateTracker(sync_seconds=30)
+        monkeypatch.setattr("app.services.learning.denial_sketch.denial_tracker", tracker)
+
+        with patch.object(tracker, "sync") as mock_sync:
+            signals.worker_process_shutdown.send(sender=None, pid=1, exitcode=0)
+
+        mock_sync.assert_called_once_with()
+
+    def test_denial_rates_endpoint(self, client, monkeypatch):
+        """Test reading a payer's denial rates through the learning API."""
+        tracker = DenialRateTracker(sync_seconds=0)
+        tracker.record_episode(7, ["CO45"])
+        tracker.record_episode(7, [])
+        monkeypatch.setattr("app.api.routes.learning.denial_tracker", tracker)
+
+        response = client.get("/api/v1/patterns/payer/7/denial-rates", params={"top": 5})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data["windows"]) == {"1d", "7d", "90d"}
+        assert data["windows"]["7d"]["denial_rate"] == pytest.approx(0.5)
+        assert data["windows"]["1d"]["top_reasons"][0]["denial_reason_code"] == "CO45"
+        assert data["trend"] is None
+
+    def test_risk_scorer_reports_trend(self, db_session):
+        """Test that a payer's denial spike is a risk factor that does not change the score."""
+        claim = ClaimFactory()
+        tracker = DenialRateTracker(sync_seconds=0)
+        for day in range(30, 90):
+            for _ in range(10):
+                tracker.record_episode(claim.payer_id, [], at=time.time() - day * DAY)
+        for index in range(30):
+            tracker.record_episode(claim.payer_id, ["CO50"] if index % 2 else [])
+
+        score = RiskScorer(db_session, tracker=tracker).calculate_risk_score(claim.id)
+        factors, overall_score = list(score.risk_factors), score.overall_score
+        # Rescoring updates the same row
+        baseline = RiskScorer(db_session, tracker=DenialRateTracker(sync_seconds=0)).calculate_risk_score(claim.id)
+
+        trend = [factor for factor in factors if factor["type"] == "denial_trend"]
+        assert len(trend) == 1
+        assert trend[0]["top_denial_reasons"][0]["denial_reason_code"] == "CO50"
+        assert "50%" in trend[0]["message"]
+        assert not any(factor["type"] == "denial_trend" for factor in baseline.risk_factors)
+        assert overall_score == baseline.overall_score
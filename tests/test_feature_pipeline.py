@@ -0,0 +1,171 @@
+"""Tests for the vectorized feature pipeline shared by training and serving."""
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.risk.ml_service import MLService
+from ml.services.data_collector import DataCollector
+from ml.services.feature_extractor import FeatureExtractor
+from ml.services.feature_pipeline import (
+    FEATURE_NAMES,
+    build_feature_matrix,
+    claim_arrays,
+    compute_features,
+    feature_names,
+)
+from tests.factories import ClaimFactory, ClaimLineFactory
+
+NOW = datetime(2024, 7, 1, 12, 0)
+
+
+def _random_claims(count, seed=7):
+    rng = random.Random(seed)
+    codes = ["99213", "99214", "99215", "93000", None]
+    claims = []
+    for _ in range(count):
+        lines = [
+            SimpleNamespace(
+                charge_amount=rng.choice([None, round(rng.uniform(10, 2000), 2)]),
+                procedure_code=rng.choice(codes),
+                procedure_modifier=rng.choice(["25", "59", None, None]),
+                revenue_code=rng.choice(["0250", None, None]),
+            )
+            for _ in range(rng.randint(0, 8))
+        ]
+        claims.append(
+            SimpleNamespace(
+                total_charge_amount=rng.choice([None, round(rng.uniform(100, 20000), 2)]),
+                is_incomplete=rng.random() < 0.2,
+                principal_diagnosis=rng.choice(["E11.9", None]),
+                diagnosis_codes=rng.choice([None, ["E11.9"], ["E11.9", "I10", "Z00"]]),
+                created_at=rng.choice([None, NOW - timedelta(days=rng.randint(0, 400), hours=rng.randint(0, 23))]),
+                service_date=rng.choice([None, datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 365))]),
+                attending_provider_npi=rng.choice(["1234567890", None]),
+                operating_provider_npi=rng.choice(["1234567890", None]),
+                referring_provider_npi=rng.choice(["1234567890", None]),
+                provider_id=rng.choice([1, None]),
+                claim_lines=lines,
+            )
+        )
+    return claims
+
+
+def _reference_features(claim):
+    """Per-claim definition of every feature, for parity checks."""
+    lines = claim.claim_lines
+    amounts = [line.charge_amount or 0.0 for line in lines]
+    procedures = [line.procedure_code for line in lines if line.procedure_code]
+    modifiers = [line.procedure_modifier for line in lines if line.procedure_modifier]
+    revenue = [line.revenue_code for line in lines if line.revenue_code]
+    total = claim.total_charge_amount or 0.0
+    diagnoses = len(claim.diagnosis_codes or [])
+    providers = [bool(claim.attending_provider_npi), bool(claim.operating_provider_npi), bool(claim.referring_provider_npi)]
+    service_date = claim.service_date
+    return {
+        "total_charge_amount": total,
+        "is_incomplete": float(claim.is_incomplete),
+        "has_principal_diagnosis": float(bool(claim.principal_diagnosis)),
+        "diagnosis_count": diagnoses,
+        "claim_line_count": len(lines),
+        "charge_per_line": total / len(lines) if lines else 0.0,
+        "diagnosis_per_line": diagnoses / len(lines) if lines else 0.0,
+        "claim_age_days": float((NOW - claim.created_at).days) if claim.created_at else 0.0,
+        "unique_procedure_codes": len(set(procedures)),
+        "modifier_count": len(modifiers),
+        "unique_modifiers": len(set(modifiers)),
+        "has_revenue_code": float(bool(revenue)),
+        "revenue_code_count": len(revenue),
+        "total_line_charges": sum(amounts),
+        "max_line_charge": max(amounts, default=0.0),
+        "min_line_charge": min(amounts, default=0.0),
+        "avg_line_charge": float(np.mean(amounts)) if amounts else 0.0,
+        "median_line_charge": sorted(amounts)[len(amounts) // 2] if amounts else 0.0,
+        "std_line_charge": float(np.std(amounts)) if len(amounts) > 1 else 0.0,
+        "has_attending_provider": float(providers[0]),
+        "has_operating_provider": float(providers[1]),
+        "has_referring_provider": float(providers[2]),
+        "has_provider": float(bool(claim.provider_id)),
+        "provider_count": float(sum(providers)),
+        "service_date_day_of_week": float(service_date.weekday()) if service_date else 0.0,
+        "service_date_month": float(service_date.month) if service_date else 0.0,
+        "service_date_quarter": float((service_date.month - 1) // 3 + 1) if service_date else 0.0,
+        "service_date_is_weekend": float(service_date.weekday() >= 5) if service_date else 0.0,
+    }
+
+
+@pytest.mark.unit
+class TestFeaturePipeline:
+    """Tests for build_feature_matrix."""
+
+    def test_matches_per_claim_definition(self):
+        """Test every feature of every claim against the per-claim definition."""
+        claims = _random_claims(300)
+
+        matrix = build_feature_matrix(claims, now=NOW)
+
+        expected = np.array([[_reference_features(c)[name] for name in FEATURE_NAMES] for c in claims])
+        assert matrix.shape == (300, len(FEATURE_NAMES))
+        np.testing.assert_allclose(matrix, expected, rtol=1e-9, atol=1e-9)
+
+    def test_empty_batch(self):
+        """Test that no claims give an empty matrix with every column."""
+        assert build_feature_matrix([]).shape == (0, len(FEATURE_NAMES))
+
+    def test_historical_columns(self):
+        """Test that historical features are appended (zeros without a session)."""
+        matrix = build_feature_matrix(_random_claims(3), include_historical=True)
+
+        assert matrix.shape == (3, len(feature_names(include_historical=True)))
+        assert not matrix[:, len(FEATURE_NAMES):].any()
+
+    def test_training_and_serving_agree(self, db_session):
+        """Test that the collector and the extractor produce the same row."""
+        claim = ClaimFactory(total_charge_amount=900.0, diagnosis_codes=["E11.9", "I10"])
+        for amount in (100.0, 300.0, 500.0):
+            ClaimLineFactory(claim=claim, charge_amount=amount)
+        db_session.commit()
+
+        training = DataCollector(db_session)._extract_claim_features(claim, include_historical=False)
+        serving = FeatureExtractor().extract_features_dict(claim)
+
+        assert training.pop("claim_id") == claim.id
+        assert training == pytest.approx(serving)
+        assert list(training) == FEATURE_NAMES
+
+    def test_ml_service_uses_model_column_order(self):
+        """Test that features are served in the order recorded with the model."""
+        claim = _random_claims(1)[0]
+        service = MLService.__new__(MLService)
+        service.db_session = None
+        service.model = SimpleNamespace(feature_names=["provider_count", "total_charge_amount"])
+
+        features = service.extract_features([claim])
+
+        row = _reference_features(claim)
+        assert features.dtype == np.float32
+        assert features[0].tolist() == pytest.approx([row["provider_count"], row["total_charge_amount"]])
+
+
+@pytest.mark.performance
+def test_vectorized_speedup():
+    """Test that 100k claims are featurized far faster than claim by claim."""
+    claims = _random_claims(100_000)
+
+    started = time.perf_counter()
+    arrays = claim_arrays(claims)
+    flattened = time.perf_counter()
+    compute_features(arrays, now=NOW)
+    vectorized = time.perf_counter() - flattened
+    end_to_end = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for claim in claims:
+        _reference_features(claim)
+    per_claim = time.perf_counter() - started
+
+    assert per_claim / vectorized > 10
+    assert end_to_end < per_claim
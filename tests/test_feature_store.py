@@ -0,0 +1,174 @@
+"""Tests for persisted claim feature vectors."""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.config.celery import QUEUE_SCORE, celery_app
+from app.models.database import ClaimFeatureVector
+from app.services.queue import tasks
+from ml.services.feature_pipeline import (
+    FEATURE_INDEX,
+    FEATURE_NAMES,
+    FEATURE_SCHEMA_VERSION,
+    build_feature_matrix,
+)
+from ml.services.feature_store import FeatureStore
+from tests.factories import ClaimEpisodeFactory, ClaimFactory, ClaimLineFactory, PayerFactory, RemittanceFactory
+
+
+def _claims(count, **kwargs):
+    claims = []
+    for _ in range(count):
+        claim = ClaimFactory(**kwargs)
+        ClaimLineFactory(claim=claim, charge_amount=100.0)
+        ClaimLineFactory(claim=claim, charge_amount=250.0)
+        claims.append(claim)
+    return claims
+
+
+def _vectors(db_session):
+    return db_session.query(ClaimFeatureVector).order_by(ClaimFeatureVector.claim_id).all()
+
+
+@pytest.mark.unit
+class TestFeatureStore:
+    """Tests for computing and reading stored vectors."""
+
+    def test_compute_and_read(self, db_session):
+        """Test that stored vectors are read without recomputing them."""
+        claims = _claims(3)
+        expected = build_feature_matrix(claims, include_historical=True, db_session=db_session)
+
+        assert FeatureStore(db_session).compute([claim.id for claim in claims]) == 3
+        db_session.commit()
+
+        with patch("ml.services.feature_store.build_feature_matrix") as mock_build:
+            features = FeatureStore(db_session).feature_matrix(claims)
+
+        mock_build.assert_not_called()
+        np.testing.assert_allclose(features, expected)
+        assert [vector.schema_version for vector in _vectors(db_session)] == [FEATURE_SCHEMA_VERSION] * 3
+
+    def test_missing_vectors_stored_on_read(self, db_session):
+        """Test that vectors are computed on first use and stored unless read-only."""
+        claims = _claims(2)
+
+        FeatureStore(db_session).feature_matrix(claims[:1], persist=False)
+        assert _vectors(db_session) == []
+
+        FeatureStore(db_session).feature_matrix(claims)
+        assert [vector.claim_id for vector in _vectors(db_session)] == [claim.id for claim in claims]
+
+    def test_without_historical(self, db_session):
+        """Test that the historical columns can be left out."""
+        claims = _claims(2)
+        FeatureStore(db_session).compute([claims[0].id])
+
+        features = FeatureStore(db_session).feature_matrix(claims, include_historical=False)
+
+        np.testing.assert_allclose(features, build_feature_matrix(claims))
+        assert features.shape == (2, len(FEATURE_NAMES))
+
+    def test_outdated_vectors_recomputed(self, db_session):
+        """Test that stale vectors and vectors older than their claim are recomputed."""
+        claims = _claims(2)
+        store = FeatureStore(db_session)
+        store.compute([claim.id for claim in claims])
+        first, second = _vectors(db_session)
+        first.stale = True
+        second.updated_at = claims[1].updated_at - timedelta(seconds=1)
+        db_session.commit()
+
+        with patch(
+            "ml.services.feature_store.build_feature_matrix", wraps=build_feature_matrix
+        ) as mock_build:
+            store.feature_matrix(claims)
+
+        assert [claim.id for claim in mock_build.call_args.args[0]] == [claim.id for claim in claims]
+        assert not any(vector.stale for vector in _vectors(db_session))
+
+    def test_claim_age_refreshed_on_read(self, db_session):
+        """Test that claim age is computed at read time, not stored."""
+        claim = _claims(1)[0]
+        FeatureStore(db_session).compute([claim.id])
+
+        later = claim.created_at + timedelta(days=30, hours=1)
+        features = FeatureStore(db_session).feature_matrix([claim], now=later)
+
+        assert features[0, FEATURE_INDEX["claim_age_days"]] == 30
+
+
+@pytest.mark.unit
+class TestRecordOutcomes:
+    """Tests for invalidating vectors when payer history moves."""
+
+    def _linked(self, payer, count, created_at=None):
+        return [
+            ClaimEpisodeFactory(
+                claim=ClaimFactory(payer=payer),
+                remittance=RemittanceFactory(payer=payer),
+                **({"created_at": created_at} if created_at else {}),
+            )
+            for _ in range(count)
+        ]
+
+    def test_first_outcomes_invalidate(self, db_session):
+        """Test that the first outcomes for a payer make its vectors stale."""
+        payer = PayerFactory()
+        claims = _claims(2, payer=payer)
+        store = FeatureStore(db_session)
+        store.compute([claim.id for claim in claims])
+        db_session.commit()
+
+        episodes = self._linked(payer, 1)
+
+        assert store.record_outcomes([episode.claim for episode in episodes]) == 2
+        assert all(vector.stale for vector in _vectors(db_session))
+        # Nothing fresh is left to invalidate until the vectors are refreshed
+        assert store.record_outcomes([episode.claim for episode in episodes]) == 0
+        assert store.refresh_stale() == 2
+
+    def test_small_change_ignored(self, db_session):
+        """Test that one more outcome on a long history does not invalidate."""
+        payer = PayerFactory()
+        self._linked(payer, 20, created_at=datetime.now() - timedelta(days=1))
+        claim = _claims(1, payer=payer)[0]
+        store = FeatureStore(db_session)
+        store.compute([claim.id])
+        db_session.commit()
+
+        episodes = self._linked(payer, 1)
+
+        assert store.record_outcomes([episode.claim for episode in episodes]) == 0
+        assert not _vectors(db_session)[0].stale
+
+
+@pytest.mark.integration
+class TestFeatureVectorTasks:
+    """Tests for the feature vector tasks."""
+
+    def test_compute_task(self, db_session):
+        """Test that the task stores the vectors of loaded claims."""
+        claims = _claims(2)
+
+        with patch("app.services.queue.tasks.SessionLocal", return_value=db_session):
+            result = tasks.compute_feature_vectors.run([claim.id for claim in claims])
+
+        assert result == {"status": "success", "vectors": 2}
+        assert len(_vectors(db_session)) == 2
+
+    def test_queued_in_batches(self):
+        """Test that ingest queues FEATURE_STORE_BATCH_SIZE claims per task."""
+        with patch.object(tasks, "FEATURE_STORE_BATCH_SIZE", 2), \
+                patch("app.services.queue.tasks.group") as mock_group:
+            tasks._queue_feature_vectors([1, 2, 3])
+            signatures = list(mock_group.call_args.args[0])
+
+        assert [signature.args[0] for signature in signatures] == [[1, 2], [3]]
+
+    def test_routed_to_score_queue(self):
+        """Test that vector tasks run on the score workers."""
+        for name in ("compute_feature_vectors", "refresh_feature_vectors"):
+            assert celery_app.amqp.router.route({}, name)["queue"].name == QUEUE_SCORE
@@ -0,0 +1,160 @@
+"""Tests for incremental warm-start retraining."""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from ml.models.risk_predictor import RiskPredictor
+from ml.training import continuous_learning_pipeline
+from ml.training.continuous_learning_pipeline import ContinuousLearningPipeline
+from ml.training.train_models import latest_model_path
+from tests.factories import ClaimEpisodeFactory, RemittanceFactory
+
+
+def _data(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4))
+    y = (X[:, 0] > 0).astype(np.float32)
+    return X, y
+
+
+def _trained(model_type, n_estimators=10, samples=100):
+    model = RiskPredictor()
+    X, y = _data(samples)
+    model.train(X, y, model_type=model_type, n_estimators=n_estimators, max_depth=3)
+    model.record_training("full", samples=samples, through_episode_id=10)
+    return model
+
+
+@pytest.mark.unit
+class TestRiskPredictorUpdate:
+    """Tests for RiskPredictor.update and lineage."""
+
+    def test_forest_grows_by_share_of_new_samples(self):
+        """Test that new data gets trees in proportion to its share of samples."""
+        model = _trained("random_forest")
+        first_trees = list(model.model.named_steps["regressor"].estimators_)
+
+        metrics = model.update(*_data(50, seed=1), max_estimators=100)
+
+        trees = model.model.named_steps["regressor"].estimators_
+        assert metrics["estimators_added"] == 5
+        assert len(trees) == 15
+        assert trees[:10] == first_trees
+        assert model.predict(_data(5, seed=2)[0]).shape == (5,)
+
+    def test_forest_drops_oldest_trees(self):
+        """Test that the forest keeps the newest trees up to the cap."""
+        model = _trained("random_forest")
+        first_trees = list(model.model.named_steps["regressor"].estimators_)
+
+        metrics = model.update(*_data(100, seed=1), max_estimators=12)
+
+        regressor = model.model.named_steps["regressor"]
+        assert metrics["estimators_dropped"] == 8
+        assert regressor.estimators_[:2] == first_trees[8:]
+        assert regressor.n_estimators == len(regressor.estimators_) == 12
+
+    def test_boosting_continues_stages(self):
+        """Test that gradient boosting adds stages and refuses to exceed the cap."""
+        model = _trained("gradient_boosting")
+
+        model.update(*_data(100, seed=1), max_estimators=20)
+
+        assert len(model.model.named_steps["regressor"].estimators_) == 20
+        with pytest.raises(ValueError):
+            model.update(*_data(100, seed=2), max_estimators=20)
+
+    def test_lineage_saved(self, tmp_path):
+        """Test that the lineage and high-water mark survive save and load."""
+        model = _trained("random_forest")
+        model.record_training("incremental", samples=20, through_episode_id=25, parent="parent.pkl")
+        model.save_model(str(tmp_path / "risk_predictor_random_forest_1.pkl"))
+
+        loaded = RiskPredictor(model_path=str(tmp_path / "risk_predictor_random_forest_1.pkl"))
+
+        assert [run["run"] for run in loaded.lineage] == ["full", "incremental"]
+        assert loaded.through_episode_id == 25
+        assert loaded.last_full_training == datetime.fromisoformat(loaded.lineage[0]["trained_at"])
+
+
+@pytest.mark.integration
+class TestIncrementalPipeline:
+    """Tests for ContinuousLearningPipeline.run_full_pipeline(incremental=True)."""
+
+    def _run(self, db_session, output_dir):
+        with patch.object(continuous_learning_pipeline, "ML_INCREMENTAL_MIN_EPISODES", 5):
+            return ContinuousLearningPipeline(db_session).run_full_pipeline(
+                start_date=datetime.now() - timedelta(days=1),
+                end_date=datetime.now() + timedelta(days=1),
+                n_estimators=10,
+                output_dir=str(output_dir),
+                run_pattern_detection=False,
+                min_episodes=20,
+                incremental=True,
+            )
+
+    def test_updates_with_new_outcomes_only(self, db_session, tmp_path, make_training_episodes):
+        """Test full training, then an update from the high-water mark, then no-op."""
+        first = make_training_episodes(30)
+
+        results = self._run(db_session, tmp_path)
+
+        assert results["errors"] == []
+        assert results["training_mode"] == "full"
+        assert results["full_retrain_reason"] == "no trained model"
+        assert RiskPredictor(model_path=results["model_path"]).through_episode_id == first[-1].id
+
+        new = make_training_episodes(10)
+        with patch.object(continuous_learning_pipeline, "train_model") as mock_train:
+            results = self._run(db_session, tmp_path)
+
+        mock_train.assert_not_called()
+        assert results["errors"] == []
+        assert results["training_mode"] == "incremental"
+        assert results["new_episodes"] == 10
+        assert str(latest_model_path(tmp_path)) == results["model_path"]
+        model = RiskPredictor(model_path=results["model_path"])
+        assert [run["run"] for run in model.lineage] == ["full", "incremental"]
+        assert model.through_episode_id == new[-1].id
+        assert model.lineage[-1]["parent"] == results["parent_model_path"]
+
+        results = self._run(db_session, tmp_path)
+        assert results["steps_completed"] == ["model_up_to_date"]
+
+    def test_late_links_below_mark_collected(self, db_session, tmp_path, make_training_episodes):
+        """Test that outcomes committed below the mark after a run are collected once."""
+        late = [ClaimEpisodeFactory(remittance=None) for _ in range(6)]
+        first = make_training_episodes(30)
+        results = self._run(db_session, tmp_path)
+        model = RiskPredictor(model_path=results["model_path"])
+        assert model.through_episode_id == first[-1].id
+        assert model.recent_episode_ids == [episode.id for episode in first]
+
+        # Linked in transactions that committed after the mark was read
+        for index, episode in enumerate(late):
+            episode.remittance = RemittanceFactory(denial_reasons=["CO45"] if index % 2 else None)
+        db_session.commit()
+        results = self._run(db_session, tmp_path)
+
+        assert results["training_mode"] == "incremental"
+        assert results["new_episodes"] == 6
+        model = RiskPredictor(model_path=results["model_path"])
+        assert model.through_episode_id == first[-1].id
+        assert model.recent_episode_ids == sorted(episode.id for episode in late + first)
+        assert self._run(db_session, tmp_path)["steps_completed"] == ["model_up_to_date"]
+
+    def test_stale_model_retrained(self, db_session, tmp_path, make_training_episodes):
+        """Test that a model past ML_FULL_RETRAIN_DAYS is retrained from scratch."""
+        make_training_episodes(30)
+        model_path = self._run(db_session, tmp_path)["model_path"]
+        model = RiskPredictor(model_path=model_path)
+        model.lineage[0]["trained_at"] = (datetime.now() - timedelta(days=60)).isoformat()
+        model.save_model(model_path)
+        make_training_episodes(10)
+
+        results = self._run(db_session, tmp_path)
+
+        assert results["training_mode"] == "full"
+        assert "days ago" in results["full_retrain_reason"]
@@ -0,0 +1,252 @@
+"""Tests for the metrics registry, /metrics endpoint and Celery worker export."""
+import os
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.utils.metrics import (
+    CACHE_REQUESTS,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    cache_key_prefix,
+)
+
+
+@pytest.mark.unit
+class TestCounter:
+    """Tests for Counter."""
+
+    def test_inc_and_value(self):
+        """Test incrementing labelled and unlabelled counters."""
+        counter = Counter("c", "doc", labelnames=("kind",))
+        counter.inc(kind="a")
+        counter.inc(2.5, kind="a")
+        counter.inc(kind="b")
+        assert counter.value(kind="a") == 3.5
+        assert counter.value(kind="b") == 1
+
+        unlabelled = Counter("u", "doc")
+        unlabelled.inc()
+        assert unlabelled.value() == 1
+
+    def test_wrong_labels_raise(self):
+        """Test that label names must match the declaration."""
+        counter = Counter("c", "doc", labelnames=("kind",))
+        with pytest.raises(ValueError):
+            counter.inc(other="a")
+
+    def test_per_thread_shards_are_summed(self):
+        """Test that concurrent increments from many threads are not lost."""
+        counter = Counter("c", "doc", labelnames=("kind",))
+
+        def work():
+            for _ in range(1000):
+                counter.inc(kind="x")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert counter.value(kind="x") == 8000
+        assert len(counter._shards) == 8
+
+    def test_remove_and_clear(self):
+        """Test removing one label set and clearing all values."""
+        counter = Counter("c", "doc", labelnames=("kind",))
+        counter.inc(kind="a")
+        counter.inc(kind="b")
+        counter.remove(kind="a")
+        assert counter.collect() == {("b",): 1.0}
+        counter.clear()
+        assert counter.collect() == {}
+
+
+@pytest.mark.unit
+class TestGauge:
+    """Tests for Gauge."""
+
+    def test_set_inc_dec(self):
+        """Test basic gauge operations."""
+        gauge = Gauge("g", "doc", labelnames=("queue",))
+        gauge.set(5, queue="ingest")
+        gauge.inc(queue="ingest")
+        gauge.dec(3, queue="ingest")
+        assert gauge.value(queue="ingest") == 3
+
+    def test_set_function(self):
+        """Test callback gauges are evaluated at collection time."""
+        gauge = Gauge("g", "doc")
+        gauge.set_function(lambda: 42)
+        assert gauge.collect() == {(): 42.0}
+
+    def test_set_function_rejects_labels(self):
+        """Test callback gauges must be unlabelled."""
+        gauge = Gauge("g", "doc", labelnames=("queue",))
+        with pytest.raises(ValueError):
+            gauge.set_function(lambda: 1)
+
+
+@pytest.mark.unit
+class TestHistogram:
+    """Tests for Histogram."""
+
+    def test_observe_buckets(self):
+        """Test observations land in the right buckets and render cumulatively."""
+        histogram = Histogram("h_seconds", "doc", buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5.0)
+
+        lines = histogram.render()
+
+        assert 'h_seconds_bucket{le="0.1"} 1' in lines
+        assert 'h_seconds_bucket{le="1"} 2' in lines
+        assert 'h_seconds_bucket{le="+Inf"} 3' in lines
+        assert "h_seconds_sum 5.55" in lines
+        assert "h_seconds_count 3" in lines
+
+    def test_time_context_manager(self):
+        """Test that time() records one observation per use."""
+        histogram = Histogram("h_seconds", "doc", labelnames=("entity",))
+        with histogram.time(entity="claim"):
+            pass
+        with pytest.raises(RuntimeError):
+            with histogram.time(entity="claim"):
+                raise RuntimeError("boom")
+        assert histogram.count(entity="claim") == 2
+
+
+@pytest.mark.unit
+class TestMetricsRegistry:
+    """Tests for MetricsRegistry."""
+
+    def test_get_or_create_returns_same_metric(self):
+        """Test that registering a name twice returns the same instance."""
+        reg = MetricsRegistry()
+        assert reg.counter("x_total", "doc") is reg.counter("x_total", "doc")
+
+    def test_type_conflict_raises(self):
+        """Test that a name cannot be registered with two types."""
+        reg = MetricsRegistry()
+        reg.counter("x", "doc")
+        with pytest.raises(ValueError):
+            reg.gauge("x", "doc")
+
+    def test_render_exposition_format(self):
+        """Test HELP/TYPE lines and label escaping."""
+        reg = MetricsRegistry()
+        reg.counter("requests_total", "Requests.", labelnames=("path",)).inc(path='/a"b')
+
+        text = reg.render()
+
+        assert "# HELP requests_total Requests.\n" in text
+        assert "# TYPE requests_total counter\n" in text
+        assert 'requests_total{path="/a\\"b"} 1\n' in text
+
+    def test_write_textfile(self, tmp_path):
+        """Test atomic textfile export."""
+        reg = MetricsRegistry()
+        reg.gauge("up", "Up.").set(1)
+        path = tmp_path / "worker.prom"
+
+        reg.write_textfile(str(path))
+
+        assert "up 1" in path.read_text()
+        assert [p.name for p in tmp_path.iterdir()] == ["worker.prom"]
+
+    def test_push_to_gateway(self):
+        """Test Pushgateway export issues a PUT to the job/grouping URL."""
+        reg = MetricsRegistry()
+        reg.gauge("up", "Up.").set(1)
+        with patch("httpx.put") as mock_put:
+            reg.push_to_gateway("http://gw:9091/", "marb_celery", {"instance": "w1"})
+
+        url = mock_put.call_args[0][0]
+        assert url == "http://gw:9091/metrics/job/marb_celery/instance/w1"
+        assert b"up 1" in mock_put.call_args[1]["content"]
+
+
+@pytest.mark.unit
+def test_cache_records_prefix_metrics(mock_redis):
+    """Test that cache hits and misses feed the exported counter by key prefix."""
+    from app.utils.cache import Cache
+
+    mock_redis.get.side_effect = [None, '"value"']
+    with patch("app.utils.cache.get_redis_client", return_value=mock_redis):
+        cache = Cache()
+    before_miss = CACHE_REQUESTS.value(prefix="claim", result="miss")
+    before_hit = CACHE_REQUESTS.value(prefix="claim", result="hit")
+
+    cache.get("claim:1")
+    cache.get("claim:1")
+
+    assert CACHE_REQUESTS.value(prefix="claim", result="miss") == before_miss + 1
+    assert CACHE_REQUESTS.value(prefix="claim", result="hit") == before_hit + 1
+    assert cache_key_prefix("risk_score:42") == "risk_score"
+
+
+@pytest.mark.api
+def test_metrics_endpoint(client):
+    """Test that /metrics serves the registry in Prometheus text format."""
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE marb_db_flush_seconds histogram" in response.text
+    assert "# TYPE marb_cache_requests_total counter" in response.text
+    assert "marb_process_memory_mb " in response.text
+
+
+@pytest.mark.unit
+class TestCeleryMetricsSignals:
+    """Tests for Celery signal handlers that feed worker metrics."""
+
+    def test_publish_stamps_header(self):
+        """Test that published tasks carry a publish timestamp."""
+        from app.config.celery import PUBLISHED_AT_HEADER, _stamp_publish_time
+
+        headers = {}
+        _stamp_publish_time(headers=headers)
+        assert PUBLISHED_AT_HEADER in headers
+
+    def test_prerun_and_postrun_observe_wait_and_runtime(self):
+        """Test queue wait time and task run time are observed."""
+        import time
+        from app.config.celery import (
+            PUBLISHED_AT_HEADER,
+            _record_task_finish,
+            _record_task_start,
+        )
+        from app.utils.metrics import CELERY_QUEUE_WAIT_SECONDS, CELERY_TASK_SECONDS
+
+        task = MagicMock()
+        task.name = "test_metrics_task"
+        setattr(task.request, PUBLISHED_AT_HEADER, time.time() - 2.0)
+
+        _record_task_start(task_id="t1", task=task)
+        _record_task_finish(task_id="t1", task=task, state="SUCCESS")
+
+        assert CELERY_QUEUE_WAIT_SECONDS.count(task="test_metrics_task") == 1
+        assert CELERY_TASK_SECONDS.count(task="test_metrics_task", state="SUCCESS") == 1
+
+    def test_export_worker_metrics_writes_textfile(self, tmp_path, monkeypatch):
+        """Test the textfile exporter writes one file per worker process."""
+        from app.config import celery as celery_config
+
+        monkeypatch.setattr(celery_config, "METRICS_TEXTFILE_DIR", str(tmp_path))
+        monkeypatch.setattr(celery_config, "METRICS_PUSHGATEWAY_URL", None)
+
+        celery_config.export_worker_metrics(force=True)
+
+        files = os.listdir(tmp_path)
+        assert len(files) == 1
+        assert files[0].startswith("marb_worker_")
+        assert "# TYPE marb_celery_queue_wait_seconds histogram" in (tmp_path / files[0]).read_text()
+
+        celery_config._remove_worker_metrics()
+        assert os.listdir(tmp_path) == []
@@ -0,0 +1,107 @@
+"""Tests for the Redis pub/sub notification bridge."""
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.api.routes.websocket import ConnectionManager, NotificationType
+from app.utils import notification_bus
+from app.utils.notification_bus import NotificationSubscriber, publish_notification
+
+
+@pytest.mark.unit
+class TestPublishNotification:
+    """Tests for publish_notification."""
+
+    def test_disabled_in_tests(self):
+        """Test that pub/sub is off when TESTING=true."""
+        assert notification_bus.PUBSUB_ENABLED is False
+        assert publish_notification("{}") is False
+
+    def test_publishes_serialized_text(self, monkeypatch):
+        """Test that the already-serialized message is published as-is."""
+        mock_redis = MagicMock()
+        monkeypatch.setattr(notification_bus, "PUBSUB_ENABLED", True)
+        with patch("app.config.redis.get_redis_client", return_value=mock_redis):
+            assert publish_notification('{"type": "info"}') is True
+
+        mock_redis.publish.assert_called_once_with(
+            notification_bus.NOTIFICATIONS_CHANNEL, '{"type": "info"}'
+        )
+
+    def test_redis_failure_returns_false(self, monkeypatch):
+        """Test that publish failures are reported, not raised."""
+        mock_redis = MagicMock()
+        mock_redis.publish.side_effect = Exception("Connection refused")
+        monkeypatch.setattr(notification_bus, "PUBSUB_ENABLED", True)
+        with patch("app.config.redis.get_redis_client", return_value=mock_redis):
+            assert publish_notification("{}") is False
+
+
+@pytest.mark.unit
+class TestNotificationSubscriber:
+    """Tests for NotificationSubscriber."""
+
+    @pytest.mark.asyncio
+    async def test_deliver_forwards_text_to_matching_clients(self):
+        """Test that relayed messages are forwarded without re-encoding."""
+        manager = ConnectionManager()
+        subscribed, other = AsyncMock(), AsyncMock()
+        await manager.connect(subscribed, topics={"task:t1"})
+        await manager.connect(other, topics={"task:t2"})
+        subscriber = NotificationSubscriber(manager)
+        text = json.dumps({"type": "file_progress", "topics": ["task:t1"], "data": {}})
+
+        assert await subscriber.deliver(text) == 1
+        await manager.flush()
+
+        subscribed.send_text.assert_called_once_with(text)
+        assert not other.send_text.called
+
+    @pytest.mark.asyncio
+    async def test_deliver_ignores_malformed_messages(self):
+        """Test that garbage on the channel is dropped."""
+        subscriber = NotificationSubscriber(ConnectionManager())
+        assert await subscriber.deliver("not json") == 0
+
+    @pytest.mark.asyncio
+    async def test_start_is_noop_when_disabled(self):
+        """Test that the subscriber does not start when pub/sub is disabled."""
+        subscriber = NotificationSubscriber(ConnectionManager())
+        subscriber.start()
+        assert subscriber.running is False
+        await subscriber.stop()
+
+
+@pytest.mark.unit
+class TestSendNotificationRouting:
+    """Tests for how notifications.py routes messages."""
+
+    @pytest.mark.asyncio
+    async def test_local_delivery_when_not_published(self):
+        """Test local fan-out when pub/sub is unavailable."""
+        from app.utils.notifications import _send_notification
+
+        with patch("app.utils.notifications.publish_notification", return_value=False), \
+             patch("app.utils.notifications.manager") as mock_manager:
+            mock_manager.dispatch = AsyncMock()
+            await _send_notification(NotificationType.INFO, {"claim_id": 3}, "hello")
+
+        notification, text = mock_manager.dispatch.call_args[0]
+        assert json.loads(text)["message"] == "hello"
+        assert notification["topics"] == ["claim:3"]
+
+    @pytest.mark.asyncio
+    async def test_no_local_delivery_when_subscriber_relays(self):
+        """Test that a subscribed process does not deliver the message twice."""
+        from app.utils.notifications import _send_notification
+
+        with patch("app.utils.notifications.publish_notification", return_value=True) as mock_publish, \
+             patch("app.utils.notifications.subscriber") as mock_subscriber, \
+             patch("app.utils.notifications.manager") as mock_manager:
+            mock_subscriber.running = True
+            mock_manager.dispatch = AsyncMock()
+            await _send_notification(NotificationType.INFO, {}, "hello")
+
+        assert mock_publish.called
+        assert not mock_manager.dispatch.called
@@ -0,0 +1,145 @@
+"""Tests for digest notifications and progress throttling."""
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.api.routes.websocket import ConnectionManager, NotificationType, build_notification
+from app.utils.notification_digest import (
+    NotificationAggregator,
+    ProgressThrottle,
+    compress_id_ranges,
+)
+
+
+def _claim(claim_id, practice_id="p1"):
+    return {"claim_id": claim_id, "status": "pending", "practice_id": practice_id}
+
+
+@pytest.mark.unit
+class TestCompressIdRanges:
+    """Tests for compress_id_ranges."""
+
+    @pytest.mark.parametrize(
+        "ids, expected",
+        [
+            ([], []),
+            ([5], [[5, 5]]),
+            ([3, 1, 2, 2, 7, 9, 8], [[1, 3], [7, 9]]),
+            (list(range(1, 20001)), [[1, 20000]]),
+        ],
+    )
+    def test_ranges(self, ids, expected):
+        """Test that IDs collapse into sorted inclusive ranges."""
+        assert compress_id_ranges(ids) == expected
+
+
+@pytest.mark.unit
+class TestNotificationAggregator:
+    """Tests for NotificationAggregator."""
+
+    def test_flush_emits_one_digest_per_group(self):
+        """Test that events are grouped by type and context."""
+        aggregator = NotificationAggregator(window_seconds=60, max_items=10000)
+        context = {"filename": "claims.edi", "task_id": "t1"}
+        with patch("app.utils.notification_digest._send_notification") as mock_send, \
+                patch("app.utils.notification_digest._run_sync"):
+            for claim_id in range(1, 5001):
+                aggregator.add(NotificationType.CLAIM_PROCESSED, _claim(claim_id), context)
+            aggregator.add(NotificationType.CLAIM_PROCESSED, _claim(9), {"filename": "other.edi"})
+            assert aggregator.pending() == 5001
+            assert not mock_send.called
+
+            aggregator.flush()
+
+        assert aggregator.pending() == 0
+        assert mock_send.call_count == 2
+        notification_type, data, message = mock_send.call_args_list[0][0]
+        assert notification_type == NotificationType.DIGEST
+        assert data == {
+            "event": "claim_processed",
+            "count": 5000,
+            "id_ranges": [[1, 5000]],
+            "filename": "claims.edi",
+            "task_id": "t1",
+        }
+        assert message == "claims.edi: 5,000 claims processed"
+        assert len(mock_send.call_args_list[0][1]["items"]) == 5000
+
+    def test_max_items_flushes_early(self):
+        """Test that a full group is emitted without waiting for the window."""
+        aggregator = NotificationAggregator(window_seconds=60, max_items=3)
+        with patch("app.utils.notification_digest._send_notification") as mock_send, \
+                patch("app.utils.notification_digest._run_sync"):
+            for claim_id in range(1, 5):
+                aggregator.add(NotificationType.CLAIM_PROCESSED, _claim(claim_id))
+
+            assert mock_send.call_count == 1
+            assert mock_send.call_args[0][1]["id_ranges"] == [[1, 3]]
+            assert aggregator.pending() == 1
+            aggregator.flush()
+
+    def test_zero_window_sends_immediately(self):
+        """Test that a zero window disables coalescing."""
+        aggregator = NotificationAggregator(window_seconds=0)
+        with patch("app.utils.notification_digest._send_notification") as mock_send, \
+                patch("app.utils.notification_digest._run_sync"):
+            aggregator.add(NotificationType.EPISODE_LINKED, {"episode_id": 1})
+            aggregator.add(NotificationType.EPISODE_LINKED, {"episode_id": 2})
+
+        assert mock_send.call_count == 2
+        assert mock_send.call_args[0][2] == "1 episodes linked"
+
+    def test_unsupported_event_rejected(self):
+        """Test that only per-entity event types can be coalesced."""
+        with pytest.raises(ValueError):
+            NotificationAggregator().add(NotificationType.FILE_PROGRESS, {})
+
+    def test_send_failure_is_logged_not_raised(self):
+        """Test that notification failures never break the caller."""
+        aggregator = NotificationAggregator(window_seconds=60)
+        with patch("app.utils.notification_digest._run_sync", side_effect=Exception("boom")), \
+                patch("app.utils.notification_digest._send_notification"):
+            aggregator.add(NotificationType.CLAIM_PROCESSED, _claim(1))
+            aggregator.flush()
+        assert aggregator.pending() == 0
+
+
+@pytest.mark.unit
+def test_progress_throttle():
+    """Test that at most one update per interval is allowed."""
+    with patch("app.utils.notification_digest.time.monotonic", side_effect=[0.0, 0.5, 1.2, 1.3]):
+        throttle = ProgressThrottle(interval_seconds=1.0)
+        assert [throttle.ready() for _ in range(4)] == [True, False, True, False]
+
+
+@pytest.mark.unit
+class TestBroadcastDigest:
+    """Tests for ConnectionManager.broadcast_digest."""
+
+    @pytest.mark.asyncio
+    async def test_summary_and_details(self):
+        """Test that only opted-in clients receive per-item events."""
+        manager = ConnectionManager()
+        summary_ws, details_ws, other_ws = AsyncMock(), AsyncMock(), AsyncMock()
+        await manager.connect(summary_ws)
+        await manager.connect(details_ws, topics={"practice:p1"}, details=True)
+        await manager.connect(other_ws, topics={"practice:p2"}, details=True)
+        items = [_claim(1), _claim(2)]
+        digest = build_notification(
+            NotificationType.DIGEST,
+            {"event": "claim_processed", "count": 2, "id_ranges": [[1, 2]], "practice_id": "p1"},
+            "2 claims processed",
+            items=items,
+        )
+
+        await manager.dispatch(digest)
+        await manager.flush()
+
+        summary = json.loads(summary_ws.send_text.call_args[0][0])
+        assert summary["type"] == "digest"
+        assert "items" not in summary
+        sent = [json.loads(call[0][0]) for call in details_ws.send_text.call_args_list]
+        assert [m["type"] for m in sent] == ["digest", "claim_processed", "claim_processed"]
+        assert [m["data"]["claim_id"] for m in sent[1:]] == [1, 2]
+        assert not other_ws.send_text.called
@@ -0,0 +1,193 @@
+"""Tests for keyset pagination and approximate totals."""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.models.database import Claim
+from app.utils.errors import ValidationError
+from app.utils.pagination import (
+    APPROXIMATE_COUNT_THRESHOLD,
+    decode_cursor,
+    encode_cursor,
+    get_total,
+    paginate,
+)
+from tests.factories import ClaimEpisodeFactory, ClaimFactory, PayerFactory, ProviderFactory
+
+
+def _create_claims(count, **kwargs):
+    provider = ProviderFactory()
+    payer = PayerFactory()
+    base = datetime(2024, 1, 1)
+    # Two claims share each timestamp so the id tie-breaker is exercised
+    return [
+        ClaimFactory(provider=provider, payer=payer, created_at=base + timedelta(minutes=i // 2), **kwargs)
+        for i in range(count)
+    ]
+
+
+@pytest.mark.unit
+class TestCursor:
+    """Tests for cursor encoding."""
+
+    def test_round_trip(self):
+        """Test that a cursor decodes to the position it encodes."""
+        created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+        cursor = encode_cursor(created_at, 42)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == (created_at, 42)
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "", "W10", "WyJ4IiwxXQ"])
+    def test_invalid_cursor_raises(self, cursor):
+        """Test that malformed cursors raise ValidationError."""
+        with pytest.raises(ValidationError):
+            decode_cursor(cursor)
+
+
+@pytest.mark.unit
+class TestPaginate:
+    """Tests for paginate()."""
+
+    def test_cursor_walk_visits_every_row_once(self, db_session):
+        """Test that following next_cursor returns all rows in (created_at, id) order."""
+        claims = _create_claims(7)
+        expected = [c.id for c in sorted(claims, key=lambda c: (c.created_at, c.id))]
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = paginate(db_session.query(Claim), Claim, 3, cursor=cursor)
+            seen.extend(c.id for c in page)
+            if cursor is None:
+                break
+
+        assert seen == expected
+
+    def test_last_page_has_no_cursor(self, db_session):
+        """Test that an exactly full last page does not produce a cursor."""
+        _create_claims(3)
+        page, cursor = paginate(db_session.query(Claim), Claim, 3)
+        assert len(page) == 3
+        assert cursor is None
+
+    def test_skip_uses_same_ordering(self, db_session):
+        """Test that offset pagination matches the keyset order."""
+        _create_claims(6)
+        first, cursor = paginate(db_session.query(Claim), Claim, 2)
+        by_cursor, _ = paginate(db_session.query(Claim), Claim, 2, cursor=cursor)
+        by_skip, _ = paginate(db_session.query(Claim), Claim, 2, skip=2)
+        assert [c.id for c in by_cursor] == [c.id for c in by_skip]
+
+    @pytest.mark.parametrize("limit, skip", [(0, 0), (-1, 0), (2, -1)])
+    def test_invalid_page_raises(self, db_session, limit, skip):
+        """Test that a non-positive limit or negative skip raises ValidationError."""
+        _create_claims(2)
+        with pytest.raises(ValidationError):
+            paginate(db_session.query(Claim), Claim, limit, skip=skip)
+
+
+@pytest.mark.unit
+class TestGetTotal:
+    """Tests for get_total()."""
+
+    def test_exact_count_is_cached(self, db_session):
+        """Test exact counts and their cache key."""
+        _create_claims(4)
+        with patch("app.utils.pagination.cache") as mock_cache:
+            mock_cache.get.return_value = None
+            total, is_exact = get_total(db_session, db_session.query(Claim), Claim, "claim", mode="exact")
+
+        assert (total, is_exact) == (4, True)
+        mock_cache.set.assert_called_once()
+        assert mock_cache.set.call_args[0][:2] == ("count:claim", 4)
+
+    def test_none_mode_skips_counting(self, db_session):
+        """Test that total_mode=none does not count."""
+        assert get_total(db_session, db_session.query(Claim), Claim, "claim", mode="none") == (None, False)
+
+    def test_approximate_falls_back_to_exact_without_estimate(self, db_session):
+        """Test that non-PostgreSQL databases get exact counts."""
+        _create_claims(2)
+        total, is_exact = get_total(db_session, db_session.query(Claim), Claim, "claim")
+        assert (total, is_exact) == (2, True)
+
+    def test_approximate_uses_large_estimate(self, db_session):
+        """Test that large planner estimates are returned without counting."""
+        estimate = APPROXIMATE_COUNT_THRESHOLD * 50
+        with patch("app.utils.pagination.estimate_count", return_value=estimate) as mock_estimate:
+            total, is_exact = get_total(
+                db_session, db_session.query(Claim), Claim, "claim", payer_id=7, practice_id=None
+            )
+
+        assert (total, is_exact) == (estimate, False)
+        assert mock_estimate.call_args[1] == {"filtered": True}
+
+    def test_small_estimate_counts_exactly(self, db_session):
+        """Test that small estimates are replaced by the (cheap) exact count."""
+        _create_claims(2)
+        with patch("app.utils.pagination.estimate_count", return_value=5):
+            total, is_exact = get_total(db_session, db_session.query(Claim), Claim, "claim")
+        assert (total, is_exact) == (2, True)
+
+
+@pytest.mark.api
+class TestListEndpointsKeyset:
+    """Tests for cursor pagination and filters on list endpoints."""
+
+    def test_claims_cursor_pagination(self, client, db_session):
+        """Test walking /claims with next_cursor."""
+        claims = _create_claims(5)
+
+        first = client.get("/api/v1/claims?limit=2").json()
+        assert first["total"] == 5
+        assert first["total_is_exact"] is True
+        assert first["next_cursor"]
+
+        ids = [c["id"] for c in first["claims"]]
+        cursor = first["next_cursor"]
+        while cursor:
+            page = client.get(f"/api/v1/claims?limit=2&cursor={cursor}").json()
+            ids.extend(c["id"] for c in page["claims"])
+            cursor = page["next_cursor"]
+
+        assert ids == [c.id for c in sorted(claims, key=lambda c: (c.created_at, c.id))]
+
+    def test_claims_status_filter(self, client, db_session):
+        """Test filtering claims by status."""
+        _create_claims(2, status="pending")
+        _create_claims(3, status="processed")
+
+        data = client.get("/api/v1/claims?status=processed").json()
+
+        assert data["total"] == 3
+        assert {c["status"] for c in data["claims"]} == {"processed"}
+
+    def test_total_mode_none(self, client, db_session):
+        """Test that totals can be skipped entirely."""
+        _create_claims(1)
+        data = client.get("/api/v1/remits?total_mode=none").json()
+        assert data["total"] is None
+
+    def test_invalid_total_mode_rejected(self, client):
+        """Test that unknown total modes are rejected."""
+        assert client.get("/api/v1/claims?total_mode=fast").status_code == 422
+
+    @pytest.mark.parametrize("path", ["/api/v1/claims", "/api/v1/remits", "/api/v1/episodes"])
+    @pytest.mark.parametrize("params", ["limit=-1", "limit=0", "limit=1001", "skip=-1"])
+    def test_invalid_page_rejected(self, client, path, params):
+        """Test that every paginated list endpoint validates skip and limit."""
+        assert client.get(f"{path}?{params}").status_code == 422
+
+    def test_invalid_cursor_rejected(self, client):
+        """Test that malformed cursors return a validation error."""
+        assert client.get("/api/v1/episodes?cursor=garbage").status_code == 400
+
+    def test_episodes_status_filter(self, client, db_session):
+        """Test filtering episodes by status."""
+        ClaimEpisodeFactory(status="linked")
+        ClaimEpisodeFactory(status="complete")
+
+        data = client.get("/api/v1/episodes?status=complete&total_mode=exact").json()
+
+        assert data["total"] == 1
+        assert data["episodes"][0]["status"] == "complete"
@@ -0,0 +1,212 @@
+"""Tests for monthly table partitions."""
+import os
+import time
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.services.maintenance import partitions
+from app.services.maintenance.partitions import (
+    add_months,
+    create_default_partition_sql,
+    create_partition_sql,
+    expired_partitions,
+    maintain_partitions,
+    month_range,
+    partition_month,
+    partition_name,
+)
+from app.services.queue import tasks
+
+POSTGRES_URL = os.getenv("TEST_DATABASE_URL", "")
+requires_postgres = pytest.mark.skipif(
+    not POSTGRES_URL.startswith("postgresql"), reason="Partitioning needs TEST_DATABASE_URL on PostgreSQL"
+)
+
+
+@pytest.mark.unit
+class TestMonths:
+    """Tests for month arithmetic and partition names."""
+
+    def test_add_months(self):
+        """Test shifting across year boundaries."""
+        assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+        assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+        assert add_months(date(2024, 1, 1), -25) == date(2021, 12, 1)
+
+    def test_month_range(self):
+        """Test the months covered by two dates."""
+        assert month_range(date(2023, 11, 30), date(2024, 2, 1)) == [
+            date(2023, 11, 1), date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1)
+        ]
+        assert month_range(date(2024, 2, 1), date(2024, 1, 31)) == []
+
+    def test_partition_names(self):
+        """Test that names round-trip to months."""
+        assert partition_name("audit_logs", date(2024, 3, 1)) == "audit_logs_p202403"
+        assert partition_month("audit_logs", "audit_logs_p202403") == date(2024, 3, 1)
+        assert partition_month("audit_logs", "claim_episodes_p202403") is None
+        assert partition_month("audit_logs", "audit_logs_p202413") is None
+
+    def test_create_partition_sql(self):
+        """Test partition bounds (upper bound exclusive)."""
+        assert create_partition_sql("claim_episodes", date(2024, 12, 1)) == (
+            "CREATE TABLE IF NOT EXISTS claim_episodes_p202412 PARTITION OF claim_episodes "
+            "FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')"
+        )
+        assert create_default_partition_sql("audit_logs") == (
+            "CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT"
+        )
+
+
+@pytest.mark.unit
+class TestExpiredPartitions:
+    """Tests for choosing partitions to detach."""
+
+    NAMES = ["audit_logs_p202312", "audit_logs_p202401", "audit_logs_p202402", "audit_logs_p202403", "other"]
+
+    def test_retention_counts_current_month(self):
+        """Test that the current month and retention - 1 earlier months are kept."""
+        expired = expired_partitions("audit_logs", self.NAMES, 2, date(2024, 3, 15))
+
+        assert expired == ["audit_logs_p202312", "audit_logs_p202401"]
+
+    def test_zero_retention_keeps_all(self):
+        """Test that retention 0 disables detaching."""
+        assert expired_partitions("audit_logs", self.NAMES, 0, date(2030, 1, 1)) == []
+
+
+@pytest.mark.unit
+class TestMaintainPartitions:
+    """Tests for maintenance on databases without partitions."""
+
+    def test_sqlite_is_skipped(self, db_session):
+        """Test that plain tables are left alone."""
+        assert maintain_partitions(db_session.connection()) == {}
+
+    def test_task(self, db_session):
+        """Test the Celery task result."""
+        with patch("app.services.queue.tasks.SessionLocal", return_value=db_session), \
+                patch("celery.app.task.Context") as mock_context_class:
+            mock_context_class.return_value = MagicMock(id="test-task", retries=0)
+            result = tasks.maintain_partitions.run()
+
+        assert result == {"status": "success", "tables": {}}
+
+
+@pytest.fixture
+def pg_connection():
+    """A PostgreSQL connection with a scratch schema first on the search path."""
+    engine = create_engine(POSTGRES_URL)
+    with engine.connect() as connection:
+        connection.execute(text("DROP SCHEMA IF EXISTS partition_test CASCADE"))
+        connection.execute(text("CREATE SCHEMA partition_test"))
+        connection.execute(text("SET search_path TO partition_test"))
+        yield connection
+        connection.rollback()
+        connection.execute(text("DROP SCHEMA partition_test CASCADE"))
+        connection.commit()
+    engine.dispose()
+
+
+def _create_audit_logs(connection, partitioned: bool, name: str = "audit_logs") -> None:
+    partition_clause = " PARTITION BY RANGE (created_at)" if partitioned else ""
+    primary_key = "id, created_at" if partitioned else "id"
+    connection.execute(text(
+        f"CREATE TABLE {name} (id bigint NOT NULL, status_code integer NOT NULL, "
+        f"created_at timestamp NOT NULL, PRIMARY KEY ({primary_key})){partition_clause}"
+    ))
+    connection.execute(text(f"CREATE INDEX ix_{name}_created_at ON {name} (created_at)"))
+
+
+@requires_postgres
+@pytest.mark.integration
+class TestPostgresPartitions:
+    """Tests against partitioned tables on PostgreSQL."""
+
+    def test_create_and_detach(self, pg_connection, monkeypatch):
+        """Test creating months ahead and detaching expired ones."""
+        monkeypatch.setitem(partitions.PARTITION_RETENTION_MONTHS, "audit_logs", 3)
+        _create_audit_logs(pg_connection, partitioned=True)
+        for month in month_range(date(2023, 12, 1), date(2024, 1, 1)):
+            pg_connection.execute(text(create_partition_sql("audit_logs", month)))
+
+        results = maintain_partitions(pg_connection, today=date(2024, 3, 10), months_ahead=1)
+
+        assert results["audit_logs"] == {
+            "created": ["audit_logs_p202403", "audit_logs_p202404"],
+            "detached": ["audit_logs_p202312"],
+        }
+        assert partitions.list_partitions(pg_connection, "audit_logs") == [
+            "audit_logs_default", "audit_logs_p202401", "audit_logs_p202403", "audit_logs_p202404"
+        ]
+
+    def test_default_partition_catches_missing_months(self, pg_connection):
+        """Test that rows for a month without a partition are kept, then moved to its partition."""
+        _create_audit_logs(pg_connection, partitioned=True)
+        maintain_partitions(pg_connection, today=date(2024, 1, 10), months_ahead=0)
+        # Maintenance stopped running: March has no partition yet
+        pg_connection.execute(text(
+            "INSERT INTO audit_logs VALUES (1, 200, '2024-01-20'), (2, 500, '2024-03-05'), (3, 200, '2024-03-06')"
+        ))
+
+        results = maintain_partitions(pg_connection, today=date(2024, 3, 10), months_ahead=0)
+
+        assert results["audit_logs"]["created"] == ["audit_logs_p202402", "audit_logs_p202403"]
+        assert pg_connection.execute(text("SELECT count(*) FROM audit_logs_default")).scalar() == 0
+        assert pg_connection.execute(text("SELECT id FROM audit_logs_p202403 ORDER BY id")).scalars().all() == [2, 3]
+        assert pg_connection.execute(text("SELECT count(*) FROM audit_logs")).scalar() == 3
+
+    def test_window_query_prunes(self, pg_connection):
+        """Test that a bounded created_at filter only scans the months it covers."""
+        _create_audit_logs(pg_connection, partitioned=True)
+        partitions.create_partitions(pg_connection, "audit_logs", month_range(date(2021, 1, 1), date(2024, 12, 1)))
+
+        plan = "\n".join(pg_connection.execute(text(
+            "EXPLAIN SELECT count(*) FROM audit_logs "
+            "WHERE created_at >= '2024-06-15' AND created_at < '2024-09-13'"
+        )).scalars())
+
+        assert sorted(set(part for part in plan.split() if part.startswith("audit_logs_p"))) == [
+            "audit_logs_p202406", "audit_logs_p202407", "audit_logs_p202408", "audit_logs_p202409"
+        ]
+
+
+@requires_postgres
+@pytest.mark.performance
+def test_benchmark_90_day_window(pg_connection):
+    """Compare a 90-day aggregate on four years of rows, plain vs partitioned."""
+    months = month_range(date(2021, 1, 1), date(2024, 12, 1))
+    _create_audit_logs(pg_connection, partitioned=False, name="audit_logs_plain")
+    _create_audit_logs(pg_connection, partitioned=True)
+    partitions.create_partitions(pg_connection, "audit_logs", months)
+
+    # One row every 30 seconds for four years (~4.2M rows)
+    rows = (
+        "SELECT n, 200 + (n % 5) * 100, timestamp '2021-01-01' + n * interval '30 seconds' "
+        "FROM generate_series(0, 4 * 365 * 2880 - 1) AS n"
+    )
+    for table in ("audit_logs_plain", "audit_logs"):
+        pg_connection.execute(text(f"INSERT INTO {table} {rows}"))
+        pg_connection.execute(text(f"ANALYZE {table}"))
+
+    def timed(table):
+        query = text(
+            f"SELECT status_code, count(*) FROM {table} "
+            "WHERE created_at >= :start AND created_at < :start + interval '90 days' GROUP BY status_code"
+        )
+        timings = []
+        for month in months[::6]:
+            start = time.perf_counter()
+            pg_connection.execute(query, {"start": month}).all()
+            timings.append(time.perf_counter() - start)
+        return sorted(timings)[len(timings) // 2]
+
+    plain = timed("audit_logs_plain")
+    partitioned = timed("audit_logs")
+
+    print(f"\n90-day aggregate over 4 years: plain {plain * 1000:.0f}ms, "
+          f"partitioned {partitioned * 1000:.0f}ms ({plain / partitioned:.1f}x)")
+    assert partitioned < plain
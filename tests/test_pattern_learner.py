@@ -0,0 +1,234 @@
+"""Tests for the claim attribute denial pattern miner."""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.database import DenialPattern, EpisodeStatus
+from app.services.learning.pattern_detector import PatternDetector
+from ml.models.pattern_learner import (
+    ATTRIBUTE_PATTERN_TYPE,
+    PatternLearner,
+    charge_bucket,
+    claim_items,
+    conditions_match,
+    diagnosis_code_values,
+    itemset_conditions,
+    pattern_key,
+)
+from ml.training.benchmark_pattern_mining import benchmark_mining, synthetic_episodes
+from tests.factories import (
+    ClaimEpisodeFactory,
+    ClaimFactory,
+    ClaimLineFactory,
+    DenialPatternFactory,
+    PayerFactory,
+    RemittanceFactory,
+)
+
+
+def _claim(principal="E11.9", diagnosis_codes=("E11.9", "I10"), procedures=("99213",), facility="11", charge=300.0):
+    return SimpleNamespace(
+        principal_diagnosis=principal,
+        diagnosis_codes=list(diagnosis_codes),
+        claim_lines=[SimpleNamespace(procedure_code=code) for code in procedures],
+        facility_type_code=facility,
+        total_charge_amount=charge,
+    )
+
+
+@pytest.mark.unit
+class TestClaimItems:
+    """Tests for turning claims into items and itemsets into conditions."""
+
+    def test_claim_items(self):
+        """Test that the principal diagnosis is not repeated and the charge is bucketed."""
+        items = claim_items("E11.9", ["E11.9", "I10", "I10"], ["99213", None], "11", 300.0)
+
+        assert sorted(items) == [
+            ("charge_bucket", charge_bucket(300.0)),
+            ("diagnosis_codes", "I10"),
+            ("facility_type_code", "11"),
+            ("principal_diagnosis", "E11.9"),
+            ("procedure_codes", "99213"),
+        ]
+        assert claim_items(None, None, None, None, None) == [("charge_bucket", 0)]
+
+    def test_conditions_round_trip(self):
+        """Test that a claim matches the conditions built from its own items."""
+        claim = _claim(procedures=("99213", "36415"))
+        items = claim_items("E11.9", claim.diagnosis_codes, ["99213", "36415"], "11", 300.0)
+        conditions = itemset_conditions(items)
+
+        assert conditions["procedure_codes"] == ["36415", "99213"]
+        assert conditions["charge_amount_min"] == 250.0
+        assert conditions["charge_amount_max"] == 500.0
+        assert conditions_match(conditions, claim)
+        assert not conditions_match(conditions, _claim(procedures=("99213",)))
+        assert not conditions_match(conditions, _claim(procedures=("99213", "36415"), charge=500.0))
+        assert not conditions_match(conditions, _claim(procedures=("99213", "36415"), facility="12"))
+
+    def test_parsed_diagnosis_codes(self):
+        """Test that the parser's {"code", "qualifier"} diagnosis codes are matched by code."""
+        parsed = [{"code": "E11.9", "qualifier": "ABK"}, {"code": "I10", "qualifier": "ABF"}]
+        claim = _claim(diagnosis_codes=parsed)
+
+        assert diagnosis_code_values(parsed) == {"E11.9", "I10"}
+        assert ("diagnosis_codes", "I10") in claim_items("E11.9", parsed, ["99213"], "11", 300.0)
+        assert conditions_match({"diagnosis_codes": ["I10"]}, claim)
+        assert not conditions_match({"diagnosis_codes": ["J45"]}, claim)
+
+    def test_open_top_bucket(self):
+        """Test that the highest charge bucket has no maximum."""
+        conditions = itemset_conditions([("charge_bucket", charge_bucket(1e6))])
+
+        assert conditions == {"charge_amount_min": 25000.0, "charge_amount_max": None}
+        assert conditions_match(conditions, _claim(charge=1e6))
+
+    def test_pattern_key_ignores_statistics(self):
+        """Test that re-mined statistics do not change a pattern's key."""
+        conditions = {"principal_diagnosis": "E11.9", "procedure_codes": ["99213"]}
+
+        assert pattern_key({**conditions, "confidence": 0.5, "lift": 2.0}) == pattern_key(conditions)
+        assert pattern_key(conditions) != pattern_key({"principal_diagnosis": "E11.9"})
+
+
+@pytest.mark.unit
+class TestPatternLearner:
+    """Tests for PatternLearner.fit."""
+
+    def test_planted_rule(self):
+        """Test that the planted combination is found with correct statistics."""
+        transactions, outcomes = synthetic_episodes(20000, seed=3)
+
+        rules = PatternLearner().fit(transactions, outcomes)
+
+        planted = [
+            rule for rule in rules
+            if rule["denial_reason_code"] == "CO50"
+            and rule["itemset"] == [("principal_diagnosis", "E01.1"), ("procedure_codes", "99213")]
+        ]
+        assert len(planted) == 1
+        rule = planted[0]
+
+        covered = [
+            episode for episode, items in enumerate(transactions)
+            if ("principal_diagnosis", "E01.1") in items and ("procedure_codes", "99213") in items
+        ]
+        denied = [episode for episode in covered if "CO50" in outcomes[episode]]
+        base_rate = sum("CO50" in codes for codes in outcomes) / len(outcomes)
+        assert rule["occurrence_count"] == len(denied)
+        assert rule["support"] == pytest.approx(len(denied) / len(transactions), abs=1e-6)
+        assert rule["confidence"] == pytest.approx(len(denied) / len(covered), abs=1e-4)
+        assert rule["lift"] == pytest.approx(len(denied) / len(covered) / base_rate, abs=1e-3)
+        assert rule["conditions"]["principal_diagnosis"] == "E01.1"
+        assert rule["conditions"]["confidence"] == rule["confidence"]
+
+        # Random CO45 denials form no rules
+        assert all(rule["denial_reason_code"] == "CO50" for rule in rules)
+        assert [rule["lift"] for rule in rules] == sorted((rule["lift"] for rule in rules), reverse=True)
+
+    def test_unproductive_extensions_pruned(self):
+        """Test that adding an unrelated item to a rule does not yield another rule."""
+        transactions, outcomes = synthetic_episodes(20000, seed=3)
+
+        rules = PatternLearner(max_length=4).fit(transactions, outcomes)
+
+        planted = {("principal_diagnosis", "E01.1"), ("procedure_codes", "99213")}
+        assert not any(planted < set(rule["itemset"]) for rule in rules)
+
+    def test_thresholds(self):
+        """Test that the support and occurrence thresholds apply."""
+        transactions = [[("procedure_codes", "A")]] * 4 + [[("procedure_codes", "B")]] * 96
+        outcomes = [["CO50"]] * 4 + [[]] * 96
+
+        assert PatternLearner(min_occurrences=5).fit(transactions, outcomes) == []
+        assert PatternLearner(min_occurrences=5).fit([], []) == []
+
+        rules = PatternLearner(min_occurrences=4).fit(transactions, outcomes)
+        assert [rule["itemset"] for rule in rules] == [[("procedure_codes", "A")]]
+        assert rules[0]["confidence"] == 1.0
+        assert rules[0]["lift"] == 25.0
+
+        assert PatternLearner(min_occurrences=4, min_support=0.05).fit(transactions, outcomes) == []
+
+
+@pytest.mark.integration
+class TestPatternDetectorAttributePatterns:
+    """Tests for attribute combination patterns in PatternDetector."""
+
+    def _episode(self, payer, principal, procedure, denied):
+        claim = ClaimFactory(
+            payer=payer,
+            principal_diagnosis=principal,
+            diagnosis_codes=[{"code": principal, "qualifier": "ABK"}],
+            facility_type_code="11",
+            total_charge_amount=150.0,
+        )
+        ClaimLineFactory(claim=claim, procedure_code=procedure)
+        remittance = RemittanceFactory(
+            payer=payer,
+            denial_reasons=[{"code": "CO50", "description": "Not medically necessary"}] if denied else None,
+        )
+        ClaimEpisodeFactory(
+            claim=claim,
+            remittance=remittance,
+            status=EpisodeStatus.COMPLETE,
+            denial_count=1 if denied else 0,
+        )
+        return claim
+
+    def test_detect_attribute_patterns(self, db_session):
+        """Test that mined combinations are stored, updated, matched and expired."""
+        payer = PayerFactory()
+        denied_claims = [self._episode(payer, "Z99.1", "99215", True) for _ in range(8)]
+        paid_claims = [self._episode(payer, "A00.0", "99213", False) for _ in range(24)]
+        kept = DenialPatternFactory(
+            payer=payer,
+            pattern_type=ATTRIBUTE_PATTERN_TYPE,
+            denial_reason_code="CO50",
+            conditions={"principal_diagnosis": "Z99.1", "confidence": 0.1},
+            first_seen=datetime.now() - timedelta(days=30),
+        )
+        stale = DenialPatternFactory(
+            payer=payer,
+            pattern_type=ATTRIBUTE_PATTERN_TYPE,
+            denial_reason_code="CO50",
+            conditions={"principal_diagnosis": "B20"},
+        )
+        stale_id = stale.id
+
+        detector = PatternDetector(db_session)
+        patterns = detector.detect_patterns_for_payer(payer.id, days_back=90)
+
+        combinations = {
+            pattern_key(pattern.conditions): pattern
+            for pattern in patterns
+            if pattern.pattern_type == ATTRIBUTE_PATTERN_TYPE
+        }
+        assert set(combinations) == {
+            pattern_key({"principal_diagnosis": "Z99.1"}),
+            pattern_key({"procedure_codes": ["99215"]}),
+        }
+        pattern = combinations[pattern_key({"principal_diagnosis": "Z99.1"})]
+        assert pattern.id == kept.id
+        assert pattern.occurrence_count == 8
+        assert pattern.frequency == 1.0
+        assert pattern.confidence_score == 1.0
+        assert pattern.conditions["lift"] == 4.0
+        assert "Z99.1" in pattern.pattern_description
+        assert db_session.get(DenialPattern, stale_id) is None
+
+        assert detector._calculate_pattern_match(denied_claims[0], pattern) == 1.0
+        assert detector._calculate_pattern_match(paid_claims[0], pattern) == 0.0
+
+
+@pytest.mark.performance
+def test_mining_scales_linearly():
+    """Test that mining time grows about linearly with the number of episodes."""
+    small, large = benchmark_mining([20000, 200000])
+
+    assert small["planted_rule_found"] and large["planted_rule_found"]
+    # 10x the episodes; allow for fixed costs and timer noise
+    assert large["seconds"] < 15 * max(small["seconds"], 0.01)
+    assert large["episodes_per_second"] > 50000
@@ -0,0 +1,186 @@
+"""Query plan regression tests and JSON array predicates."""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select, text
+
+from app.config.database import Base
+from app.models.database import Claim, ClaimEpisode, EpisodeStatus, Remittance
+from app.utils.json_filters import json_array_any, json_array_contains
+from ml.services.data_collector import DataCollector
+from tests.factories import ClaimEpisodeFactory, ClaimFactory, PayerFactory, RemittanceFactory
+
+POSTGRES_URL = os.getenv("TEST_DATABASE_URL", "")
+requires_postgres = pytest.mark.skipif(
+    not POSTGRES_URL.startswith("postgresql"), reason="GIN indexes need TEST_DATABASE_URL on PostgreSQL"
+)
+
+# Access paths that must stay index-backed: (name, statement, table)
+ACCESS_PATHS = [
+    (
+        "claims by payer and service date",
+        select(Claim.id).where(
+            Claim.payer_id == 1,
+            Claim.service_date >= datetime(2024, 1, 1),
+            Claim.service_date < datetime(2024, 4, 1),
+        ),
+        "claims",
+    ),
+    (
+        "remittances by claim control number",
+        select(Remittance.id).where(Remittance.claim_control_number == "CLM001"),
+        "remittances",
+    ),
+    (
+        "episodes with denials",
+        select(ClaimEpisode.id).where(ClaimEpisode.status == EpisodeStatus.COMPLETE, ClaimEpisode.denial_count > 0),
+        "claim_episodes",
+    ),
+]
+
+# Only indexable with the PostgreSQL GIN indexes
+JSON_ACCESS_PATHS = [
+    (
+        "remittances by denial code",
+        select(Remittance.id).where(json_array_contains(Remittance.denial_reasons, "CO45", key="code")),
+        "remittances",
+    ),
+    (
+        "claims by diagnosis code",
+        select(Claim.id).where(json_array_contains(Claim.diagnosis_codes, "E11.9", key="code")),
+        "claims",
+    ),
+]
+
+
+def _plan(connection, statement) -> str:
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    explain = "EXPLAIN QUERY PLAN " if connection.dialect.name == "sqlite" else "EXPLAIN "
+    return "\n".join(str(row[-1]) for row in connection.exec_driver_sql(explain + sql))
+
+
+def _is_sequential_scan(plan: str, table: str) -> bool:
+    return any(
+        line.strip().startswith(f"SCAN {table}") or f"Seq Scan on {table}" in line
+        for line in plan.splitlines()
+    )
+
+
+@pytest.mark.unit
+class TestAccessPathPlans:
+    """Fail if an indexed access path falls back to a sequential scan."""
+
+    @pytest.mark.parametrize("name, statement, table", ACCESS_PATHS, ids=[path[0] for path in ACCESS_PATHS])
+    def test_index_used(self, db_session, name, statement, table):
+        """Test that the planner searches an index."""
+        plan = _plan(db_session.connection(), statement)
+
+        assert not _is_sequential_scan(plan, table), plan
+
+
+@requires_postgres
+@pytest.mark.integration
+class TestPostgresPlans:
+    """Plans on PostgreSQL, where the JSONB columns have GIN indexes."""
+
+    @pytest.fixture
+    def pg_connection(self):
+        engine = create_engine(POSTGRES_URL, connect_args={"options": "-csearch_path=plan_test"})
+        with engine.connect() as connection:
+            connection.execute(text("DROP SCHEMA IF EXISTS plan_test CASCADE"))
+            connection.execute(text("CREATE SCHEMA plan_test"))
+            Base.metadata.create_all(connection)
+            # Empty tables: make any usable index cheaper than a scan
+            connection.execute(text("SET enable_seqscan = off"))
+            yield connection
+            connection.rollback()
+            connection.execute(text("DROP SCHEMA plan_test CASCADE"))
+            connection.commit()
+        engine.dispose()
+
+    @pytest.mark.parametrize(
+        "name, statement, table", ACCESS_PATHS + JSON_ACCESS_PATHS,
+        ids=[path[0] for path in ACCESS_PATHS + JSON_ACCESS_PATHS],
+    )
+    def test_index_used(self, pg_connection, name, statement, table):
+        """Test that no access path needs a sequential scan."""
+        plan = _plan(pg_connection, statement)
+
+        assert not _is_sequential_scan(plan, table), plan
+
+
+@pytest.mark.unit
+class TestJsonArrayPredicates:
+    """Tests for json_array_contains and json_array_any on SQLite."""
+
+    def _remittance_ids(self, db_session, condition):
+        return sorted(db_session.execute(select(Remittance.id).where(condition)).scalars())
+
+    def test_contains(self, db_session):
+        """Test plain string and keyed object elements."""
+        plain = RemittanceFactory(denial_reasons=["CO45", "PR1"])
+        keyed = RemittanceFactory(denial_reasons=[{"code": "CO45", "group": "CO"}])
+        other = RemittanceFactory(denial_reasons=["CO450", {"reason": "CO45"}])
+        RemittanceFactory(denial_reasons=None)
+
+        assert self._remittance_ids(db_session, json_array_contains(Remittance.denial_reasons, "CO45")) == [plain.id]
+        assert self._remittance_ids(
+            db_session, json_array_contains(Remittance.denial_reasons, "CO45", key="code")
+        ) == [plain.id, keyed.id]
+        assert other.id not in self._remittance_ids(
+            db_session, json_array_contains(Remittance.denial_reasons, "CO45", key="code")
+        )
+
+    def test_any(self, db_session):
+        """Test that only arrays with a truthy element match, like any()."""
+        denied = [
+            RemittanceFactory(denial_reasons=reasons).id
+            for reasons in (["CO45"], [{"code": "CO45"}], ["", 1], [0.5], [True], [[0]])
+        ]
+        for reasons in ([], None, ["", None], [0, 0.0, False], [[], {}], {"code": "CO45"}):
+            RemittanceFactory(denial_reasons=reasons)
+
+        assert self._remittance_ids(db_session, json_array_any(Remittance.denial_reasons)) == denied
+
+
+@pytest.mark.api
+class TestCodeFilters:
+    """Tests for the denial and diagnosis code filters on list endpoints."""
+
+    def test_remits_by_denial_code(self, client, db_session):
+        """Test filtering remittances by denial reason code."""
+        RemittanceFactory(remittance_control_number="DENIED", denial_reasons=["CO45"])
+        RemittanceFactory(remittance_control_number="PAID", denial_reasons=None)
+
+        response = client.get("/api/v1/remits?denial_code=CO45&total_mode=exact")
+
+        assert [r["remittance_control_number"] for r in response.json()["remits"]] == ["DENIED"]
+        assert response.json()["total"] == 1
+
+    def test_claims_by_diagnosis_code(self, client, db_session):
+        """Test filtering claims by parsed or plain diagnosis codes."""
+        ClaimFactory(claim_control_number="PARSED", diagnosis_codes=[{"code": "E119", "qualifier": "ABK"}])
+        ClaimFactory(claim_control_number="PLAIN", diagnosis_codes=["E119"])
+        ClaimFactory(claim_control_number="OTHER", diagnosis_codes=["I10"])
+
+        response = client.get("/api/v1/claims?diagnosis_code=E119")
+
+        assert sorted(c["claim_control_number"] for c in response.json()["claims"]) == ["PARSED", "PLAIN"]
+
+
+@pytest.mark.unit
+def test_denial_rate_counts_in_sql(db_session):
+    """Test the aggregate denial rate against the episodes it counts."""
+    payer = PayerFactory()
+    for reasons in (["CO45"], [], None, ["PR1", "CO45"], [""]):
+        claim = ClaimFactory(payer=payer)
+        ClaimEpisodeFactory(claim=claim, remittance=RemittanceFactory(payer=payer, denial_reasons=reasons))
+    ClaimFactory(payer=payer)  # no remittance yet
+    db_session.commit()
+
+    collector = DataCollector(db_session)
+    cutoff = datetime.now() - timedelta(days=1)
+
+    assert collector._calculate_payer_denial_rate(payer.id, cutoff) == 0.4
+    assert collector._calculate_payer_denial_rate(payer.id, datetime.now() + timedelta(days=1)) == 0.0
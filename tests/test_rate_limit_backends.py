@@ -0,0 +1,299 @@
+"""Tests for the GCRA rate limiting backend."""
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.api.middleware.rate_limit_backends import (
+    GCRA_LUA_SCRIPT,
+    RedisGCRALimiter,
+    SlidingWindowCounter,
+    TokenBucketPreCheck,
+    ceil_seconds,
+)
+
+
+@pytest.mark.unit
+class TestSlidingWindowCounter:
+    """Tests for SlidingWindowCounter."""
+
+    def test_counts_requests_in_current_window(self):
+        """Test that increments in the current window are counted exactly."""
+        counter = SlidingWindowCounter(60)
+        now = 6000.0  # Window boundary
+        for _ in range(5):
+            counter.increment("ip", now)
+        assert counter.count("ip", now) == 5
+
+    def test_unknown_key_counts_zero(self):
+        """Test that unknown keys count as zero without allocating state."""
+        counter = SlidingWindowCounter(60)
+        assert counter.count("ip", 6000.0) == 0
+        assert len(counter) == 0
+
+    def test_previous_window_weighted_by_overlap(self):
+        """Test that the previous window decays linearly across the next window."""
+        counter = SlidingWindowCounter(60)
+        for _ in range(10):
+            counter.increment("ip", 6000.0)
+        # Halfway through the next window, half of the previous count remains
+        assert counter.count("ip", 6090.0) == pytest.approx(5.0)
+        # At the start of the next window, all of it remains
+        assert counter.count("ip", 6060.0) == pytest.approx(10.0)
+
+    def test_stale_windows_are_dropped(self):
+        """Test that counts older than two windows no longer contribute."""
+        counter = SlidingWindowCounter(60)
+        for _ in range(10):
+            counter.increment("ip", 6000.0)
+        assert counter.count("ip", 6130.0) == 0
+
+    def test_memory_is_constant_per_key(self):
+        """Test that state per key does not grow with the number of requests."""
+        counter = SlidingWindowCounter(60)
+        for i in range(1000):
+            counter.increment("ip", 6000.0 + i * 0.01)
+        assert len(counter) == 1
+        assert len(counter._windows["ip"]) == 3
+
+    def test_seconds_until_below(self):
+        """Test the wait time until the estimate drops below the limit."""
+        counter = SlidingWindowCounter(60)
+        for _ in range(10):
+            counter.increment("ip", 6000.0)
+        assert counter.seconds_until_below("ip", 20, 6000.0) == 0.0
+        # 10 requests in the current window, limit 10: must wait for the next
+        # window (60s) and then for the carried weight to fall below 10 (0s more)
+        assert counter.seconds_until_below("ip", 10, 6000.0) == pytest.approx(60.0)
+        # In the next window, limit 5: 10 * (1 - t/60) < 5 once t > 30
+        assert counter.seconds_until_below("ip", 5, 6070.0) == pytest.approx(20.0)
+
+    def test_cleanup_removes_idle_keys(self):
+        """Test that cleanup drops keys idle for two windows."""
+        counter = SlidingWindowCounter(60)
+        counter.increment("old", 6000.0)
+        counter.increment("new", 6120.0)
+        counter.cleanup(6120.0)
+        assert "old" not in counter._windows
+        assert "new" in counter._windows
+
+
+@pytest.mark.unit
+class TestTokenBucketPreCheck:
+    """Tests for TokenBucketPreCheck."""
+
+    def test_unknown_client_is_not_rejected(self):
+        """Test that clients never seen before go to the shared limiter."""
+        pre_check = TokenBucketPreCheck(capacity=5, refill_per_second=5 / 60)
+        assert pre_check.retry_after("ip", 1000.0) == 0.0
+
+    def test_rejects_after_capacity_admitted(self):
+        """Test that a client is rejected locally once its bucket is empty."""
+        pre_check = TokenBucketPreCheck(capacity=5, refill_per_second=5 / 60)
+        for _ in range(5):
+            assert pre_check.retry_after("ip", 1000.0) == 0.0
+            pre_check.record_allowed("ip", 1000.0)
+        assert pre_check.retry_after("ip", 1000.0) == pytest.approx(12.0)
+
+    def test_refills_over_time(self):
+        """Test that tokens refill at the configured rate."""
+        pre_check = TokenBucketPreCheck(capacity=5, refill_per_second=5 / 60)
+        for _ in range(5):
+            pre_check.record_allowed("ip", 1000.0)
+        assert pre_check.retry_after("ip", 1012.0) == 0.0
+
+    def test_record_rejected_blocks_until_retry_after(self):
+        """Test that a shared-limiter rejection blocks the client locally."""
+        pre_check = TokenBucketPreCheck(capacity=5, refill_per_second=5 / 60)
+        pre_check.record_rejected("ip", 30.0, 1000.0)
+        assert pre_check.retry_after("ip", 1010.0) == pytest.approx(20.0)
+        assert pre_check.retry_after("ip", 1031.0) == 0.0
+
+    def test_cleanup_drops_full_unblocked_buckets(self):
+        """Test that cleanup keeps blocked or partially drained buckets only."""
+        pre_check = TokenBucketPreCheck(capacity=5, refill_per_second=5 / 60)
+        pre_check.record_allowed("idle", 1000.0)
+        pre_check.record_rejected("blocked", 600.0, 1000.0)
+        pre_check.cleanup(1100.0)
+        assert len(pre_check) == 1
+        assert pre_check.retry_after("blocked", 1100.0) > 0
+
+
+@pytest.mark.unit
+class TestRedisGCRALimiter:
+    """Tests for RedisGCRALimiter."""
+
+    def test_registers_script_once(self):
+        """Test that the Lua script is registered at construction."""
+        mock_redis = MagicMock()
+        RedisGCRALimiter(mock_redis, 60, 1000)
+        mock_redis.register_script.assert_called_once_with(GCRA_LUA_SCRIPT)
+
+    def test_check_is_single_script_call(self):
+        """Test that a check is one script invocation with both keys."""
+        mock_redis = MagicMock()
+        script = mock_redis.register_script.return_value
+        script.return_value = [1, 59, 999, 0]
+        limiter = RedisGCRALimiter(mock_redis, 60, 1000)
+
+        result = limiter.check("192.168.1.1")
+
+        assert result == (True, 59, 999, 0.0)
+        script.assert_called_once_with(
+            keys=["rl:gcra:192.168.1.1:m", "rl:gcra:192.168.1.1:h"],
+            args=[60, 1000, 60_000, 3_600_000],
+        )
+        assert not mock_redis.pipeline.called
+
+    def test_check_rejected_converts_retry_after(self):
+        """Test that retry-after is converted from milliseconds to seconds."""
+        mock_redis = MagicMock()
+        mock_redis.register_script.return_value.return_value = [0, 0, 940, 1500]
+        limiter = RedisGCRALimiter(mock_redis, 60, 1000)
+
+        assert limiter.check("ip") == (False, 0, 940, 1.5)
+
+
+@pytest.mark.unit
+def test_ceil_seconds():
+    """Test Retry-After rounding."""
+    assert ceil_seconds(0.0) == 1
+    assert ceil_seconds(1.2) == 2
+    assert ceil_seconds(60.0) == 60
+
+
+def _build_app(rate_limit):
+    app = FastAPI()
+
+    @app.get("/test")
+    async def test_endpoint():
+        return {"message": "success"}
+
+    app.add_middleware(
+        rate_limit.RateLimitMiddleware,
+        requests_per_minute=5,
+        requests_per_hour=10,
+        backend="gcra",
+    )
+
+    @app.exception_handler(HTTPException)
+    async def http_exception_handler(request, exc: HTTPException):
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": exc.detail},
+            headers=exc.headers or {},
+        )
+
+    return app
+
+
+@pytest.fixture
+def rate_limit_module(monkeypatch):
+    """Reload the rate limit module with TESTING disabled."""
+    monkeypatch.setenv("TESTING", "false")
+    import importlib
+    from app.api.middleware import rate_limit
+    importlib.reload(rate_limit)
+    yield rate_limit
+    monkeypatch.setenv("TESTING", "true")
+    importlib.reload(rate_limit)
+
+
+@pytest.mark.unit
+class TestGCRABackendMiddleware:
+    """Tests for RateLimitMiddleware with backend="gcra"."""
+
+    def test_unknown_backend_raises(self, rate_limit_module):
+        """Test that an unknown backend is rejected at construction."""
+        with pytest.raises(ValueError, match="Unknown rate limit backend"):
+            rate_limit_module.RateLimitMiddleware(FastAPI(), backend="leaky")
+
+    def test_memory_fallback_blocks_over_minute_limit(self, rate_limit_module, monkeypatch):
+        """Test the sliding-window fallback when Redis is unavailable."""
+        def mock_get_redis():
+            raise Exception("Redis unavailable")
+        monkeypatch.setattr("app.config.redis.get_redis_client", mock_get_redis)
+        client = TestClient(_build_app(rate_limit_module))
+
+        for i in range(5):
+            response = client.get("/test")
+            assert response.status_code == 200
+            assert response.headers["X-RateLimit-Remaining-Minute"] == str(4 - i)
+
+        try:
+            response = client.get("/test")
+            status_code, detail, headers = (
+                response.status_code, response.json()["detail"], response.headers
+            )
+        except HTTPException as exc:
+            status_code, detail, headers = exc.status_code, exc.detail, exc.headers
+        assert status_code == 429
+        assert "Rate limit exceeded" in detail
+        assert int(headers["Retry-After"]) >= 1
+
+    def test_memory_fallback_does_not_keep_timestamps(self, rate_limit_module, monkeypatch):
+        """Test that the GCRA fallback uses counters instead of timestamp lists."""
+        def mock_get_redis():
+            raise Exception("Redis unavailable")
+        monkeypatch.setattr("app.config.redis.get_redis_client", mock_get_redis)
+        middleware = rate_limit_module.RateLimitMiddleware(
+            FastAPI(), requests_per_minute=100, requests_per_hour=1000, backend="gcra"
+        )
+
+        for _ in range(50):
+            assert middleware._check_rate_limit_gcra("ip")[0] is True
+
+        assert len(middleware.request_times) == 0
+        assert len(middleware.minute_counter) == 1
+
+    def test_redis_rejection_is_cached_locally(self, rate_limit_module, monkeypatch):
+        """Test that a client rejected by Redis is rejected locally until Retry-After."""
+        mock_redis = MagicMock()
+        script = mock_redis.register_script.return_value
+        script.return_value = [0, 0, 5, 30_000]
+        monkeypatch.setattr("app.config.redis.get_redis_client", lambda: mock_redis)
+        middleware = rate_limit_module.RateLimitMiddleware(
+            FastAPI(), requests_per_minute=5, requests_per_hour=10, backend="gcra"
+        )
+
+        is_allowed, message, _, _, retry_after = middleware._check_rate_limit_gcra("ip")
+        assert is_allowed is False
+        assert "per minute" in message
+        assert retry_after == 30.0
+
+        is_allowed, message, _, _, retry_after = middleware._check_rate_limit_gcra("ip")
+        assert is_allowed is False
+        assert "retry after" in message
+        assert script.call_count == 1  # Second check never reached Redis
+
+    def test_redis_allowed_counts_for_headers(self, rate_limit_module, monkeypatch):
+        """Test that remaining counts from Redis map to request counts."""
+        mock_redis = MagicMock()
+        mock_redis.register_script.return_value.return_value = [1, 3, 8, 0]
+        monkeypatch.setattr("app.config.redis.get_redis_client", lambda: mock_redis)
+        client = TestClient(_build_app(rate_limit_module))
+
+        response = client.get("/test")
+
+        assert response.status_code == 200
+        assert response.headers["X-RateLimit-Remaining-Minute"] == "3"
+        assert response.headers["X-RateLimit-Remaining-Hour"] == "8"
+        assert not mock_redis.pipeline.called
+
+    def test_redis_error_falls_back_to_local_counters(self, rate_limit_module, monkeypatch):
+        """Test that a failing script call falls back to the sliding-window counters."""
+        mock_redis = MagicMock()
+        mock_redis.register_script.return_value.side_effect = Exception("Connection reset")
+        monkeypatch.setattr("app.config.redis.get_redis_client", lambda: mock_redis)
+        middleware = rate_limit_module.RateLimitMiddleware(
+            FastAPI(), requests_per_minute=5, requests_per_hour=10, backend="gcra"
+        )
+
+        is_allowed, _, minute_count, hour_count, _ = middleware._check_rate_limit_gcra("ip")
+
+        assert is_allowed is True
+        assert (minute_count, hour_count) == (1, 1)
+        assert middleware.minute_counter.count("ip", time.time()) == 1
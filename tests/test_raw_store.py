@@ -0,0 +1,191 @@
+"""Tests for the raw EDI file store."""
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.models.database import Claim, EDIRawFile, Remittance
+from app.services.edi import raw_store
+from app.services.edi.parser import EDIParser
+from app.services.edi.raw_store import (
+    RawBlockLocator,
+    get_raw_segments,
+    read_raw_range,
+    split_raw_segments,
+    store_raw_file,
+)
+from app.services.edi.transformer import EDITransformer
+from app.services.queue.tasks import _load_claim_batch
+from tests.factories import ClaimFactory
+
+SAMPLES_DIR = Path(__file__).parent.parent / "samples"
+
+
+@pytest.mark.unit
+class TestRawFileStorage:
+    """Tests for storing and reading files."""
+
+    def test_read_ranges_across_chunks(self, db_session):
+        """Test that any byte range reads back exactly."""
+        raw = b"".join(b"SEG*%06d~\n" % i for i in range(2000))
+        with patch.object(raw_store, "RAW_STORE_CHUNK_SIZE", 1000):
+            file_hash = store_raw_file(db_session, raw, "test.edi", "837")
+
+        stored = db_session.query(EDIRawFile).one()
+        assert stored.size == len(raw)
+        assert stored.compressed_size < len(raw) / 2
+        assert len(stored.chunk_offsets) == 25
+
+        for offset, length in [(0, 10), (995, 10), (1000, 1000), (5, 20_000), (len(raw) - 3, 3)]:
+            assert read_raw_range(db_session, file_hash, offset, length) == raw[offset:offset + length]
+
+    def test_same_content_stored_once(self, db_session):
+        """Test content addressing."""
+        first = store_raw_file(db_session, b"ISA*00~", "a.edi")
+        second = store_raw_file(db_session, b"ISA*00~", "b.edi")
+
+        assert first == second
+        assert db_session.query(EDIRawFile).count() == 1
+
+    def test_missing_file(self, db_session):
+        """Test reading from an unknown file."""
+        assert read_raw_range(db_session, "0" * 64, 0, 10) is None
+
+    def test_split_raw_segments(self):
+        """Test segment splitting matches the parser's normalization."""
+        assert split_raw_segments(b"CLM*1*10~\r\nDTP*472\n*D8~  ~") == ["CLM*1*10", "DTP*472*D8"]
+
+
+@pytest.mark.unit
+class TestRawBlockLocator:
+    """Tests for RawBlockLocator."""
+
+    @pytest.mark.parametrize(
+        "path, key",
+        [
+            (SAMPLES_DIR / "sample_837.txt", "claims"),
+            (SAMPLES_DIR / "sample_835.txt", "remittances"),
+            (SAMPLES_DIR / "large" / "large_837_100claims.edi", "claims"),
+        ],
+        ids=lambda value: getattr(value, "name", value),
+    )
+    def test_locates_every_parsed_block(self, path, key):
+        """Test that each block's byte range holds exactly its segments."""
+        raw = path.read_bytes()
+        parsed = EDIParser().parse(raw.decode("utf-8"), path.name)
+        locator = RawBlockLocator("hash", raw)
+
+        blocks = [item["raw_block"] for item in parsed[key]]
+        assert blocks
+        for block in blocks:
+            offset, length = locator.locate(block)
+            assert split_raw_segments(raw[offset:offset + length]) == ["*".join(seg) for seg in block]
+
+    def test_unknown_block_keeps_cursor(self):
+        """Test that a block missing from the file does not skip later blocks."""
+        raw = b"HL*1*22~CLM*A~HL*2*22~CLM*B~"
+        locator = RawBlockLocator("hash", raw)
+
+        assert locator.locate([["HL", "9", "22"]]) is None
+        assert locator.locate([["HL", "1", "22"], ["CLM", "X"]]) is None
+        assert locator.locate([["HL", "2", "22"], ["CLM", "B"]]) == (14, 14)
+
+
+@pytest.mark.unit
+class TestTransformerRawReference:
+    """Tests for raw segment references written by EDITransformer."""
+
+    def test_claim_points_into_store(self, db_session):
+        """Test that claims store a pointer and no inline copies."""
+        raw = (SAMPLES_DIR / "sample_837.txt").read_bytes()
+        parsed = EDIParser().parse(raw.decode("utf-8"), "sample_837.txt")
+        file_hash = store_raw_file(db_session, raw, "sample_837.txt", "837")
+        transformer = EDITransformer(
+            db_session, filename="sample_837.txt", raw_locator=RawBlockLocator(file_hash, raw)
+        )
+
+        claim = transformer.transform_837_claim(parsed["claims"][0])
+        db_session.add(claim)
+        db_session.commit()
+
+        assert claim.raw_file_hash == file_hash
+        assert claim.raw_edi_data is None
+        assert claim.parsed_segments is None
+        assert get_raw_segments(db_session, claim) == [
+            "*".join(seg) for seg in parsed["claims"][0]["raw_block"]
+        ]
+
+    def test_claims_point_into_store_after_failed_batch(self, db_session):
+        """Test that claims loaded one by one after a failed batch still get pointers."""
+        path = SAMPLES_DIR / "large" / "large_837_100claims.edi"
+        raw = path.read_bytes()
+        claims = EDIParser().parse(raw.decode("utf-8"), path.name)["claims"][:5]
+        file_hash = store_raw_file(db_session, raw, path.name, "837")
+        # Already loaded from an earlier upload: the batch INSERT fails on it
+        ClaimFactory(claim_control_number=claims[0]["claim_control_number"])
+        locator = RawBlockLocator(file_hash, raw)
+        transformer = EDITransformer(db_session, filename=path.name, raw_locator=locator)
+
+        with patch.object(locator, "locate", wraps=locator.locate) as mock_locate:
+            claim_ids = _load_claim_batch(db_session, transformer, claims, path.name)
+
+        loaded = db_session.query(Claim).filter(Claim.id.in_(claim_ids)).order_by(Claim.id).all()
+        assert [claim.claim_control_number for claim in loaded] == [
+            claim["claim_control_number"] for claim in claims[1:]
+        ]
+        for claim, parsed in zip(loaded, claims[1:]):
+            assert claim.raw_file_hash == file_hash
+            assert claim.raw_edi_data is None
+            assert get_raw_segments(db_session, claim) == ["*".join(seg) for seg in parsed["raw_block"]]
+        # Located once by the batch and once more by the claim-by-claim retry
+        assert mock_locate.call_count == 10
+
+    def test_remittance_without_store_is_inline(self, db_session):
+        """Test the inline fallback when no raw store is available."""
+        transformer = EDITransformer(db_session, filename="test.edi")
+        remittance = transformer.transform_835_remittance(
+            {"claim_control_number": "CLM1", "raw_block": [["CLP", "CLM1", "1"]]}, {}
+        )
+        db_session.add(remittance)
+        db_session.commit()
+
+        assert remittance.raw_file_hash is None
+        assert get_raw_segments(db_session, remittance) == ["CLP*CLM1*1"]
+
+    def test_legacy_rows_are_deferred(self, db_session):
+        """Test that inline raw data is not loaded unless accessed."""
+        claim_id = ClaimFactory(raw_edi_data=str([["CLM", "1"]])).id
+        db_session.expunge_all()
+
+        loaded = db_session.get(Claim, claim_id)
+
+        assert "raw_edi_data" not in loaded.__dict__
+        assert get_raw_segments(db_session, loaded) == ["CLM*1"]
+
+
+@pytest.mark.api
+class TestRawSegmentsEndpoints:
+    """Tests for include_raw on detail endpoints."""
+
+    def test_claim_raw_segments_only_when_requested(self, client, db_session):
+        """Test that raw segments are loaded on request and never cached."""
+        raw = b"HL*1*22~CLM*RAW1*10~"
+        file_hash = store_raw_file(db_session, raw, "raw.edi", "837")
+        claim = ClaimFactory(raw_file_hash=file_hash, raw_offset=0, raw_length=len(raw))
+
+        plain = client.get(f"/api/v1/claims/{claim.id}").json()
+        with_raw = client.get(f"/api/v1/claims/{claim.id}?include_raw=true").json()
+
+        assert "raw_segments" not in plain
+        assert with_raw["raw_segments"] == ["HL*1*22", "CLM*RAW1*10"]
+        assert "raw_segments" not in client.get(f"/api/v1/claims/{claim.id}").json()
+
+    def test_remit_without_raw_data(self, client, db_session):
+        """Test include_raw on a remittance with no raw data."""
+        remittance = Remittance(remittance_control_number="R1", claim_control_number="C1")
+        db_session.add(remittance)
+        db_session.commit()
+
+        data = client.get(f"/api/v1/remits/{remittance.id}?include_raw=true").json()
+
+        assert data["raw_segments"] is None
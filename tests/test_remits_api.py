@@ -6,6 +6,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from app.services.queue.blob_spool import open_blob_spool
 from tests.factories import PayerFactory, RemittanceFactory
 
 
@@ -101,18 +102,18 @@ class TestUploadRemitFile:
                 assert data["filename"] == test_filename
                 assert data["file_size_mb"] > 50  # Should be > 50MB
 
-                # Verify that process_edi_file was called with file_path instead of file_content
+                # Verify that process_edi_file was called with a spool handle instead of file_content
                 mock_task.delay.assert_called_once()
                 call_args = mock_task.delay.call_args
-                assert "file_path" in call_args.kwargs
+                assert "blob_handle" in call_args.kwargs
                 assert "file_content" not in call_args.kwargs
                 assert call_args.kwargs["filename"] == test_filename
                 assert call_args.kwargs["file_type"] == "835"
 
-                # Verify that a temporary file was created
-                temp_file_path = call_args.kwargs["file_path"]
-                assert os.path.exists(temp_file_path)
-                assert os.path.getsize(temp_file_path) == file_size
+                # Verify that the file was spooled for the worker
+                handle = call_args.kwargs["blob_handle"]
+                assert handle["size"] == file_size
+                assert open_blob_spool(handle).read(handle) == file_content
 
     def test_upload_large_file_error_cleanup(self, client, mock_celery_task):
         """Test that temporary files are cleaned up on error during large file upload."""
@@ -593,7 +593,7 @@ class TestRemitsAPIComprehensive:
         # Clear cache
         cache.delete("count:remittance")
         
-        with patch("app.api.routes.remits.cache") as mock_cache:
+        with patch("app.utils.pagination.cache") as mock_cache:
             mock_cache.get.return_value = None
             mock_cache.set = MagicMock()
             
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from app.models.database import ClaimEpisode, EpisodeStatus, Remittance, RemittanceStatus
+from app.services.queue.blob_spool import open_blob_spool
 from app.services.queue.tasks import link_episodes, process_edi_file
 
 
@@ -85,16 +86,15 @@ IEA*1*000000001~"""
 
             # Get the arguments passed to the task
             call_args = mock_task.delay.call_args
-            task_file_path = call_args[1]["file_path"]
+            task_blob_handle = call_args[1]["blob_handle"]
             task_filename = call_args[1]["filename"]
             task_file_type = call_args[1]["file_type"]
 
             assert task_filename == "test_835.edi"
             assert task_file_type == "835"
-            # Verify file_path exists and contains correct content
-            assert task_file_path is not None
-            with open(task_file_path, "rb") as f:
-                file_content_read = f.read().decode("utf-8")
+            # Verify the spooled blob contains the uploaded content
+            assert task_blob_handle is not None
+            file_content_read = open_blob_spool(task_blob_handle).read(task_blob_handle).decode("utf-8")
             assert file_content_read == sample_835_content
 
         # Step 2: Process the file directly (simulating Celery task execution)
@@ -102,7 +102,7 @@ IEA*1*000000001~"""
             mock_session_local.return_value = db_session
 
             result = process_edi_file.run(
-                file_path=task_file_path,
+                blob_handle=task_blob_handle,
                 filename=task_filename,
                 file_type=task_file_type,
             )
@@ -189,14 +189,14 @@ IEA*1*000000001~"""
             assert response.status_code == 200
 
             call_args = mock_task.delay.call_args
-            task_file_path = call_args[1]["file_path"]
+            task_blob_handle = call_args[1]["blob_handle"]
 
         # Process the file
         with patch("app.services.queue.tasks.SessionLocal") as mock_session_local:
             mock_session_local.return_value = db_session
 
             result = process_edi_file.run(
-                file_path=task_file_path,
+                blob_handle=task_blob_handle,
                 filename="test_835_episode.edi",
                 file_type="835",
             )
@@ -267,14 +267,14 @@ IEA*1*000000001~"""
             assert response.status_code == 200
 
             call_args = mock_task.delay.call_args
-            task_file_path = call_args[1]["file_path"]
+            task_blob_handle = call_args[1]["blob_handle"]
 
         # Process the file
         with patch("app.services.queue.tasks.SessionLocal") as mock_session_local:
             mock_session_local.return_value = db_session
 
             result = process_edi_file.run(
-                file_path=task_file_path,
+                blob_handle=task_blob_handle,
                 filename="test_multi_835.edi",
                 file_type="835",
             )
@@ -328,14 +328,14 @@ IEA*1*000000001~"""
             assert response.status_code == 200
 
             call_args = mock_task.delay.call_args
-            task_file_path = call_args[1]["file_path"]
+            task_blob_handle = call_args[1]["blob_handle"]
 
         # Process the file
         with patch("app.services.queue.tasks.SessionLocal") as mock_session_local:
             mock_session_local.return_value = db_session
 
             process_edi_file.run(
-                file_path=task_file_path,
+                blob_handle=task_blob_handle,
                 filename="test_pagination_835.edi",
                 file_type="835",
             )
@@ -382,14 +382,14 @@ IEA*1*000000001~"""
             assert response.status_code == 200
 
             call_args = mock_task.delay.call_args
-            task_file_path = call_args[1]["file_path"]
+            task_blob_handle = call_args[1]["blob_handle"]
 
         # Process the file
         with patch("app.services.queue.tasks.SessionLocal") as mock_session_local:
             mock_session_local.return_value = db_session
 
             result = process_edi_file.run(
-                file_path=task_file_path,
+                blob_handle=task_blob_handle,
                 filename="test_manual_link.edi",
                 file_type="835",
             )
@@ -0,0 +1,140 @@
+"""Tests for read-replica session routing."""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import database
+from app.config.database import (
+    Base,
+    dispose_async_engine,
+    get_async_read_db,
+    open_read_session,
+    open_replica_session,
+    read_session,
+)
+from app.models.database import EpisodeStatus, Payer
+from app.services.learning.pattern_detector import PatternDetector
+from tests.factories import ClaimEpisodeFactory, ClaimFactory, PayerFactory, RemittanceFactory
+
+
+def _create_database(url: str, payer_name: str) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add(Payer(payer_id="P1", name=payer_name))
+        session.commit()
+    engine.dispose()
+
+
+@pytest.fixture
+def replica_url(tmp_path, monkeypatch):
+    """Two SQLite databases standing in for the primary and its replica."""
+    primary_url = f"sqlite:///{tmp_path / 'primary.db'}"
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    _create_database(primary_url, "Primary")
+    _create_database(replica_url, "Replica")
+
+    primary_engine = create_engine(primary_url)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=primary_engine))
+    monkeypatch.setattr(database, "DATABASE_REPLICA_URL", replica_url)
+    monkeypatch.setattr(database, "_replica_engine", None)
+    monkeypatch.setattr(database, "_ReplicaSessionLocal", None)
+    monkeypatch.setattr(database, "_async_replica_engine", None)
+    monkeypatch.setattr(database, "_AsyncReplicaSessionLocal", None)
+    monkeypatch.setattr(database, "_replica_lag_checked", None)
+    yield replica_url
+    if database._replica_engine is not None:
+        database._replica_engine.dispose()
+    primary_engine.dispose()
+
+
+def _payer_name(db: Session) -> str:
+    return db.query(Payer.name).scalar()
+
+
+@pytest.mark.unit
+class TestReadSessionRouting:
+    """Tests for choosing between the replica and the primary."""
+
+    def test_reads_from_replica(self, replica_url):
+        """Test that read sessions use a current replica."""
+        with read_session() as db:
+            assert db.info["replica"] is True
+            assert _payer_name(db) == "Replica"
+
+    def test_replica_rejects_writes(self, replica_url):
+        """Test that replica connections are read-only."""
+        with read_session() as db:
+            db.add(Payer(payer_id="P2", name="Written"))
+            with pytest.raises(OperationalError, match="readonly"):
+                db.commit()
+
+    def test_falls_back_when_lagging(self, replica_url):
+        """Test the lag tolerance."""
+        with patch.object(database, "measure_replica_lag", return_value=120.0):
+            with read_session() as db:
+                assert db.info["replica"] is False
+                assert _payer_name(db) == "Primary"
+
+            database._replica_lag_checked = None
+            with read_session(max_lag_seconds=300) as db:
+                assert _payer_name(db) == "Replica"
+
+    def test_falls_back_when_unreachable(self, replica_url, tmp_path, monkeypatch):
+        """Test that a replica that cannot be reached is skipped."""
+        monkeypatch.setattr(database, "DATABASE_REPLICA_URL", f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+
+        assert open_replica_session() is None
+        with read_session() as db:
+            assert _payer_name(db) == "Primary"
+
+    def test_lag_measurement_reused(self, replica_url):
+        """Test that lag is not measured for every session."""
+        with patch.object(database, "measure_replica_lag", return_value=0.0) as measure:
+            for _ in range(3):
+                open_read_session().close()
+
+        assert measure.call_count == 1
+
+    def test_no_replica_configured(self, replica_url, monkeypatch):
+        """Test that reads use the primary without a replica."""
+        monkeypatch.setattr(database, "DATABASE_REPLICA_URL", None)
+
+        assert open_replica_session() is None
+        with read_session() as db:
+            assert _payer_name(db) == "Primary"
+
+    async def test_async_read_db(self, replica_url):
+        """Test the async dependency used by list endpoints."""
+        try:
+            async for db in get_async_read_db():
+                assert db.info["replica"] is True
+                assert await db.run_sync(_payer_name) == "Replica"
+        finally:
+            await dispose_async_engine()
+
+
+@pytest.mark.unit
+def test_pattern_scan_uses_read_session(db_session, tmp_path):
+    """Test that PatternDetector scans episodes through read_db."""
+    payer = PayerFactory()
+    remittance = RemittanceFactory(payer=payer, denial_reasons=[{"code": "CO45"}])
+    remittance.created_at = datetime.now() - timedelta(days=10)
+    ClaimEpisodeFactory(
+        claim=ClaimFactory(payer=payer), remittance=remittance, status=EpisodeStatus.COMPLETE, denial_count=1
+    )
+    db_session.commit()
+
+    empty_url = f"sqlite:///{tmp_path / 'empty.db'}"
+    _create_database(empty_url, "Empty")
+    empty_engine = create_engine(empty_url)
+    with Session(empty_engine) as empty_replica:
+        assert PatternDetector(db_session, read_db=empty_replica).detect_patterns_for_payer(payer.id) == []
+    empty_engine.dispose()
+
+    patterns = PatternDetector(db_session).detect_patterns_for_payer(payer.id)
+    assert [pattern.denial_reason_code for pattern in patterns] == ["CO45"]
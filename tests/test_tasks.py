@@ -247,16 +247,17 @@ IEA*1*000000001~"""
                 with patch("app.services.queue.tasks.EDITransformer") as mock_transformer:
                     mock_transformer_instance = MagicMock()
                     mock_transformer.return_value = mock_transformer_instance
-                    # Create claims fresh each time transformer is called
-                    # Use a callable that creates new claims bound to the task's session
-                    call_count = [0]
-                    def create_claim(claim_data):
-                        call_count[0] += 1
-                        claim_num = "CLAIM001" if call_count[0] == 1 else "CLAIM002"
-                        # Create claim in the task's session (db_session)
-                        return ClaimFactory(provider=provider, payer=payer, claim_control_number=claim_num)
+                    # Create the batch's claims in the task's session (db_session)
+                    def load_batch(batch):
+                        claims = [
+                            ClaimFactory.build(provider=provider, payer=payer, claim_control_number=number)
+                            for number in batch.claim_control_number
+                        ]
+                        db_session.add_all(claims)
+                        db_session.flush()
+                        return [claim.id for claim in claims]
                     
-                    mock_transformer_instance.transform_837_claim.side_effect = create_claim
+                    mock_transformer_instance.load_837_batch.side_effect = load_batch
                     # Patch the Context class that Celery creates for .run()
                     with patch("celery.app.task.Context") as mock_context_class:
                         mock_context = MagicMock()
@@ -275,7 +276,7 @@ IEA*1*000000001~"""
                         assert result["claims_created"] == 2
 
     def test_process_edi_file_835_multiple_remittances(self, db_session):
-        """Test processing 835 file with multiple remittances to cover flush, append, and link_episodes.delay."""
+        """Test processing 835 file with multiple remittances to cover flush, append, and the link_episodes group."""
         from tests.factories import PayerFactory
 
         payer = PayerFactory()
@@ -283,8 +284,8 @@ IEA*1*000000001~"""
 
         with patch("app.services.queue.tasks.SessionLocal") as mock_session_local:
             mock_session_local.return_value = db_session
-            with patch("app.services.queue.tasks.link_episodes") as mock_link_episodes:
-                mock_link_episodes.delay = MagicMock()
+            with patch("app.services.queue.tasks.link_episodes") as mock_link_episodes, \
+                    patch("app.services.queue.tasks.group") as mock_group:
                 with patch("app.services.queue.tasks.EDIParser") as mock_parser:
                     mock_parser_instance = MagicMock()
                     mock_parser.return_value = mock_parser_instance
@@ -325,12 +326,13 @@ IEA*1*000000001~"""
 
                         assert result["status"] == "success"
                         assert result["remittances_created"] == 2
-                        # Verify link_episodes.delay was called for each remittance
-                        assert mock_link_episodes.delay.call_count == 2
-                        # Verify the IDs match (they should be the remittance IDs)
-                        call_ids = [call[0][0] for call in mock_link_episodes.delay.call_args_list]
-                        assert len(call_ids) == 2
-                        assert all(rid in call_ids for rid in remit_ids)
+                        # Verify one group of link_episodes signatures was published for the remittances
+                        mock_group.return_value.apply_async.assert_called_once_with()
+                        signatures = list(mock_group.call_args[0][0])
+                        assert signatures == [mock_link_episodes.s.return_value] * 2
+                        call_ids = [call[0][0] for call in mock_link_episodes.s.call_args_list]
+                        assert sorted(call_ids) == sorted(remit_ids)
+                        mock_link_episodes.delay.assert_not_called()
 
     def test_process_edi_file_837_with_warnings(self, db_session):
         """Test processing 837 file that includes warnings in parsed data."""
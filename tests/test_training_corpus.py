@@ -0,0 +1,88 @@
+"""Tests for the sharded synthetic EDI corpus generator."""
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from app.services.edi.parser import EDIParser
+from ml.training.generate_training_data import generate_corpus, generate_training_dataset
+
+START_DATE = datetime(2024, 1, 1)
+
+
+def _envelope(content):
+    """Segments of an interchange and its SE/IEA control fields."""
+    segments = [segment.strip() for segment in content.split("~") if segment.strip()]
+    se = next(segment for segment in segments if segment.startswith("SE*")).split("*")
+    iea = segments[-1].split("*")
+    st = next(segment for segment in segments if segment.startswith("ST*")).split("*")
+    return segments, int(se[1]), se[2], st[2], iea[2]
+
+
+def _assert_valid_envelope(path):
+    segments, se_count, se_control, st_control, iea_control = _envelope(path.read_text())
+    transaction = [segment for segment in segments if segment[:3] not in ("ISA", "GS*", "GE*", "IEA")]
+    assert se_count == len(transaction)
+    assert se_control == st_control
+    return iea_control
+
+
+@pytest.mark.unit
+class TestGenerateCorpus:
+    """Tests for generate_corpus."""
+
+    def test_split_shards(self, tmp_path):
+        """Test that each shard is a valid, separately numbered interchange."""
+        metadata = generate_corpus(
+            5, tmp_path, shard_size=3, workers=1, seed=3, start_date=START_DATE, split_shards=True
+        )
+
+        files = metadata["files"]
+        assert len(files) == 2
+        controls = [_assert_valid_envelope(Path(f["claims_file"])) for f in files]
+        assert controls == ["000000001", "000000002"]
+        assert not list(tmp_path.glob(".shard-*"))
+
+        parser = EDIParser()
+        claims = parser.parse(Path(files[1]["claims_file"]).read_text(), "claims.edi")["claims"]
+        remittances = parser.parse(Path(files[1]["remittances_file"]).read_text(), "remits.edi")["remittances"]
+        assert [c["claim_control_number"] for c in claims] == ["CLAIM000005", "CLAIM000006"]
+        assert [r["claim_control_number"] for r in remittances] == ["CLAIM000005", "CLAIM000006"]
+
+    def test_combined_file(self, tmp_path):
+        """Test that shards are assembled into one linked 837/835 pair."""
+        metadata = generate_corpus(7, tmp_path, shard_size=2, workers=1, start_date=START_DATE)
+
+        claims_file = tmp_path / "corpus_837_claims.edi"
+        remittances_file = tmp_path / "corpus_835_remittances.edi"
+        _assert_valid_envelope(claims_file)
+        _assert_valid_envelope(remittances_file)
+
+        parser = EDIParser()
+        claims = parser.parse(claims_file.read_text(), "claims.edi")["claims"]
+        remittances = parser.parse(remittances_file.read_text(), "remits.edi")
+        assert len(claims) == len(remittances["remittances"]) == 7
+        assert [c["claim_control_number"] for c in claims] == [
+            r["claim_control_number"] for r in remittances["remittances"]
+        ]
+        assert sum(metadata["outcomes"].values()) == 7
+        total_paid = float(re.search(r"BPR\*I\*([\d.]+)", remittances_file.read_text()).group(1))
+        assert total_paid == pytest.approx(sum(shard["total_paid"] for shard in metadata["shards"]))
+        assert json.loads((tmp_path / "corpus_metadata.json").read_text())["files"] == metadata["files"]
+
+    def test_independent_of_workers(self, tmp_path):
+        """Test that the seed, not the worker count, determines the output."""
+        for workers in (1, 2):
+            generate_corpus(6, tmp_path / str(workers), shard_size=2, workers=workers, seed=9, start_date=START_DATE)
+
+        for name in ("corpus_837_claims.edi", "corpus_835_remittances.edi"):
+            assert (tmp_path / "1" / name).read_bytes() == (tmp_path / "2" / name).read_bytes()
+
+    def test_training_dataset_envelope(self, tmp_path):
+        """Test that the training files count their transaction segments correctly."""
+        generate_training_dataset(num_episodes=4, output_dir=tmp_path, start_date=START_DATE)
+
+        _assert_valid_envelope(tmp_path / "training_837_claims.edi")
+        _assert_valid_envelope(tmp_path / "training_835_remittances.edi")
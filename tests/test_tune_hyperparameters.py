@@ -0,0 +1,145 @@
+"""Tests for successive-halving hyperparameter search."""
+import json
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from sklearn.model_selection import KFold, RandomizedSearchCV
+
+from ml.training import tune_hyperparameters
+from ml.training.tune_hyperparameters import (
+    _build_pipeline,
+    _halving_rungs,
+    cache_training_matrix,
+    successive_halving_search,
+    tune_gradient_boosting,
+)
+
+DISTRIBUTIONS = {
+    "regressor__n_estimators": [5, 10],
+    "regressor__max_depth": [1, 3, None],
+    "regressor__min_samples_leaf": [1, 8],
+}
+
+
+def _data(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 6)).astype(np.float32)
+    y = ((X[:, 0] + 0.5 * X[:, 1] * X[:, 2] + rng.normal(scale=0.5, size=n)) > 0.3).astype(np.float32)
+    return X, y
+
+
+def _search(X, y, cache_dir, **kwargs):
+    return successive_halving_search(
+        "random_forest", X, y, n_candidates=9, cv=3, n_jobs=1,
+        cache_dir=str(cache_dir), param_distributions=DISTRIBUTIONS, **kwargs,
+    )
+
+
+@pytest.mark.unit
+class TestSuccessiveHalving:
+    """Tests for successive_halving_search and its cache."""
+
+    def test_rungs(self):
+        """Test that budgets grow and candidates shrink by the factor."""
+        assert _halving_rungs(20, 2000, 50, 3) == [(20, 222), (7, 666), (3, 2000)]
+        # Budgets below the minimum are skipped, not shrunk further
+        assert _halving_rungs(27, 300, 50, 3) == [(27, 100), (9, 300)]
+
+    def test_cache_reused(self, tmp_path):
+        """Test that the matrix and folds are cached once and memory-mapped."""
+        X, y = _data(60)
+
+        path = cache_training_matrix(X, y, cv=3, cache_dir=str(tmp_path))
+
+        assert cache_training_matrix(X, y, cv=3, cache_dir=str(tmp_path)) == path
+        assert isinstance(np.load(path / "X.npy", mmap_mode="r"), np.memmap)
+        folds = [np.load(path / f"fold_{fold}_test.npy") for fold in range(3)]
+        assert sorted(np.concatenate(folds).tolist()) == list(range(60))
+        assert set(np.load(path / "fold_0_train.npy").tolist()).isdisjoint(folds[0].tolist())
+
+    def test_search(self, tmp_path):
+        """Test that weak candidates are dropped and the best is refitted."""
+        X, y = _data(400)
+
+        results = _search(X, y, tmp_path)
+
+        assert [rung["candidates"] for rung in results["rungs"]] == [9, 3]
+        assert [rung["resource"] for rung in results["rungs"]] == [88, 266]
+        assert results["evaluations"] == (9 + 3) * 3
+        for name, value in results["best_params"].items():
+            assert value in DISTRIBUTIONS[name]
+        assert results["best_estimator"].predict(X[:5]).shape == (5,)
+
+    def test_estimators_budget(self, tmp_path):
+        """Test that n_estimators can be the budget instead of being tuned."""
+        X, y = _data(200)
+
+        results = _search(X, y, tmp_path, resource="n_estimators")
+
+        assert results["best_params"]["regressor__n_estimators"] == 10
+        assert results["best_estimator"].named_steps["regressor"].n_estimators == 10
+
+    def test_resume_from_journal(self, tmp_path):
+        """Test that an interrupted search only recomputes what the journal lacks."""
+        X, y = _data(400)
+        first = _search(X, y, tmp_path)
+
+        with patch.object(tune_hyperparameters, "_score_candidate", side_effect=AssertionError):
+            resumed = _search(X, y, tmp_path)
+        assert resumed["evaluations"] == 0
+        assert resumed["best_params"] == first["best_params"]
+
+        # Lose the last two scores, the second cut short mid-write
+        (journal,) = cache_training_matrix(X, y, cv=3, cache_dir=str(tmp_path)).glob("journal_*.jsonl")
+        lines = journal.read_text().splitlines()
+        journal.write_text("\n".join(lines[:-2]) + "\n" + lines[-1][:20])
+
+        resumed = _search(X, y, tmp_path)
+
+        assert resumed["evaluations"] == 2
+        assert resumed["best_params"] == first["best_params"]
+        assert [json.loads(line)["fold"] for line in journal.read_text().splitlines()[-2:]] == [1, 2]
+
+    def test_tune_dispatch(self, tmp_path):
+        """Test that tuning functions use halving when asked."""
+        X, y = _data(200)
+
+        with patch.object(tune_hyperparameters, "successive_halving_search") as mock_search:
+            tune_gradient_boosting(X, y, n_iter=4, strategy="halving", cache_dir=str(tmp_path))
+
+        assert mock_search.call_args.args[0] == "gradient_boosting"
+        assert mock_search.call_args.kwargs["n_candidates"] == 4
+
+
+@pytest.mark.performance
+def test_halving_faster_at_same_quality(tmp_path):
+    """Test that halving tunes much faster than randomized search without losing accuracy."""
+    X, y = _data(20_000)
+    X_test, y_test = _data(5_000, seed=1)
+    distributions = {
+        "regressor__n_estimators": [10, 20, 30],
+        "regressor__max_depth": [None, 5, 10, 20],
+        "regressor__min_samples_leaf": [1, 2, 4, 8],
+        "regressor__max_features": ["sqrt", "log2", None],
+    }
+
+    started = time.perf_counter()
+    randomized = RandomizedSearchCV(
+        _build_pipeline("random_forest", 42, n_jobs=1), distributions, n_iter=27,
+        cv=KFold(3, shuffle=True, random_state=42), scoring="neg_mean_squared_error", random_state=42,
+    ).fit(X, y)
+    randomized_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    halving = successive_halving_search(
+        "random_forest", X, y, n_candidates=27, cv=3, n_jobs=1,
+        cache_dir=str(tmp_path), param_distributions=distributions,
+    )
+    halving_seconds = time.perf_counter() - started
+
+    randomized_mse = np.mean((randomized.best_estimator_.predict(X_test) - y_test) ** 2)
+    halving_mse = np.mean((halving["best_estimator"].predict(X_test) - y_test) ** 2)
+    assert halving_seconds < randomized_seconds / 2
+    assert halving_mse <= randomized_mse * 1.02
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from app.models.database import Claim, ClaimLine, ClaimStatus, Payer, Provider
+from app.services.queue.blob_spool import open_blob_spool
 from app.services.queue.tasks import process_edi_file
 
 
@@ -86,16 +87,15 @@ IEA*1*000000001~"""
 
             # Get the arguments passed to the task
             call_args = mock_task.delay.call_args
-            task_file_path = call_args[1]["file_path"]
+            task_blob_handle = call_args[1]["blob_handle"]
             task_filename = call_args[1]["filename"]
             task_file_type = call_args[1]["file_type"]
 
             assert task_filename == "test_837.edi"
             assert task_file_type == "837"
-            # Verify file_path exists and contains correct content
-            assert task_file_path is not None
-            with open(task_file_path, "rb") as f:
-                file_content_read = f.read().decode("utf-8")
+            # Verify the spooled blob contains the uploaded content
+            assert task_blob_handle is not None
+            file_content_read = open_blob_spool(task_blob_handle).read(task_blob_handle).decode("utf-8")
             assert file_content_read == sample_837_content
 
         # Step 2: Process the file directly (simulating Celery task execution)
@@ -109,7 +109,7 @@ IEA*1*000000001~"""
 
             # Call the task's run method directly (bypasses Celery broker)
             result = process_edi_file.run(
-                file_path=task_file_path,
+                blob_handle=task_blob_handle,
                 filename=task_filename,
                 file_type=task_file_type,
             )
@@ -297,14 +297,14 @@ IEA*1*000000001~"""
 
             # Get task arguments
             call_args = mock_task.delay.call_args
-            task_file_path = call_args[1]["file_path"]
+            task_blob_handle = call_args[1]["blob_handle"]
 
         # Process the file
         with patch("app.services.queue.tasks.SessionLocal") as mock_session_local:
             mock_session_local.return_value = db_session
 
             result = process_edi_file.run(
-                file_path=task_file_path,
+                blob_handle=task_blob_handle,
                 filename="test_multi_837.edi",
                 file_type="837",
             )
@@ -394,11 +394,10 @@ IEA*1*000000001~"""
 
             # Get task arguments
             call_args = mock_task.delay.call_args
-            task_file_path = call_args[1]["file_path"]
-            # Verify file_path exists and contains correct content
-            assert task_file_path is not None
-            with open(task_file_path, "rb") as f:
-                file_content_read = f.read().decode("utf-8")
+            task_blob_handle = call_args[1]["blob_handle"]
+            # Verify the spooled blob contains the uploaded content
+            assert task_blob_handle is not None
+            file_content_read = open_blob_spool(task_blob_handle).read(task_blob_handle).decode("utf-8")
             assert file_content_read == invalid_content
 
         # Processing should handle errors gracefully
@@ -409,7 +408,7 @@ IEA*1*000000001~"""
             # depending on how errors are handled
             try:
                 result = process_edi_file.run(
-                    file_path=task_file_path,
+                    blob_handle=task_blob_handle,
                     filename="invalid.edi",
                     file_type="837",
                 )
@@ -456,14 +455,14 @@ IEA*1*000000001~"""
             assert response.status_code == 200
 
             call_args = mock_task.delay.call_args
-            task_file_path = call_args[1]["file_path"]
+            task_blob_handle = call_args[1]["blob_handle"]
 
         # Process the file
         with patch("app.services.queue.tasks.SessionLocal") as mock_session_local:
             mock_session_local.return_value = db_session
 
             process_edi_file.run(
-                file_path=task_file_path,
+                blob_handle=task_blob_handle,
                 filename="test_pagination.edi",
                 file_type="837",
             )
@@ -509,14 +508,14 @@ IEA*1*000000001~"""
             assert response.status_code == 200
 
             call_args = mock_task.delay.call_args
-            task_file_path = call_args[1]["file_path"]
+            task_blob_handle = call_args[1]["blob_handle"]
 
         # Process the file
         with patch("app.services.queue.tasks.SessionLocal") as mock_session_local:
             mock_session_local.return_value = db_session
 
             result = process_edi_file.run(
-                file_path=task_file_path,
+                blob_handle=task_blob_handle,
                 filename="test_retrieval.edi",
                 file_type="837",
             )
@@ -1,6 +1,6 @@
 """Tests for WebSocket API endpoints."""
 import json
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -111,7 +111,7 @@ class TestWebSocketNotifications:
 
         # Mock a WebSocket connection
         mock_websocket = AsyncMock()
-        manager.active_connections = [mock_websocket]
+        await manager.connect(mock_websocket)
 
         # Send a notification
         await manager.send_notification(
@@ -120,11 +120,12 @@ class TestWebSocketNotifications:
             message="Test notification",
         )
 
-        # Verify broadcast was called
-        assert mock_websocket.send_json.called
+        # Verify broadcast was sent (serialized once, as text)
+        await manager.flush()
+        assert mock_websocket.send_text.called
 
         # Get the call arguments
-        call_args = mock_websocket.send_json.call_args[0][0]
+        call_args = json.loads(mock_websocket.send_text.call_args[0][0])
 
         # Verify notification structure
         assert call_args["type"] == "risk_score_calculated"
@@ -159,7 +160,7 @@ class TestWebSocketNotifications:
 
         manager = ConnectionManager()
         mock_websocket = AsyncMock()
-        manager.active_connections = [mock_websocket]
+        await manager.connect(mock_websocket)
 
         await manager.send_notification(
             notification_type=NotificationType.RISK_SCORE_CALCULATED,
@@ -172,7 +173,8 @@ class TestWebSocketNotifications:
             message="Risk score calculated for claim 123",
         )
 
-        call_args = mock_websocket.send_json.call_args[0][0]
+        await manager.flush()
+        call_args = json.loads(mock_websocket.send_text.call_args[0][0])
         assert call_args["type"] == "risk_score_calculated"
         assert call_args["data"]["claim_id"] == 123
         assert call_args["data"]["overall_score"] == 85.5
@@ -185,7 +187,7 @@ class TestWebSocketNotifications:
 
         manager = ConnectionManager()
         mock_websocket = AsyncMock()
-        manager.active_connections = [mock_websocket]
+        await manager.connect(mock_websocket)
 
         await manager.send_notification(
             notification_type=NotificationType.EPISODE_LINKED,
@@ -198,7 +200,8 @@ class TestWebSocketNotifications:
             message="Episode 456 linked successfully",
         )
 
-        call_args = mock_websocket.send_json.call_args[0][0]
+        await manager.flush()
+        call_args = json.loads(mock_websocket.send_text.call_args[0][0])
         assert call_args["type"] == "episode_linked"
         assert call_args["data"]["episode_id"] == 456
         assert call_args["data"]["claim_id"] == 123
@@ -211,7 +214,7 @@ class TestWebSocketNotifications:
 
         manager = ConnectionManager()
         mock_websocket = AsyncMock()
-        manager.active_connections = [mock_websocket]
+        await manager.connect(mock_websocket)
 
         await manager.send_notification(
             notification_type=NotificationType.FILE_PROCESSED,
@@ -224,7 +227,8 @@ class TestWebSocketNotifications:
             message="837 file test_837.edi processed successfully",
         )
 
-        call_args = mock_websocket.send_json.call_args[0][0]
+        await manager.flush()
+        call_args = json.loads(mock_websocket.send_text.call_args[0][0])
         assert call_args["type"] == "file_processed"
         assert call_args["data"]["filename"] == "test_837.edi"
         assert call_args["data"]["file_type"] == "837"
@@ -315,7 +319,7 @@ class TestWebSocketNotifications:
 
         manager = ConnectionManager()
         mock_websocket = AsyncMock()
-        manager.active_connections = [mock_websocket]
+        await manager.connect(mock_websocket)
 
         await manager.send_notification(
             notification_type=NotificationType.INFO,
@@ -323,7 +327,8 @@ class TestWebSocketNotifications:
             # No message parameter
         )
 
-        call_args = mock_websocket.send_json.call_args[0][0]
+        await manager.flush()
+        call_args = json.loads(mock_websocket.send_text.call_args[0][0])
         assert call_args["type"] == "info"
         assert "message" not in call_args or call_args.get("message") is None
 
@@ -335,14 +340,126 @@ class TestWebSocketNotifications:
         manager = ConnectionManager()
         mock_ws1 = AsyncMock()
         mock_ws2 = AsyncMock()
-        mock_ws2.send_json.side_effect = RuntimeError("Connection closed")
-        manager.active_connections = [mock_ws1, mock_ws2]
+        mock_ws2.send_text.side_effect = RuntimeError("Connection closed")
+        await manager.connect(mock_ws1)
+        await manager.connect(mock_ws2)
 
         # Broadcast should handle the error and remove disconnected client
         await manager.broadcast({"type": "test", "data": "test"})
+        await manager.flush()
 
         # ws1 should have received the message
-        assert mock_ws1.send_json.called
+        assert mock_ws1.send_text.called
         # ws2 should have been removed
         assert len(manager.active_connections) == 1
 
+
+
+@pytest.mark.api
+class TestWebSocketFanOut:
+    """Tests for per-connection send queues and topic subscriptions."""
+
+    @pytest.mark.asyncio
+    async def test_message_serialized_once(self):
+        """Test that a broadcast is encoded once and the same text sent to every client."""
+        from app.api.routes.websocket import ConnectionManager
+
+        manager = ConnectionManager()
+        sockets = [AsyncMock() for _ in range(3)]
+        for ws in sockets:
+            await manager.connect(ws)
+
+        with patch("app.api.routes.websocket.json.dumps", wraps=json.dumps) as mock_dumps:
+            await manager.broadcast({"type": "info", "data": {}})
+        await manager.flush()
+
+        assert mock_dumps.call_count == 1
+        texts = [ws.send_text.call_args[0][0] for ws in sockets]
+        assert all(text is texts[0] for text in texts)
+
+    @pytest.mark.asyncio
+    async def test_slow_client_does_not_block_others(self):
+        """Test that a stalled client does not delay delivery to other clients."""
+        import asyncio
+        from app.api.routes.websocket import ConnectionManager
+
+        manager = ConnectionManager()
+        blocked = asyncio.Event()
+        slow_ws, fast_ws = AsyncMock(), AsyncMock()
+
+        async def stalled_send(text):
+            await blocked.wait()
+
+        slow_ws.send_text.side_effect = stalled_send
+        await manager.connect(slow_ws)
+        await manager.connect(fast_ws)
+
+        await manager.broadcast({"type": "info"})
+        await asyncio.wait_for(manager.clients[fast_ws].wait_idle(), timeout=1)
+
+        assert fast_ws.send_text.called
+        assert not manager.clients[slow_ws]._idle.is_set()
+        blocked.set()
+        await manager.flush()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_oldest(self):
+        """Test the drop-oldest policy of the bounded send queue."""
+        from app.api.routes.websocket import ClientConnection
+
+        client = ClientConnection(AsyncMock(), max_queue_size=2)
+        for text in ("a", "b", "c"):
+            client.enqueue(text)
+
+        assert list(client.queue) == ["b", "c"]
+        assert client.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_topic_subscriptions_filter_messages(self):
+        """Test that subscribed clients only receive matching notifications."""
+        from app.api.routes.websocket import ConnectionManager, NotificationType
+
+        manager = ConnectionManager()
+        all_ws, practice_ws, claim_ws = AsyncMock(), AsyncMock(), AsyncMock()
+        await manager.connect(all_ws)
+        await manager.connect(practice_ws, topics={"practice:P1"})
+        await manager.connect(claim_ws, topics={"claim:7"})
+
+        await manager.send_notification(
+            NotificationType.CLAIM_PROCESSED, {"claim_id": 8, "practice_id": "P1"}
+        )
+        await manager.flush()
+
+        assert all_ws.send_text.called
+        assert practice_ws.send_text.called
+        assert not claim_ws.send_text.called
+        payload = json.loads(all_ws.send_text.call_args[0][0])
+        assert payload["topics"] == ["practice:P1", "claim:8"]
+
+    def test_parse_topics_validates(self):
+        """Test topic validation."""
+        from app.api.routes.websocket import parse_topics
+
+        assert parse_topics(["practice:P1", " task:abc "]) == {"practice:P1", "task:abc"}
+        with pytest.raises(ValueError):
+            parse_topics(["payer:1"])
+        with pytest.raises(ValueError):
+            parse_topics(["claim:"])
+
+    def test_subscribe_message(self, client):
+        """Test subscribing and unsubscribing over the socket."""
+        with client.websocket_connect("/ws/notifications?topics=practice:P1") as websocket:
+            websocket.receive_json()
+
+            websocket.send_text(json.dumps({"action": "subscribe", "topics": ["claim:5"]}))
+            data = websocket.receive_json()
+            assert data["type"] == "ack"
+            assert data["topics"] == ["claim:5", "practice:P1"]
+
+            websocket.send_text(json.dumps({"action": "unsubscribe", "topics": "practice:P1"}))
+            assert websocket.receive_json()["topics"] == ["claim:5"]
+
+            websocket.send_text(json.dumps({"action": "subscribe", "topics": ["bogus"]}))
+            data = websocket.receive_json()
+            assert data["type"] == "error"
+            assert "Invalid topic" in data["message"]